@@ -41,7 +41,7 @@ if TYPE_CHECKING:
 	from browser_use.agent.prompts import SystemPrompt
 	from browser_use.agent.service import Agent
 	from browser_use.agent.views import ActionModel, ActionResult, AgentHistoryList
-	from browser_use.browser import BrowserProfile, BrowserSession
+	from browser_use.browser import BrowserPool, BrowserProfile, BrowserSession
 	from browser_use.controller.service import Controller
 	from browser_use.dom.service import DomService
 	from browser_use.llm.anthropic.chat import ChatAnthropic
@@ -65,6 +65,7 @@ _LAZY_IMPORTS = {
 	# Browser components (heavy due to playwright/patchright)
 	'BrowserSession': ('browser_use.browser', 'BrowserSession'),
 	'BrowserProfile': ('browser_use.browser', 'BrowserProfile'),
+	'BrowserPool': ('browser_use.browser', 'BrowserPool'),
 	# Controller (moderate weight)
 	'Controller': ('browser_use.controller.service', 'Controller'),
 	# DOM service (moderate weight)
@@ -101,6 +102,7 @@ __all__ = [
 	'Agent',
 	'BrowserSession',
 	'BrowserProfile',
+	'BrowserPool',
 	'Controller',
 	'DomService',
 	'SystemPrompt',
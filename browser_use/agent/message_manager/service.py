@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import logging
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from browser_use.agent.message_manager.views import (
+	DOMBaseline,
 	HistoryItem,
 )
-from browser_use.agent.prompts import AgentMessagePrompt
+from browser_use.agent.prompts import MAX_CLICKABLE_ELEMENTS_LENGTH, AgentMessagePrompt
 from browser_use.agent.views import (
 	ActionResult,
 	AgentOutput,
@@ -14,17 +15,26 @@ from browser_use.agent.views import (
 	MessageManagerState,
 )
 from browser_use.browser.views import BrowserStateSummary
+from browser_use.dom.serializer.delta import DOMLinesDelta, keyed_lines
 from browser_use.filesystem.file_system import FileSystem
 from browser_use.llm.messages import (
 	BaseMessage,
 	ContentPartTextParam,
 	SystemMessage,
+	UserMessage,
 )
 from browser_use.observability import observe_debug
+from browser_use.tokens.service import estimate_tokens
 from browser_use.utils import match_url_with_domain_pattern, time_execution_sync
 
+if TYPE_CHECKING:
+	from browser_use.tokens.service import TokenCost
+
 logger = logging.getLogger(__name__)
 
+# DOM delta prompts: send a new page snapshot once the changes are larger than this fraction of it
+DOM_DELTA_MAX_RATIO = 0.5
+
 
 # ========== Logging Helper Functions ==========
 # These functions are used ONLY for formatting debug log output.
@@ -108,6 +118,8 @@ class MessageManager:
 		vision_detail_level: Literal['auto', 'low', 'high'] = 'auto',
 		include_tool_call_examples: bool = False,
 		include_recent_events: bool = False,
+		dom_delta_prompts: bool = False,
+		token_cost_service: TokenCost | None = None,
 	):
 		self.task = task
 		self.state = state
@@ -119,6 +131,8 @@ class MessageManager:
 		self.vision_detail_level = vision_detail_level
 		self.include_tool_call_examples = include_tool_call_examples
 		self.include_recent_events = include_recent_events
+		self.dom_delta_prompts = dom_delta_prompts
+		self.token_cost_service = token_cost_service
 
 		assert max_history_items is None or max_history_items > 5, 'max_history_items must be None or greater than 5'
 
@@ -279,6 +293,8 @@ class MessageManager:
 		if browser_state_summary.screenshot:
 			screenshots.append(browser_state_summary.screenshot)
 
+		dom_delta = self._update_page_snapshot(browser_state_summary, step_info) if self.dom_delta_prompts else None
+
 		# Create single state message with all content
 		assert browser_state_summary
 		state_message = AgentMessagePrompt(
@@ -295,11 +311,63 @@ class MessageManager:
 			screenshots=screenshots,
 			vision_detail_level=self.vision_detail_level,
 			include_recent_events=self.include_recent_events,
+			dom_delta=dom_delta,
 		).get_user_message(use_vision)
 
 		# Set the state message with caching enabled
 		self._set_message_with_type(state_message, 'state')
 
+	def _update_page_snapshot(
+		self, browser_state_summary: BrowserStateSummary, step_info: AgentStepInfo | None
+	) -> DOMLinesDelta | None:
+		"""For DOM delta prompts: the changes since the page snapshot message, None to put the full DOM in the state message.
+
+		The snapshot is (re)sent when there is none yet, after a navigation and when the changes got too large. It stays the
+		same in between, so providers with prompt caching only process the changes.
+		"""
+		dom_state = browser_state_summary.dom_state
+		lines = keyed_lines(dom_state, self.include_attributes)
+		full_text = dom_state.llm_representation(self.include_attributes) if lines is not None else ''
+		if lines is None or len(full_text) > MAX_CLICKABLE_ELEMENTS_LENGTH:
+			# can't be diffed, or too large to be sent in full: the state message keeps what is closest to the viewport
+			self.state.dom_baseline = None
+			self.state.history.page_snapshot_message = None
+			return None
+
+		step_number = step_info.step_number + 1 if step_info else None
+		baseline = self.state.dom_baseline
+		if baseline is not None and baseline.url == browser_state_summary.url:
+			delta = DOMLinesDelta.between(baseline.lines, lines)
+			delta_text = delta.render()
+			if len(delta_text) <= DOM_DELTA_MAX_RATIO * len(full_text):
+				self._record_dom_delta(full_text, delta_text, step_number)
+				return delta
+
+		self.state.dom_baseline = DOMBaseline(url=browser_state_summary.url, step_number=step_number, lines=lines)
+		step_text = f' at step {step_number}' if step_number is not None else ''
+		snapshot_message = UserMessage(
+			content=f'<page_snapshot>\nInteractive elements of {browser_state_summary.url}{step_text}, '
+			f'the <browser_state> lists what changed since:\n{full_text}\n</page_snapshot>',
+			cache=True,
+		)
+		self._set_message_with_type(snapshot_message, 'page_snapshot')
+		self._record_dom_delta(full_text, None, step_number)
+		return DOMLinesDelta(added=[], removed=[], changed=[])
+
+	def _record_dom_delta(self, full_text: str, delta_text: str | None, step_number: int | None) -> None:
+		"""Record the estimated snapshot and delta sizes, `delta_text` is None when the snapshot was (re)sent.
+
+		Not booked as saved tokens: the snapshot stays in every call, only prompt caching makes the delta cheaper.
+		"""
+		if self.token_cost_service is not None:
+			self.token_cost_service.add_prompt_delta(
+				'dom_delta',
+				estimate_tokens(full_text),
+				estimate_tokens(delta_text) if delta_text is not None else 0,
+				sent_prefix=delta_text is None,
+				step_number=step_number,
+			)
+
 	def _log_history_lines(self) -> str:
 		"""Generate a formatted log string of message history for debugging / printing to terminal"""
 		# TODO: fix logging
@@ -346,7 +414,7 @@ class MessageManager:
 		self.last_input_messages = self.state.history.get_messages()
 		return self.last_input_messages
 
-	def _set_message_with_type(self, message: BaseMessage, message_type: Literal['system', 'state']) -> None:
+	def _set_message_with_type(self, message: BaseMessage, message_type: Literal['system', 'page_snapshot', 'state']) -> None:
 		"""Replace a specific state message slot with a new message"""
 		# filter out sensitive data from the message
 		if self.sensitive_data:
@@ -354,6 +422,8 @@ class MessageManager:
 
 		if message_type == 'system':
 			self.state.history.system_message = message
+		elif message_type == 'page_snapshot':
+			self.state.history.page_snapshot_message = message
 		elif message_type == 'state':
 			self.state.history.state_message = message
 		else:
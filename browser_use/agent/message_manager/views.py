@@ -71,15 +71,18 @@ class MessageHistory(BaseModel):
 	"""History of messages"""
 
 	system_message: BaseMessage | None = None
+	page_snapshot_message: BaseMessage | None = None
 	state_message: BaseMessage | None = None
 	context_messages: list[BaseMessage] = Field(default_factory=list)
 	model_config = ConfigDict(arbitrary_types_allowed=True)
 
 	def get_messages(self) -> list[BaseMessage]:
-		"""Get all messages in the correct order: system -> state -> contextual"""
+		"""Get all messages in the correct order: system -> page snapshot -> state -> contextual"""
 		messages = []
 		if self.system_message:
 			messages.append(self.system_message)
+		if self.page_snapshot_message:
+			messages.append(self.page_snapshot_message)
 		if self.state_message:
 			messages.append(self.state_message)
 		messages.extend(self.context_messages)
@@ -87,6 +90,15 @@ class MessageHistory(BaseModel):
 		return messages
 
 
+class DOMBaseline(BaseModel):
+	"""The page snapshot DOM delta prompts are computed against"""
+
+	url: str
+	step_number: int | None = None
+	lines: dict[int, str]
+	"""Serialized lines by backend node id, see `browser_use.dom.serializer.delta.keyed_lines`"""
+
+
 class MessageManagerState(BaseModel):
 	"""Holds the state for MessageManager"""
 
@@ -96,5 +108,6 @@ class MessageManagerState(BaseModel):
 		default_factory=lambda: [HistoryItem(step_number=0, system_message='Agent initialized')]
 	)
 	read_state_description: str = ''
+	dom_baseline: DOMBaseline | None = None
 
 	model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -2,6 +2,7 @@ import importlib.resources
 from datetime import datetime
 from typing import TYPE_CHECKING, Literal, Optional
 
+from browser_use.dom.views import DOMRect
 from browser_use.llm.messages import ContentPartImageParam, ContentPartTextParam, ImageURL, SystemMessage, UserMessage
 from browser_use.observability import observe_debug
 from browser_use.utils import is_new_tab_page
@@ -9,8 +10,12 @@ from browser_use.utils import is_new_tab_page
 if TYPE_CHECKING:
 	from browser_use.agent.views import AgentStepInfo
 	from browser_use.browser.views import BrowserStateSummary
+	from browser_use.dom.serializer.delta import DOMLinesDelta
 	from browser_use.filesystem.file_system import FileSystem
 
+# Characters of serialized DOM the state message holds at most
+MAX_CLICKABLE_ELEMENTS_LENGTH = 40000
+
 
 class SystemPrompt:
 	def __init__(
@@ -87,12 +92,13 @@ class AgentMessagePrompt:
 		include_attributes: list[str] | None = None,
 		step_info: Optional['AgentStepInfo'] = None,
 		page_filtered_actions: str | None = None,
-		max_clickable_elements_length: int = 40000,
+		max_clickable_elements_length: int = MAX_CLICKABLE_ELEMENTS_LENGTH,
 		sensitive_data: str | None = None,
 		available_file_paths: list[str] | None = None,
 		screenshots: list[str] | None = None,
 		vision_detail_level: Literal['auto', 'low', 'high'] = 'auto',
 		include_recent_events: bool = False,
+		dom_delta: 'DOMLinesDelta | None' = None,
 	):
 		self.browser_state: 'BrowserStateSummary' = browser_state_summary
 		self.file_system: 'FileSystem | None' = file_system
@@ -108,15 +114,32 @@ class AgentMessagePrompt:
 		self.screenshots = screenshots or []
 		self.vision_detail_level = vision_detail_level
 		self.include_recent_events = include_recent_events
+		self.dom_delta = dom_delta
 		assert self.browser_state
 
 	@observe_debug(ignore_input=True, ignore_output=True, name='_get_browser_state_description')
 	def _get_browser_state_description(self) -> str:
-		elements_text = self.browser_state.dom_state.llm_representation(include_attributes=self.include_attributes)
-
-		if len(elements_text) > self.max_clickable_elements_length:
-			elements_text = elements_text[: self.max_clickable_elements_length]
-			truncated_text = f' (truncated to {self.max_clickable_elements_length} characters)'
+		viewport = None
+		if self.browser_state.page_info:
+			viewport = DOMRect(
+				x=0.0,
+				y=0.0,
+				width=self.browser_state.page_info.viewport_width,
+				height=self.browser_state.page_info.viewport_height,
+			)
+		if self.dom_delta is not None:
+			# The full elements are in the page snapshot message, only list what changed since then
+			elements_text, omitted_text = self.dom_delta.render(), None
+			elements_title = 'Changes to the interactive elements since the <page_snapshot> (+ added, - removed, ~ changed; all other elements are unchanged and keep their index)'
+		else:
+			# Only serialize what fits, starting with the elements in the viewport
+			elements_text, omitted_text = self.browser_state.dom_state.budgeted_llm_representation(
+				self.max_clickable_elements_length, include_attributes=self.include_attributes, viewport=viewport
+			)
+			elements_title = 'Interactive elements from top layer of the current page inside the viewport'
+
+		if omitted_text:
+			truncated_text = f' (truncated to {self.max_clickable_elements_length} characters, omitted {omitted_text})'
 		else:
 			truncated_text = ''
 
@@ -187,7 +210,7 @@ class AgentMessagePrompt:
 Available tabs:
 {tabs_text}
 {page_info_text}
-{recent_events_text}{pdf_message}Interactive elements from top layer of the current page inside the viewport{truncated_text}:
+{recent_events_text}{pdf_message}{elements_title}{truncated_text}:
 {elements_text}
 """
 		return browser_state
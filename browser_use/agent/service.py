@@ -180,6 +180,7 @@ class Agent(Generic[Context, AgentStructuredOutput]):
 		step_timeout: int = 120,
 		preload: bool = True,
 		include_recent_events: bool = False,
+		dom_delta_prompts: bool = False,
 		**kwargs,
 	):
 		if not isinstance(llm, BaseChatModel):
@@ -229,6 +230,7 @@ class Agent(Generic[Context, AgentStructuredOutput]):
 		self.llm = llm
 		self.preload = preload
 		self.include_recent_events = include_recent_events
+		self.dom_delta_prompts = dom_delta_prompts
 		self.controller = (
 			controller if controller is not None else Controller(display_files_in_done_text=display_files_in_done_text)
 		)
@@ -346,6 +348,8 @@ class Agent(Generic[Context, AgentStructuredOutput]):
 			vision_detail_level=self.settings.vision_detail_level,
 			include_tool_call_examples=self.settings.include_tool_call_examples,
 			include_recent_events=self.include_recent_events,
+			dom_delta_prompts=self.dom_delta_prompts,
+			token_cost_service=self.token_cost_service,
 		)
 
 		browser_profile = browser_profile or DEFAULT_BROWSER_PROFILE
@@ -14,6 +14,7 @@ from uuid_extensions import uuid7str
 from browser_use.agent.message_manager.views import MessageManagerState
 from browser_use.browser.views import BrowserStateHistory
 from browser_use.controller.registry.views import ActionModel
+from browser_use.dom.enhanced_tree import precompute_xpaths_and_texts
 from browser_use.dom.views import DEFAULT_INCLUDE_ATTRIBUTES, DOMInteractedElement, DOMSelectorMap
 
 # from browser_use.dom.history_tree_processor.service import (
@@ -256,9 +257,10 @@ class AgentHistory(BaseModel):
 
 	@staticmethod
 	def get_interacted_element(model_output: AgentOutput, selector_map: DOMSelectorMap) -> list[DOMInteractedElement | None]:
+		indices = [action.get_index() for action in model_output.action]
+		precompute_xpaths_and_texts(selector_map[index] for index in indices if index is not None and index in selector_map)
 		elements = []
-		for action in model_output.action:
-			index = action.get_index()
+		for index in indices:
 			if index is not None and index in selector_map:
 				el = selector_map[index]
 				elements.append(DOMInteractedElement.load_from_enhanced_dom_tree(el))
@@ -2,11 +2,13 @@ from typing import TYPE_CHECKING
 
 # Type stubs for lazy imports
 if TYPE_CHECKING:
+	from .pool import BrowserPool
 	from .profile import BrowserProfile
 	from .session import BrowserSession
 
 # Lazy imports mapping for heavy browser components
 _LAZY_IMPORTS = {
+	'BrowserPool': ('.pool', 'BrowserPool'),
 	'BrowserProfile': ('.profile', 'BrowserProfile'),
 	'BrowserSession': ('.session', 'BrowserSession'),
 }
@@ -35,4 +37,5 @@ def __getattr__(name: str):
 __all__ = [
 	'BrowserSession',
 	'BrowserProfile',
+	'BrowserPool',
 ]
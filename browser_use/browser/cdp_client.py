@@ -0,0 +1,237 @@
+"""
+CDP client with a faster JSON decoder and off-loop decoding of large messages.
+
+`DOMSnapshot.captureSnapshot` and `DOM.getDocument(depth=-1)` answers for heavy pages are several megabytes of JSON.
+cdp-use decodes every message with stdlib `json` in its message handler task, which stalls every other task on the
+event loop (other agents, watchdogs, websocket keepalives) for the whole decode. `DecodingCDPClient` instead:
+- decodes with orjson or msgspec when one is installed (`pip install "browser-use[cdp]"`), several times faster
+- decodes messages above `decode_in_thread_threshold` bytes in a worker thread, so the loop is only blocked while the
+  decoder holds the GIL (all of it on regular CPython builds, none of it on free-threaded builds)
+- counts messages, bytes and decode time per CDP method in a `CDPMessageStats` shared by all clients of a session,
+  along with the commands sent (round-trips), e.g. per action in the watchdog event handler logs
+
+`SessionEventRouter` routes the CDP events of every session of a client to per-session state.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import weakref
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+import websockets
+from cdp_use import CDPClient
+
+logger = logging.getLogger(__name__)
+
+JSONDecoder = Callable[[str | bytes], Any]
+T = TypeVar('T')
+
+DEFAULT_DECODE_IN_THREAD_THRESHOLD = 1024 * 1024
+"""Messages of at least this many bytes are decoded in a worker thread"""
+
+
+def _fastest_json_decoder() -> tuple[str, JSONDecoder]:
+	try:
+		import orjson
+
+		return 'orjson', orjson.loads
+	except ImportError:
+		pass
+	try:
+		import msgspec
+
+		return 'msgspec', msgspec.json.decode
+	except ImportError:
+		pass
+	return 'json', json.loads
+
+
+JSON_DECODER_NAME, decode_json = _fastest_json_decoder()
+"""The fastest installed JSON decoder: orjson, then msgspec, then the stdlib"""
+
+
+@dataclass(slots=True)
+class CDPMethodStats:
+	"""Payload sizes and decode times of the messages of one CDP method (command responses and events)."""
+
+	count: int = 0
+	sent: int = 0
+	"""Commands of this method sent (events are only received)"""
+	total_bytes: int = 0
+	max_bytes: int = 0
+	decode_seconds: float = 0.0
+	max_decode_seconds: float = 0.0
+	decoded_in_thread: int = 0
+
+	def add(self, size: int, decode_seconds: float, in_thread: bool) -> None:
+		self.count += 1
+		self.total_bytes += size
+		self.max_bytes = max(self.max_bytes, size)
+		self.decode_seconds += decode_seconds
+		self.max_decode_seconds = max(self.max_decode_seconds, decode_seconds)
+		self.decoded_in_thread += in_thread
+
+
+@dataclass
+class CDPMessageStats:
+	"""Per CDP method stats of the received messages of one or more clients."""
+
+	decoder: str = JSON_DECODER_NAME
+	methods: dict[str, CDPMethodStats] = field(default_factory=dict)
+	commands_sent: int = 0
+	"""CDP commands sent by all clients, the difference between two reads is the number of round-trips in between"""
+
+	def _method(self, method: str) -> CDPMethodStats:
+		stats = self.methods.get(method)
+		if stats is None:
+			stats = self.methods[method] = CDPMethodStats()
+		return stats
+
+	def add(self, method: str, size: int, decode_seconds: float, in_thread: bool = False) -> None:
+		self._method(method).add(size, decode_seconds, in_thread)
+
+	def add_sent(self, method: str) -> None:
+		self._method(method).sent += 1
+		self.commands_sent += 1
+
+	def reset(self) -> None:
+		self.methods.clear()
+		self.commands_sent = 0
+
+	def summary(self, top: int = 10) -> str:
+		"""The `top` methods by total decode time, one line each."""
+		lines = [f'{self.commands_sent} CDP commands sent, messages decoded with {self.decoder}:']
+		for method, stats in sorted(self.methods.items(), key=lambda item: item[1].decode_seconds, reverse=True)[:top]:
+			lines.append(
+				f'  {method}: {stats.count}x ({stats.sent} sent), {stats.total_bytes / 1024:.0f} KiB (max {stats.max_bytes / 1024:.0f} KiB), '
+				f'{stats.decode_seconds * 1000:.1f} ms decoding (max {stats.max_decode_seconds * 1000:.1f} ms, '
+				f'{stats.decoded_in_thread}x in a thread)'
+			)
+		return '\n'.join(lines)
+
+
+class DecodingCDPClient(CDPClient):
+	"""A `CDPClient` that decodes incoming messages with `decoder`, large ones in a worker thread, and records stats.
+
+	Messages are still handled one at a time in arrival order: the handler awaits each decode before receiving the next
+	message, only the rest of the event loop keeps running meanwhile.
+	"""
+
+	def __init__(
+		self,
+		url: str,
+		decoder: JSONDecoder = decode_json,
+		decode_in_thread_threshold: int | None = DEFAULT_DECODE_IN_THREAD_THRESHOLD,
+		stats: CDPMessageStats | None = None,
+		**kwargs: Any,
+	):
+		super().__init__(url, **kwargs)
+		self.decoder = decoder
+		self.decode_in_thread_threshold = decode_in_thread_threshold
+		self.stats = stats if stats is not None else CDPMessageStats()
+		self._request_methods: dict[int, str] = {}
+
+	async def send_raw(self, method: str, params: Any | None = None, session_id: str | None = None) -> dict[str, Any]:
+		# cdp-use assigns the next message id synchronously, before sending, so the answer can be attributed to the method
+		# (true for the cdp-use versions allowed in pyproject.toml, check it before raising the upper bound)
+		request_id = self.msg_id + 1
+		self._request_methods[request_id] = method
+		self.stats.add_sent(method)
+		try:
+			return await super().send_raw(method, params, session_id)
+		except BaseException:
+			# not sent (client not started, socket closed) or cancelled, an answer would be counted as 'unknown'
+			self._request_methods.pop(request_id, None)
+			raise
+
+	async def stop(self):
+		await super().stop()
+		self._request_methods.clear()
+
+	async def decode(self, raw: str | bytes) -> tuple[Any, int, float, bool]:
+		"""Decode one message, returns it with its size, decode time and whether it was decoded in a thread."""
+		size = len(raw)
+		in_thread = self.decode_in_thread_threshold is not None and size >= self.decode_in_thread_threshold
+		start = time.perf_counter()
+		data = await asyncio.to_thread(self.decoder, raw) if in_thread else self.decoder(raw)
+		return data, size, time.perf_counter() - start, in_thread
+
+	async def _handle_messages(self):
+		"""Same as `CDPClient._handle_messages` of cdp-use 1.4.x, with `decode()` instead of `json.loads`."""
+		try:
+			while True:
+				if not self.ws:
+					break
+
+				raw = await self.ws.recv()
+				data, size, decode_seconds, in_thread = await self.decode(raw)
+
+				# Handle response messages (with id)
+				if 'id' in data:
+					self.stats.add(self._request_methods.pop(data['id'], 'unknown'), size, decode_seconds, in_thread)
+				if 'id' in data and data['id'] in self.pending_requests:
+					future = self.pending_requests.pop(data['id'])
+					if not future.done():
+						if 'error' in data:
+							logger.debug(f'CDP Error for request {data["id"]}: {data["error"]}')
+							future.set_exception(RuntimeError(data['error']))
+						else:
+							future.set_result(data['result'])
+					else:
+						logger.warning(f'Received duplicate response for request {data["id"]} - ignoring')
+
+				# Handle event messages (without id, but with method)
+				elif 'method' in data:
+					self.stats.add(data['method'], size, decode_seconds, in_thread)
+					await self._event_registry.handle_event(data['method'], data.get('params', {}), data.get('sessionId'))
+
+				else:
+					logger.warning(f'Received unexpected message: {data}')
+
+		except websockets.exceptions.ConnectionClosed as e:
+			logger.debug(f'WebSocket connection closed: {e}')
+			self._fail_pending_requests(ConnectionError('WebSocket connection closed'))
+		except Exception as e:
+			logger.error(f'Error in message handler: {e}')
+			self._fail_pending_requests(e)
+
+	def _fail_pending_requests(self, error: Exception) -> None:
+		for future in self.pending_requests.values():
+			if not future.done():
+				future.set_exception(error)
+		self.pending_requests.clear()
+		self._request_methods.clear()
+
+
+class SessionEventRouter(Generic[T]):
+	"""Passes CDP events to the handler of their method along with the state their session has in `sessions`.
+
+	cdp-use keeps a single handler per event per client, so one dispatcher per event is registered on each client and
+	routes the events of all sessions on it by session id. Events of sessions without state are dropped.
+	"""
+
+	def __init__(self, sessions: Mapping[str, T], handlers: Mapping[str, Callable[[T, Any], None]]):
+		self.sessions = sessions
+		"""Session id -> state, looked up on every event, so sessions can be added and removed at any time"""
+		self.handlers = handlers
+		"""CDP event method (e.g. 'Network.loadingFinished') -> handler called with the session state and the event params"""
+		self._clients: weakref.WeakSet[CDPClient] = weakref.WeakSet()
+
+	def attach(self, client: CDPClient) -> None:
+		"""Register the dispatchers on `client`, once per client."""
+		if client in self._clients:
+			return
+		for method, handler in self.handlers.items():
+			domain, event = method.split('.')
+			register = getattr(getattr(client.register, domain), event)
+			register(lambda params, session_id=None, handler=handler: self._dispatch(handler, params, session_id))
+		self._clients.add(client)
+
+	def _dispatch(self, handler: Callable[[T, Any], None], params: Any, session_id: str | None) -> None:
+		state = self.sessions.get(session_id) if session_id else None
+		if state is not None:
+			handler(state, params)
@@ -0,0 +1,353 @@
+# @file purpose: Records all CDP traffic of a browser session to a compressed file and replays it without a browser
+
+import asyncio
+import bisect
+import gzip
+import itertools
+import json
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from cdp_use import CDPClient
+from cdp_use.cdp.registration_library import CDPRegistrationLibrary
+from cdp_use.cdp.registry import EventRegistry
+
+from browser_use.browser.cdp_client import DecodingCDPClient, decode_json
+
+if TYPE_CHECKING:
+	from browser_use.browser.profile import BrowserProfile
+	from browser_use.browser.session import BrowserSession
+
+RECORDING_VERSION = 1
+REPLAY_CDP_URL = 'ws://cdp-replay'
+
+
+@dataclass(slots=True)
+class RecordedCall:
+	"""One CDP command and what the browser answered."""
+
+	connection: int
+	"""Number of the websocket connection in the order the connections were opened"""
+	method: str
+	params_json: str
+	session_id: str | None
+	request_seq: int
+	response_seq: int
+	result_json: str | None = None
+	"""The result, kept as JSON so every replay parses it again like a real response"""
+	error: Any = None
+	duration: float = 0.0
+
+
+@dataclass(slots=True)
+class RecordedEvent:
+	connection: int
+	seq: int
+	method: str
+	params_json: str
+	session_id: str | None
+
+
+@dataclass
+class CDPRecording:
+	"""Everything that went over the CDP connections of a session, in order (`seq` orders calls and events)."""
+
+	calls: list[RecordedCall] = field(default_factory=list)
+	events: list[RecordedEvent] = field(default_factory=list)
+	connections: int = 0
+
+	_seq: Any = field(default_factory=itertools.count, repr=False)
+
+	def next_seq(self) -> int:
+		return next(self._seq)
+
+	def new_connection(self) -> int:
+		self.connections += 1
+		return self.connections - 1
+
+	def save(self, path: str | Path) -> None:
+		"""Write the recording as gzip compressed JSON lines (a header line, then calls and events by sequence number)."""
+		entries: list[tuple[int, dict[str, Any]]] = [
+			(
+				call.request_seq,
+				{
+					'type': 'call',
+					'connection': call.connection,
+					'method': call.method,
+					'params': call.params_json,
+					'session_id': call.session_id,
+					'request_seq': call.request_seq,
+					'response_seq': call.response_seq,
+					'result': call.result_json,
+					'error': call.error,
+					'duration': call.duration,
+				},
+			)
+			for call in self.calls
+		]
+		entries.extend(
+			(
+				event.seq,
+				{
+					'type': 'event',
+					'connection': event.connection,
+					'seq': event.seq,
+					'method': event.method,
+					'params': event.params_json,
+					'session_id': event.session_id,
+				},
+			)
+			for event in self.events
+		)
+		entries.sort(key=lambda entry: entry[0])
+		with gzip.open(path, 'wt', encoding='utf-8') as f:
+			f.write(json.dumps({'version': RECORDING_VERSION, 'connections': self.connections}) + '\n')
+			for _, entry in entries:
+				f.write(json.dumps(entry) + '\n')
+
+	@classmethod
+	def load(cls, path: str | Path) -> 'CDPRecording':
+		recording = cls()
+		with gzip.open(path, 'rt', encoding='utf-8') as f:
+			header = json.loads(f.readline())
+			if header.get('version') != RECORDING_VERSION:
+				raise ValueError(f'Unsupported CDP recording version {header.get("version")} in {path}')
+			recording.connections = header['connections']
+			for line in f:
+				entry = json.loads(line)
+				if entry['type'] == 'call':
+					recording.calls.append(
+						RecordedCall(
+							connection=entry['connection'],
+							method=entry['method'],
+							params_json=entry['params'],
+							session_id=entry['session_id'],
+							request_seq=entry['request_seq'],
+							response_seq=entry['response_seq'],
+							result_json=entry['result'],
+							error=entry['error'],
+							duration=entry['duration'],
+						)
+					)
+				else:
+					recording.events.append(
+						RecordedEvent(
+							connection=entry['connection'],
+							seq=entry['seq'],
+							method=entry['method'],
+							params_json=entry['params'],
+							session_id=entry['session_id'],
+						)
+					)
+		return recording
+
+
+def _params_json(params: Any) -> str:
+	return json.dumps(params or {}, sort_keys=True)
+
+
+class _RecordingEventRegistry(EventRegistry):
+	def __init__(self, client: 'RecordingCDPClient'):
+		super().__init__()
+		self._client = client
+
+	async def handle_event(self, method: str, params: Any, session_id: str | None = None) -> bool:
+		self._client.recording.events.append(
+			RecordedEvent(
+				connection=self._client.connection,
+				seq=self._client.recording.next_seq(),
+				method=method,
+				params_json=json.dumps(params),
+				session_id=session_id,
+			)
+		)
+		return await super().handle_event(method, params, session_id)
+
+
+class RecordingCDPClient(DecodingCDPClient):
+	"""A `DecodingCDPClient` that adds every command, response and event it sees to a `CDPRecording`.
+
+	Responses are serialized the moment they arrive, callers are free to mutate what they get back.
+	"""
+
+	def __init__(self, url: str, recording: CDPRecording, **kwargs: Any):
+		super().__init__(url, **kwargs)
+		self.recording = recording
+		self.connection = recording.new_connection()
+		self._event_registry = _RecordingEventRegistry(self)
+		self.register = CDPRegistrationLibrary(self._event_registry)
+
+	async def send_raw(self, method: str, params: Any | None = None, session_id: str | None = None) -> dict[str, Any]:
+		call = RecordedCall(
+			connection=self.connection,
+			method=method,
+			params_json=_params_json(params),
+			session_id=session_id,
+			request_seq=self.recording.next_seq(),
+			response_seq=-1,
+		)
+		start = time.perf_counter()
+		try:
+			result = await super().send_raw(method, params, session_id)
+		except RuntimeError as e:
+			# cdp-use raises the error object of the browser as a RuntimeError, anything else is not a CDP answer
+			if e.args and isinstance(e.args[0], dict):
+				call.error = e.args[0]
+				self._add(call, start)
+			raise
+		call.result_json = json.dumps(result)
+		self._add(call, start)
+		return result
+
+	async def emit_event(self, method: str, params: Any | None = None, session_id: str | None = None) -> bool:
+		# synthetic events are emitted again by the code under replay, they are not part of the browser traffic
+		return await EventRegistry.handle_event(self._event_registry, method, params or {}, session_id)
+
+	def _add(self, call: RecordedCall, start: float) -> None:
+		call.duration = time.perf_counter() - start
+		call.response_seq = self.recording.next_seq()
+		self.recording.calls.append(call)
+
+
+class CDPReplay:
+	"""Answers CDP commands from a `CDPRecording`, for any number of `ReplayCDPClient`s.
+
+	A command is answered with the first unused recorded call on the same connection with the same method, session and
+	params. If there is none, params are ignored, then the connection is ignored. Commands that are sent more often
+	than during the recording (polling) get the last answer again. Commands that were never recorded fail like a CDP
+	error, which callers already handle.
+	"""
+
+	def __init__(self, recording: CDPRecording):
+		self.recording = recording
+		self._exact: dict[tuple[int, str, str | None, str], deque[RecordedCall]] = {}
+		self._by_method: dict[tuple[int, str, str | None], deque[RecordedCall]] = {}
+		self._any_connection: dict[tuple[str, str | None], deque[RecordedCall]] = {}
+		self._last: dict[tuple[str, str | None], RecordedCall] = {}
+		self._used: set[int] = set()
+		self._request_seqs: dict[int, list[int]] = {}
+		self._events: dict[int, deque[RecordedEvent]] = {}
+		self._connections = itertools.count()
+
+		for call in sorted(recording.calls, key=lambda call: call.request_seq):
+			self._exact.setdefault((call.connection, call.method, call.session_id, call.params_json), deque()).append(call)
+			self._by_method.setdefault((call.connection, call.method, call.session_id), deque()).append(call)
+			self._any_connection.setdefault((call.method, call.session_id), deque()).append(call)
+			self._request_seqs.setdefault(call.connection, []).append(call.request_seq)
+		for event in sorted(recording.events, key=lambda event: event.seq):
+			self._events.setdefault(event.connection, deque()).append(event)
+
+	@classmethod
+	def load(cls, path: str | Path) -> 'CDPReplay':
+		return cls(CDPRecording.load(path))
+
+	def new_connection(self) -> int:
+		return next(self._connections)
+
+	def create_client(self, url: str = REPLAY_CDP_URL) -> 'ReplayCDPClient':
+		return ReplayCDPClient(url, self)
+
+	def match(self, connection: int, method: str, params: Any, session_id: str | None) -> RecordedCall | None:
+		for queue in (
+			self._exact.get((connection, method, session_id, _params_json(params))),
+			self._by_method.get((connection, method, session_id)),
+			self._any_connection.get((method, session_id)),
+		):
+			while queue and id(queue[0]) in self._used:
+				queue.popleft()
+			if queue:
+				call = queue.popleft()
+				self._used.add(id(call))
+				self._last[(method, session_id)] = call
+				return call
+		return self._last.get((method, session_id))
+
+	def next_request_seq(self, connection: int, after_seq: int) -> float:
+		"""Sequence number of the next recorded command on the connection after `after_seq` (inf if there is none)."""
+		request_seqs = self._request_seqs.get(connection, [])
+		position = bisect.bisect_right(request_seqs, after_seq)
+		return request_seqs[position] if position < len(request_seqs) else math.inf
+
+	def pop_events(self, connection: int, until_seq: float) -> list[RecordedEvent]:
+		events = self._events.get(connection)
+		popped: list[RecordedEvent] = []
+		while events and events[0].seq < until_seq:
+			popped.append(events.popleft())
+		return popped
+
+
+class ReplayCDPClient(CDPClient):
+	"""A `CDPClient` without a browser, answering from a `CDPReplay`.
+
+	Events are delivered in recorded order: the ones that arrived before a response are dispatched before the response is
+	returned, the ones that arrived while the client was idle right after it.
+	"""
+
+	def __init__(self, url: str, replay: CDPReplay):
+		super().__init__(url)
+		self.replay = replay
+		self.connection = replay.new_connection()
+		self._started = False
+		self._dispatch_lock = asyncio.Lock()
+		self._dispatch_tasks: set[asyncio.Task] = set()
+
+	async def start(self):
+		if self._started:
+			raise RuntimeError('Client is already started')
+		self._started = True
+
+	async def stop(self):
+		for task in self._dispatch_tasks:
+			task.cancel()
+		self._dispatch_tasks.clear()
+		self._started = False
+
+	async def send_raw(self, method: str, params: Any | None = None, session_id: str | None = None) -> dict[str, Any]:
+		if not self._started:
+			raise RuntimeError('Client is not started. Call start() first or use as async context manager.')
+		call = self.replay.match(self.connection, method, params, session_id)
+		if call is None:
+			raise RuntimeError({'code': -32601, 'message': f'No recorded response for {method} (session {session_id})'})
+
+		await self._dispatch_events(call.response_seq)
+		task = asyncio.create_task(self._dispatch_events(self.replay.next_request_seq(self.connection, call.response_seq)))
+		self._dispatch_tasks.add(task)
+		task.add_done_callback(self._dispatch_tasks.discard)
+
+		if call.error is not None:
+			raise RuntimeError(call.error)
+		return decode_json(call.result_json) if call.result_json is not None else {}
+
+	async def _dispatch_events(self, until_seq: float) -> None:
+		async with self._dispatch_lock:
+			for event in self.replay.pop_events(self.connection, until_seq):
+				await self._event_registry.handle_event(event.method, decode_json(event.params_json), event.session_id)
+
+
+def record_cdp_traffic(browser_session: 'BrowserSession') -> CDPRecording:
+	"""Make `browser_session` record all its CDP traffic, call before `start()`. Save the result with `.save(path)`."""
+	recording = CDPRecording()
+	browser_session._cdp_client_factory = lambda url: RecordingCDPClient(
+		url,
+		recording,
+		decode_in_thread_threshold=browser_session.browser_profile.cdp_decode_in_thread_threshold,
+		stats=browser_session.cdp_message_stats,
+	)
+	return recording
+
+
+def replay_browser_session(
+	recording: str | Path | CDPRecording, browser_profile: 'BrowserProfile | None' = None
+) -> 'BrowserSession':
+	"""A `BrowserSession` that talks to a replay of `recording` instead of a browser, start it as usual."""
+	from browser_use.browser.session import BrowserSession
+
+	replay = CDPReplay(recording if isinstance(recording, CDPRecording) else CDPRecording.load(recording))
+	kwargs: dict[str, Any] = {'browser_profile': browser_profile} if browser_profile is not None else {}
+	browser_session = BrowserSession(cdp_url=REPLAY_CDP_URL, is_local=False, **kwargs)
+	browser_session._cdp_client_factory = replay.create_client
+	return browser_session
@@ -108,8 +108,9 @@ class CrashWatchdog(BaseWatchdog):
 			# cdp_client.on('Network.loadingFinished', on_loading_finished, session_id=session_id)
 
 			def on_target_crashed(event: TargetCrashedEvent, session_id: SessionID | None = None):
+				# the target from the event, the client (and this handler) may be shared by all sessions in flat session mode
 				# Create and track the task
-				task = asyncio.create_task(self._on_target_crash_cdp(target_id))
+				task = asyncio.create_task(self._on_target_crash_cdp(event.get('targetId') or target_id))
 				self._cdp_event_tasks.add(task)
 				# Remove from set when done
 				task.add_done_callback(lambda t: self._cdp_event_tasks.discard(t))
@@ -424,6 +424,11 @@ class DefaultActionWatchdog(BaseWatchdog):
 			center_x = max(0, min(viewport_width - 1, center_x))
 			center_y = max(0, min(viewport_height - 1, center_y))
 
+			# Move the click point off elements that cover the center (sticky headers, overlays, badges, ...)
+			center_x, center_y = self._get_unobstructed_click_point(element_node, best_quad, center_x, center_y)
+			center_x = max(0, min(viewport_width - 1, center_x))
+			center_y = max(0, min(viewport_height - 1, center_y))
+
 			# Scroll element into view
 			try:
 				await cdp_session.cdp_client.send.DOM.scrollIntoViewIfNeeded(
@@ -434,8 +439,8 @@ class DefaultActionWatchdog(BaseWatchdog):
 				self.logger.debug(f'Failed to scroll element into view: {e}')
 
 			# Perform the click using CDP
-			# TODO: do occlusion detection first, if element is not on the top, fire JS-based
-			# click event instead using xpath of x,y coordinate clicking, because we wont be able to click *through* occluding elements using x,y clicks
+			# TODO: if the element is covered at every point, fire a JS-based click event instead,
+			# because we wont be able to click *through* occluding elements using x,y clicks
 			try:
 				self.logger.debug(f'👆 Dragging mouse over element before clicking x: {center_x}px y: {center_y}px ...')
 				# Move mouse to element
@@ -532,9 +537,8 @@ class DefaultActionWatchdog(BaseWatchdog):
 					raise Exception(f'Failed to click element: {e}')
 			finally:
 				# always re-focus back to original top-level page session context in case click opened a new tab/popup/window/dialog/etc.
+				# (re-activated only if the focus moved or a new tab/popup opened since it was last activated)
 				cdp_session = await self.browser_session.get_or_create_cdp_session(focus=True)
-				await cdp_session.cdp_client.send.Target.activateTarget(params={'targetId': cdp_session.target_id})
-				await cdp_session.cdp_client.send.Runtime.runIfWaitingForDebugger(session_id=cdp_session.session_id)
 
 		except URLNotAllowedError as e:
 			raise e
@@ -548,6 +552,32 @@ class DefaultActionWatchdog(BaseWatchdog):
 				f'<llm_error_msg>Failed to click element {element_info}. The element may not be interactable or visible. {type(e).__name__}: {e}</llm_error_msg>'
 			)
 
+	def _get_unobstructed_click_point(
+		self, element_node: EnhancedDOMTreeNode, quad: list[float], x: float, y: float
+	) -> tuple[float, float]:
+		"""Check in the spatial index of the cached DOM that a click at (x, y) hits the element, pick another point if not.
+
+		The index uses the positions of the last DOM snapshot, the offset between the quad and the snapshot position of
+		the element translates between them (the page may have scrolled since). Returns (x, y) unchanged when the element
+		is on top there, when it is not part of the cached DOM, or when no uncovered point is found.
+		"""
+		dom_watchdog = self.browser_session._dom_watchdog
+		spatial_index = dom_watchdog.get_spatial_index() if dom_watchdog else None
+		if spatial_index is None or element_node.absolute_position is None:
+			return x, y
+
+		offset_x = min(quad[i] for i in range(0, 8, 2)) - element_node.absolute_position.x
+		offset_y = min(quad[i] for i in range(1, 8, 2)) - element_node.absolute_position.y
+		if spatial_index.is_topmost_at_point(element_node, x - offset_x, y - offset_y):
+			return x, y
+
+		click_point = spatial_index.find_click_point(element_node)
+		if click_point is None:
+			self.logger.debug(f'Element <{element_node.tag_name}> seems to be covered by other elements, clicking its center')
+			return x, y
+		self.logger.debug(f'Center of element <{element_node.tag_name}> is covered, clicking an uncovered point instead')
+		return click_point[0] + offset_x, click_point[1] + offset_y
+
 	async def _type_to_page(self, text: str):
 		"""
 		Type text to the page (whatever element currently has focus).
@@ -556,7 +586,6 @@ class DefaultActionWatchdog(BaseWatchdog):
 		try:
 			# Get CDP client and session
 			cdp_session = await self.browser_session.get_or_create_cdp_session(target_id=None, focus=True)
-			await cdp_session.cdp_client.send.Target.activateTarget(params={'targetId': cdp_session.target_id})
 
 			# Type the text character by character to the focused element
 			for char in text:
@@ -675,6 +704,7 @@ class DefaultActionWatchdog(BaseWatchdog):
 			# Get the correct session ID for the element's iframe
 			# session_id = await self._get_session_id_for_element(element_node)
 
+			# focusing activates the target (only if the focus moved)
 			cdp_session = await self.browser_session.get_or_create_cdp_session(target_id=element_node.target_id, focus=True)
 
 			# Get element info
@@ -682,7 +712,6 @@ class DefaultActionWatchdog(BaseWatchdog):
 
 			# Scroll element into view
 			try:
-				await cdp_session.cdp_client.send.Target.activateTarget(params={'targetId': element_node.target_id})
 				await cdp_session.cdp_client.send.DOM.scrollIntoViewIfNeeded(
 					params={'backendNodeId': backend_node_id}, session_id=cdp_session.session_id
 				)
@@ -2,16 +2,20 @@
 
 import asyncio
 import time
-from typing import TYPE_CHECKING
+from collections.abc import Awaitable
+from typing import TYPE_CHECKING, Any, TypeVar
 
 from browser_use.browser.events import (
 	BrowserErrorEvent,
 	BrowserStateRequestEvent,
 	ScreenshotEvent,
+	TabClosedEvent,
 	TabCreatedEvent,
 )
+from browser_use.browser.quiescence import PageQuiescenceDetector, QuiescenceReport
 from browser_use.browser.watchdog_base import BaseWatchdog
 from browser_use.dom.service import DomService
+from browser_use.dom.spatial_index import DOMSpatialIndex
 from browser_use.dom.views import (
 	EnhancedDOMTreeNode,
 	SerializedDOMState,
@@ -20,6 +24,11 @@ from browser_use.dom.views import (
 if TYPE_CHECKING:
 	from browser_use.browser.views import BrowserStateSummary, PageInfo
 
+T = TypeVar('T')
+
+BROWSER_STATE_DEADLINE = 20.0
+"""Seconds the parts of a browser state (DOM tree, screenshot, tabs, title, page info) get after the page is stable"""
+
 
 class DOMWatchdog(BaseWatchdog):
 	"""Handles DOM tree building, serialization, and element access via CDP.
@@ -29,16 +38,20 @@ class DOMWatchdog(BaseWatchdog):
 	helper methods for other watchdogs.
 	"""
 
-	LISTENS_TO = [TabCreatedEvent, BrowserStateRequestEvent]
+	LISTENS_TO = [TabCreatedEvent, TabClosedEvent, BrowserStateRequestEvent]
 	EMITS = [BrowserErrorEvent]
 
 	# Public properties for other watchdogs
 	selector_map: dict[int, EnhancedDOMTreeNode] | None = None
 	current_dom_state: SerializedDOMState | None = None
-	enhanced_dom_tree: EnhancedDOMTreeNode | None = None
+	enhanced_dom_tree: EnhancedDOMTreeNode | None = None  # stays None when the tree is built in a worker (dom_offload)
 
 	# Internal DOM service
 	_dom_service: DomService | None = None
+	# Spatial index of enhanced_dom_tree, built on first use and dropped on every DOM build
+	_spatial_index: DOMSpatialIndex | None = None
+	# Network and lifecycle activity of the pages waited on
+	_page_quiescence: PageQuiescenceDetector | None = None
 
 	async def on_TabCreatedEvent(self, event: TabCreatedEvent) -> None:
 		# self.logger.debug('Setting up init scripts in browser')
@@ -138,7 +151,10 @@ class DOMWatchdog(BaseWatchdog):
 	async def on_BrowserStateRequestEvent(self, event: BrowserStateRequestEvent) -> 'BrowserStateSummary':
 		"""Handle browser state request by coordinating DOM building and screenshot capture.
 
-		This is the main entry point for getting the complete browser state.
+		This is the main entry point for getting the complete browser state. Once the page is stable, the parts of the
+		state are fetched concurrently: tabs, title, page info and the DOM tree, with the screenshot after the DOM tree
+		(it shows the highlights injected by the DOM build). Parts that fail or are still running after
+		BROWSER_STATE_DEADLINE seconds are replaced by fallbacks. The seconds each part took are in `timing` of the summary.
 
 		Args:
 			event: The browser state request event with options
@@ -148,9 +164,11 @@ class DOMWatchdog(BaseWatchdog):
 		"""
 		from browser_use.browser.views import BrowserStateSummary, PageInfo
 
+		start = time.time()
+		timing: dict[str, float] = {}
+
 		self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: STARTING browser state request')
 		page_url = await self.browser_session.get_current_page_url()
-		self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Got page URL: {page_url}')
 		if self.browser_session.agent_focus:
 			self.logger.debug(
 				f'📍 Current page URL: {page_url}, target_id: {self.browser_session.agent_focus.target_id}, session_id: {self.browser_session.agent_focus.session_id}'
@@ -171,174 +189,86 @@ class DOMWatchdog(BaseWatchdog):
 				self.logger.warning(
 					f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Network waiting failed: {e}, continuing anyway...'
 				)
-
-		# Get tabs info once at the beginning for all paths
-		self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: Getting tabs info...')
-		tabs_info = await self.browser_session.get_tabs()
-		self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Got {len(tabs_info)} tabs')
-		self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Tabs info: {tabs_info}')
-
-		# Get viewport / scroll position info, remember changing scroll position should invalidate selector_map cache because it only includes visible elements
-		# cdp_session = await self.browser_session.get_or_create_cdp_session(focus=True)
-		# scroll_info = await cdp_session.cdp_client.send.Runtime.evaluate(
-		# 	params={'expression': 'JSON.stringify({y: document.body.scrollTop, x: document.body.scrollLeft, width: document.documentElement.clientWidth, height: document.documentElement.clientHeight})'},
-		# 	session_id=cdp_session.session_id,
-		# )
-		# self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Got scroll info: {scroll_info["result"]}')
+			timing['wait_for_stable_network'] = time.time() - start
+
+		def default_page_info() -> PageInfo:
+			viewport = self.browser_session.browser_profile.viewport or {'width': 1280, 'height': 720}
+			return PageInfo(
+				viewport_width=viewport['width'],
+				viewport_height=viewport['height'],
+				page_width=viewport['width'],
+				page_height=viewport['height'],
+				scroll_x=0,
+				scroll_y=0,
+				pixels_above=0,
+				pixels_below=0,
+				pixels_left=0,
+				pixels_right=0,
+			)
 
 		try:
-			# Fast path for empty pages
+			build_dom = event.include_dom and not not_a_meaningful_website
+			take_screenshot = event.include_screenshot and not not_a_meaningful_website
 			if not_a_meaningful_website:
 				self.logger.debug(f'⚡ Skipping BuildDOMTree for empty target: {page_url}')
 				self.logger.info(f'📸 Not taking screenshot for empty page: {page_url} (non-http/https URL)')
 
-				# Create minimal DOM state
-				content = SerializedDOMState(_root=None, selector_map={})
-
-				# Skip screenshot for empty pages
-				screenshot_b64 = None
-
-				# Try to get page info from CDP, fall back to defaults if unavailable
-				try:
-					page_info = await self._get_page_info()
-				except Exception as e:
-					self.logger.debug(f'Failed to get page info from CDP for empty page: {e}, using fallback')
-					# Use default viewport dimensions
-					viewport = self.browser_session.browser_profile.viewport or {'width': 1280, 'height': 720}
-					page_info = PageInfo(
-						viewport_width=viewport['width'],
-						viewport_height=viewport['height'],
-						page_width=viewport['width'],
-						page_height=viewport['height'],
-						scroll_x=0,
-						scroll_y=0,
-						pixels_above=0,
-						pixels_below=0,
-						pixels_left=0,
-						pixels_right=0,
-					)
-
-				return BrowserStateSummary(
-					dom_state=content,
-					url=page_url,
-					title='Empty Tab',
-					tabs=tabs_info,
-					screenshot=screenshot_b64,
-					page_info=page_info,
-					pixels_above=0,
-					pixels_below=0,
-					browser_errors=[],
-					is_pdf_viewer=False,
-					recent_events=self._get_recent_events_str() if event.include_recent_events else None,
-				)
-
-			# Normal path: Build DOM tree if requested
-			if event.include_dom:
-				self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: 🌳 Building DOM tree...')
+			async def get_title() -> str:
+				return await asyncio.wait_for(self.browser_session.get_current_page_title(), timeout=2.0)
 
+			async def build_dom_tree() -> SerializedDOMState:
 				# Build the DOM directly using the internal method
 				previous_state = (
 					self.browser_session._cached_browser_state_summary.dom_state
 					if self.browser_session._cached_browser_state_summary
 					else None
 				)
+				return await self._build_dom_tree(previous_state)
 
-				try:
-					# Call the DOM building method directly
-					self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: Starting _build_dom_tree...')
-					content = await self._build_dom_tree(previous_state)
-					self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: ✅ _build_dom_tree completed')
-				except Exception as e:
-					self.logger.warning(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: DOM build failed: {e}, using minimal state')
-					content = SerializedDOMState(_root=None, selector_map={})
-
-				if not content:
-					# Fallback to minimal DOM state
-					self.logger.warning('DOM build returned no content, using minimal state')
-					content = SerializedDOMState(_root=None, selector_map={})
-			else:
-				# Skip DOM building if not requested
-				content = SerializedDOMState(_root=None, selector_map={})
-
-			# re-focus top-level page session context
-			assert self.browser_session.agent_focus is not None, 'No current target ID'
-			await self.browser_session.get_or_create_cdp_session(target_id=self.browser_session.agent_focus.target_id, focus=True)
-
-			# Get screenshot if requested
-			screenshot_b64 = None
-			if event.include_screenshot:
-				self.logger.debug(
-					f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: 📸 DOM watchdog requesting screenshot, include_screenshot={event.include_screenshot}'
-				)
-				try:
-					# Check if handler is registered
-					handlers = self.event_bus.handlers.get('ScreenshotEvent', [])
-					handler_names = [getattr(h, '__name__', str(h)) for h in handlers]
-					self.logger.debug(f'📸 ScreenshotEvent handlers registered: {len(handlers)} - {handler_names}')
-
-					screenshot_event = self.event_bus.dispatch(ScreenshotEvent(full_page=False))
-					self.logger.debug('📸 Dispatched ScreenshotEvent, waiting for event to complete...')
-
-					# Wait for the event itself to complete (this waits for all handlers)
-					await screenshot_event
-
-					# Get the single handler result
-					screenshot_b64 = await screenshot_event.event_result(raise_if_any=True, raise_if_none=True)
-				except TimeoutError:
-					self.logger.warning('📸 Screenshot timed out after 6 seconds - no handler registered or slow page?')
-
-				except Exception as e:
-					self.logger.warning(f'📸 Screenshot failed: {type(e).__name__}: {e}')
-			else:
-				self.logger.debug(f'📸 Skipping screenshot, include_screenshot={event.include_screenshot}')
-
-			# Tabs info already fetched at the beginning
-
-			# Get target title safely
-			try:
-				self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: Getting page title...')
-				title = await asyncio.wait_for(self.browser_session.get_current_page_title(), timeout=2.0)
-				self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Got title: {title}')
-			except Exception as e:
-				self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Failed to get title: {e}')
-				title = 'Page'
+			tasks: dict[str, asyncio.Task] = {
+				'tabs': asyncio.create_task(self._timed(timing, 'tabs', self.browser_session.get_tabs())),
+				'page_info': asyncio.create_task(self._timed(timing, 'page_info', self._get_page_info())),
+			}
+			if not not_a_meaningful_website:
+				tasks['title'] = asyncio.create_task(self._timed(timing, 'title', get_title()))
+			if build_dom:
+				self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: 🌳 Building DOM tree...')
+				tasks['dom'] = asyncio.create_task(self._timed(timing, 'dom', build_dom_tree()))
+			if take_screenshot:
+				tasks['screenshot'] = asyncio.create_task(self._take_screenshot_after(tasks.get('dom'), timing))
+
+			done, pending = await asyncio.wait(tasks.values(), timeout=BROWSER_STATE_DEADLINE)
+			for task in pending:
+				task.cancel()
+			if pending:
+				await asyncio.wait(pending)
+
+			def result_of(name: str, fallback: Any) -> Any:
+				task = tasks.get(name)
+				if task is None:
+					return fallback
+				if task not in done:
+					self.logger.warning(
+						f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: {name} not ready after {BROWSER_STATE_DEADLINE}s, using fallback'
+					)
+					return fallback
+				if task.exception() is not None:
+					self.logger.debug(
+						f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Failed to get {name}: {type(task.exception()).__name__}: {task.exception()}'
+					)
+					return fallback
+				return task.result()
 
-			# Get comprehensive page info from CDP
-			try:
-				self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: Getting page info from CDP...')
-				page_info = await self._get_page_info()
-				self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Got page info from CDP: {page_info}')
-			except Exception as e:
-				self.logger.debug(
-					f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Failed to get page info from CDP: {e}, using fallback'
-				)
-				# Fallback to default viewport dimensions
-				viewport = self.browser_session.browser_profile.viewport or {'width': 1280, 'height': 720}
-				page_info = PageInfo(
-					viewport_width=viewport['width'],
-					viewport_height=viewport['height'],
-					page_width=viewport['width'],
-					page_height=viewport['height'],
-					scroll_x=0,
-					scroll_y=0,
-					pixels_above=0,
-					pixels_below=0,
-					pixels_left=0,
-					pixels_right=0,
-				)
+			tabs_info = result_of('tabs', [])
+			page_info = result_of('page_info', None) or default_page_info()
+			title = 'Empty Tab' if not_a_meaningful_website else result_of('title', 'Page')
+			content = result_of('dom', None) or SerializedDOMState(_root=None, selector_map={})
+			screenshot_b64 = result_of('screenshot', None)
+			timing['total'] = time.time() - start
+			self.logger.debug(f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: Timing breakdown: {timing}')
 
 			# Check for PDF viewer
-			is_pdf_viewer = page_url.endswith('.pdf') or '/pdf/' in page_url
-
-			# Build and cache the browser state summary
-			if screenshot_b64:
-				self.logger.debug(
-					f'🔍 DOMWatchdog.on_BrowserStateRequestEvent: 📸 Creating BrowserStateSummary with screenshot, length: {len(screenshot_b64)}'
-				)
-			else:
-				self.logger.debug(
-					'🔍 DOMWatchdog.on_BrowserStateRequestEvent: 📸 Creating BrowserStateSummary WITHOUT screenshot'
-				)
+			is_pdf_viewer = not not_a_meaningful_website and (page_url.endswith('.pdf') or '/pdf/' in page_url)
 
 			browser_state = BrowserStateSummary(
 				dom_state=content,
@@ -352,10 +282,12 @@ class DOMWatchdog(BaseWatchdog):
 				browser_errors=[],
 				is_pdf_viewer=is_pdf_viewer,
 				recent_events=self._get_recent_events_str() if event.include_recent_events else None,
+				timing=timing,
 			)
 
-			# Cache the state
-			self.browser_session._cached_browser_state_summary = browser_state
+			# Cache the state (not for empty pages)
+			if not not_a_meaningful_website:
+				self.browser_session._cached_browser_state_summary = browser_state
 
 			self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: ✅ COMPLETED - Returning browser state')
 			return browser_state
@@ -387,8 +319,39 @@ class DOMWatchdog(BaseWatchdog):
 				browser_errors=[str(e)],
 				is_pdf_viewer=False,
 				recent_events=None,
+				timing=timing,
 			)
 
+	@staticmethod
+	async def _timed(timing: dict[str, float], name: str, awaitable: Awaitable[T]) -> T:
+		"""Await `awaitable` and record how many seconds it took in `timing[name]`, also when it fails or is cancelled."""
+		start = time.time()
+		try:
+			return await awaitable
+		finally:
+			timing[name] = time.time() - start
+
+	async def _take_screenshot_after(self, dom_task: asyncio.Task | None, timing: dict[str, float]) -> str:
+		"""Take the screenshot of a state request once the DOM build (which injects the highlights) is over."""
+		if dom_task is not None:
+			await asyncio.wait([dom_task])
+
+		# re-focus top-level page session context
+		assert self.browser_session.agent_focus is not None, 'No current target ID'
+		await self.browser_session.get_or_create_cdp_session(target_id=self.browser_session.agent_focus.target_id, focus=True)
+
+		async def take_screenshot() -> str:
+			self.logger.debug('🔍 DOMWatchdog.on_BrowserStateRequestEvent: 📸 DOM watchdog requesting screenshot')
+			screenshot_event = self.event_bus.dispatch(ScreenshotEvent(full_page=False))
+			# Wait for the event itself to complete (this waits for all handlers), then get the single handler result
+			await screenshot_event
+			screenshot_b64 = await screenshot_event.event_result(raise_if_any=True, raise_if_none=True)
+			if screenshot_b64 is None:
+				raise RuntimeError('Screenshot handler returned no screenshot')
+			return screenshot_b64
+
+		return await self._timed(timing, 'screenshot', take_screenshot())
+
 	async def _build_dom_tree(self, previous_state: SerializedDOMState | None = None) -> SerializedDOMState:
 		"""Internal method to build and serialize DOM tree.
 
@@ -400,18 +363,26 @@ class DOMWatchdog(BaseWatchdog):
 		"""
 		try:
 			self.logger.debug('🔍 DOMWatchdog._build_dom_tree: STARTING DOM tree build')
-			# Remove any existing highlights before building new DOM
-			try:
-				self.logger.debug('🔍 DOMWatchdog._build_dom_tree: Removing existing highlights...')
-				await self.browser_session.remove_highlights()
-				# self.logger.debug('🔍 DOMWatchdog._build_dom_tree: ✅ Highlights removed')
-			except Exception as e:
-				self.logger.debug(f'🔍 DOMWatchdog._build_dom_tree: Failed to remove existing highlights: {e}')
+			# Remove any existing highlights before building new DOM (unless the last screenshot already removed them)
+			focus_target_id = self.browser_session.agent_focus.target_id if self.browser_session.agent_focus else None
+			if focus_target_id not in self.browser_session._targets_without_highlights:
+				try:
+					self.logger.debug('🔍 DOMWatchdog._build_dom_tree: Removing existing highlights...')
+					await self.browser_session.remove_highlights()
+				except Exception as e:
+					self.logger.debug(f'🔍 DOMWatchdog._build_dom_tree: Failed to remove existing highlights: {e}')
 
 			# Create or reuse DOM service
 			if self._dom_service is None:
 				# self.logger.debug('🔍 DOMWatchdog._build_dom_tree: Creating DomService...')
-				self._dom_service = DomService(browser_session=self.browser_session, logger=self.logger)
+				self._dom_service = DomService(
+					browser_session=self.browser_session,
+					logger=self.logger,
+					incremental=self.browser_session.browser_profile.incremental_dom,
+					extraction_backend=self.browser_session.browser_profile.dom_extraction_backend,
+					offload=self.browser_session.browser_profile.dom_offload,
+					occlusion_filtering=self.browser_session.browser_profile.dom_occlusion_filtering,
+				)
 				# self.logger.debug('🔍 DOMWatchdog._build_dom_tree: ✅ DomService created')
 			# else:
 			# self.logger.debug('🔍 DOMWatchdog._build_dom_tree: Reusing existing DomService')
@@ -422,6 +393,8 @@ class DOMWatchdog(BaseWatchdog):
 			self.current_dom_state, self.enhanced_dom_tree, timing_info = await self._dom_service.get_serialized_dom_tree(
 				previous_cached_state=previous_state,
 			)
+			# the incremental DOM reuses and mutates the same root, so the old index would keep serving stale rects
+			self._spatial_index = None
 			end = time.time()
 			self.logger.debug('🔍 DOMWatchdog._build_dom_tree: ✅ DomService.get_serialized_dom_tree completed')
 
@@ -442,6 +415,8 @@ class DOMWatchdog(BaseWatchdog):
 					self.logger.debug('🔍 DOMWatchdog._build_dom_tree: Injecting highlighting script...')
 					from browser_use.dom.debug.highlights import inject_highlighting_script
 
+					if self.browser_session.agent_focus:
+						self.browser_session._targets_without_highlights.discard(self.browser_session.agent_focus.target_id)
 					await inject_highlighting_script(self._dom_service, self.selector_map)
 					self.logger.debug(
 						f'🔍 DOMWatchdog._build_dom_tree: ✅ Injected highlighting for {len(self.selector_map)} elements'
@@ -462,24 +437,28 @@ class DOMWatchdog(BaseWatchdog):
 			)
 			raise
 
-	async def _wait_for_stable_network(self):
-		"""Wait for page stability - simplified for CDP-only branch."""
-		start_time = time.time()
-
-		# Apply minimum wait time first (let page settle)
-		min_wait = self.browser_session.browser_profile.minimum_wait_page_load_time
-		if min_wait > 0:
-			self.logger.debug(f'⏳ Minimum wait: {min_wait}s')
-			await asyncio.sleep(min_wait)
-
-		# Apply network idle wait time (for dynamic content like iframes)
-		network_idle_wait = self.browser_session.browser_profile.wait_for_network_idle_page_load_time
-		if network_idle_wait > 0:
-			self.logger.debug(f'⏳ Network idle wait: {network_idle_wait}s')
-			await asyncio.sleep(network_idle_wait)
+	async def _wait_for_stable_network(self) -> QuiescenceReport | None:
+		"""Wait until the page is quiet: no requests in flight and no DOM mutations for a while.
 
-		elapsed = time.time() - start_time
-		self.logger.debug(f'✅ Page stability wait completed in {elapsed:.2f}s')
+		Uses the browser profile's minimum_wait_page_load_time as the minimum wait, wait_for_network_idle_page_load_time
+		as the quiet time and maximum_wait_page_load_time as the hard cap.
+		"""
+		profile = self.browser_session.browser_profile
+		if not self.browser_session.agent_focus:
+			return None
+		cdp_session = await self.browser_session.get_or_create_cdp_session(
+			target_id=self.browser_session.agent_focus.target_id, focus=True
+		)
+		if self._page_quiescence is None:
+			self._page_quiescence = PageQuiescenceDetector()
+		report = await self._page_quiescence.wait_until_quiet(
+			cdp_session,
+			min_wait=profile.minimum_wait_page_load_time,
+			idle_time=profile.wait_for_network_idle_page_load_time,
+			max_wait=profile.maximum_wait_page_load_time,
+		)
+		self.logger.debug(f'✅ Page stability wait: {report}')
+		return report
 
 	async def _get_page_info(self) -> 'PageInfo':
 		"""Get comprehensive page information using a single CDP call.
@@ -572,11 +551,30 @@ class DOMWatchdog(BaseWatchdog):
 
 		return self.selector_map.get(index) if self.selector_map else None
 
+	def get_spatial_index(self) -> DOMSpatialIndex | None:
+		"""Get the spatial index of the cached DOM tree (for point and viewport queries), None if no tree is cached."""
+		if self.enhanced_dom_tree is None:
+			return None
+		if self._spatial_index is None:
+			self._spatial_index = DOMSpatialIndex(self.enhanced_dom_tree)
+		return self._spatial_index
+
+	async def on_TabClosedEvent(self, event: TabClosedEvent) -> None:
+		"""Stop tracking the network activity of the closed tab's sessions."""
+		if self._page_quiescence is not None:
+			self._page_quiescence.forget_target(event.target_id)
+
+	def forget_cdp_session(self, session_id: str) -> None:
+		"""Stop tracking the network activity of a session that was released or the browser detached (e.g. its target crashed)."""
+		if self._page_quiescence is not None:
+			self._page_quiescence.forget(session_id)
+
 	def clear_cache(self) -> None:
 		"""Clear cached DOM state to force rebuild on next access."""
 		self.selector_map = None
 		self.current_dom_state = None
 		self.enhanced_dom_tree = None
+		self._spatial_index = None
 		# Keep the DOM service instance to reuse its CDP client connection
 
 	def is_file_input(self, element: EnhancedDOMTreeNode) -> bool:
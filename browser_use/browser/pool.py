@@ -0,0 +1,281 @@
+"""
+Pool of pre-launched browsers, leased to agents one at a time.
+
+Starting a `BrowserSession` launches a local browser (free port, binary lookup, spawning it, polling for its CDP URL) and
+connects to it, which takes 1-3s per agent. `BrowserPool` keeps `size` browsers started and connected ahead of time:
+
+	async with BrowserPool(size=4, browser_profile=BrowserProfile(headless=True)) as pool:
+		async with pool.lease() as browser_session:
+			await Agent(task=task, llm=llm, browser_session=browser_session).run()
+
+Before a browser is leased its health is checked (browser and focused page answer CDP within `health_check_timeout`).
+When it's returned it's reset to a clean state: one about:blank tab, no cookies, no cache, no storage of the origins of
+the targets seen during the lease and of the frames still open in its tabs, and the profile's `storage_state` loaded
+again. Browsers are replaced with freshly launched ones after
+`max_uses` leases, when they fail a health check and when they can't be reset (e.g. crashed).
+
+Pooled sessions are started with `keep_alive=True`, so agents leave them running when they finish.
+"""
+
+import asyncio
+import logging
+import shutil
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Self
+
+from browser_use.browser.events import LoadStorageStateEvent, SwitchTabEvent, TabClosedEvent
+from browser_use.browser.profile import BrowserProfile
+from browser_use.browser.session import BrowserSession
+
+logger = logging.getLogger(__name__)
+
+RELAUNCH_MAX_DELAY = 30.0
+"""Seconds between two attempts to launch a replacement browser, at most (the delay doubles from 1s)"""
+
+
+@dataclass(slots=True)
+class BrowserPoolStats:
+	"""How browsers entered and left the pool."""
+
+	launched: int = 0
+	leased: int = 0
+	recycled: int = 0
+	"""Replaced after `max_uses` leases"""
+	unhealthy: int = 0
+	"""Replaced because they failed a health check or couldn't be reset"""
+
+
+class BrowserPool:
+	"""Keeps `size` started browser sessions ready to lease, see the module docstring."""
+
+	def __init__(
+		self,
+		size: int = 2,
+		browser_profile: BrowserProfile | None = None,
+		max_uses: int = 20,
+		health_check_timeout: float = 5.0,
+	):
+		if size < 1 or max_uses < 1:
+			raise ValueError(f'BrowserPool(size={size}, max_uses={max_uses}) needs at least one browser and one use')
+		browser_profile = browser_profile or BrowserProfile()
+		self._shared_user_data_dir = 'user_data_dir' in browser_profile.model_fields_set
+		if self._shared_user_data_dir and size > 1:
+			raise ValueError(
+				f'BrowserPool(size={size}) can not run its browsers in the same user_data_dir={browser_profile.user_data_dir}, '
+				'leave it unset to give each browser its own temporary one'
+			)
+		self.size = size
+		self.browser_profile = browser_profile
+		self.max_uses = max_uses
+		self.health_check_timeout = health_check_timeout
+		self.stats = BrowserPoolStats()
+
+		self._idle: asyncio.Queue[BrowserSession] = asyncio.Queue()
+		self._leased: dict[str, BrowserSession] = {}
+		self._uses: dict[str, int] = {}
+		self._temp_dirs: dict[str, str] = {}
+		self._tasks: set[asyncio.Task] = set()
+		self._closed = False
+
+	async def start(self) -> Self:
+		"""Launch and connect all browsers of the pool concurrently."""
+		await asyncio.gather(*(self._launch_into_pool() for _ in range(self.size)))
+		logger.info(f'🏊 Browser pool ready with {self.size} browsers')
+		return self
+
+	async def __aenter__(self) -> Self:
+		return await self.start()
+
+	async def __aexit__(self, *args) -> None:
+		await self.close()
+
+	@property
+	def idle(self) -> int:
+		"""Browsers ready to lease"""
+		return self._idle.qsize()
+
+	async def acquire(self, timeout: float | None = None) -> BrowserSession:
+		"""Lease a healthy browser, waiting up to `timeout` seconds for one to be returned or launched."""
+		if self._closed:
+			raise RuntimeError('BrowserPool is closed')
+		async with asyncio.timeout(timeout):
+			while True:
+				browser_session = await self._idle.get()
+				try:
+					healthy = await self._is_healthy(browser_session)
+				except BaseException:
+					# timed out or cancelled during the check, it's checked again before it's leased
+					self._idle.put_nowait(browser_session)
+					raise
+				if healthy:
+					break
+				logger.warning(f'🏊 {browser_session} failed its health check, replacing it')
+				self.stats.unhealthy += 1
+				self._replace(browser_session)
+		self._leased[browser_session.id] = browser_session
+		self._uses[browser_session.id] += 1
+		self.stats.leased += 1
+		return browser_session
+
+	async def release(self, browser_session: BrowserSession) -> None:
+		"""Return a leased browser, reset to a clean state (or replaced once it was used `max_uses` times)."""
+		if self._leased.pop(browser_session.id, None) is None:
+			# released twice, or leased before the pool was closed (close() killed it already)
+			logger.debug(f'🏊 {browser_session} is not leased from the pool, ignoring its release')
+			return
+		if self._closed:
+			await self._kill(browser_session)
+			return
+		if self._uses.get(browser_session.id, 0) >= self.max_uses:
+			logger.debug(f'🏊 {browser_session} was leased {self.max_uses} times, replacing it')
+			self.stats.recycled += 1
+			self._replace(browser_session)
+			return
+		try:
+			await asyncio.wait_for(self._reset_to_clean_state(browser_session), timeout=self.health_check_timeout * 3)
+		except Exception as e:
+			logger.warning(f'🏊 Failed to reset {browser_session}, replacing it: {type(e).__name__}: {e}')
+			self.stats.unhealthy += 1
+			self._replace(browser_session)
+			return
+		self._idle.put_nowait(browser_session)
+
+	@asynccontextmanager
+	async def lease(self, timeout: float | None = None) -> AsyncIterator[BrowserSession]:
+		"""Lease a browser for the duration of the `async with` block."""
+		browser_session = await self.acquire(timeout=timeout)
+		try:
+			yield browser_session
+		finally:
+			await self.release(browser_session)
+
+	async def close(self) -> None:
+		"""Kill all browsers, including the leased ones, and stop launching replacements."""
+		self._closed = True
+		for task in list(self._tasks):
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
+		browser_sessions = list(self._leased.values())
+		while not self._idle.empty():
+			browser_sessions.append(self._idle.get_nowait())
+		self._leased.clear()
+		await asyncio.gather(*(self._kill(browser_session) for browser_session in browser_sessions))
+
+	async def _launch(self) -> BrowserSession:
+		if self._shared_user_data_dir:
+			user_data_dir = self.browser_profile.user_data_dir
+		else:
+			user_data_dir = tempfile.mkdtemp(prefix='browser-use-pool-')
+		browser_profile = self.browser_profile.model_copy(update={'keep_alive': True, 'user_data_dir': user_data_dir})
+		browser_session = BrowserSession(browser_profile=browser_profile)
+		if not self._shared_user_data_dir:
+			self._temp_dirs[browser_session.id] = str(user_data_dir)
+		try:
+			await browser_session.start()
+		except BaseException:
+			await self._kill(browser_session)
+			raise
+		self._uses[browser_session.id] = 0
+		self.stats.launched += 1
+		return browser_session
+
+	async def _launch_into_pool(self) -> None:
+		self._idle.put_nowait(await self._launch())
+
+	def _replace(self, browser_session: BrowserSession) -> None:
+		"""Kill a browser and launch its replacement in the background, retrying until one starts."""
+
+		async def replace() -> None:
+			await self._kill(browser_session)
+			delay = 1.0
+			while not self._closed:
+				try:
+					await self._launch_into_pool()
+					return
+				except Exception as e:
+					logger.error(f'🏊 Failed to launch a replacement browser, retrying in {delay:.0f}s: {type(e).__name__}: {e}')
+					await asyncio.sleep(delay)
+					delay = min(delay * 2, RELAUNCH_MAX_DELAY)
+
+		task = asyncio.create_task(replace())
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+
+	async def _kill(self, browser_session: BrowserSession) -> None:
+		try:
+			await browser_session.kill()
+		except Exception as e:
+			logger.debug(f'🏊 Failed to kill {browser_session}: {type(e).__name__}: {e}')
+		self._uses.pop(browser_session.id, None)
+		temp_dir = self._temp_dirs.pop(browser_session.id, None)
+		if temp_dir:
+			shutil.rmtree(temp_dir, ignore_errors=True)
+
+	async def _is_healthy(self, browser_session: BrowserSession) -> bool:
+		"""Whether the browser and its focused page answer CDP commands in time."""
+		cdp_session = browser_session.agent_focus
+		if browser_session._cdp_client_root is None or cdp_session is None:
+			return False
+		try:
+			await asyncio.wait_for(
+				asyncio.gather(
+					browser_session.cdp_client.send.Browser.getVersion(),
+					cdp_session.cdp_client.send.Runtime.evaluate(params={'expression': '1'}, session_id=cdp_session.session_id),
+				),
+				timeout=self.health_check_timeout,
+			)
+		except Exception as e:
+			logger.debug(f'🏊 Health check of {browser_session} failed: {type(e).__name__}: {e}')
+			return False
+		return True
+
+	async def _add_frame_origins(self, browser_session: BrowserSession, target_id: str) -> None:
+		"""Add the origins of all frames of a tab to the origins whose storage is cleared."""
+		try:
+			cdp_session = await browser_session.get_or_create_cdp_session(target_id, focus=False)
+			frame_tree = await cdp_session.cdp_client.send.Page.getFrameTree(session_id=cdp_session.session_id)
+		except Exception as e:
+			logger.debug(f'🏊 Could not read the frames of target {target_id}: {type(e).__name__}: {e}')
+			return
+		stack = [frame_tree['frameTree']]
+		while stack:
+			node = stack.pop()
+			browser_session._target_registry.add_origin(node['frame']['url'])
+			stack.extend(node.get('childFrames') or [])
+
+	async def _reset_to_clean_state(self, browser_session: BrowserSession) -> None:
+		"""Close all tabs but one, blank it, and clear cookies, cache and the storage of the origins visited."""
+		pages = await browser_session._cdp_get_all_pages(include_chrome=True, include_chrome_error=True)
+		# same-process iframes never become targets, their origins are only known from the frame trees of the tabs
+		await asyncio.gather(*(self._add_frame_origins(browser_session, page['targetId']) for page in pages))
+		if pages:
+			keep_target_id = pages[0]['targetId']
+		else:
+			keep_target_id = await browser_session._cdp_create_new_page('about:blank')
+		await browser_session.event_bus.dispatch(SwitchTabEvent(target_id=keep_target_id))
+		for page in pages[1:]:
+			# dispatched before closing, like when the agent closes a tab
+			await browser_session.event_bus.dispatch(TabClosedEvent(target_id=page['targetId']))
+			await browser_session._cdp_close_page(page['targetId'])
+		await browser_session._cdp_navigate('about:blank', keep_target_id)
+
+		cdp_client = browser_session.cdp_client
+		cdp_session = await browser_session.get_or_create_cdp_session(keep_target_id)
+		origins = browser_session._target_registry.origins
+		await asyncio.gather(
+			cdp_client.send.Storage.clearCookies(),
+			cdp_session.cdp_client.send.Network.clearBrowserCache(session_id=cdp_session.session_id),
+			*(cdp_client.send.Storage.clearDataForOrigin(params={'origin': origin, 'storageTypes': 'all'}) for origin in origins),
+		)
+		origins.clear()
+
+		browser_session._cached_browser_state_summary = None
+		browser_session._cached_selector_map.clear()
+		browser_session._downloaded_files.clear()
+		if browser_session._dom_watchdog:
+			browser_session._dom_watchdog.clear_cache()
+		# restore the profile's storage_state (if any) the browser started with
+		await browser_session.event_bus.dispatch(LoadStorageStateEvent())
@@ -90,6 +90,10 @@ class PopupsWatchdog(BaseWatchdog):
 		except Exception as e:
 			self.logger.warning(f'Failed to set up dialog handling for tab {target_id}: {e}')
 
+	def forget_target(self, target_id: str) -> None:
+		"""Set up dialog handling again on the next TabCreatedEvent of a target whose CDP session was released."""
+		self._dialog_listeners_registered.discard(target_id)
+
 	async def on_DialogOpenedEvent(self, event: DialogOpenedEvent) -> None:
 		"""Handle the async closing of JavaScript dialogs."""
 		self.logger.info(f'📋 on_DialogOpenedEvent called with frame_id={event.frame_id} url={event.url} message={event.message}')
@@ -609,12 +609,27 @@ class BrowserProfile(BrowserConnectArgs, BrowserLaunchPersistentContextArgs, Bro
 		default=False,
 		description='Enable cross-origin iframe support (OOPIF/Out-of-Process iframes). When False (default), only same-origin frames are processed to avoid complexity and hanging.',
 	)
+	cdp_flat_sessions: bool = Field(
+		default=False,
+		description='Attach every target through the root CDP connection (flat sessions multiplexed over one WebSocket) instead of opening a dedicated WebSocket per target.',
+	)
+	cdp_session_pool_size: int = Field(
+		default=64,
+		ge=1,
+		description='Maximum number of CDP sessions kept for reuse, the least recently used ones are released beyond that.',
+	)
+	cdp_decode_in_thread_threshold: int | None = Field(
+		default=1024 * 1024,
+		description='CDP messages of at least this many bytes (large DOM snapshots) are JSON-decoded in a worker thread instead of on the event loop, None to always decode on the loop.',
+	)
 
 	# --- Page load/wait timings ---
 	default_navigation_timeout: float | None = Field(default=None, description='Default page navigation timeout.')
 	default_timeout: float | None = Field(default=None, description='Default playwright call timeout.')
 	minimum_wait_page_load_time: float = Field(default=0.25, description='Minimum time to wait before capturing page state.')
-	wait_for_network_idle_page_load_time: float = Field(default=0.5, description='Time to wait for network idle.')
+	wait_for_network_idle_page_load_time: float = Field(
+		default=0.5, description='Time without requests in flight or DOM mutations after which the page counts as loaded.'
+	)
 	maximum_wait_page_load_time: float = Field(default=5.0, description='Maximum time to wait for page load.')
 	wait_between_actions: float = Field(default=0.5, description='Time to wait between actions.')
 
@@ -622,6 +637,22 @@ class BrowserProfile(BrowserConnectArgs, BrowserLaunchPersistentContextArgs, Bro
 	include_dynamic_attributes: bool = Field(default=True, description='Include dynamic attributes in selectors.')
 	highlight_elements: bool = Field(default=True, description='Highlight interactive elements on the page.')
 	viewport_expansion: int = Field(default=500, description='Viewport expansion in pixels for LLM context.')
+	incremental_dom: bool = Field(
+		default=False,
+		description='Keep the DOM tree patched from CDP DOM mutation events between steps and only refetch layout and changed accessibility nodes, instead of refetching the whole document every step (experimental).',
+	)
+	dom_extraction_backend: Literal['cdp', 'js'] = Field(
+		default='cdp',
+		description="How the DOM tree is fetched: 'cdp' builds it from the CDP snapshot, document and accessibility trees, 'js' from one script that walks the DOM in the page and returns a compact pre-filtered tree (no accessibility tree, paint order or cross-origin iframes, experimental).",
+	)
+	dom_offload: Literal['off', 'thread', 'process'] = Field(
+		default='off',
+		description="Build and serialize the DOM tree from the CDP payloads off the event loop: 'process' in a shared process pool, 'thread' in a shared thread pool (only helps on free-threaded Python). Only the serialized state comes back, without the tree. Ignored with incremental_dom and the 'js' extraction backend.",
+	)
+	dom_occlusion_filtering: bool = Field(
+		default=False,
+		description='Leave interactive elements out of the DOM state when other elements are painted over them completely, e.g. page content behind a modal (experimental).',
+	)
 
 	# --- Downloads ---
 	auto_download_pdfs: bool = Field(default=True, description='Automatically download PDFs when navigating to PDF viewer pages.')
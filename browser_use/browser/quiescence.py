@@ -0,0 +1,257 @@
+"""
+Wait until a page is quiet: no requests in flight and no DOM mutations for a while.
+
+`PageQuiescenceDetector.wait_until_quiet` replaces fixed sleeps before reading the browser state. Per CDP session it
+tracks the requests in flight from `Network.requestWillBeSent` / `loadingFinished` / `loadingFailed` and the page
+loading progress from `Page.lifecycleEvent`. Tracking starts with the first wait on a session and is kept on, so the
+requests started by an action are known by the time the next state is requested. DOM mutations are counted in the page
+by a `MutationObserver` that the wait polls, along with the end time of the last finished resource (which also covers
+requests that finished before tracking started).
+
+Requests that never settle on many sites (analytics beacons, long-polls, event streams, websockets) are not waited on.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from cdp_use.cdp.network.events import LoadingFailedEvent, LoadingFinishedEvent, RequestWillBeSentEvent
+from cdp_use.cdp.page.events import LifecycleEventEvent
+from cdp_use.cdp.target import SessionID, TargetID
+
+from browser_use.browser.cdp_client import SessionEventRouter
+
+if TYPE_CHECKING:
+	from browser_use.browser.session import CDPSession
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.05
+"""Seconds between two reads of the page's mutation and resource timestamps"""
+
+LONG_REQUEST_SECONDS = 3.0
+"""Requests in flight for longer than this are assumed to be long-polls and stop blocking quiescence"""
+
+IGNORED_RESOURCE_TYPES = frozenset({'EventSource', 'WebSocket', 'Ping', 'CSPViolationReport', 'Prefetch', 'Media'})
+"""Requests of these types stay open or don't affect the page, they are never waited on"""
+
+IGNORED_URL_PATTERN = re.compile(
+	r'google-analytics\.com|googletagmanager\.com|doubleclick\.net|googlesyndication\.com|facebook\.com/tr'
+	r'|connect\.facebook\.net|hotjar\.com|segment\.(io|com)|mixpanel\.com|amplitude\.com|sentry\.io|newrelic\.com'
+	r'|nr-data\.net|clarity\.ms|fullstory\.com|intercom\.io|/collect\?|/beacon|/analytics|/telemetry|/track'
+)
+"""Analytics and tracking endpoints, their requests are never waited on"""
+
+# Counts DOM mutations with a MutationObserver installed on first use (kept until the next navigation) and returns the
+# milliseconds since the last mutation and since the last resource finished loading. Right after the observer was
+# installed, mutations are unknown until the next read.
+PAGE_ACTIVITY_SCRIPT = """
+(() => {
+	let state = window.__browserUseQuiescence;
+	const installed = !state;
+	if (installed) {
+		state = window.__browserUseQuiescence = { mutations: 0, lastMutation: null };
+		new MutationObserver(records => {
+			state.mutations += records.length;
+			state.lastMutation = performance.now();
+		}).observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+	}
+	const now = performance.now();
+	let lastResource = null;
+	for (const entry of performance.getEntriesByType('resource')) {
+		if (lastResource === null || entry.responseEnd > lastResource) lastResource = entry.responseEnd;
+	}
+	return {
+		installed,
+		readyState: document.readyState,
+		mutations: state.mutations,
+		msSinceMutation: state.lastMutation === null ? null : now - state.lastMutation,
+		msSinceResource: lastResource === null ? null : now - lastResource,
+	};
+})()
+"""
+
+
+def is_ignored_request(url: str, resource_type: str | None) -> bool:
+	return resource_type in IGNORED_RESOURCE_TYPES or IGNORED_URL_PATTERN.search(url) is not None
+
+
+@dataclass(slots=True)
+class QuiescenceReport:
+	"""What a wait for a quiet page waited on."""
+
+	waited: float
+	"""Seconds spent waiting"""
+	reason: str
+	"""'quiet' when the page went quiet, 'timeout' when the hard cap was reached, 'error' when the page couldn't be read"""
+	requests: int = 0
+	"""Requests waited on, in flight at the start or started during the wait (not counting ignored ones)"""
+	mutations: int = 0
+	"""DOM mutations during the wait"""
+	lifecycle_events: list[str] = field(default_factory=list)
+	"""Page lifecycle events during the wait (init, DOMContentLoaded, load, networkIdle, ...)"""
+	pending_requests: list[str] = field(default_factory=list)
+	"""URLs of the requests still blocking when the wait ended"""
+	long_requests: list[str] = field(default_factory=list)
+	"""URLs of the requests in flight for longer than LONG_REQUEST_SECONDS, not waited on"""
+
+	def __str__(self) -> str:
+		summary = f'{self.reason} after {self.waited:.2f}s ({self.requests} requests, {self.mutations} DOM mutations'
+		if self.lifecycle_events:
+			summary += f', lifecycle: {", ".join(self.lifecycle_events)}'
+		summary += ')'
+		if self.pending_requests:
+			summary += f', still loading: {", ".join(self.pending_requests[:5])}'
+		if self.long_requests:
+			summary += f', ignored long requests: {", ".join(self.long_requests[:5])}'
+		return summary
+
+
+class _SessionActivity:
+	"""Network and lifecycle activity of one CDP session, updated from the CDP client's event loop."""
+
+	def __init__(self, target_id: TargetID) -> None:
+		self.target_id = target_id
+		self.in_flight: dict[str, tuple[float, str]] = {}
+		"""Request id -> (start time, url) of the requests that are waited on"""
+		self.last_activity = 0.0
+		"""time.monotonic() of the last request start or end"""
+		self.request_count = 0
+		self.lifecycle_events: list[tuple[float, str]] = []
+
+	def on_request_will_be_sent(self, event: RequestWillBeSentEvent) -> None:
+		url = event['request']['url']
+		if is_ignored_request(url, event.get('type')):
+			return
+		now = time.monotonic()
+		self.in_flight[event['requestId']] = (now, url)
+		self.last_activity = now
+		self.request_count += 1
+
+	def on_request_done(self, event: LoadingFinishedEvent | LoadingFailedEvent) -> None:
+		if self.in_flight.pop(event['requestId'], None) is not None:
+			self.last_activity = time.monotonic()
+
+	def on_lifecycle_event(self, event: LifecycleEventEvent) -> None:
+		now = time.monotonic()
+		self.lifecycle_events.append((now, event['name']))
+		del self.lifecycle_events[:-50]
+		if event['name'] == 'init':
+			# a new document, the requests of the previous one won't finish
+			self.in_flight.clear()
+		self.last_activity = now
+
+
+class PageQuiescenceDetector:
+	"""Waits for pages to go quiet, tracking the network activity of every session it waited on since."""
+
+	def __init__(self) -> None:
+		self._activity: dict[SessionID, _SessionActivity] = {}
+		self._events = SessionEventRouter(
+			self._activity,
+			{
+				'Network.requestWillBeSent': _SessionActivity.on_request_will_be_sent,
+				'Network.loadingFinished': _SessionActivity.on_request_done,
+				'Network.loadingFailed': _SessionActivity.on_request_done,
+				'Page.lifecycleEvent': _SessionActivity.on_lifecycle_event,
+			},
+		)
+
+	async def _track(self, cdp_session: 'CDPSession') -> _SessionActivity:
+		activity = self._activity.get(cdp_session.session_id)
+		if activity is not None:
+			return activity
+
+		client = cdp_session.cdp_client
+		self._events.attach(client)
+		activity = self._activity[cdp_session.session_id] = _SessionActivity(cdp_session.target_id)
+		try:
+			await asyncio.gather(
+				client.send.Network.enable(session_id=cdp_session.session_id),
+				client.send.Page.setLifecycleEventsEnabled(params={'enabled': True}, session_id=cdp_session.session_id),
+			)
+		except BaseException:
+			self.forget(cdp_session.session_id)
+			raise
+		return activity
+
+	def forget(self, session_id: SessionID) -> None:
+		"""Stop tracking a session (e.g. when the browser detached it)."""
+		self._activity.pop(session_id, None)
+
+	def forget_target(self, target_id: TargetID) -> None:
+		"""Stop tracking all sessions of a target (e.g. when its tab was closed)."""
+		for session_id in [session_id for session_id, activity in self._activity.items() if activity.target_id == target_id]:
+			del self._activity[session_id]
+
+	async def wait_until_quiet(
+		self, cdp_session: 'CDPSession', min_wait: float, idle_time: float, max_wait: float
+	) -> QuiescenceReport:
+		"""Wait until no requests are in flight and the DOM hasn't changed for `idle_time` seconds.
+
+		Waits at least `min_wait` and at most `max_wait` seconds (or `min_wait` if that's longer).
+		"""
+		start = time.monotonic()
+		try:
+			activity = await self._track(cdp_session)
+		except Exception as e:
+			logger.debug(f'Failed to track network activity of session {cdp_session.session_id[-4:]}: {type(e).__name__}: {e}')
+			await asyncio.sleep(min_wait)
+			return QuiescenceReport(waited=time.monotonic() - start, reason='error')
+
+		# requests in flight when the wait starts are waited on too
+		requests_before = activity.request_count - len(activity.in_flight)
+		first_mutation_count: int | None = None
+		mutations = 0
+		reason = 'timeout'
+		while True:
+			now = time.monotonic()
+			quiet_for = now - activity.last_activity
+			try:
+				result = await asyncio.wait_for(
+					cdp_session.cdp_client.send.Runtime.evaluate(
+						params={'expression': PAGE_ACTIVITY_SCRIPT, 'returnByValue': True}, session_id=cdp_session.session_id
+					),
+					timeout=max(0.1, max_wait - (now - start)),
+				)
+				page: dict[str, Any] = result.get('result', {}).get('value') or {}
+			except Exception:
+				# the page is navigating (no execution context) or busy
+				page = {}
+
+			if page:
+				if first_mutation_count is None:
+					first_mutation_count = page['mutations']
+				mutations = page['mutations'] - first_mutation_count
+				for ms_since in (page.get('msSinceMutation'), page.get('msSinceResource')):
+					if ms_since is not None:
+						quiet_for = min(quiet_for, ms_since / 1000)
+			if not page or page.get('installed'):
+				quiet_for = 0.0
+
+			now = time.monotonic()
+			blocking = {
+				request_id: url
+				for request_id, (started, url) in activity.in_flight.items()
+				if now - started <= LONG_REQUEST_SECONDS
+			}
+			elapsed = now - start
+			if elapsed >= min_wait and not blocking and page.get('readyState') != 'loading' and quiet_for >= idle_time:
+				reason = 'quiet'
+				break
+			if elapsed >= max(min_wait, max_wait):
+				break
+			await asyncio.sleep(POLL_INTERVAL)
+
+		return QuiescenceReport(
+			waited=time.monotonic() - start,
+			reason=reason,
+			requests=activity.request_count - requests_before,
+			mutations=mutations,
+			lifecycle_events=[name for timestamp, name in activity.lifecycle_events if timestamp >= start],
+			pending_requests=list(blocking.values()),
+			long_requests=[url for request_id, (_, url) in activity.in_flight.items() if request_id not in blocking],
+		)
@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+from collections.abc import Callable
 from typing import Any, Self, cast
 
 import httpx
@@ -9,11 +10,13 @@ from bubus import EventBus
 from cdp_use import CDPClient
 from cdp_use.cdp.network import Cookie
 from cdp_use.cdp.target import SessionID, TargetID
+from cdp_use.cdp.target.events import DetachedFromTargetEvent
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from uuid_extensions import uuid7str
 
 # CDP logging is now handled by setup_logging() in logging_config.py
 # It automatically sets CDP logs to the same level as browser_use logs
+from browser_use.browser.cdp_client import CDPMessageStats, DecodingCDPClient
 from browser_use.browser.events import (
 	AgentFocusChangedEvent,
 	BrowserConnectedEvent,
@@ -33,6 +36,8 @@ from browser_use.browser.events import (
 	TabCreatedEvent,
 )
 from browser_use.browser.profile import BrowserProfile
+from browser_use.browser.session_pool import CDPSessionPool, CDPSessionPoolStats
+from browser_use.browser.target_registry import TargetRegistry
 from browser_use.browser.views import BrowserStateSummary, TabInfo
 from browser_use.dom.views import EnhancedDOMTreeNode, TargetInfo
 from browser_use.utils import _log_pretty_url, is_new_tab_page
@@ -69,6 +74,7 @@ class CDPSession(BaseModel):
 		new_socket: bool = False,
 		cdp_url: str | None = None,
 		domains: list[str] | None = None,
+		cdp_client_factory: Callable[[str], CDPClient] = CDPClient,
 	):
 		"""Create a CDP session for a target.
 
@@ -78,6 +84,7 @@ class CDPSession(BaseModel):
 			new_socket: If True, create a dedicated WebSocket connection for this target
 			cdp_url: CDP URL (required if new_socket is True)
 			domains: List of CDP domains to enable. If None, enables default domains.
+			cdp_client_factory: Creates the client of a dedicated WebSocket connection from the CDP URL
 		"""
 		if new_socket:
 			if not cdp_url:
@@ -88,7 +95,7 @@ class CDPSession(BaseModel):
 			logger = logging.getLogger(f'browser_use.CDPSession.{target_id[-4:]}')
 			logger.info(f'🔌 Creating dedicated WebSocket connection for target {target_id}')
 
-			target_cdp_client = CDPClient(cdp_url)
+			target_cdp_client = cdp_client_factory(cdp_url)
 			await target_cdp_client.start()
 
 			cdp_session = cls(
@@ -211,9 +218,19 @@ class BrowserSession(BaseModel):
 
 	# Mutable private state shared between watchdogs
 	_cdp_client_root: CDPClient | None = PrivateAttr(default=None)
-	_cdp_session_pool: dict[str, CDPSession] = PrivateAttr(default_factory=dict)
+	_cdp_client_factory: Callable[[str], CDPClient] | None = PrivateAttr(default=None)
+	"""Creates the CDP clients of the session from the CDP URL (replaced to record or replay CDP traffic, see cdp_recording.py), defaults to `_create_cdp_client`"""
+	_cdp_message_stats: CDPMessageStats = PrivateAttr(default_factory=CDPMessageStats)
+	_cdp_session_pool: CDPSessionPool = PrivateAttr(default_factory=CDPSessionPool)
+	_cdp_release_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+	_activated_focus: tuple[SessionID, int] | None = PrivateAttr(default=None)
+	"""Session last brought to the foreground by `_activate_cdp_session` and the number of pages opened by then"""
+	_target_registry: TargetRegistry = PrivateAttr(default_factory=TargetRegistry)
+	"""Targets of the browser (url, title, type, opener) kept up to date by discovery events, see target_registry.py"""
 	_cached_browser_state_summary: Any = PrivateAttr(default=None)
 	_cached_selector_map: dict[int, EnhancedDOMTreeNode] = PrivateAttr(default_factory=dict)
+	_targets_without_highlights: set[TargetID] = PrivateAttr(default_factory=set)
+	"""Targets whose highlights were removed since they were last injected (others may show highlights)"""
 	_downloaded_files: list[str] = PrivateAttr(default_factory=list)  # Track files downloaded during this session
 
 	# Watchdogs
@@ -225,6 +242,7 @@ class BrowserSession(BaseModel):
 	_local_browser_watchdog: Any | None = PrivateAttr(default=None)
 	_default_action_watchdog: Any | None = PrivateAttr(default=None)
 	_dom_watchdog: Any | None = PrivateAttr(default=None)
+	_popups_watchdog: Any | None = PrivateAttr(default=None)
 	_screenshot_watchdog: Any | None = PrivateAttr(default=None)
 	_permissions_watchdog: Any | None = PrivateAttr(default=None)
 
@@ -259,10 +277,13 @@ class BrowserSession(BaseModel):
 			if hasattr(session, 'disconnect'):
 				await session.disconnect()
 		self._cdp_session_pool.clear()
+		self._target_registry.clear()
+		self._activated_focus = None
 
 		self._cdp_client_root = None  # type: ignore
 		self._cached_browser_state_summary = None
 		self._cached_selector_map.clear()
+		self._targets_without_highlights.clear()
 		self._downloaded_files.clear()
 
 		self.agent_focus = None
@@ -549,7 +570,10 @@ class BrowserSession(BaseModel):
 		return self.agent_focus.target_id
 
 	async def on_TabClosedEvent(self, event: TabClosedEvent) -> None:
-		"""Handle tab closure - update focus if needed."""
+		"""Handle tab closure - release its CDP session and update focus if needed."""
+		if session := self._cdp_session_pool.close(event.target_id):
+			await self._release_cdp_session(session, detach=False)
+
 		if not self.agent_focus:
 			return
 
@@ -652,6 +676,19 @@ class BrowserSession(BaseModel):
 				)
 			)
 
+	def _create_cdp_client(self, cdp_url: str) -> CDPClient:
+		"""A client decoding with the fastest installed JSON decoder, counting what it receives in `cdp_message_stats`."""
+		return DecodingCDPClient(
+			cdp_url,
+			decode_in_thread_threshold=self.browser_profile.cdp_decode_in_thread_threshold,
+			stats=self._cdp_message_stats,
+		)
+
+	@property
+	def cdp_message_stats(self) -> CDPMessageStats:
+		"""Payload sizes and decode times of the CDP messages received by all connections of this session, per method."""
+		return self._cdp_message_stats
+
 	@property
 	def cdp_client(self) -> CDPClient:
 		"""Get the cached root CDP cdp_session.cdp_client. The client is created and started in self.connect()."""
@@ -681,27 +718,30 @@ class BrowserSession(BaseModel):
 
 		# Check if we already have a session for this target in the pool
 		if target_id in self._cdp_session_pool:
-			session = self._cdp_session_pool[target_id]
+			session = self._cdp_session_pool.touch(target_id)
 			if focus and self.agent_focus.target_id != target_id:
 				self.logger.debug(
 					f'[get_or_create_cdp_session] Switching agent focus from {self.agent_focus.target_id} to {target_id}'
 				)
 				self.agent_focus = session
 			if focus:
-				await session.cdp_client.send.Target.activateTarget(params={'targetId': session.target_id})
-				await session.cdp_client.send.Runtime.runIfWaitingForDebugger(session_id=session.session_id)
+				await self._activate_cdp_session(session)
 			# else:
 			# self.logger.debug(f'[get_or_create_cdp_session] Reusing existing session for {target_id} (focus={focus})')
 			return session
 
 		# If it's the current focus target, return that session
 		if self.agent_focus.target_id == target_id:
-			self._cdp_session_pool[target_id] = self.agent_focus
+			await self._add_cdp_session(self.agent_focus)
 			return self.agent_focus
 
 		# Create new session for this target
-		# Default to True for new sessions (each new target gets its own WebSocket)
-		should_use_new_socket = True if new_socket is None else new_socket
+		# Default to True for new sessions (each new target gets its own WebSocket), in flat session mode all sessions
+		# are multiplexed over the root WebSocket
+		if self.browser_profile.cdp_flat_sessions:
+			should_use_new_socket = False
+		else:
+			should_use_new_socket = True if new_socket is None else new_socket
 		self.logger.debug(
 			f'[get_or_create_cdp_session] Creating new CDP session for target {target_id} (new_socket={should_use_new_socket})'
 		)
@@ -710,8 +750,11 @@ class BrowserSession(BaseModel):
 			target_id,
 			new_socket=should_use_new_socket,
 			cdp_url=self.cdp_url if should_use_new_socket else None,
+			cdp_client_factory=self._cdp_client_factory or self._create_cdp_client,
 		)
-		self._cdp_session_pool[target_id] = session
+		if session.owns_cdp_client:
+			session.cdp_client.register.Target.detachedFromTarget(self._on_target_detached)
+		await self._add_cdp_session(session)
 
 		# Only change agent focus if requested
 		if focus:
@@ -719,8 +762,7 @@ class BrowserSession(BaseModel):
 				f'[get_or_create_cdp_session] Switching agent focus from {self.agent_focus.target_id} to {target_id}'
 			)
 			self.agent_focus = session
-			await session.cdp_client.send.Target.activateTarget(params={'targetId': session.target_id})
-			await session.cdp_client.send.Runtime.runIfWaitingForDebugger(session_id=session.session_id)
+			await self._activate_cdp_session(session)
 		else:
 			self.logger.debug(
 				f'[get_or_create_cdp_session] Created session for {target_id} without changing focus (still on {self.agent_focus.target_id})'
@@ -728,6 +770,66 @@ class BrowserSession(BaseModel):
 
 		return session
 
+	async def _activate_cdp_session(self, session: CDPSession, force: bool = False) -> None:
+		"""Bring the target of a session to the foreground and resume it if it's paused waiting for the debugger.
+
+		Both commands are only sent when the focus moves: to another session (a new session of the same target counts as a
+		move), or away from it because a new tab or popup opened since, which the browser may have brought to the front.
+		Repeated calls for the session that kept the focus are free unless `force` is set.
+		"""
+		focus = (session.session_id, self._target_registry.pages_opened)
+		if not force and focus == self._activated_focus:
+			return
+		await session.cdp_client.send.Target.activateTarget(params={'targetId': session.target_id})
+		await session.cdp_client.send.Runtime.runIfWaitingForDebugger(session_id=session.session_id)
+		self._activated_focus = focus
+
+	async def _add_cdp_session(self, session: CDPSession) -> None:
+		"""Pool a new session, releasing the least recently used ones beyond the pool size (never the agent focus)."""
+		evicted = self._cdp_session_pool.add(
+			session,
+			max_size=self.browser_profile.cdp_session_pool_size,
+			keep=self.agent_focus.target_id if self.agent_focus else None,
+		)
+		for evicted_session in evicted:
+			self.logger.debug(
+				f'[get_or_create_cdp_session] Evicting least recently used CDP session of target {evicted_session.target_id}'
+			)
+			await self._release_cdp_session(evicted_session)
+
+	async def _release_cdp_session(self, session: CDPSession, detach: bool = True) -> None:
+		"""Close the WebSocket of a session that left the pool, or detach it from the shared root WebSocket."""
+		self._forget_cdp_session(session.session_id, session.target_id)
+		try:
+			if session.owns_cdp_client:
+				await session.disconnect()
+			elif detach and self._cdp_client_root is not None and session is not self.agent_focus:
+				await self._cdp_client_root.send.Target.detachFromTarget(params={'sessionId': session.session_id})
+		except Exception as e:
+			self.logger.debug(f'Failed to release CDP session of target {session.target_id}: {type(e).__name__}: {e}')
+
+	def _on_target_detached(self, event: DetachedFromTargetEvent, session_id: SessionID | None = None) -> None:
+		"""Drop sessions the browser detached (e.g. target closed or crashed) from the pool."""
+		session = self._cdp_session_pool.detach(event['sessionId'])
+		self._forget_cdp_session(event['sessionId'], session.target_id if session else event.get('targetId'))
+		if session is not None and session.owns_cdp_client:
+			# called from the message loop of the session's own client, which can't be stopped from here
+			task = asyncio.create_task(session.disconnect())
+			self._cdp_release_tasks.add(task)
+			task.add_done_callback(self._cdp_release_tasks.discard)
+
+	def _forget_cdp_session(self, session_id: SessionID, target_id: TargetID | None) -> None:
+		"""Make the watchdogs drop what they registered for a session that was released or detached."""
+		if self._dom_watchdog:
+			self._dom_watchdog.forget_cdp_session(session_id)
+		if self._popups_watchdog and target_id:
+			self._popups_watchdog.forget_target(target_id)
+
+	@property
+	def cdp_session_pool_stats(self) -> CDPSessionPoolStats:
+		"""Sessions created, reused and removed from the CDP session pool (`self._cdp_session_pool.summary()` for a summary)"""
+		return self._cdp_session_pool.stats
+
 	@property
 	def current_target_id(self) -> str | None:
 		return self.agent_focus.target_id if self.agent_focus else None
@@ -928,21 +1030,22 @@ class BrowserSession(BaseModel):
 			# Convert HTTP URL to WebSocket URL if needed
 
 			# Create and store the CDP client for direct CDP communication
-			self._cdp_client_root = CDPClient(self.cdp_url)
+			self._cdp_client_root = (self._cdp_client_factory or self._create_cdp_client)(self.cdp_url)
 			assert self._cdp_client_root is not None
 			await self._cdp_client_root.start()
 			await self._cdp_client_root.send.Target.setAutoAttach(
 				params={'autoAttach': True, 'waitForDebuggerOnStart': False, 'flatten': True}
 			)
+			self._cdp_client_root.register.Target.detachedFromTarget(self._on_target_detached)
 			self.logger.info('✅ CDP client connected successfully')
 
-			# Get browser targets to find available contexts/pages
-			targets = await self._cdp_client_root.send.Target.getTargets()
+			# Track targets from discovery events from now on, this also reports all existing targets
+			await self._target_registry.start(self._cdp_client_root)
 
 			# Find main browser pages (avoiding iframes, workers, extensions, etc.)
 			page_targets: list[TargetInfo] = [
 				t
-				for t in targets['targetInfos']
+				for t in self._target_registry.targets()
 				if self._is_valid_target(
 					t, include_http=True, include_about=True, include_pages=True, include_iframes=False, include_workers=False
 				)
@@ -971,8 +1074,8 @@ class BrowserSession(BaseModel):
 						)
 						redirected_targets.append(target_id)
 						redirect_sessions[target_id] = redirect_session  # Store for potential reuse
-						# Update the target's URL in our list for later use
-						target['url'] = 'about:blank'
+						# Update the target's URL in our list for later use (a copy, the registry's info is updated by events)
+						page_targets[page_targets.index(target)] = {**target, 'url': 'about:blank'}
 						# Small delay to ensure navigation completes
 						await asyncio.sleep(0.1)
 					except Exception as e:
@@ -1001,7 +1104,7 @@ class BrowserSession(BaseModel):
 				# For the initial connection, we'll use the shared root WebSocket
 				self.agent_focus = await CDPSession.for_target(self._cdp_client_root, target_id, new_socket=False)
 			if self.agent_focus:
-				self._cdp_session_pool[target_id] = self.agent_focus
+				await self._add_cdp_session(self.agent_focus)
 
 			# Verify the session is working
 			try:
@@ -1039,69 +1142,65 @@ class BrowserSession(BaseModel):
 		return self
 
 	async def get_tabs(self) -> list[TabInfo]:
-		"""Get information about all open tabs using CDP Target.getTargetInfo for speed."""
+		"""Get information about all open tabs, from the target registry (titles included, no CDP round-trips)."""
 		tabs = []
 
 		# Safety check - return empty list if browser not connected yet
 		if not self._cdp_client_root:
 			return tabs
 
-		# Get all page targets using CDP
+		if not self._target_registry.is_tracking:
+			return await self._get_tabs_from_browser()
+
+		for page_target in await self._cdp_get_all_pages():
+			tabs.append(self._tab_info(page_target['targetId'], page_target['url'], page_target.get('title', '')))
+		return tabs
+
+	async def _get_tabs_from_browser(self) -> list[TabInfo]:
+		"""Get information about all open tabs using CDP Target.getTargetInfo, for clients without target discovery."""
+		tabs = []
 		pages = await self._cdp_get_all_pages()
 
 		for i, page_target in enumerate(pages):
 			target_id = page_target['targetId']
 			url = page_target['url']
 
-			# Try to get the title directly from Target.getTargetInfo - much faster!
 			# The initial getTargets() doesn't include title, but getTargetInfo does
 			try:
 				target_info = await self.cdp_client.send.Target.getTargetInfo(params={'targetId': target_id})
-				# The title is directly available in targetInfo
 				title = target_info.get('targetInfo', {}).get('title', '')
-
-				# Skip JS execution for chrome:// pages and new tab pages
-				if is_new_tab_page(url) or url.startswith('chrome://'):
-					# Use URL as title for chrome pages, or mark new tabs as unusable
-					if is_new_tab_page(url):
-						title = 'ignore this tab and do not use it'
-					elif not title:
-						# For chrome:// pages without a title, use the URL itself
-						title = url
-
-				# Special handling for PDF pages without titles
-				if (not title or title == '') and (url.endswith('.pdf') or 'pdf' in url):
-					# PDF pages might not have a title, use URL filename
-					try:
-						from urllib.parse import urlparse
-
-						filename = urlparse(url).path.split('/')[-1]
-						if filename:
-							title = filename
-					except Exception:
-						pass
-
 			except Exception as e:
-				# Fallback to basic title handling
 				self.logger.debug(f'⚠️ Failed to get target info for tab #{i}: {_log_pretty_url(url)} - {type(e).__name__}')
+				title = ''
 
-				if is_new_tab_page(url):
-					title = 'ignore this tab and do not use it'
-				elif url.startswith('chrome://'):
-					title = url
-				else:
-					title = ''
-
-			tab_info = TabInfo(
-				target_id=target_id,
-				url=url,
-				title=title,
-				parent_target_id=None,
-			)
-			tabs.append(tab_info)
+			tabs.append(self._tab_info(target_id, url, title))
 
 		return tabs
 
+	@staticmethod
+	def _tab_info(target_id: TargetID, url: str, title: str) -> TabInfo:
+		# Skip JS execution for chrome:// pages and new tab pages
+		if is_new_tab_page(url):
+			# mark new tabs as unusable
+			title = 'ignore this tab and do not use it'
+		elif url.startswith('chrome://') and not title:
+			# For chrome:// pages without a title, use the URL itself
+			title = url
+
+		# Special handling for PDF pages without titles
+		if not title and (url.endswith('.pdf') or 'pdf' in url):
+			# PDF pages might not have a title, use URL filename
+			try:
+				from urllib.parse import urlparse
+
+				filename = urlparse(url).path.split('/')[-1]
+				if filename:
+					title = filename
+			except Exception:
+				pass
+
+		return TabInfo(target_id=target_id, url=url, title=title, parent_target_id=None)
+
 	# ========== ID Lookup Methods ==========
 
 	async def get_current_target_info(self) -> TargetInfo | None:
@@ -1109,6 +1208,9 @@ class BrowserSession(BaseModel):
 		if not self.agent_focus or not self.agent_focus.target_id:
 			return None
 
+		if self._target_registry.is_tracking:
+			return self._target_registry.get(self.agent_focus.target_id)
+
 		targets = await self.cdp_client.send.Target.getTargets()
 		for target in targets.get('targetInfos', []):
 			if target.get('targetId') == self.agent_focus.target_id:
@@ -1181,13 +1283,13 @@ class BrowserSession(BaseModel):
 
 	async def get_target_id_from_url(self, url: str) -> TargetID:
 		"""Get the TargetID from a URL."""
-		all_targets = await self.cdp_client.send.Target.getTargets()
-		for target in all_targets.get('targetInfos', []):
+		all_targets = await self._cdp_get_all_targets()
+		for target in all_targets:
 			if target['url'] == url and target['type'] == 'page':
 				return target['targetId']
 
 		# still not found, try substring match as fallback
-		for target in all_targets.get('targetInfos', []):
+		for target in all_targets:
 			if url in target['url'] and target['type'] == 'page':
 				return target['targetId']
 
@@ -1195,7 +1297,6 @@ class BrowserSession(BaseModel):
 
 	async def get_most_recently_opened_target_id(self) -> TargetID:
 		"""Get the most recently opened target ID."""
-		all_targets = await self.cdp_client.send.Target.getTargets()
 		return (await self._cdp_get_all_pages())[-1]['targetId']
 
 	def is_file_input(self, element: Any) -> bool:
@@ -1266,6 +1367,8 @@ class BrowserSession(BaseModel):
 				params={'expression': script, 'returnByValue': True}, session_id=cdp_session.session_id
 			)
 
+			self._targets_without_highlights.add(cdp_session.target_id)
+
 			# Log the result for debugging
 			if result and 'result' in result and 'value' in result['result']:
 				removed_count = result['result']['value'].get('removed', 0)
@@ -1287,6 +1390,7 @@ class BrowserSession(BaseModel):
 				await cdp_session.cdp_client.send.Runtime.evaluate(
 					params={'expression': simple_script}, session_id=cdp_session.session_id
 				)
+				self._targets_without_highlights.add(cdp_session.target_id)
 				self.logger.debug('Fallback highlight removal completed')
 			except Exception as fallback_error:
 				self.logger.error(f'Both highlight removal attempts failed: {fallback_error}')
@@ -1313,15 +1417,14 @@ class BrowserSession(BaseModel):
 		include_chrome_extensions: bool = False,
 		include_chrome_error: bool = False,
 	) -> list[TargetInfo]:
-		"""Get all browser pages/tabs using CDP Target.getTargets."""
+		"""Get all browser pages/tabs from the target registry (or CDP Target.getTargets before it's tracking)."""
 		# Safety check - return empty list if browser not connected yet
 		if not self._cdp_client_root:
 			return []
-		targets = await self.cdp_client.send.Target.getTargets()
 		# Filter for valid page/tab targets only
 		return [
 			t
-			for t in targets.get('targetInfos', [])
+			for t in await self._cdp_get_all_targets()
 			if self._is_valid_target(
 				t,
 				include_http=include_http,
@@ -1335,6 +1438,13 @@ class BrowserSession(BaseModel):
 			)
 		]
 
+	async def _cdp_get_all_targets(self) -> list[TargetInfo]:
+		"""Get all browser targets, oldest first."""
+		if self._target_registry.is_tracking:
+			return self._target_registry.targets()
+		targets = await self.cdp_client.send.Target.getTargets()
+		return targets.get('targetInfos', [])
+
 	async def _cdp_create_new_page(self, url: str = 'about:blank', background: bool = False, new_window: bool = False) -> str:
 		"""Create a new page/tab using CDP Target.createTarget. Returns target ID."""
 		# Use the root CDP client to create tabs at the browser level
@@ -1540,6 +1650,7 @@ class BrowserSession(BaseModel):
 		all_targets = targets
 
 		# First pass: collect frame trees from ALL targets
+		frame_tree_targets: list[tuple[TargetInfo, CDPSession]] = []
 		for target in all_targets:
 			target_id = target['targetId']
 
@@ -1560,85 +1671,97 @@ class BrowserSession(BaseModel):
 
 			if cdp_session:
 				target_sessions[target_id] = cdp_session.session_id
+				frame_tree_targets.append((target, cdp_session))
 
-				try:
-					# Try to get frame tree (not all target types support this)
-					frame_tree_result = await cdp_session.cdp_client.send.Page.getFrameTree(session_id=cdp_session.session_id)
-
-					# Process the frame tree recursively
-					def process_frame_tree(node, parent_frame_id=None):
-						"""Recursively process frame tree and add to all_frames."""
-						frame = node.get('frame', {})
-						current_frame_id = frame.get('id')
-
-						if current_frame_id:
-							# For iframe targets, check if the frame has a parentId field
-							# This indicates it's an OOPIF with a parent in another target
-							actual_parent_id = frame.get('parentId') or parent_frame_id
-
-							# Create frame info with all CDP response data plus our additions
-							frame_info = {
-								**frame,  # Include all original frame data: id, url, parentId, etc.
-								'frameTargetId': target_id,  # Target that can access this frame
-								'parentFrameId': actual_parent_id,  # Use parentId from frame if available
-								'childFrameIds': [],  # Will be populated below
-								'isCrossOrigin': False,  # Will be determined based on context
-								'isValidTarget': self._is_valid_target(
-									target,
-									include_http=True,
-									include_about=True,
-									include_pages=True,
-									include_iframes=True,
-									include_workers=False,
-									include_chrome=False,  # chrome://newtab, chrome://settings, etc. are not valid frames we can control (for sanity reasons)
-									include_chrome_extensions=False,  # chrome-extension://
-									include_chrome_error=False,  # chrome-error://  (e.g. when iframes fail to load or are blocked by uBlock Origin)
-								),
-							}
-
-							# Check if frame is cross-origin based on crossOriginIsolatedContextType
-							cross_origin_type = frame.get('crossOriginIsolatedContextType')
-							if cross_origin_type and cross_origin_type != 'NotIsolated':
-								frame_info['isCrossOrigin'] = True
-
-							# For iframe targets, the frame itself is likely cross-origin
-							if target.get('type') == 'iframe':
-								frame_info['isCrossOrigin'] = True
+		# Try to get the frame trees (not all target types support this), concurrently as the targets are independent
+		frame_tree_results = await asyncio.gather(
+			*(
+				cdp_session.cdp_client.send.Page.getFrameTree(session_id=cdp_session.session_id)
+				for _, cdp_session in frame_tree_targets
+			),
+			return_exceptions=True,
+		)
 
-							# Skip cross-origin frames if support is disabled
-							if not include_cross_origin and frame_info.get('isCrossOrigin'):
-								return  # Skip this frame and its children
+		for (target, _), frame_tree_result in zip(frame_tree_targets, frame_tree_results):
+			target_id = target['targetId']
+			try:
+				if isinstance(frame_tree_result, BaseException):
+					raise frame_tree_result
+
+				# Process the frame tree recursively
+				def process_frame_tree(node, parent_frame_id=None):
+					"""Recursively process frame tree and add to all_frames."""
+					frame = node.get('frame', {})
+					current_frame_id = frame.get('id')
+
+					if current_frame_id:
+						# For iframe targets, check if the frame has a parentId field
+						# This indicates it's an OOPIF with a parent in another target
+						actual_parent_id = frame.get('parentId') or parent_frame_id
+
+						# Create frame info with all CDP response data plus our additions
+						frame_info = {
+							**frame,  # Include all original frame data: id, url, parentId, etc.
+							'frameTargetId': target_id,  # Target that can access this frame
+							'parentFrameId': actual_parent_id,  # Use parentId from frame if available
+							'childFrameIds': [],  # Will be populated below
+							'isCrossOrigin': False,  # Will be determined based on context
+							'isValidTarget': self._is_valid_target(
+								target,
+								include_http=True,
+								include_about=True,
+								include_pages=True,
+								include_iframes=True,
+								include_workers=False,
+								include_chrome=False,  # chrome://newtab, chrome://settings, etc. are not valid frames we can control (for sanity reasons)
+								include_chrome_extensions=False,  # chrome-extension://
+								include_chrome_error=False,  # chrome-error://  (e.g. when iframes fail to load or are blocked by uBlock Origin)
+							),
+						}
+
+						# Check if frame is cross-origin based on crossOriginIsolatedContextType
+						cross_origin_type = frame.get('crossOriginIsolatedContextType')
+						if cross_origin_type and cross_origin_type != 'NotIsolated':
+							frame_info['isCrossOrigin'] = True
+
+						# For iframe targets, the frame itself is likely cross-origin
+						if target.get('type') == 'iframe':
+							frame_info['isCrossOrigin'] = True
+
+						# Skip cross-origin frames if support is disabled
+						if not include_cross_origin and frame_info.get('isCrossOrigin'):
+							return  # Skip this frame and its children
+
+						# Add child frame IDs (note: OOPIFs won't appear here)
+						child_frames = node.get('childFrames', [])
+						for child in child_frames:
+							child_frame = child.get('frame', {})
+							child_frame_id = child_frame.get('id')
+							if child_frame_id:
+								frame_info['childFrameIds'].append(child_frame_id)
+
+						# Store or merge frame info
+						if current_frame_id in all_frames:
+							# Frame already seen from another target, merge info
+							existing = all_frames[current_frame_id]
+							# If this is an iframe target, it has direct access to the frame
+							if target.get('type') == 'iframe':
+								existing['frameTargetId'] = target_id
+								existing['isCrossOrigin'] = True
+						else:
+							all_frames[current_frame_id] = frame_info
 
-							# Add child frame IDs (note: OOPIFs won't appear here)
-							child_frames = node.get('childFrames', [])
+						# Process child frames recursively (only if we're not skipping this frame)
+						if include_cross_origin or not frame_info.get('isCrossOrigin'):
 							for child in child_frames:
-								child_frame = child.get('frame', {})
-								child_frame_id = child_frame.get('id')
-								if child_frame_id:
-									frame_info['childFrameIds'].append(child_frame_id)
-
-							# Store or merge frame info
-							if current_frame_id in all_frames:
-								# Frame already seen from another target, merge info
-								existing = all_frames[current_frame_id]
-								# If this is an iframe target, it has direct access to the frame
-								if target.get('type') == 'iframe':
-									existing['frameTargetId'] = target_id
-									existing['isCrossOrigin'] = True
-							else:
-								all_frames[current_frame_id] = frame_info
-
-							# Process child frames recursively (only if we're not skipping this frame)
-							if include_cross_origin or not frame_info.get('isCrossOrigin'):
-								for child in child_frames:
-									process_frame_tree(child, current_frame_id)
-
-					# Process the entire frame tree
-					process_frame_tree(frame_tree_result.get('frameTree', {}))
-
-				except Exception as e:
-					# Target doesn't support Page domain or has no frames
-					self.logger.debug(f'Failed to get frame tree for target {target_id}: {e}')
+								process_frame_tree(child, current_frame_id)
+
+				# Process the entire frame tree
+				process_frame_tree(frame_tree_result.get('frameTree', {}))
+
+			except Exception as e:
+				# Target doesn't support Page domain or has no frames
+				self.logger.debug(f'Failed to get frame tree for target {target_id}: {e}')
 
 		# Second pass: populate backend node IDs and parent target IDs
 		# Only do this if cross-origin support is enabled
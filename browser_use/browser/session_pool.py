@@ -0,0 +1,88 @@
+"""
+Least recently used pool of the CDP sessions of a browser session, by target id.
+
+Sessions used to stay in the pool until the browser session was reset, including the WebSocket of every session that
+had its own connection, so long runs that open and close many tabs leaked sockets and memory. Sessions now leave the
+pool when their tab is closed, when the browser detaches them, and (least recently used first) when the pool grows
+beyond its size. The caller releases what was removed (`BrowserSession._release_cdp_session`).
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from cdp_use.cdp.target import SessionID, TargetID
+
+if TYPE_CHECKING:
+	from browser_use.browser.session import CDPSession
+
+
+@dataclass(slots=True)
+class CDPSessionPoolStats:
+	"""How sessions entered and left the pool."""
+
+	created: int = 0
+	reused: int = 0
+	evicted: int = 0
+	"""Removed because the pool was full (least recently used first)"""
+	closed: int = 0
+	"""Removed because their tab was closed"""
+	detached: int = 0
+	"""Removed because the browser detached them (target gone or crashed)"""
+
+
+class CDPSessionPool(OrderedDict[TargetID, 'CDPSession']):
+	"""CDP sessions by target id, least recently used first."""
+
+	def __init__(self) -> None:
+		super().__init__()
+		self.stats = CDPSessionPoolStats()
+
+	def touch(self, target_id: TargetID) -> 'CDPSession':
+		"""Return the session of `target_id` and mark it as the most recently used."""
+		self.move_to_end(target_id)
+		self.stats.reused += 1
+		return self[target_id]
+
+	def add(self, session: 'CDPSession', max_size: int, keep: TargetID | None = None) -> list['CDPSession']:
+		"""Add a new session, returns the sessions evicted to stay within `max_size` (never `session` or `keep`'s)."""
+		self[session.target_id] = session
+		self.move_to_end(session.target_id)
+		self.stats.created += 1
+
+		evicted = []
+		for target_id in list(self):
+			if len(self) <= max_size:
+				break
+			if target_id in (session.target_id, keep):
+				continue
+			evicted.append(self.pop(target_id))
+			self.stats.evicted += 1
+		return evicted
+
+	def close(self, target_id: TargetID) -> 'CDPSession | None':
+		"""Remove the session of a closed tab, or one that is replaced by a new session."""
+		session = self.pop(target_id, None)
+		if session is not None:
+			self.stats.closed += 1
+		return session
+
+	def detach(self, session_id: SessionID) -> 'CDPSession | None':
+		"""Remove the session the browser detached, if it's in the pool."""
+		for target_id, session in self.items():
+			if session.session_id == session_id:
+				self.stats.detached += 1
+				return self.pop(target_id)
+		return None
+
+	@property
+	def open_sockets(self) -> int:
+		"""WebSocket connections owned by pooled sessions (not counting the root connection they may share)"""
+		return sum(1 for session in self.values() if session.owns_cdp_client)
+
+	def summary(self) -> str:
+		stats = self.stats
+		return (
+			f'{len(self)} CDP sessions ({self.open_sockets} with their own socket), {stats.created} created, {stats.reused} reused, '
+			f'{stats.evicted} evicted, {stats.closed} closed, {stats.detached} detached'
+		)
@@ -0,0 +1,82 @@
+"""
+In-memory view of the browser's targets, kept up to date by CDP target discovery events.
+
+Listing tabs used to cost a `Target.getTargets` round-trip plus one `Target.getTargetInfo` per tab (for the titles),
+on every browser state request. With `Target.setDiscoverTargets` the browser reports every existing target once and
+then pushes `Target.targetCreated` / `targetInfoChanged` / `targetDestroyed` as they happen, each with the full
+`TargetInfo` (url, title, type, opener). `TargetRegistry` applies those events, so tab lookups are local reads.
+"""
+
+import logging
+from urllib.parse import urlsplit
+
+from cdp_use import CDPClient
+from cdp_use.cdp.target.events import TargetCreatedEvent, TargetDestroyedEvent, TargetInfoChangedEvent
+from cdp_use.cdp.target.types import TargetID, TargetInfo
+
+logger = logging.getLogger(__name__)
+
+
+class TargetRegistry:
+	"""Target infos by target id, in the order the targets were reported (oldest first)."""
+
+	def __init__(self) -> None:
+		self._targets: dict[TargetID, TargetInfo] = {}
+		self.is_tracking = False
+		"""True once discovery is on, until then the registry is empty and callers have to ask the browser"""
+		self.pages_opened = 0
+		"""Pages created since discovery was turned on (new tabs and popups, which may take the foreground)"""
+		self.origins: set[str] = set()
+		"""http(s) origins of all the urls the targets were reported at (and frames added by pool.py), to clear their storage"""
+
+	async def start(self, cdp_client: CDPClient) -> None:
+		"""Register the discovery event handlers on the browser level `cdp_client` and turn discovery on.
+
+		The browser reports all existing targets with `targetCreated` events before it answers `setDiscoverTargets`.
+		"""
+		cdp_client.register.Target.targetCreated(self.on_target_created)
+		cdp_client.register.Target.targetInfoChanged(self.on_target_info_changed)
+		cdp_client.register.Target.targetDestroyed(self.on_target_destroyed)
+		await cdp_client.send.Target.setDiscoverTargets(params={'discover': True})
+		self.is_tracking = True
+		logger.debug(f'Tracking {len(self._targets)} targets from discovery events')
+
+	def clear(self) -> None:
+		self._targets.clear()
+		self.is_tracking = False
+		self.pages_opened = 0
+		self.origins.clear()
+
+	def on_target_created(self, event: TargetCreatedEvent, session_id: str | None = None) -> None:
+		target_info = event['targetInfo']
+		self._targets[target_info['targetId']] = target_info
+		self.add_origin(target_info['url'])
+		if self.is_tracking and target_info['type'] == 'page':
+			self.pages_opened += 1
+
+	def on_target_info_changed(self, event: TargetInfoChangedEvent, session_id: str | None = None) -> None:
+		# updated in place, a target keeps its position
+		target_info = event['targetInfo']
+		self._targets[target_info['targetId']] = target_info
+		self.add_origin(target_info['url'])
+
+	def on_target_destroyed(self, event: TargetDestroyedEvent, session_id: str | None = None) -> None:
+		self._targets.pop(event['targetId'], None)
+
+	def add_origin(self, url: str) -> None:
+		if url.startswith(('http://', 'https://')):
+			parts = urlsplit(url)
+			self.origins.add(f'{parts.scheme}://{parts.netloc}')
+
+	def get(self, target_id: TargetID) -> TargetInfo | None:
+		return self._targets.get(target_id)
+
+	def targets(self) -> list[TargetInfo]:
+		"""All known targets, oldest first"""
+		return list(self._targets.values())
+
+	def __len__(self) -> int:
+		return len(self._targets)
+
+	def __contains__(self, target_id: object) -> bool:
+		return target_id in self._targets
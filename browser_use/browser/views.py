@@ -84,6 +84,7 @@ class BrowserStateSummary:
 	browser_errors: list[str] = field(default_factory=list)
 	is_pdf_viewer: bool = False  # Whether the current page is a PDF viewer
 	recent_events: str | None = None  # Text summary of recent browser events
+	timing: dict[str, float] = field(default_factory=dict, repr=False)  # Seconds each part of the state took to get
 
 
 @dataclass
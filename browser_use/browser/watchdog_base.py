@@ -108,6 +108,8 @@ class BaseWatchdog(BaseModel):
 				)
 				event_str = f'#{event.event_id[-4:]}'
 				time_start = time.time()
+				# CDP round-trips during the handler, including nested events (and any handler running concurrently)
+				cdp_calls_start = browser_session.cdp_message_stats.commands_sent
 				watchdog_and_handler_str = f'[{watchdog_class_name}.{actual_handler.__name__}({event_str})]'.ljust(54)
 				browser_session.logger.debug(
 					f'{cyan}🚌 {watchdog_and_handler_str} ⏳ Starting...      {reset} {parent} {grandparent}'
@@ -123,20 +125,22 @@ class BaseWatchdog(BaseModel):
 					# just for debug logging, not used for anything else
 					time_end = time.time()
 					time_elapsed = time_end - time_start
+					cdp_calls = browser_session.cdp_message_stats.commands_sent - cdp_calls_start
 					result_summary = '' if result is None else f' ➡️ {magenta}<{type(result).__name__}>{reset}'
 					parents_summary = f' {parent}'.replace('↲  triggered by ', f'⤴  {green}returned to  {cyan}').replace(
 						'👈 by Agent', f'👉 {green}returned to  {magenta}Agent{reset}'
 					)
 					browser_session.logger.debug(
-						f'{green}🚌 {watchdog_and_handler_str} ✅ Succeeded ({time_elapsed:.2f}s){reset}{result_summary}{parents_summary}'
+						f'{green}🚌 {watchdog_and_handler_str} ✅ Succeeded ({time_elapsed:.2f}s, {cdp_calls} CDP calls){reset}{result_summary}{parents_summary}'
 					)
 					return result
 				except Exception as e:
 					time_end = time.time()
 					time_elapsed = time_end - time_start
+					cdp_calls = browser_session.cdp_message_stats.commands_sent - cdp_calls_start
 					original_error = e
 					browser_session.logger.error(
-						f'{red}🚌 {watchdog_and_handler_str} ❌ Failed ({time_elapsed:.2f}s): {type(e).__name__}: {e}{reset}'
+						f'{red}🚌 {watchdog_and_handler_str} ❌ Failed ({time_elapsed:.2f}s, {cdp_calls} CDP calls): {type(e).__name__}: {e}{reset}'
 					)
 
 					# attempt to repair potentially crashed CDP session
@@ -147,13 +151,12 @@ class BaseWatchdog(BaseModel):
 							browser_session.logger.debug(
 								f'{yellow}🚌 {watchdog_and_handler_str} ⚠️ Re-foregrounding target to try and recover crashed CDP session\n\t{browser_session.agent_focus}{reset}'
 							)
-							del browser_session._cdp_session_pool[browser_session.agent_focus.target_id]
+							if stale_session := browser_session._cdp_session_pool.close(browser_session.agent_focus.target_id):
+								await browser_session._release_cdp_session(stale_session)
 							browser_session.agent_focus = await browser_session.get_or_create_cdp_session(
-								target_id=browser_session.agent_focus.target_id, new_socket=True
-							)
-							await browser_session.agent_focus.cdp_client.send.Target.activateTarget(
-								params={'targetId': browser_session.agent_focus.target_id}
+								target_id=browser_session.agent_focus.target_id, focus=False, new_socket=True
 							)
+							await browser_session._activate_cdp_session(browser_session.agent_focus, force=True)
 						else:
 							await browser_session.get_or_create_cdp_session(target_id=None, new_socket=True, focus=True)
 					except Exception as sub_error:
@@ -0,0 +1,352 @@
+"""
+Columnar (NumPy-backed) representation of CDP DOMSnapshot data.
+
+`build_snapshot_lookup` creates one `EnhancedSnapshotNode` (plus up to three `DOMRect`s and a styles dict) per node.
+This module stores the same data as contiguous arrays per document instead:
+- computed styles are interned twice: style values are indices into the snapshot's string table, and every distinct
+  combination of style values is stored once in a shared style table that rows point into
+- client/scroll rects only exist for a small share of nodes, so they are stored sparsely
+Whole-page checks such as scrollability, CSS visibility and bounding box intersection can then run vectorized.
+`DomService` uses `style_visible_backend_node_ids` to skip the per node visibility check of hidden nodes.
+
+NumPy is an optional dependency: `pip install "browser-use[dom]"`.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from cdp_use.cdp.domsnapshot.commands import CaptureSnapshotReturns
+
+from browser_use.dom.enhanced_snapshot import REQUIRED_COMPUTED_STYLES
+from browser_use.dom.views import DOMRect, EnhancedSnapshotNode
+
+if TYPE_CHECKING:
+	import numpy as np
+
+STYLE_COLUMNS = {name: i for i, name in enumerate(REQUIRED_COMPUTED_STYLES)}
+SCROLLABLE_OVERFLOW_VALUES = ('auto', 'scroll', 'overlay')
+SCROLLABLE_TAGS = ('div', 'main', 'section', 'article', 'aside', 'body', 'html')
+
+
+def _import_numpy():
+	try:
+		import numpy as np
+	except ImportError:
+		raise ImportError('`numpy` not installed. Please install using `pip install "browser-use[dom]"` or `pip install numpy`')
+	return np
+
+
+@dataclass(slots=True)
+class ColumnarDocumentSnapshot:
+	"""All snapshot data of a single document, one row per snapshot node."""
+
+	backend_node_ids: 'np.ndarray'
+	"""int64[n]"""
+	sorted_backend_node_ids: 'np.ndarray'
+	"""int64[n] sorted copy of `backend_node_ids`, used for lookups by backend node id"""
+	sorted_rows: 'np.ndarray'
+	"""int32[n] row of every entry of `sorted_backend_node_ids`"""
+	node_names: 'np.ndarray'
+	"""int32[n] index into `ColumnarSnapshot.strings`, -1 if unknown"""
+	is_clickable: 'np.ndarray'
+	"""bool[n]"""
+	has_layout: 'np.ndarray'
+	"""bool[n], False for nodes without a layout tree node"""
+	bounds: 'np.ndarray'
+	"""float64[n, 4] (x, y, width, height) in CSS pixels, NaN if missing"""
+	paint_orders: 'np.ndarray'
+	"""int32[n], -1 if missing"""
+	style_rows: 'np.ndarray'
+	"""int32[n] row in `ColumnarSnapshot.style_table`, -1 (the all-missing sentinel row) if no styles"""
+
+	rect_rows: 'np.ndarray'
+	"""int32[m] sorted rows that have client rects and/or scroll rects"""
+	client_rects: 'np.ndarray'
+	"""float64[m, 4] client rects of `rect_rows`, NaN if missing"""
+	scroll_rects: 'np.ndarray'
+	"""float64[m, 4] scroll rects of `rect_rows`, NaN if missing"""
+
+	has_clickable_data: bool = True
+	"""False if the snapshot had no `isClickable` data for this document"""
+
+	def __len__(self) -> int:
+		return len(self.backend_node_ids)
+
+	@property
+	def nbytes(self) -> int:
+		return sum(
+			column.nbytes
+			for column in (
+				self.backend_node_ids,
+				self.sorted_backend_node_ids,
+				self.sorted_rows,
+				self.node_names,
+				self.is_clickable,
+				self.has_layout,
+				self.bounds,
+				self.paint_orders,
+				self.style_rows,
+				self.rect_rows,
+				self.client_rects,
+				self.scroll_rects,
+			)
+		)
+
+	def find_row(self, backend_node_id: int) -> int | None:
+		"""Last row of the given backend node id in O(log n) (like `build_snapshot_lookup`), None if it is not part of this document."""
+		position = int(self.sorted_backend_node_ids.searchsorted(backend_node_id, side='right')) - 1
+		if position >= 0 and self.sorted_backend_node_ids[position] == backend_node_id:
+			return int(self.sorted_rows[position])
+		return None
+
+
+@dataclass(slots=True)
+class ColumnarSnapshot:
+	"""Columnar snapshot of all documents returned by `DOMSnapshot.captureSnapshot`."""
+
+	strings: tuple[str, ...]
+	style_table: 'np.ndarray'
+	"""int32[k + 1, len(REQUIRED_COMPUTED_STYLES)] distinct style rows (string indices, -1 if missing), last row all -1"""
+	documents: list[ColumnarDocumentSnapshot]
+
+	@property
+	def nbytes(self) -> int:
+		return self.style_table.nbytes + sum(document.nbytes for document in self.documents)
+
+	def string_ids(self, values: tuple[str, ...]) -> list[int]:
+		"""Indices of the given values in the string table (case insensitive)."""
+		return [i for i, string in enumerate(self.strings) if string.lower() in values]
+
+	def styles(self, document: ColumnarDocumentSnapshot, style: str) -> 'np.ndarray':
+		"""int32[n] string index of the computed `style` of every row, -1 if missing."""
+		return self.style_table[document.style_rows, STYLE_COLUMNS[style]]
+
+	# region - vectorized checks
+
+	def style_equals_mask(self, document: ColumnarDocumentSnapshot, style: str, values: tuple[str, ...]) -> 'np.ndarray':
+		"""bool[n] mask of rows whose computed `style` is one of `values` (case insensitive)."""
+		np = _import_numpy()
+		return np.isin(self.styles(document, style), self.string_ids(values))
+
+	def style_visible_mask(self, document: ColumnarDocumentSnapshot) -> 'np.ndarray':
+		"""bool[n] mask of rows with bounds that are not hidden by `display`, `visibility` or `opacity`."""
+		np = _import_numpy()
+		hidden = self.style_equals_mask(document, 'display', ('none',)) | self.style_equals_mask(
+			document, 'visibility', ('hidden',)
+		)
+
+		opacities = np.ones(len(self.strings) + 1, dtype=np.float64)
+		for i, string in enumerate(self.strings):
+			try:
+				opacities[i] = float(string)
+			except ValueError:
+				pass
+		# index -1 (missing style) maps to the trailing 1.0
+		hidden |= opacities[self.styles(document, 'opacity')] <= 0
+
+		return ~np.isnan(document.bounds[:, 0]) & ~hidden
+
+	def scrollable_mask(self, document: ColumnarDocumentSnapshot) -> 'np.ndarray':
+		"""bool[n] mask equivalent to the CSS part of `EnhancedDOMTreeNode.is_actually_scrollable`."""
+		np = _import_numpy()
+		mask = np.zeros(len(document), dtype=bool)
+		if not len(document.rect_rows):
+			return mask
+
+		scroll, client = document.scroll_rects, document.client_rects
+		with np.errstate(invalid='ignore'):
+			overflows = (scroll[:, 3] > client[:, 3] + 1) | (scroll[:, 2] > client[:, 2] + 1)
+
+		style_rows = self.style_table[document.style_rows[document.rect_rows]]
+		overflow_ids = self.string_ids(SCROLLABLE_OVERFLOW_VALUES)
+		allows_scroll = (
+			np.isin(style_rows[:, STYLE_COLUMNS['overflow']], overflow_ids)
+			| np.isin(style_rows[:, STYLE_COLUMNS['overflow-x']], overflow_ids)
+			| np.isin(style_rows[:, STYLE_COLUMNS['overflow-y']], overflow_ids)
+		)
+		# without any computed styles fall back to common scrollable container tags
+		has_styles = (style_rows >= 0).any(axis=1)
+		is_container_tag = np.isin(document.node_names[document.rect_rows], self.string_ids(SCROLLABLE_TAGS))
+
+		mask[document.rect_rows] = overflows & np.where(has_styles, allows_scroll, is_container_tag)
+		return mask
+
+	def intersects_mask(self, document: ColumnarDocumentSnapshot, rect: DOMRect) -> 'np.ndarray':
+		"""bool[n] mask of rows whose bounds intersect `rect` (e.g. the viewport in document coordinates)."""
+		bounds = document.bounds
+		return (
+			(bounds[:, 0] < rect.x + rect.width)
+			& (bounds[:, 0] + bounds[:, 2] > rect.x)
+			& (bounds[:, 1] < rect.y + rect.height)
+			& (bounds[:, 1] + bounds[:, 3] > rect.y)
+		)
+
+	def containment_ratios(self, document: ColumnarDocumentSnapshot, parent: DOMRect) -> 'np.ndarray':
+		"""float64[n] share of each row's area inside `parent` (0 for zero-area or missing bounds)."""
+		np = _import_numpy()
+		x, y, width, height = document.bounds.T
+		x_overlap = np.clip(np.minimum(x + width, parent.x + parent.width) - np.maximum(x, parent.x), 0, None)
+		y_overlap = np.clip(np.minimum(y + height, parent.y + parent.height) - np.maximum(y, parent.y), 0, None)
+		area = width * height
+		with np.errstate(invalid='ignore', divide='ignore'):
+			ratios = np.where(area > 0, x_overlap * y_overlap / area, 0.0)
+		return np.nan_to_num(ratios, nan=0.0)
+
+	def style_visible_backend_node_ids(self) -> set[int]:
+		"""Backend node ids with bounds that are not hidden by `display`, `visibility` or `opacity`.
+
+		A backend node id that appears more than once counts with its last row, exactly like `build_snapshot_lookup`.
+		"""
+		np = _import_numpy()
+		if not self.documents:
+			return set()
+		backend_node_ids = np.concatenate([document.backend_node_ids for document in self.documents])
+		visible = np.concatenate([self.style_visible_mask(document) for document in self.documents])
+		# the first occurrence in the reversed arrays is the last one
+		unique_ids, last_rows = np.unique(backend_node_ids[::-1], return_index=True)
+		return set(unique_ids[visible[::-1][last_rows]].tolist())
+
+	# endregion - vectorized checks
+
+	def get_snapshot_node(self, backend_node_id: int) -> EnhancedSnapshotNode | None:
+		"""Materialize a single row as `EnhancedSnapshotNode` (same values as `build_snapshot_lookup`).
+
+		Stacking contexts are not stored in the columnar representation and are always None.
+		"""
+		for document in reversed(self.documents):  # the last document wins, like in `build_snapshot_lookup`
+			row = document.find_row(backend_node_id)
+			if row is not None:
+				break
+		else:
+			return None
+
+		def to_rect(values) -> DOMRect | None:
+			if values[0] != values[0]:  # NaN
+				return None
+			return DOMRect(x=float(values[0]), y=float(values[1]), width=float(values[2]), height=float(values[3]))
+
+		client_rects = scroll_rects = None
+		rect_position = int(document.rect_rows.searchsorted(row))
+		if rect_position < len(document.rect_rows) and document.rect_rows[rect_position] == row:
+			client_rects = to_rect(document.client_rects[rect_position])
+			scroll_rects = to_rect(document.scroll_rects[rect_position])
+
+		computed_styles = {
+			REQUIRED_COMPUTED_STYLES[i]: self.strings[string_index]
+			for i, string_index in enumerate(self.style_table[document.style_rows[row]].tolist())
+			if string_index >= 0
+		}
+		paint_order = int(document.paint_orders[row])
+
+		return EnhancedSnapshotNode(
+			is_clickable=bool(document.is_clickable[row]) if document.has_clickable_data else None,
+			cursor_style=computed_styles.get('cursor'),
+			bounds=to_rect(document.bounds[row]),
+			clientRects=client_rects,
+			scrollRects=scroll_rects,
+			computed_styles=computed_styles or None,
+			paint_order=paint_order if paint_order >= 0 else None,
+			stacking_contexts=None,
+		)
+
+
+def build_columnar_snapshot(snapshot: CaptureSnapshotReturns, device_pixel_ratio: float = 1.0) -> ColumnarSnapshot:
+	"""Build the columnar counterpart of `build_snapshot_lookup` in O(nodes + layout nodes)."""
+	np = _import_numpy()
+
+	strings = tuple(snapshot['strings'])
+	num_styles = len(REQUIRED_COMPUTED_STYLES)
+	style_table_lookup: dict[tuple[int, ...], int] = {}
+	documents: list[ColumnarDocumentSnapshot] = []
+
+	for document in snapshot['documents']:
+		nodes = document['nodes']
+		layout = document['layout']
+
+		backend_node_ids = np.asarray(nodes.get('backendNodeId', []), dtype=np.int64)
+		num_rows = len(backend_node_ids)
+
+		node_names = np.full(num_rows, -1, dtype=np.int32)
+		if 'nodeName' in nodes:
+			node_names[:] = np.asarray(nodes['nodeName'], dtype=np.int32)[:num_rows]
+
+		is_clickable = np.zeros(num_rows, dtype=bool)
+		if 'isClickable' in nodes and nodes['isClickable']['index']:
+			is_clickable[np.asarray(nodes['isClickable']['index'], dtype=np.int64)] = True
+
+		# map snapshot rows to the first layout node that references them
+		# (only layout nodes that have bounds count, exactly like `build_snapshot_lookup`)
+		bounds_data = layout.get('bounds', [])
+		node_index = np.asarray(layout.get('nodeIndex', []), dtype=np.int64)[: len(bounds_data)]
+		if len(node_index):
+			rows, layout_indices = np.unique(node_index, return_index=True)
+		else:
+			rows = layout_indices = np.zeros(0, dtype=np.int64)
+
+		has_layout = np.zeros(num_rows, dtype=bool)
+		has_layout[rows] = True
+
+		bounds = np.full((num_rows, 4), np.nan, dtype=np.float64)
+		for row, layout_idx in zip(rows.tolist(), layout_indices.tolist()):
+			if len(bounds_data[layout_idx]) >= 4:
+				bounds[row] = bounds_data[layout_idx][:4]
+		if device_pixel_ratio != 1.0:
+			bounds /= device_pixel_ratio
+
+		paint_orders = np.full(num_rows, -1, dtype=np.int32)
+		paint_orders_data = layout.get('paintOrders', [])
+		if paint_orders_data:
+			usable = layout_indices < len(paint_orders_data)
+			paint_orders[rows[usable]] = np.asarray(paint_orders_data, dtype=np.int32)[layout_indices[usable]]
+
+		style_rows = np.full(num_rows, -1, dtype=np.int32)
+		styles_data = layout.get('styles', [])
+		for row, layout_idx in zip(rows.tolist(), layout_indices.tolist()):
+			if layout_idx < len(styles_data):
+				# out-of-range string indices are treated as missing
+				style_key = tuple(
+					style_index if 0 <= style_index < len(strings) else -1 for style_index in styles_data[layout_idx][:num_styles]
+				)
+				if any(style_index >= 0 for style_index in style_key):
+					style_rows[row] = style_table_lookup.setdefault(style_key, len(style_table_lookup))
+
+		client_rects_data = layout.get('clientRects', [])
+		scroll_rects_data = layout.get('scrollRects', [])
+		rect_rows: list[int] = []
+		client_rects: list[list[float]] = []
+		scroll_rects: list[list[float]] = []
+		nan_rect = [float('nan')] * 4
+		for row, layout_idx in zip(rows.tolist(), layout_indices.tolist()):
+			client_rect = client_rects_data[layout_idx] if layout_idx < len(client_rects_data) else None
+			scroll_rect = scroll_rects_data[layout_idx] if layout_idx < len(scroll_rects_data) else None
+			has_client_rect = bool(client_rect) and len(client_rect) >= 4
+			has_scroll_rect = bool(scroll_rect) and len(scroll_rect) >= 4
+			if has_client_rect or has_scroll_rect:
+				rect_rows.append(row)
+				client_rects.append(client_rect[:4] if has_client_rect else nan_rect)  # type: ignore[index]
+				scroll_rects.append(scroll_rect[:4] if has_scroll_rect else nan_rect)  # type: ignore[index]
+
+		sorted_rows = np.argsort(backend_node_ids, kind='stable')
+		documents.append(
+			ColumnarDocumentSnapshot(
+				backend_node_ids=backend_node_ids,
+				sorted_backend_node_ids=backend_node_ids[sorted_rows],
+				sorted_rows=sorted_rows.astype(np.int32),
+				node_names=node_names,
+				is_clickable=is_clickable,
+				has_layout=has_layout,
+				bounds=bounds,
+				paint_orders=paint_orders,
+				style_rows=style_rows,
+				rect_rows=np.asarray(rect_rows, dtype=np.int32),
+				client_rects=np.asarray(client_rects, dtype=np.float64).reshape(-1, 4),
+				scroll_rects=np.asarray(scroll_rects, dtype=np.float64).reshape(-1, 4),
+				has_clickable_data='isClickable' in nodes,
+			)
+		)
+
+	style_table = np.full((len(style_table_lookup) + 1, num_styles), -1, dtype=np.int32)
+	for style_key, style_row in style_table_lookup.items():
+		style_table[style_row, : len(style_key)] = style_key
+
+	return ColumnarSnapshot(strings=strings, style_table=style_table, documents=documents)
@@ -3,6 +3,7 @@
 import json
 import traceback
 
+from browser_use.dom.enhanced_tree import precompute_xpaths_and_texts
 from browser_use.dom.service import DomService
 from browser_use.dom.views import DOMSelectorMap
 
@@ -10,6 +11,7 @@ from browser_use.dom.views import DOMSelectorMap
 def convert_dom_selector_map_to_highlight_format(selector_map: DOMSelectorMap) -> list[dict]:
 	"""Convert DOMSelectorMap to the format expected by the highlighting script."""
 	elements = []
+	precompute_xpaths_and_texts(selector_map.values())
 
 	for interactive_index, node in selector_map.items():
 		# Get bounding box using absolute position (includes iframe translations) if available
@@ -101,14 +103,6 @@ async def inject_highlighting_script(dom_service: DomService, interactive_elemen
 
 		print(f'📍 Creating CSP-safe highlighting for {len(converted_elements)} elements')
 
-		# ALWAYS remove any existing highlights first to prevent double-highlighting
-		await remove_highlighting_script(dom_service)
-
-		# Add a small delay to ensure removal completes
-		import asyncio
-
-		await asyncio.sleep(0.05)
-
 		# Create CSP-safe highlighting script using DOM methods instead of innerHTML
 		# Uses outline-only highlights with reasonable z-index to avoid blocking page content
 		script = f"""
@@ -119,7 +113,7 @@ async def inject_highlighting_script(dom_service: DomService, interactive_elemen
 			console.log('=== BROWSER-USE HIGHLIGHTING ===');
 			console.log('Highlighting', interactiveElements.length, 'interactive elements');
 			
-			// Double-check: Remove any existing highlight container first to prevent duplicates
+			// ALWAYS remove any existing highlights first to prevent double-highlighting (same evaluation, no extra round-trip)
 			const existingContainer = document.getElementById('browser-use-debug-highlights');
 			if (existingContainer) {{
 				console.log('⚠️ Found existing highlight container, removing it first');
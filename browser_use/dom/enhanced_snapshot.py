@@ -5,6 +5,8 @@ This module provides stateless functions for parsing Chrome DevTools Protocol (C
 to extract visibility, clickability, cursor styles, and other layout information.
 """
 
+from collections.abc import Iterator, Mapping
+
 from cdp_use.cdp.domsnapshot.commands import CaptureSnapshotReturns
 from cdp_use.cdp.domsnapshot.types import (
 	LayoutTreeSnapshot,
@@ -45,9 +47,97 @@ REQUIRED_COMPUTED_STYLES = [
 ]
 
 
-def _parse_rare_boolean_data(rare_data: RareBooleanData, index: int) -> bool | None:
-	"""Parse rare boolean data from snapshot - returns True if index is in the rare data."""
-	return index in rare_data['index']
+# styles whose values differ between most elements, the other ones repeat all over a page (keywords and colors)
+PER_ELEMENT_STYLES = frozenset({'width', 'height', 'top', 'left', 'right', 'bottom', 'transform', 'border', 'margin', 'padding'})
+
+# style name -> (whether it is a per element style, position in its group)
+_STYLE_SLOTS: dict[str, tuple[bool, int]] = {}
+for _name in REQUIRED_COMPUTED_STYLES:
+	_group = [name for name in REQUIRED_COMPUTED_STYLES if (name in PER_ELEMENT_STYLES) == (_name in PER_ELEMENT_STYLES)]
+	_STYLE_SLOTS[_name] = (_name in PER_ELEMENT_STYLES, _group.index(_name))
+
+
+class ComputedStyles(Mapping[str, str]):
+	"""Read only computed styles of a layout node (`REQUIRED_COMPUTED_STYLES` only).
+
+	A dict of two dozen styles per node is by far the biggest part of a snapshot. The values are kept in two tuples
+	instead, one for the styles that repeat across a page and one for the per element ones (sizes and offsets), and
+	identical tuples and rows are shared between nodes. Never mutate them, assign a new mapping instead.
+	"""
+
+	__slots__ = ('_shared', '_own')
+
+	def __init__(self, shared: tuple[str | None, ...], own: tuple[str | None, ...]):
+		self._shared = shared
+		self._own = own
+
+	@classmethod
+	def from_dict(cls, styles: dict[str, str]) -> 'ComputedStyles':
+		shared = tuple(styles.get(name) for name in REQUIRED_COMPUTED_STYLES if name not in PER_ELEMENT_STYLES)
+		own = tuple(styles.get(name) for name in REQUIRED_COMPUTED_STYLES if name in PER_ELEMENT_STYLES)
+		return cls(shared, own)
+
+	def get(self, key: str, default=None):  # type: ignore[override]  # hot path, avoids the KeyError of Mapping.get
+		slot = _STYLE_SLOTS.get(key)
+		if slot is None:
+			return default
+		value = (self._own if slot[0] else self._shared)[slot[1]]
+		return default if value is None else value
+
+	def __getitem__(self, key: str) -> str:
+		value = self.get(key)
+		if value is None:
+			raise KeyError(key)
+		return value
+
+	def __iter__(self) -> Iterator[str]:
+		return (name for name in REQUIRED_COMPUTED_STYLES if self.get(name) is not None)
+
+	def __len__(self) -> int:
+		return sum(value is not None for value in self._shared) + sum(value is not None for value in self._own)
+
+	def __repr__(self) -> str:
+		return f'{type(self).__name__}({dict(self)!r})'
+
+
+class _ComputedStylesInterner:
+	"""Creates one `ComputedStyles` per distinct style row of a snapshot, sharing equal value tuples between rows."""
+
+	def __init__(self, strings: list[str]):
+		self.strings = strings
+		self._rows: dict[tuple[int, ...], ComputedStyles | None] = {}
+		self._values: dict[tuple[str | None, ...], tuple[str | None, ...]] = {}
+
+	def get(self, style_indices: list[int]) -> ComputedStyles | None:
+		"""Computed styles of a layout node from its string indices, None if it has none."""
+		key = tuple(style_indices)
+		if key in self._rows:
+			return self._rows[key]
+		styles = _parse_computed_styles(self.strings, style_indices)
+		computed_styles = None
+		if styles:
+			computed_styles = ComputedStyles.from_dict(styles)
+			shared = self._values.setdefault(computed_styles._shared, computed_styles._shared)
+			own = self._values.setdefault(computed_styles._own, computed_styles._own)
+			computed_styles = ComputedStyles(shared, own)
+		self._rows[key] = computed_styles
+		return computed_styles
+
+
+def _build_rare_boolean_set(rare_data: RareBooleanData) -> set[int]:
+	"""Build a set of snapshot indices from rare boolean data for O(1) membership checks."""
+	return set(rare_data['index'])
+
+
+def _build_layout_index_lookup(layout: LayoutTreeSnapshot) -> dict[int, int]:
+	"""Build a lookup table of snapshot node index to the first layout node index that references it."""
+	layout_index_lookup: dict[int, int] = {}
+	bounds_count = len(layout.get('bounds', []))
+	for layout_idx, node_index in enumerate(layout.get('nodeIndex', [])):
+		# only layout nodes that have bounds are usable, first match wins
+		if layout_idx < bounds_count and node_index not in layout_index_lookup:
+			layout_index_lookup[node_index] = layout_idx
+	return layout_index_lookup
 
 
 def _parse_computed_styles(strings: list[str], style_indices: list[int]) -> dict[str, str]:
@@ -63,13 +153,20 @@ def build_snapshot_lookup(
 	snapshot: CaptureSnapshotReturns,
 	device_pixel_ratio: float = 1.0,
 ) -> dict[int, EnhancedSnapshotNode]:
-	"""Build a lookup table of backend node ID to enhanced snapshot data with everything calculated upfront."""
+	"""Build a lookup table of backend node ID to enhanced snapshot data with everything calculated upfront.
+
+	Runs in O(nodes + layout nodes) per document: the snapshot index -> layout index mapping and the
+	rare boolean sets are built once per document instead of being scanned for every node.
+	"""
 	snapshot_lookup: dict[int, EnhancedSnapshotNode] = {}
 
 	if not snapshot['documents']:
 		return snapshot_lookup
 
 	strings = snapshot['strings']
+	computed_styles_interner = _ComputedStylesInterner(strings)
+	# nodes without a layout node only differ in `is_clickable`, they share one (never mutated) snapshot node each
+	snapshot_nodes_without_layout: dict[bool | None, EnhancedSnapshotNode] = {}
 
 	for document in snapshot['documents']:
 		nodes: NodeTreeSnapshot = document['nodes']
@@ -81,79 +178,103 @@ def build_snapshot_lookup(
 			for i, backend_node_id in enumerate(nodes['backendNodeId']):
 				backend_node_to_snapshot_index[backend_node_id] = i
 
+		# Build snapshot index to layout index lookup and rare boolean sets once per document
+		layout_index_lookup = _build_layout_index_lookup(layout)
+		clickable_indices = _build_rare_boolean_set(nodes['isClickable']) if 'isClickable' in nodes else None
+
+		bounds_data = layout.get('bounds', [])
+		styles_data = layout.get('styles', [])
+		paint_orders_data = layout.get('paintOrders', [])
+		client_rects_data = layout.get('clientRects', [])
+		scroll_rects_data = layout.get('scrollRects', [])
+		stacking_contexts_data = layout.get('stackingContexts', {})
+
 		# Build snapshot lookup for each backend node id
 		for backend_node_id, snapshot_index in backend_node_to_snapshot_index.items():
 			is_clickable = None
-			if 'isClickable' in nodes:
-				is_clickable = _parse_rare_boolean_data(nodes['isClickable'], snapshot_index)
+			if clickable_indices is not None:
+				is_clickable = snapshot_index in clickable_indices
 
-			# Find corresponding layout node
 			cursor_style = None
-			is_visible = None
 			bounding_box = None
-			computed_styles = {}
-
-			# Look for layout tree node that corresponds to this snapshot node
+			computed_styles = None
 			paint_order = None
 			client_rects = None
 			scroll_rects = None
 			stacking_contexts = None
-			for layout_idx, node_index in enumerate(layout.get('nodeIndex', [])):
-				if node_index == snapshot_index and layout_idx < len(layout.get('bounds', [])):
-					# Parse bounding box
-					bounds = layout['bounds'][layout_idx]
-					if len(bounds) >= 4:
-						# IMPORTANT: CDP coordinates are in device pixels, convert to CSS pixels
-						# by dividing by the device pixel ratio
-						raw_x, raw_y, raw_width, raw_height = bounds[0], bounds[1], bounds[2], bounds[3]
-
-						# Apply device pixel ratio scaling to convert device pixels to CSS pixels
-						bounding_box = DOMRect(
-							x=raw_x / device_pixel_ratio,
-							y=raw_y / device_pixel_ratio,
-							width=raw_width / device_pixel_ratio,
-							height=raw_height / device_pixel_ratio,
-						)
-
-					# Parse computed styles for this layout node
-					if layout_idx < len(layout.get('styles', [])):
-						style_indices = layout['styles'][layout_idx]
-						computed_styles = _parse_computed_styles(strings, style_indices)
-						cursor_style = computed_styles.get('cursor')
-
-					# Extract paint order if available
-					if layout_idx < len(layout.get('paintOrders', [])):
-						paint_order = layout.get('paintOrders', [])[layout_idx]
-
-					# Extract client rects if available
-					client_rects_data = layout.get('clientRects', [])
-					if layout_idx < len(client_rects_data):
-						client_rect_data = client_rects_data[layout_idx]
-						if client_rect_data and len(client_rect_data) >= 4:
-							client_rects = DOMRect(
-								x=client_rect_data[0],
-								y=client_rect_data[1],
-								width=client_rect_data[2],
-								height=client_rect_data[3],
-							)
-
-					# Extract scroll rects if available
-					scroll_rects_data = layout.get('scrollRects', [])
-					if layout_idx < len(scroll_rects_data):
-						scroll_rect_data = scroll_rects_data[layout_idx]
-						if scroll_rect_data and len(scroll_rect_data) >= 4:
-							scroll_rects = DOMRect(
-								x=scroll_rect_data[0],
-								y=scroll_rect_data[1],
-								width=scroll_rect_data[2],
-								height=scroll_rect_data[3],
-							)
-
-					# Extract stacking contexts if available
-					if layout_idx < len(layout.get('stackingContexts', [])):
-						stacking_contexts = layout.get('stackingContexts', {}).get('index', [])[layout_idx]
-
-					break
+
+			# Look up the layout tree node that corresponds to this snapshot node
+			layout_idx = layout_index_lookup.get(snapshot_index)
+			if layout_idx is None:
+				snapshot_node = snapshot_nodes_without_layout.get(is_clickable)
+				if snapshot_node is None:
+					snapshot_node = snapshot_nodes_without_layout[is_clickable] = EnhancedSnapshotNode(
+						is_clickable=is_clickable,
+						cursor_style=None,
+						bounds=None,
+						clientRects=None,
+						scrollRects=None,
+						computed_styles=None,
+						paint_order=None,
+						stacking_contexts=None,
+					)
+				snapshot_lookup[backend_node_id] = snapshot_node
+				continue
+
+			# Parse bounding box
+			bounds = bounds_data[layout_idx]
+			if len(bounds) >= 4:
+				# IMPORTANT: CDP coordinates are in device pixels, convert to CSS pixels
+				# by dividing by the device pixel ratio
+				raw_x, raw_y, raw_width, raw_height = bounds[0], bounds[1], bounds[2], bounds[3]
+
+				# Apply device pixel ratio scaling to convert device pixels to CSS pixels
+				if device_pixel_ratio == 1.0:
+					# keep the parsed numbers instead of allocating a copy of each
+					bounding_box = DOMRect(x=raw_x, y=raw_y, width=raw_width, height=raw_height)
+				else:
+					bounding_box = DOMRect(
+						x=raw_x / device_pixel_ratio,
+						y=raw_y / device_pixel_ratio,
+						width=raw_width / device_pixel_ratio,
+						height=raw_height / device_pixel_ratio,
+					)
+
+			# Parse computed styles for this layout node
+			if layout_idx < len(styles_data):
+				computed_styles = computed_styles_interner.get(styles_data[layout_idx])
+				if computed_styles is not None:
+					cursor_style = computed_styles.get('cursor')
+
+			# Extract paint order if available
+			if layout_idx < len(paint_orders_data):
+				paint_order = paint_orders_data[layout_idx]
+
+			# Extract client rects if available
+			if layout_idx < len(client_rects_data):
+				client_rect_data = client_rects_data[layout_idx]
+				if client_rect_data and len(client_rect_data) >= 4:
+					client_rects = DOMRect(
+						x=client_rect_data[0],
+						y=client_rect_data[1],
+						width=client_rect_data[2],
+						height=client_rect_data[3],
+					)
+
+			# Extract scroll rects if available
+			if layout_idx < len(scroll_rects_data):
+				scroll_rect_data = scroll_rects_data[layout_idx]
+				if scroll_rect_data and len(scroll_rect_data) >= 4:
+					scroll_rects = DOMRect(
+						x=scroll_rect_data[0],
+						y=scroll_rect_data[1],
+						width=scroll_rect_data[2],
+						height=scroll_rect_data[3],
+					)
+
+			# Extract stacking contexts if available
+			if layout_idx < len(stacking_contexts_data):
+				stacking_contexts = stacking_contexts_data.get('index', [])[layout_idx]
 
 			snapshot_lookup[backend_node_id] = EnhancedSnapshotNode(
 				is_clickable=is_clickable,
@@ -161,7 +282,7 @@ def build_snapshot_lookup(
 				bounds=bounding_box,
 				clientRects=client_rects,
 				scrollRects=scroll_rects,
-				computed_styles=computed_styles if computed_styles else None,
+				computed_styles=computed_styles,
 				paint_order=paint_order,
 				stacking_contexts=stacking_contexts,
 			)
@@ -0,0 +1,259 @@
+"""
+Build `EnhancedDOMTreeNode` trees from `DOM.getDocument` / `DOM.setChildNodes` payloads.
+
+Everything here is synchronous and uses an explicit stack, so building a tree costs no coroutine per node and
+works for arbitrarily deep documents. Layout data and visibility are attached afterwards by `DomService._apply_layout`.
+"""
+
+import sys
+from collections.abc import Iterable, Iterator
+from typing import cast
+
+from cdp_use.cdp.accessibility.types import AXNode, AXPropertyName
+from cdp_use.cdp.dom.types import Node
+from cdp_use.cdp.target import SessionID, TargetID
+
+from browser_use.dom.views import EnhancedAXNode, EnhancedAXProperty, EnhancedDOMTreeNode, NodeType
+
+# plain dict lookup, calling the enum for every node is measurably slower
+_NODE_TYPES = {node_type.value: node_type for node_type in NodeType}
+
+# AX properties with a boolean, token or no value, shared by all nodes (properties are never mutated)
+_SHARED_AX_PROPERTIES: dict[tuple[str, str | bool | None], EnhancedAXProperty] = {}
+# AX value types whose values come from a small fixed vocabulary
+_TOKEN_VALUE_TYPES = frozenset({'token', 'tokenList', 'role', 'internalRole'})
+
+# Strings parsed from CDP payloads are separate objects per node. Names that come from a small vocabulary (tag names,
+# attribute names, AX roles and property names) are interned so that every node points to the same string.
+# Values (attribute values, text, AX names) are not, interned strings live as long as the process.
+_intern = sys.intern
+
+
+def build_enhanced_ax_node(ax_node: AXNode) -> EnhancedAXNode:
+	properties: list[EnhancedAXProperty] | None = None
+	if 'properties' in ax_node and ax_node['properties']:
+		properties = []
+		for property in ax_node['properties']:
+			try:
+				# test whether property name can go into the enum (sometimes Chrome returns some random properties)
+				name = property['name']
+				if not isinstance(name, str):
+					continue
+				# interning returns an equal string, so the name stays a valid AXPropertyName
+				name = cast(AXPropertyName, _intern(name))
+				value: str | bool | None = property.get('value', {}).get('value', None)
+				is_token = False
+				if isinstance(value, str) and property['value'].get('type') in _TOKEN_VALUE_TYPES:
+					value = _intern(value)
+					is_token = True
+				if value is None or isinstance(value, bool) or is_token:
+					shared_property = _SHARED_AX_PROPERTIES.get((name, value))
+					if shared_property is None:
+						shared_property = _SHARED_AX_PROPERTIES[(name, value)] = EnhancedAXProperty(name=name, value=value)
+					properties.append(shared_property)
+				else:
+					properties.append(
+						EnhancedAXProperty(
+							name=name,
+							value=value,
+							# related_nodes=[],  # TODO: add related nodes
+						)
+					)
+			except ValueError:
+				pass
+
+	role = ax_node.get('role', {}).get('value', None)
+	enhanced_ax_node = EnhancedAXNode(
+		ax_node_id=ax_node['nodeId'],
+		ignored=ax_node['ignored'],
+		role=_intern(role) if isinstance(role, str) else role,
+		name=ax_node.get('name', {}).get('value', None),
+		description=ax_node.get('description', {}).get('value', None),
+		properties=properties,
+	)
+	return enhanced_ax_node
+
+
+def build_enhanced_subtree(
+	node: Node,
+	parent: EnhancedDOMTreeNode | None,
+	target_id: TargetID,
+	session_id: SessionID | None,
+	ax_tree_lookup: dict[int, AXNode] | None = None,
+) -> list[EnhancedDOMTreeNode]:
+	"""Build enhanced nodes for a CDP node payload and everything it contains (children, shadow roots, content documents).
+
+	Snapshot data, absolute positions and visibility are left empty.
+	Returns all created nodes in document order, the root of the subtree first.
+	"""
+	created: list[EnhancedDOMTreeNode] = []
+	stack: list[tuple[Node, EnhancedDOMTreeNode | None, str]] = [(node, parent, 'root')]
+	while stack:
+		cdp_node, parent_node, relation = stack.pop()
+
+		# To make attributes more readable ([name1, value1, name2, value2] -> {name1: value1, name2: value2})
+		raw_attributes = cdp_node.get('attributes')
+		attributes: dict[str, str] = dict(zip(map(_intern, raw_attributes[::2]), raw_attributes[1::2])) if raw_attributes else {}
+
+		ax_node = ax_tree_lookup.get(cdp_node['backendNodeId']) if ax_tree_lookup else None
+
+		enhanced_node = EnhancedDOMTreeNode(
+			node_id=cdp_node['nodeId'],
+			backend_node_id=cdp_node['backendNodeId'],
+			node_type=_NODE_TYPES[cdp_node['nodeType']],
+			node_name=_intern(cdp_node['nodeName']),
+			node_value=cdp_node['nodeValue'],
+			attributes=attributes,
+			is_scrollable=cdp_node.get('isScrollable', None),
+			frame_id=cdp_node.get('frameId', None),
+			session_id=session_id,
+			target_id=target_id,
+			content_document=None,
+			shadow_root_type=cdp_node.get('shadowRootType') or None,
+			shadow_roots=None,
+			parent_node=parent_node,
+			children_nodes=None,
+			ax_node=build_enhanced_ax_node(ax_node) if ax_node else None,
+			snapshot_node=None,
+			is_visible=None,
+			absolute_position=None,
+			element_index=None,
+		)
+		created.append(enhanced_node)
+
+		# the parent of content documents and shadow roots is forcefully set to the iframe / host (helps traverse the tree)
+		if parent_node is not None:
+			if relation == 'content_document':
+				parent_node.content_document = enhanced_node
+			elif relation == 'shadow_root':
+				if parent_node.shadow_roots is None:
+					parent_node.shadow_roots = []
+				parent_node.shadow_roots.append(enhanced_node)
+			elif relation == 'child':
+				if parent_node.children_nodes is None:
+					parent_node.children_nodes = []
+				parent_node.children_nodes.append(enhanced_node)
+
+		# pushed in reverse so that nodes are created in document order: content document, shadow roots, children
+		children = cdp_node.get('children')
+		if children:
+			for child in reversed(children):
+				stack.append((child, enhanced_node, 'child'))
+		shadow_roots = cdp_node.get('shadowRoots')
+		if shadow_roots:
+			for shadow_root in reversed(shadow_roots):
+				stack.append((shadow_root, enhanced_node, 'shadow_root'))
+		content_document = cdp_node.get('contentDocument')
+		if content_document:
+			stack.append((content_document, enhanced_node, 'content_document'))
+
+	return created
+
+
+def iter_subtree(root: EnhancedDOMTreeNode) -> Iterator[EnhancedDOMTreeNode]:
+	"""Yield every node of the subtree including content documents and shadow roots (document order)."""
+	stack = [root]
+	while stack:
+		node = stack.pop()
+		yield node
+		if node.children_nodes:
+			stack.extend(reversed(node.children_nodes))
+		if node.shadow_roots:
+			stack.extend(reversed(node.shadow_roots))
+		if node.content_document:
+			stack.append(node.content_document)
+
+
+def precompute_xpaths_and_texts(nodes: Iterable[EnhancedDOMTreeNode]) -> None:
+	"""Cache `xpath` and `get_all_children_text()` on `nodes` (e.g. all elements of a selector map) in one batch.
+
+	Computed per node, both walk the tree again: the xpath scans the siblings of every ancestor, the text the whole
+	subtree, which is quadratic for the items of long lists and tables. Here the sibling positions are counted once per
+	parent and xpaths are built top-down, every ancestor once for all nodes below it. Texts are built bottom-up, from
+	the innermost nodes out, and a node's text reuses the texts of the nodes nested in it.
+	"""
+	nodes = list(nodes)
+	positions: dict[int, dict[int, int]] = {}
+	"""id(parent) -> id(element child) -> 1-based position among the children of its tag, 0 if it's the only one"""
+	xpaths: dict[int, str] = {}
+	"""id(node) -> xpath of the nodes walked up from so far"""
+
+	def position(element: EnhancedDOMTreeNode) -> int:
+		parent = element.parent_node
+		if parent is None or not parent.children_nodes:
+			return 0
+		parent_positions = positions.get(id(parent))
+		if parent_positions is None:
+			by_tag: dict[str, list[EnhancedDOMTreeNode]] = {}
+			for child in parent.children_nodes:
+				if child.node_type == NodeType.ELEMENT_NODE:
+					by_tag.setdefault(child.node_name.lower(), []).append(child)
+			parent_positions = positions[id(parent)] = {
+				id(child): i + 1 if len(siblings) > 1 else 0 for siblings in by_tag.values() for i, child in enumerate(siblings)
+			}
+		return parent_positions.get(id(element), 0)
+
+	def xpath(node: EnhancedDOMTreeNode) -> str:
+		# walk up to the closest node whose xpath is known or where the xpath starts, then fill in on the way back down
+		pending: list[EnhancedDOMTreeNode] = []
+		current: EnhancedDOMTreeNode | None = node
+		prefix = ''
+		while current is not None and current.node_type in (NodeType.ELEMENT_NODE, NodeType.DOCUMENT_FRAGMENT_NODE):
+			known = xpaths.get(id(current))
+			if known is not None:
+				prefix = known
+				break
+			pending.append(current)
+			# shadow roots are passed through, iframes end the xpath
+			if (
+				current.node_type == NodeType.ELEMENT_NODE
+				and current.parent_node
+				and current.parent_node.node_name.lower() == 'iframe'
+			):
+				break
+			current = current.parent_node
+
+		for pending_node in reversed(pending):
+			if pending_node.node_type == NodeType.ELEMENT_NODE and not (
+				pending_node.parent_node and pending_node.parent_node.node_name.lower() == 'iframe'
+			):
+				element_position = position(pending_node)
+				segment = (
+					f'{pending_node.node_name.lower()}[{element_position}]'
+					if element_position
+					else pending_node.node_name.lower()
+				)
+				prefix = f'{prefix}/{segment}' if prefix else segment
+			xpaths[id(pending_node)] = prefix
+		return xpaths.get(id(node), '')
+
+	def depth(node: EnhancedDOMTreeNode) -> int:
+		count = 0
+		current = node.parent_node
+		while current is not None:
+			count += 1
+			current = current.parent_node
+		return count
+
+	# innermost first, so that the text parts of nested nodes are known when the nodes around them are reached
+	text_parts: dict[int, list[str]] = {}
+	for node in sorted(nodes, key=depth, reverse=True):
+		node._xpath = xpath(node)
+		if id(node) in text_parts:
+			continue
+		parts: list[str] = []
+		if node.node_type == NodeType.TEXT_NODE:
+			parts.append(node.node_value)
+		elif node.node_type == NodeType.ELEMENT_NODE:
+			stack = list(reversed(node.children))
+			while stack:
+				child = stack.pop()
+				known_parts = text_parts.get(id(child))
+				if known_parts is not None:
+					parts.extend(known_parts)
+				elif child.node_type == NodeType.TEXT_NODE:
+					parts.append(child.node_value)
+				elif child.node_type == NodeType.ELEMENT_NODE:
+					stack.extend(reversed(child.children))
+		text_parts[id(node)] = parts
+		node._children_text = '\n'.join(parts).strip()
@@ -0,0 +1,308 @@
+# @file purpose: Builds the enhanced DOM tree from one in-page script instead of the CDP snapshot, document and AX payloads
+
+import asyncio
+import itertools
+import sys
+from typing import TYPE_CHECKING, Any
+
+from cdp_use.cdp.target import SessionID, TargetID
+
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.serializer.clickable_elements import ClickableElementDetector
+from browser_use.dom.utils import gc_paused
+from browser_use.dom.views import DOMRect, EnhancedDOMTreeNode, EnhancedSnapshotNode, NodeType
+
+if TYPE_CHECKING:
+	from browser_use.browser.session import CDPSession
+
+OBJECT_GROUP = 'browser-use-in-page-extraction'
+
+# text nodes get no id from the page, they are numbered below every id of an element
+_TEXT_NODE_ID_BASE = 1 << 40
+
+# Walks the document (same origin iframes and open shadow roots included) and returns it as JSON:
+#   document:   {i: id, o: [x, y] offset from document to top level viewport coordinates, c: children}
+#   element:    {i: id, t: node name, a: [name, value, ...], b: [x, y, width, height] bounds in document coordinates,
+#                v: 1 if visible, cur: cursor, k: 1 if it has an onclick handler, sc: 1 if scrollable,
+#                sr: [scrollLeft, scrollTop, scrollWidth, scrollHeight], cr: [0, 0, clientWidth, clientHeight],
+#                c: children, sh: {i: id, c: children} open shadow root, d: content document}
+#   text:       the text itself (whitespace only text is dropped)
+# Elements with `display: none` (and everything in them) and elements that never render are left out.
+# Ids are stable for as long as the page lives, the elements of the last extraction stay reachable by id for
+# `resolve_backend_node_ids`.
+IN_PAGE_EXTRACTION_SCRIPT = """
+(() => {
+	const state = window.__browserUseExtraction || (window.__browserUseExtraction = {ids: new WeakMap(), nextId: 1, byId: new Map()});
+	state.byId = new Map();
+	const SKIPPED = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'HEAD', 'META', 'LINK', 'TITLE', 'BASE']);
+	const SCROLLING = new Set(['auto', 'scroll', 'overlay']);
+
+	const idOf = (node) => {
+		let id = state.ids.get(node);
+		if (id === undefined) {
+			id = state.nextId++;
+			state.ids.set(node, id);
+		}
+		state.byId.set(id, node);
+		return id;
+	};
+
+	const intersects = (x, y, width, height, clip) =>
+		x < clip[0] + clip[2] && x + width > clip[0] && y < clip[1] + clip[3] && y + height > clip[1];
+
+	const walkChildren = (parent, frame) => {
+		const children = [];
+		for (let child = parent.firstChild; child; child = child.nextSibling) {
+			if (child.nodeType === 3) {
+				if (child.nodeValue.trim()) children.push(child.nodeValue);
+			} else if (child.nodeType === 1) {
+				const element = walkElement(child, frame);
+				if (element) children.push(element);
+			}
+		}
+		return children;
+	};
+
+	const walkDocument = (doc, frame) => ({
+		i: idOf(doc),
+		o: [frame.x - frame.view.scrollX, frame.y - frame.view.scrollY],
+		c: walkChildren(doc, frame),
+	});
+
+	const walkElement = (element, frame) => {
+		const name = element.nodeName;
+		if (SKIPPED.has(name)) return null;
+		const style = frame.view.getComputedStyle(element);
+		if (style.display === 'none') return null;
+
+		const node = {i: idOf(element), t: name};
+		if (element.attributes.length) {
+			const attributes = [];
+			for (const attribute of element.attributes) attributes.push(attribute.name, attribute.value);
+			node.a = attributes;
+		}
+
+		// display: contents and friends have no box of their own, like nodes without a layout object in a snapshot
+		const hasBox = element.getClientRects().length > 0;
+		const rect = element.getBoundingClientRect();
+		if (hasBox) {
+			node.b = [rect.x + frame.view.scrollX, rect.y + frame.view.scrollY, rect.width, rect.height];
+			if (
+				style.visibility !== 'hidden' &&
+				parseFloat(style.opacity) > 0 &&
+				intersects(rect.x + frame.x, rect.y + frame.y, rect.width, rect.height, frame.clip)
+			) {
+				node.v = 1;
+			}
+			if (style.cursor !== 'auto') node.cur = style.cursor;
+			if (typeof element.onclick === 'function') node.k = 1;
+
+			const isRoot = element === element.ownerDocument.documentElement;
+			const overflows = element.scrollHeight > element.clientHeight + 1 || element.scrollWidth > element.clientWidth + 1;
+			if (isRoot || overflows) {
+				node.sr = isRoot
+					? [frame.view.scrollX, frame.view.scrollY, element.scrollWidth, element.scrollHeight]
+					: [element.scrollLeft, element.scrollTop, element.scrollWidth, element.scrollHeight];
+				node.cr = [0, 0, element.clientWidth, element.clientHeight];
+				if (!isRoot && (SCROLLING.has(style.overflowX) || SCROLLING.has(style.overflowY))) node.sc = 1;
+			}
+		}
+
+		if (element.shadowRoot) {
+			node.sh = {i: idOf(element.shadowRoot), c: walkChildren(element.shadowRoot, frame)};
+		}
+
+		if (name === 'IFRAME' || name === 'FRAME') {
+			let doc = null;
+			try {
+				doc = element.contentDocument;
+			} catch (e) {
+				// cross origin
+			}
+			if (doc && doc.documentElement && hasBox) {
+				const view = doc.defaultView;
+				const x = frame.x + rect.x + element.clientLeft + parseFloat(style.paddingLeft);
+				const y = frame.y + rect.y + element.clientTop + parseFloat(style.paddingTop);
+				const left = Math.max(x, frame.clip[0]);
+				const top = Math.max(y, frame.clip[1]);
+				const right = Math.min(x + view.innerWidth, frame.clip[0] + frame.clip[2]);
+				const bottom = Math.min(y + view.innerHeight, frame.clip[1] + frame.clip[3]);
+				const clip = [left, top, Math.max(right - left, 0), Math.max(bottom - top, 0)];
+				node.d = walkDocument(doc, {view, x, y, clip});
+			}
+		} else {
+			const children = walkChildren(element, frame);
+			if (children.length) node.c = children;
+		}
+		return node;
+	};
+
+	return JSON.stringify(walkDocument(document, {view: window, x: 0, y: 0, clip: [0, 0, window.innerWidth, window.innerHeight]}));
+})()
+"""
+
+_TEXT_SNAPSHOT = EnhancedSnapshotNode(
+	is_clickable=None,
+	cursor_style=None,
+	bounds=None,
+	clientRects=None,
+	scrollRects=None,
+	computed_styles=None,
+	paint_order=None,
+	stacking_contexts=None,
+)
+"""Text nodes have no box of their own in the extraction, they only need a snapshot to count as rendered"""
+
+
+async def run_in_page_extraction(cdp_session: 'CDPSession') -> str:
+	"""Run `IN_PAGE_EXTRACTION_SCRIPT` in the page of the session and return its JSON payload."""
+	result = await cdp_session.cdp_client.send.Runtime.evaluate(
+		params={'expression': IN_PAGE_EXTRACTION_SCRIPT, 'returnByValue': True},
+		session_id=cdp_session.session_id,
+	)
+	if 'exceptionDetails' in result:
+		raise RuntimeError(f'In-page DOM extraction failed: {result["exceptionDetails"].get("text", "unknown error")}')
+	return result['result']['value']
+
+
+def build_in_page_tree(payload: dict[str, Any], target_id: TargetID, session_id: SessionID | None) -> EnhancedDOMTreeNode:
+	"""Build the enhanced DOM tree from the (parsed) payload of `IN_PAGE_EXTRACTION_SCRIPT`.
+
+	Node ids and backend node ids are the negated ids of the page, because the page can't know the ids of CDP.
+	`resolve_backend_node_ids` replaces them with the real backend node ids where actions need them.
+	There is no AX tree and no paint order, visibility and absolute positions come from the page.
+	"""
+	text_ids = itertools.count(_TEXT_NODE_ID_BASE)
+
+	def make_node(node_id: int, node_type: NodeType, node_name: str, parent: EnhancedDOMTreeNode | None) -> EnhancedDOMTreeNode:
+		return EnhancedDOMTreeNode(
+			node_id=node_id,
+			backend_node_id=node_id,
+			node_type=node_type,
+			node_name=node_name,
+			node_value='',
+			attributes={},
+			is_scrollable=None,
+			is_visible=None,
+			absolute_position=None,
+			target_id=target_id,
+			frame_id=None,
+			session_id=session_id,
+			content_document=None,
+			shadow_root_type=None,
+			shadow_roots=None,
+			parent_node=parent,
+			children_nodes=None,
+			ax_node=None,
+			snapshot_node=None,
+		)
+
+	# every node references its parent and children, so the cyclic GC would repeatedly rescan the half built tree
+	with gc_paused():
+		root = make_node(-payload['i'], NodeType.DOCUMENT_NODE, '#document', None)
+		# (payload children, node they belong to, offset of their document to top level viewport coordinates)
+		stack: list[tuple[list, EnhancedDOMTreeNode, tuple[float, float]]] = [(payload.get('c', []), root, tuple(payload['o']))]
+		while stack:
+			children, parent, (offset_x, offset_y) = stack.pop()
+			nodes: list[EnhancedDOMTreeNode] = []
+			for child in children:
+				if isinstance(child, str):
+					text_id = -next(text_ids)
+					node = make_node(text_id, NodeType.TEXT_NODE, '#text', parent)
+					node.node_value = child
+					node.snapshot_node = _TEXT_SNAPSHOT
+					node.is_visible = bool(parent.is_visible)
+					nodes.append(node)
+					continue
+
+				node = make_node(-child['i'], NodeType.ELEMENT_NODE, sys.intern(child['t']), parent)
+				raw_attributes = child.get('a')
+				if raw_attributes:
+					node.attributes = dict(zip(map(sys.intern, raw_attributes[::2]), raw_attributes[1::2]))
+				node.is_visible = 'v' in child
+				node.is_scrollable = True if 'sc' in child else None
+				bounds = child.get('b')
+				if bounds:
+					scroll_rects, client_rects = child.get('sr'), child.get('cr')
+					node.snapshot_node = EnhancedSnapshotNode(
+						is_clickable=True if 'k' in child else None,
+						cursor_style=child.get('cur'),
+						bounds=DOMRect(*bounds),
+						clientRects=DOMRect(*client_rects) if client_rects else None,
+						scrollRects=DOMRect(*scroll_rects) if scroll_rects else None,
+						computed_styles=None,
+						paint_order=None,
+						stacking_contexts=None,
+					)
+					node.absolute_position = DOMRect(bounds[0] + offset_x, bounds[1] + offset_y, bounds[2], bounds[3])
+				nodes.append(node)
+
+				if 'c' in child:
+					stack.append((child['c'], node, (offset_x, offset_y)))
+				shadow_root = child.get('sh')
+				if shadow_root:
+					shadow_root_node = make_node(-shadow_root['i'], NodeType.DOCUMENT_FRAGMENT_NODE, '#document-fragment', node)
+					shadow_root_node.shadow_root_type = 'open'
+					shadow_root_node.is_visible = node.is_visible
+					node.shadow_roots = [shadow_root_node]
+					stack.append((shadow_root['c'], shadow_root_node, (offset_x, offset_y)))
+				content_document = child.get('d')
+				if content_document:
+					document_node = make_node(-content_document['i'], NodeType.DOCUMENT_NODE, '#document', node)
+					node.content_document = document_node
+					stack.append((content_document['c'], document_node, tuple(content_document['o'])))
+			parent.children_nodes = nodes
+	return root
+
+
+async def resolve_backend_node_ids(cdp_session: 'CDPSession', nodes: list[EnhancedDOMTreeNode]) -> int:
+	"""Replace the page ids of `nodes` with their real backend node ids, returns how many could be resolved.
+
+	One call gets the elements of the last extraction as remote objects, the backend node ids are then described
+	for all elements concurrently. Nodes that can't be resolved (removed in the meantime) keep their page id.
+	"""
+	if not nodes:
+		return 0
+	client, session_id = cdp_session.cdp_client, cdp_session.session_id
+	page_ids = [-node.backend_node_id for node in nodes]
+	try:
+		result = await client.send.Runtime.evaluate(
+			params={
+				'expression': f'(() => {{ const byId = window.__browserUseExtraction.byId; return {page_ids}.map(id => byId.get(id) || null); }})()',
+				'objectGroup': OBJECT_GROUP,
+			},
+			session_id=session_id,
+		)
+		array_object_id = result['result'].get('objectId')
+		if array_object_id is None:
+			return 0
+		properties = await client.send.Runtime.getProperties(
+			params={'objectId': array_object_id, 'ownProperties': True}, session_id=session_id
+		)
+		object_ids: dict[int, str] = {}
+		for prop in properties['result']:
+			if 'value' in prop and (object_id := prop['value'].get('objectId')) and prop['name'].isdigit():
+				object_ids[int(prop['name'])] = object_id
+
+		indices = list(object_ids)
+		described = await asyncio.gather(
+			*(client.send.DOM.describeNode(params={'objectId': object_ids[index]}, session_id=session_id) for index in indices),
+			return_exceptions=True,
+		)
+		resolved = 0
+		for index, description in zip(indices, described):
+			if not isinstance(description, BaseException):
+				nodes[index].backend_node_id = description['node']['backendNodeId']
+				resolved += 1
+		return resolved
+	finally:
+		await client.send.Runtime.releaseObjectGroup(params={'objectGroup': OBJECT_GROUP}, session_id=session_id)
+
+
+def nodes_needing_backend_node_ids(root: EnhancedDOMTreeNode) -> list[EnhancedDOMTreeNode]:
+	"""The elements the serializer can give an index to (visible and interactive), the only ones actions address."""
+	return [
+		node
+		for node in iter_subtree(root)
+		if node.node_type == NodeType.ELEMENT_NODE and node.is_visible and ClickableElementDetector.is_interactive(node)
+	]
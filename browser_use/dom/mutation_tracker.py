@@ -0,0 +1,274 @@
+"""
+Keep an `EnhancedDOMTreeNode` tree in sync with the page by applying CDP `DOM.*` mutation events in place.
+
+Chrome only fires DOM events for nodes the client already knows about, so the tracker is reset from a full
+`DOM.getDocument(depth=-1, pierce=True)` build and then patched by the events that arrive on the same session.
+Node ids are never reused by Chrome within a session, so events that still refer to nodes of a previous document
+are recognised by their unknown ids and dropped.
+"""
+
+import logging
+from typing import Any
+
+from cdp_use.cdp.dom.types import Node
+from cdp_use.cdp.target import SessionID, TargetID
+
+from browser_use.dom.enhanced_tree import build_enhanced_subtree, iter_subtree
+from browser_use.dom.views import EnhancedDOMTreeNode, NodeType
+
+logger = logging.getLogger(__name__)
+
+# DOM domain events that the tracker knows how to apply
+TRACKED_DOM_EVENTS = (
+	'childNodeInserted',
+	'childNodeRemoved',
+	'childNodeCountUpdated',
+	'setChildNodes',
+	'attributeModified',
+	'attributeRemoved',
+	'characterDataModified',
+	'shadowRootPushed',
+	'shadowRootPopped',
+	'scrollableFlagUpdated',
+	'documentUpdated',
+)
+
+# tags whose state (checked, selected, value, ...) can change without any DOM mutation
+STATEFUL_TAGS = frozenset({'input', 'select', 'textarea', 'option'})
+
+
+class DOMMutationTracker:
+	"""Patches the enhanced DOM tree of one target in place from CDP DOM mutation events.
+
+	The tracker records which nodes need their accessibility data refetched (`dirty_backend_node_ids`)
+	and which inserted nodes still need their children requested (`unexpanded_node_ids`).
+	`needs_full_rebuild` is set when the page navigated or the tree can no longer be trusted.
+	"""
+
+	def __init__(self, target_id: TargetID, session_id: SessionID, node_session_id: SessionID | None = None):
+		self.target_id = target_id
+		self.session_id = session_id
+		"""CDP session the DOM events arrive on (nodeIds are scoped to it)."""
+		self.node_session_id = node_session_id
+		"""Value written to `EnhancedDOMTreeNode.session_id` for nodes created from events."""
+
+		self.root: EnhancedDOMTreeNode | None = None
+		self.node_lookup: dict[int, EnhancedDOMTreeNode] = {}
+		"""NodeId (NOT backend node id) -> enhanced dom tree node"""
+
+		self.needs_full_rebuild = True
+		self.dirty_backend_node_ids: set[int] = set()
+		self.unexpanded_node_ids: set[int] = set()
+		self.mutation_count = 0
+
+		self._building = False
+		self._buffered_events: list[tuple[str, Any]] = []
+
+	# region - lifecycle
+
+	def begin_rebuild(self) -> None:
+		"""Start buffering events while a full `DOM.getDocument` build is in flight."""
+		self._building = True
+		self._buffered_events = []
+
+	def abort_rebuild(self) -> None:
+		self._building = False
+		self._buffered_events = []
+		self.needs_full_rebuild = True
+
+	def reset(self, root: EnhancedDOMTreeNode) -> None:
+		"""Adopt a freshly built tree and replay the events that arrived while it was being built."""
+		self.root = root
+		self.node_lookup = {node.node_id: node for node in iter_subtree(root)}
+		self.needs_full_rebuild = False
+		self.dirty_backend_node_ids = set()
+		self.unexpanded_node_ids = set()
+		self.mutation_count = 0
+
+		buffered_events, self._buffered_events = self._buffered_events, []
+		self._building = False
+		for method, params in buffered_events:
+			# events emitted before the document was fetched still carry old node ids and are skipped
+			self._apply(method, params, strict=False)
+
+	def invalidate(self, reason: str) -> None:
+		if not self.needs_full_rebuild:
+			logger.debug(f'DOM mutation tracker for target {self.target_id[-4:]} needs a full rebuild: {reason}')
+		self.needs_full_rebuild = True
+
+	@property
+	def can_refresh(self) -> bool:
+		"""Whether the tree can be brought up to date without refetching the whole document."""
+		return self.root is not None and not self.needs_full_rebuild and not self._building
+
+	def stateful_backend_node_ids(self) -> set[int]:
+		"""Backend node ids of form controls, whose accessibility state can change without a DOM mutation."""
+		return {
+			node.backend_node_id
+			for node in self.node_lookup.values()
+			if node.node_type == NodeType.ELEMENT_NODE and node.node_name.lower() in STATEFUL_TAGS
+		}
+
+	# endregion
+
+	# region - event handling
+
+	def handle_event(self, method: str, params: Any) -> None:
+		"""Apply a `DOM.<method>` event (called from the CDP client's event loop, must not block)."""
+		if self._building:
+			if method == 'documentUpdated':
+				# the document we are fetching may already be stale, but we can't tell which one Chrome answered with
+				self._buffered_events = []
+			self._buffered_events.append((method, params))
+			return
+		if self.root is None:
+			return
+		self._apply(method, params, strict=True)
+
+	def _apply(self, method: str, params: Any, strict: bool) -> None:
+		if method == 'documentUpdated':
+			self.invalidate('document updated')
+			return
+		handler = getattr(self, f'_on_{method}', None)
+		if handler is None:
+			return
+		self.mutation_count += 1
+		try:
+			handler(params, strict)
+		except Exception as e:
+			self.invalidate(f'failed to apply DOM.{method}: {type(e).__name__}: {e}')
+
+	def _get_node(self, node_id: int, strict: bool) -> EnhancedDOMTreeNode | None:
+		node = self.node_lookup.get(node_id)
+		if node is None and strict:
+			# Chrome only reports nodes we know about, so an unknown id means we missed an update
+			self.invalidate(f'unknown node id {node_id}')
+		return node
+
+	def _adopt_subtree(self, cdp_node: Node, parent: EnhancedDOMTreeNode | None) -> EnhancedDOMTreeNode:
+		created = build_enhanced_subtree(cdp_node, parent, self.target_id, self.node_session_id)
+		for node in created:
+			self.node_lookup[node.node_id] = node
+			if node.node_type == NodeType.ELEMENT_NODE:
+				self.dirty_backend_node_ids.add(node.backend_node_id)
+		for cdp_child in (cdp_node, *_iter_cdp_nodes(cdp_node)):
+			if cdp_child.get('childNodeCount') and not cdp_child.get('children'):
+				self.unexpanded_node_ids.add(cdp_child['nodeId'])
+		return created[0]
+
+	def _forget_subtree(self, root: EnhancedDOMTreeNode) -> None:
+		for node in iter_subtree(root):
+			self.node_lookup.pop(node.node_id, None)
+			self.dirty_backend_node_ids.discard(node.backend_node_id)
+			self.unexpanded_node_ids.discard(node.node_id)
+
+	def _mark_dirty(self, node: EnhancedDOMTreeNode) -> None:
+		if node.node_type == NodeType.ELEMENT_NODE:
+			self.dirty_backend_node_ids.add(node.backend_node_id)
+
+	def _on_childNodeInserted(self, params: Any, strict: bool) -> None:
+		parent = self._get_node(params['parentNodeId'], strict)
+		if parent is None:
+			return
+		if params['node']['nodeId'] in self.node_lookup:
+			return  # already known (e.g. replayed event for a node that is part of the fetched document)
+
+		new_node = self._adopt_subtree(params['node'], parent)
+		children = list(parent.children_nodes or [])
+		position = 0
+		if params.get('previousNodeId'):
+			position = next(
+				(i + 1 for i, child in enumerate(children) if child.node_id == params['previousNodeId']), len(children)
+			)
+		children.insert(position, new_node)
+		parent.children_nodes = children
+		parent.reset_cached_children_details()
+		self._mark_dirty(parent)
+
+	def _on_childNodeRemoved(self, params: Any, strict: bool) -> None:
+		node = self.node_lookup.get(params['nodeId'])
+		parent = self.node_lookup.get(params['parentNodeId'])
+		if node is None or parent is None:
+			return  # nothing to remove
+		if parent.children_nodes:
+			parent.children_nodes = [child for child in parent.children_nodes if child is not node]
+		parent.reset_cached_children_details()
+		self._forget_subtree(node)
+		self._mark_dirty(parent)
+
+	def _on_childNodeCountUpdated(self, params: Any, strict: bool) -> None:
+		node = self._get_node(params['nodeId'], strict)
+		if node is not None:
+			# the children of this node are not pushed to us, they have to be requested explicitly
+			self.unexpanded_node_ids.add(node.node_id)
+
+	def _on_setChildNodes(self, params: Any, strict: bool) -> None:
+		parent = self._get_node(params['parentId'], strict)
+		if parent is None:
+			return
+		for child in parent.children_nodes or []:
+			self._forget_subtree(child)
+		parent.children_nodes = [self._adopt_subtree(cdp_node, parent) for cdp_node in params['nodes']]
+		parent.reset_cached_children_details()
+		self.unexpanded_node_ids.discard(parent.node_id)
+		self._mark_dirty(parent)
+
+	def _on_attributeModified(self, params: Any, strict: bool) -> None:
+		node = self._get_node(params['nodeId'], strict)
+		if node is not None:
+			node.attributes[params['name']] = params['value']
+			node.reset_element_hash()
+			self._mark_dirty(node)
+
+	def _on_attributeRemoved(self, params: Any, strict: bool) -> None:
+		node = self._get_node(params['nodeId'], strict)
+		if node is not None:
+			node.attributes.pop(params['name'], None)
+			node.reset_element_hash()
+			self._mark_dirty(node)
+
+	def _on_characterDataModified(self, params: Any, strict: bool) -> None:
+		node = self._get_node(params['nodeId'], strict)
+		if node is not None:
+			node.node_value = params['characterData']
+			if node.parent_node is not None:
+				node.parent_node.reset_cached_children_details()
+				# the text is part of the accessible name of its parent
+				self._mark_dirty(node.parent_node)
+
+	def _on_shadowRootPushed(self, params: Any, strict: bool) -> None:
+		host = self._get_node(params['hostId'], strict)
+		if host is None or params['root']['nodeId'] in self.node_lookup:
+			return
+		host.shadow_roots = (host.shadow_roots or []) + [self._adopt_subtree(params['root'], host)]
+		self._mark_dirty(host)
+
+	def _on_shadowRootPopped(self, params: Any, strict: bool) -> None:
+		host = self.node_lookup.get(params['hostId'])
+		shadow_root = self.node_lookup.get(params['rootId'])
+		if host is None or shadow_root is None:
+			return
+		host.shadow_roots = [root for root in host.shadow_roots or [] if root is not shadow_root] or None
+		self._forget_subtree(shadow_root)
+		self._mark_dirty(host)
+
+	def _on_scrollableFlagUpdated(self, params: Any, strict: bool) -> None:
+		node = self._get_node(params['nodeId'], strict)
+		if node is not None:
+			node.is_scrollable = params['isScrollable']
+
+	# endregion
+
+
+def _iter_cdp_nodes(node: Node):
+	"""Yield all descendants of a CDP node payload (children, shadow roots and content documents)."""
+	stack = [*(node.get('children') or []), *(node.get('shadowRoots') or [])]
+	if content_document := node.get('contentDocument'):
+		stack.append(content_document)
+	while stack:
+		current = stack.pop()
+		yield current
+		stack.extend(current.get('children') or [])
+		stack.extend(current.get('shadowRoots') or [])
+		if content_document := current.get('contentDocument'):
+			stack.append(content_document)
@@ -0,0 +1,168 @@
+"""
+Building and serializing DOM trees off the event loop, in a worker process or thread.
+
+Tree construction and serialization are pure-Python CPU work. Run on the event loop, one heavy page stalls every other
+agent, CDP keepalive and LLM stream in the process. With `BrowserProfile.dom_offload`, the DOM watchdog ships the raw CDP
+payloads to a worker instead, which builds the tree, serializes it and returns an `OffloadedDOMState`. That is a
+compact, picklable result without the tree: the interactive elements by backend node id, the selector map as indices to
+backend node ids, and the serialized lines.
+
+Nodes in the result are `DetachedDOMTreeNode`s: copies without parent, children, shadow roots or content document. What
+the rest of the code derives from those links (xpath, element hash, children text, scroll info) is computed in the
+worker and stored on the copy.
+
+'process' runs in a shared `ProcessPoolExecutor` (spawned workers). 'thread' runs in a shared thread pool, only worth it
+on free-threaded Python builds, with the GIL the loop still stalls for the whole build.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Literal
+
+from browser_use.dom.enhanced_tree import precompute_xpaths_and_texts
+from browser_use.dom.views import (
+	DOMStateDiff,
+	EnhancedDOMTreeNode,
+	NodeType,
+	SerializedDOMLine,
+	SerializedDOMState,
+)
+
+logger = logging.getLogger(__name__)
+
+DOMOffloadMode = Literal['off', 'thread', 'process']
+
+# `get_all_children_text` depths precomputed on detached nodes (every call site uses one of these)
+DETACHED_CHILDREN_TEXT_DEPTHS = (-1, 2)
+
+_executors: dict[str, Executor] = {}
+
+
+def get_dom_offload_executor(mode: Literal['thread', 'process']) -> Executor:
+	"""The executor of `mode`, shared by all DOM services of the process and created on first use."""
+	executor = _executors.get(mode)
+	if executor is None:
+		if mode == 'process':
+			# spawned, forking a process with a running event loop and open websockets is not safe
+			executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+		else:
+			executor = ThreadPoolExecutor(thread_name_prefix='browser_use_dom_offload')
+		_executors[mode] = executor
+	return executor
+
+
+def discard_dom_offload_executor(mode: Literal['thread', 'process']) -> None:
+	"""Forget a broken executor (e.g. a worker process was killed), the next call creates a new one."""
+	executor = _executors.pop(mode, None)
+	if executor is not None:
+		executor.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass(slots=True, eq=False, repr=False)
+class DetachedDOMTreeNode(EnhancedDOMTreeNode):
+	"""An `EnhancedDOMTreeNode` copied out of its tree, with what depends on the tree computed beforehand."""
+
+	detached_xpath: str = ''
+	detached_children_texts: dict[int, str] = field(default_factory=dict)
+	detached_should_show_scroll_info: bool = False
+	detached_scroll_info_text: str = ''
+
+	@property
+	def xpath(self) -> str:
+		return self.detached_xpath
+
+	def get_all_children_text(self, max_depth: int = -1) -> str:
+		text = self.detached_children_texts.get(max_depth)
+		return text if text is not None else self.detached_children_texts.get(-1, '')
+
+	@property
+	def should_show_scroll_info(self) -> bool:
+		return self.detached_should_show_scroll_info
+
+	def get_scroll_info_text(self) -> str:
+		return self.detached_scroll_info_text
+
+
+def detach_node(node: EnhancedDOMTreeNode) -> DetachedDOMTreeNode:
+	is_element = node.node_type == NodeType.ELEMENT_NODE
+	return DetachedDOMTreeNode(
+		node_id=node.node_id,
+		backend_node_id=node.backend_node_id,
+		node_type=node.node_type,
+		node_name=node.node_name,
+		node_value=node.node_value,
+		attributes=node.attributes,
+		is_scrollable=node.is_scrollable,
+		is_visible=node.is_visible,
+		absolute_position=node.absolute_position,
+		target_id=node.target_id,
+		frame_id=node.frame_id,
+		session_id=node.session_id,
+		content_document=None,
+		shadow_root_type=node.shadow_root_type,
+		shadow_roots=None,
+		parent_node=None,
+		children_nodes=None,
+		ax_node=node.ax_node,
+		snapshot_node=node.snapshot_node,
+		element_index=node.element_index,
+		# text nodes are only rendered, never hashed, located or asked for their text
+		_branch_hash=node.parent_branch_hash() if is_element else None,
+		_element_hash=hash(node) if is_element else None,
+		detached_xpath=node.xpath if is_element else '',
+		detached_children_texts={depth: node.get_all_children_text(depth) for depth in DETACHED_CHILDREN_TEXT_DEPTHS}
+		if is_element
+		else {},
+		detached_should_show_scroll_info=is_element and node.should_show_scroll_info,
+		detached_scroll_info_text=node.get_scroll_info_text() if is_element else '',
+	)
+
+
+@dataclass
+class OffloadedDOMState:
+	"""Picklable `SerializedDOMState` without the tree it was serialized from."""
+
+	elements: dict[int, DetachedDOMTreeNode]
+	"""Interactive elements by backend node id"""
+	selector_map: dict[int, int]
+	"""Element index -> backend node id"""
+	lines: list[SerializedDOMLine] | None
+	diff: DOMStateDiff | None
+	timing: dict[str, float]
+
+	@classmethod
+	def from_serialized_state(cls, state: SerializedDOMState, timing: dict[str, float]) -> 'OffloadedDOMState':
+		detached: dict[int, DetachedDOMTreeNode] = {}
+		precompute_xpaths_and_texts(state.selector_map.values())
+
+		def detach(node: EnhancedDOMTreeNode) -> DetachedDOMTreeNode:
+			# the same node in the selector map and in the lines stays one object (pickled once)
+			copy = detached.get(id(node))
+			if copy is None:
+				copy = detached[id(node)] = detach_node(node)
+			return copy
+
+		return cls(
+			elements={node.backend_node_id: detach(node) for node in state.selector_map.values()},
+			selector_map={index: node.backend_node_id for index, node in state.selector_map.items()},
+			lines=[
+				SerializedDOMLine(
+					depth=line.depth, node=detach(line.node), interactive_index=line.interactive_index, is_new=line.is_new
+				)
+				for line in state._lines
+			]
+			if state._lines is not None
+			else None,
+			diff=state.diff,
+			timing=timing,
+		)
+
+	def to_serialized_state(self) -> SerializedDOMState:
+		return SerializedDOMState(
+			_root=None,
+			selector_map={index: self.elements[backend_node_id] for index, backend_node_id in self.selector_map.items()},
+			diff=self.diff,
+			_lines=self.lines,
+		)
@@ -0,0 +1,307 @@
+"""
+Benchmark classifying nodes as interactive: the compiled classifier vs the previous chain of checks.
+
+Run with: python -m browser_use.dom.playground.benchmark_clickable [payload.json ...]
+Payloads can be recorded with `python -m browser_use.dom.playground.benchmark_tree_construction --record <url> <payload.json>`.
+
+Synthetic pages get random classes, ids, data attributes, roles, event handlers, AX properties, sizes and cursors, so every
+check of the classifier is hit. Both classifiers must agree on every node.
+"""
+
+import random
+import sys
+import time
+
+from browser_use.browser import BrowserSession
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, load_payload, make_payload
+from browser_use.dom.serializer import clickable_elements
+from browser_use.dom.serializer.clickable_elements import ClickableElementDetector
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMRect, EnhancedAXNode, EnhancedAXProperty, EnhancedDOMTreeNode, NodeType, TargetAllTrees
+
+SIZES = [1_000, 10_000, 50_000]
+
+CLASSES = ['item', 'card', 'nav-item', 'btn btn-primary', 'search-btn', 'MagnifyIcon', 'list-row', '']
+IDS = ['main', 'query-input', 'header', 'SearchBox']
+DATA_ATTRIBUTES = [('data-action', 'open'), ('data-testid', 'FindButton'), ('data-id', '42'), ('data-kind', 'lookup')]
+ROLES = ['button', 'link', 'presentation', 'list', 'listbox', 'tab', 'searchbox', 'none']
+HANDLERS = ['onclick', 'onmousedown', 'tabindex', 'aria-label', 'title']
+AX_PROPERTIES = ['disabled', 'hidden', 'focusable', 'editable', 'checked', 'expanded', 'required', 'keyshortcuts', 'level']
+AX_VALUES: list[str | bool | None] = [True, False, None, '', 'value']
+TAGS = ['iframe', 'html', 'summary', 'svg']
+SIZES_PX = [(0, 0), (20, 20), (40, 12), (200, 150), (60, 60)]
+
+
+def decorate_for_classification(root: EnhancedDOMTreeNode, seed: int = 0) -> None:
+	"""Give the elements of a synthetic tree the attributes, AX properties, sizes and cursors real pages have."""
+	rng = random.Random(seed)
+	for node in iter_subtree(root):
+		if node.node_type != NodeType.ELEMENT_NODE:
+			continue
+		if rng.random() < 0.05:
+			node.node_name = rng.choice(TAGS).upper()
+		attributes = dict(node.attributes)
+		attributes['class'] = rng.choice(CLASSES)
+		if rng.random() < 0.2:
+			attributes['id'] = rng.choice(IDS) if rng.random() < 0.5 else f'id-{rng.randrange(10**6)}'
+		if rng.random() < 0.2:
+			attributes.update([rng.choice(DATA_ATTRIBUTES)])
+		if rng.random() < 0.2:
+			attributes['role'] = rng.choice(ROLES)
+		if rng.random() < 0.2:
+			attributes[rng.choice(HANDLERS)] = ''
+		if rng.random() < 0.05:
+			attributes = {}
+		node.attributes = attributes
+		if rng.random() < 0.5:
+			node.ax_node = EnhancedAXNode(
+				ax_node_id=str(node.backend_node_id),
+				ignored=False,
+				role=rng.choice(ROLES + ['generic', None]),
+				name=None,
+				description=None,
+				properties=[
+					EnhancedAXProperty(name=rng.choice(AX_PROPERTIES), value=rng.choice(AX_VALUES))  # type: ignore[arg-type]
+					for _ in range(rng.randrange(3))
+				]
+				or None,
+			)
+		if node.snapshot_node is not None:
+			width, height = rng.choice(SIZES_PX)
+			node.snapshot_node.bounds = DOMRect(x=0, y=0, width=width, height=height)
+			node.snapshot_node.cursor_style = 'pointer' if rng.random() < 0.1 else 'auto'
+
+
+def legacy_is_interactive(node: EnhancedDOMTreeNode) -> bool:
+	"""`ClickableElementDetector.is_interactive` before it was compiled: the checks one after another, per node."""
+
+	# Skip non-element nodes
+	if node.node_type != NodeType.ELEMENT_NODE:
+		return False
+
+	# # if ax ignored skip
+	# if node.ax_node and node.ax_node.ignored:
+	# 	return False
+
+	# remove html and body nodes
+	if node.tag_name in {'html', 'body'}:
+		return False
+
+	# IFRAME elements should be interactive if they're large enough to potentially need scrolling
+	# Small iframes (< 100px width or height) are unlikely to have scrollable content
+	if node.tag_name and node.tag_name.upper() == 'IFRAME':
+		if node.snapshot_node and node.snapshot_node.bounds:
+			width = node.snapshot_node.bounds.width
+			height = node.snapshot_node.bounds.height
+			# Only include iframes larger than 100x100px
+			if width > 100 and height > 100:
+				return True
+
+	# RELAXED SIZE CHECK: Allow all elements including size 0 (they might be interactive overlays, etc.)
+	# Note: Size 0 elements can still be interactive (e.g., invisible clickable overlays)
+	# Visibility is determined separately by CSS styles, not just bounding box size
+
+	# SEARCH ELEMENT DETECTION: Check for search-related classes and attributes
+	if node.attributes:
+		search_indicators = {
+			'search',
+			'magnify',
+			'glass',
+			'lookup',
+			'find',
+			'query',
+			'search-icon',
+			'search-btn',
+			'search-button',
+			'searchbox',
+		}
+
+		# Check class names for search indicators
+		class_list = node.attributes.get('class', '').lower().split()
+		if any(indicator in ' '.join(class_list) for indicator in search_indicators):
+			return True
+
+		# Check id for search indicators
+		element_id = node.attributes.get('id', '').lower()
+		if any(indicator in element_id for indicator in search_indicators):
+			return True
+
+		# Check data attributes for search functionality
+		for attr_name, attr_value in node.attributes.items():
+			if attr_name.startswith('data-') and any(indicator in attr_value.lower() for indicator in search_indicators):
+				return True
+
+	# Enhanced accessibility property checks - direct clear indicators only
+	if node.ax_node and node.ax_node.properties:
+		for prop in node.ax_node.properties:
+			try:
+				# aria disabled
+				if prop.name == 'disabled' and prop.value:
+					return False
+
+				# aria hidden
+				if prop.name == 'hidden' and prop.value:
+					return False
+
+				# Direct interactiveness indicators
+				if prop.name in ['focusable', 'editable', 'settable'] and prop.value:
+					return True
+
+				# Interactive state properties (presence indicates interactive widget)
+				if prop.name in ['checked', 'expanded', 'pressed', 'selected']:
+					# These properties only exist on interactive elements
+					return True
+
+				# Form-related interactiveness
+				if prop.name in ['required', 'autocomplete'] and prop.value:
+					return True
+
+				# Elements with keyboard shortcuts are interactive
+				if prop.name == 'keyshortcuts' and prop.value:
+					return True
+			except (AttributeError, ValueError):
+				# Skip properties we can't process
+				continue
+
+	# ENHANCED TAG CHECK: Include truly interactive elements
+	interactive_tags = {
+		'button',
+		'input',
+		'select',
+		'textarea',
+		'a',
+		'label',
+		'details',
+		'summary',
+		'option',
+		'optgroup',
+	}
+	if node.tag_name in interactive_tags:
+		return True
+
+	# SVG elements need special handling - only interactive if they have explicit handlers
+	# svg_tags = {'svg', 'path', 'circle', 'rect', 'polygon', 'ellipse', 'line', 'polyline', 'g'}
+	# if node.tag_name in svg_tags:
+	# 	# Only consider SVG elements interactive if they have:
+	# 	# 1. Explicit event handlers
+	# 	# 2. Interactive role attributes
+	# 	# 3. Cursor pointer style
+	# 	if node.attributes:
+	# 		# Check for event handlers
+	# 		if any(attr.startswith('on') for attr in node.attributes):
+	# 			return True
+	# 		# Check for interactive roles
+	# 		if node.attributes.get('role') in {'button', 'link', 'menuitem'}:
+	# 			return True
+	# 		# Check for cursor pointer (indicating clickability)
+	# 		if node.attributes.get('style') and 'cursor: pointer' in node.attributes.get('style', ''):
+	# 			return True
+	# 	# Otherwise, SVG elements are decorative
+	# 	return False
+
+	# Tertiary check: elements with interactive attributes
+	if node.attributes:
+		# Check for event handlers or interactive attributes
+		interactive_attributes = {'onclick', 'onmousedown', 'onmouseup', 'onkeydown', 'onkeyup', 'tabindex'}
+		if any(attr in node.attributes for attr in interactive_attributes):
+			return True
+
+		# Check for interactive ARIA roles
+		if 'role' in node.attributes:
+			interactive_roles = {
+				'button',
+				'link',
+				'menuitem',
+				'option',
+				'radio',
+				'checkbox',
+				'tab',
+				'textbox',
+				'combobox',
+				'slider',
+				'spinbutton',
+				'search',
+				'searchbox',
+			}
+			if node.attributes['role'] in interactive_roles:
+				return True
+
+	# Quaternary check: accessibility tree roles
+	if node.ax_node and node.ax_node.role:
+		interactive_ax_roles = {
+			'button',
+			'link',
+			'menuitem',
+			'option',
+			'radio',
+			'checkbox',
+			'tab',
+			'textbox',
+			'combobox',
+			'slider',
+			'spinbutton',
+			'listbox',
+			'search',
+			'searchbox',
+		}
+		if node.ax_node.role in interactive_ax_roles:
+			return True
+
+	# ICON AND SMALL ELEMENT CHECK: Elements that might be icons
+	if (
+		node.snapshot_node
+		and node.snapshot_node.bounds
+		and 10 <= node.snapshot_node.bounds.width <= 50  # Icon-sized elements
+		and 10 <= node.snapshot_node.bounds.height <= 50
+	):
+		# Check if this small element has interactive properties
+		if node.attributes:
+			# Small elements with these attributes are likely interactive icons
+			icon_attributes = {'class', 'role', 'onclick', 'data-action', 'aria-label'}
+			if any(attr in node.attributes for attr in icon_attributes):
+				return True
+
+	# Final fallback: cursor style indicates interactivity (for cases Chrome missed)
+	if node.snapshot_node and node.snapshot_node.cursor_style and node.snapshot_node.cursor_style == 'pointer':
+		return True
+
+	return False
+
+
+def benchmark(name: str, trees: TargetAllTrees, decorate: bool, repeat: int = 5) -> None:
+	"""Print the best of `repeat` runs of both classifiers, the compiled one with a cold and a warm search indicator cache."""
+	root, _ = DomService(BrowserSession()).construct_enhanced_tree(trees, TARGET_ID)
+	if decorate:
+		decorate_for_classification(root)
+	nodes = list(iter_subtree(root))
+	expected = [legacy_is_interactive(node) for node in nodes]
+	assert [ClickableElementDetector.is_interactive(node) for node in nodes] == expected, 'classifiers disagree'
+
+	def best_of(classify, clear_cache: bool = False) -> float:
+		best = float('inf')
+		for _ in range(repeat):
+			if clear_cache:
+				clickable_elements._has_search_indicator.cache_clear()
+			start = time.perf_counter()
+			for node in nodes:
+				classify(node)
+			best = min(best, time.perf_counter() - start)
+		return best * 1000
+
+	legacy = best_of(legacy_is_interactive)
+	cold = best_of(ClickableElementDetector.is_interactive, clear_cache=True)
+	warm = best_of(ClickableElementDetector.is_interactive)
+	print(f'{name:>22} {len(nodes):>9} {sum(expected):>12} {legacy:>12.2f} {cold:>12.2f} {warm:>12.2f}')
+
+
+def main():
+	print(f'{"payload":>22} {"nodes":>9} {"interactive":>12} {"legacy (ms)":>12} {"cold (ms)":>12} {"warm (ms)":>12}')
+	for size in SIZES:
+		benchmark(f'{size} nodes', make_payload(size), decorate=True)
+	for path in sys.argv[1:]:
+		benchmark(path[-22:], load_payload(path), decorate=False)
+
+
+if __name__ == '__main__':
+	main()
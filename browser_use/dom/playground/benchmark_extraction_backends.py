@@ -0,0 +1,68 @@
+"""
+Compare the DOM extraction backends ('cdp' snapshot payloads vs one 'js' in-page script) on real pages.
+
+Run with: python -m browser_use.dom.playground.benchmark_extraction_backends [url ...]
+
+For every page and backend it prints the best of a few runs of fetching the tree and serializing it, the size of the
+payloads that cross the CDP websocket and how many interactive elements the serialized state has (should be close).
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+from browser_use.browser import BrowserProfile, BrowserSession
+from browser_use.browser.events import NavigateToUrlEvent
+from browser_use.dom.in_page_extraction import run_in_page_extraction
+from browser_use.dom.service import DomService
+
+URLS = [
+	'https://en.wikipedia.org/wiki/Web_browser',
+	'https://news.ycombinator.com',
+	'https://github.com/browser-use/browser-use',
+]
+REPEAT = 3
+
+
+async def payload_size(dom_service: DomService, target_id: str) -> int:
+	"""Bytes of JSON the backend receives for one page."""
+	if dom_service.extraction_backend == 'js':
+		cdp_session = await dom_service.browser_session.get_or_create_cdp_session(target_id=target_id, focus=False)
+		return len(await run_in_page_extraction(cdp_session))
+	trees = await dom_service._get_all_trees(target_id)
+	return len(json.dumps(trees.snapshot)) + len(json.dumps(trees.dom_tree)) + len(json.dumps(trees.ax_tree))
+
+
+async def benchmark(url: str, browser_session: BrowserSession) -> None:
+	await browser_session.event_bus.dispatch(NavigateToUrlEvent(url=url))
+	await asyncio.sleep(2)
+	target_id = browser_session.current_target_id
+	assert target_id is not None
+
+	for backend in ('cdp', 'js'):
+		dom_service = DomService(browser_session, extraction_backend=backend)
+		best = float('inf')
+		interactive = 0
+		for _ in range(REPEAT):
+			start = time.perf_counter()
+			state, _, _ = await dom_service.get_serialized_dom_tree()
+			best = min(best, time.perf_counter() - start)
+			interactive = len(state.selector_map)
+		size = await payload_size(dom_service, target_id)
+		print(f'{url[-40:]:>40} {backend:>7} {best * 1000:>9.0f} {size / 2**20:>12.2f} {interactive:>11}')
+
+
+async def main():
+	browser_session = BrowserSession(browser_profile=BrowserProfile(headless=True))
+	await browser_session.start()
+	try:
+		print(f'{"page":>40} {"backend":>7} {"time (ms)":>9} {"payload (MiB)":>12} {"interactive":>11}')
+		for url in sys.argv[1:] or URLS:
+			await benchmark(url, browser_session)
+	finally:
+		await browser_session.kill()
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
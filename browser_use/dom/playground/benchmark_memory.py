@@ -0,0 +1,122 @@
+"""
+Benchmark the memory an enhanced DOM tree keeps alive after it has been built.
+
+Run with: python -m browser_use.dom.playground.benchmark_memory [payload.json ...]
+Payloads can be recorded with `python -m browser_use.dom.playground.benchmark_tree_construction --record <url> <payload.json>`.
+
+Payloads are parsed from JSON inside the measurement (like CDP responses), then the tree is built and the payloads
+are dropped. What tracemalloc still counts afterwards is what the tree costs for as long as it is cached.
+Synthetic pages get all computed styles, a few attributes and AX properties per node, like a real page.
+"""
+
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+from browser_use.browser import BrowserSession
+from browser_use.dom.enhanced_snapshot import REQUIRED_COMPUTED_STYLES
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, make_payload
+from browser_use.dom.service import DomService
+from browser_use.dom.views import TargetAllTrees
+
+SIZES = [1_000, 10_000, 50_000]
+
+STYLE_VALUES = {
+	'display': ['block', 'inline', 'flex', 'inline-block'],
+	'visibility': ['visible'],
+	'opacity': ['1'],
+	'position': ['static', 'relative', 'absolute'],
+	'z-index': ['auto', '1', '10'],
+	'pointer-events': ['auto'],
+	'cursor': ['auto', 'pointer', 'text'],
+	'overflow': ['visible', 'hidden'],
+	'overflow-x': ['visible', 'hidden'],
+	'overflow-y': ['visible', 'auto'],
+	'background-color': ['rgba(0, 0, 0, 0)', 'rgb(255, 255, 255)'],
+	'color': ['rgb(0, 0, 0)', 'rgb(51, 51, 51)'],
+	'transform': ['none'],
+	'clip': ['auto'],
+	'clip-path': ['none'],
+	'user-select': ['auto', 'none'],
+	'border': ['0px none rgb(0, 0, 0)', '1px solid rgb(221, 221, 221)'],
+	'margin': ['0px', '0px 0px 16px'],
+	'padding': ['0px', '8px 16px'],
+}
+
+
+def make_realistic_payload(num_nodes: int, seed: int = 0) -> str:
+	"""A `make_payload` page with the styles, attributes and AX properties of a real page, as JSON."""
+	rng = random.Random(seed)
+	trees = make_payload(num_nodes, seed=seed)
+	snapshot = trees.snapshot
+	strings: list[str] = snapshot['strings']  # type: ignore[assignment]
+	string_ids: dict[str, int] = {}
+
+	def string_id(value: str) -> int:
+		if value not in string_ids:
+			string_ids[value] = len(strings)
+			strings.append(value)
+		return string_ids[value]
+
+	layout = snapshot['documents'][0]['layout']
+	layout['styles'] = [
+		[
+			string_id(rng.choice(STYLE_VALUES[name]) if name in STYLE_VALUES else f'{rng.randrange(400)}px')
+			for name in REQUIRED_COMPUTED_STYLES
+		]
+		for _ in layout['nodeIndex']
+	]
+
+	for ax_node in trees.ax_tree['nodes']:
+		ax_node['properties'] = [
+			{'name': 'focusable', 'value': {'type': 'booleanOrUndefined', 'value': rng.random() < 0.3}},
+			{'name': 'editable', 'value': {'type': 'token', 'value': 'plaintext'}},
+		][: rng.randrange(3)]
+
+	stack = [trees.dom_tree['root']]
+	while stack:
+		node = stack.pop()
+		if node['nodeType'] == 1:
+			node['attributes'] = [
+				*node['attributes'],
+				'id',
+				f'node-{node["nodeId"]}',
+				'data-testid',
+				f'test-{rng.randrange(100)}',
+			]
+		stack.extend(node.get('children', []))
+
+	return json.dumps({'dom_tree': trees.dom_tree, 'snapshot': snapshot, 'ax_tree': trees.ax_tree, 'device_pixel_ratio': 1.0})
+
+
+def measure(name: str, payload_json: str, dom_service: DomService) -> None:
+	gc.collect()
+	tracemalloc.start()
+	try:
+		trees = TargetAllTrees(cdp_timing={}, **json.loads(payload_json))
+		root, _ = dom_service.construct_enhanced_tree(trees, TARGET_ID)
+		_, peak = tracemalloc.get_traced_memory()
+		del trees
+		gc.collect()
+		retained, _ = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	num_nodes = payload_json.count('"backendNodeId"') // 2
+	print(f'{name:>22} {retained / 2**20:>13.1f} {peak / 2**20:>10.1f} {retained / max(num_nodes, 1):>14.0f}')
+	del root
+
+
+def main():
+	dom_service = DomService(BrowserSession())
+	print(f'{"payload":>22} {"retained (MiB)":>13} {"peak (MiB)":>10} {"bytes per node":>14}')
+	for size in SIZES:
+		measure(f'{size} nodes', make_realistic_payload(size), dom_service)
+	for path in sys.argv[1:]:
+		measure(path[-22:], Path(path).read_text(), dom_service)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,78 @@
+"""
+Benchmark the paint order occlusion filter of the serializer.
+
+Run with: python -m browser_use.dom.playground.benchmark_occlusion [payload.json ...]
+Payloads can be recorded with `python -m browser_use.dom.playground.benchmark_tree_construction --record <url> <payload.json>`.
+
+Times building the occluder index plus one `is_occluded` query per interactive visible element (what one serialization
+does). Synthetic pages get opaque backgrounds on a third of their elements and a modal dialog over the top of the page.
+"""
+
+import random
+import sys
+import time
+
+from browser_use.browser import BrowserSession
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, load_payload, make_payload
+from browser_use.dom.serializer.clickable_elements import ClickableElementDetector
+from browser_use.dom.serializer.paint_order import PaintOrderOcclusionFilter
+from browser_use.dom.service import DomService
+from browser_use.dom.views import EnhancedDOMTreeNode, NodeType
+
+SIZES = [1_000, 5_000, 50_000]
+BUDGET_MS_AT_5K = 10.0
+
+
+def add_opaque_backgrounds(root: EnhancedDOMTreeNode, seed: int = 0) -> None:
+	"""Give a third of the laid out elements an opaque background and paint the last one over the first viewport."""
+	rng = random.Random(seed)
+	elements = [
+		node
+		for node in iter_subtree(root)
+		if node.node_type == NodeType.ELEMENT_NODE and node.snapshot_node and node.absolute_position
+	]
+	for node in elements:
+		if rng.random() < 0.33:
+			node.snapshot_node.computed_styles = {'background-color': 'rgb(255, 255, 255)', 'opacity': '1'}  # type: ignore[union-attr]
+	modal = elements[-1]
+	modal.absolute_position = modal.snapshot_node.bounds = type(modal.absolute_position)(x=0, y=0, width=1280, height=800)  # type: ignore[union-attr,misc]
+	modal.snapshot_node.computed_styles = {'background-color': 'rgb(0, 0, 0)', 'opacity': '1'}  # type: ignore[union-attr]
+	modal.snapshot_node.paint_order = 10**9  # type: ignore[union-attr]
+
+
+def benchmark(name: str, root: EnhancedDOMTreeNode, repeat: int = 5) -> float:
+	"""Print and return the best of `repeat` runs in milliseconds."""
+	candidates = [
+		node
+		for node in iter_subtree(root)
+		if node.node_type == NodeType.ELEMENT_NODE and node.is_visible and ClickableElementDetector.is_interactive(node)
+	]
+	best = float('inf')
+	occluded = 0
+	for _ in range(repeat):
+		start = time.perf_counter()
+		occlusion_filter = PaintOrderOcclusionFilter(root)
+		occluded = sum(occlusion_filter.is_occluded(node) for node in candidates)
+		best = min(best, time.perf_counter() - start)
+	elements = sum(1 for node in iter_subtree(root) if node.node_type == NodeType.ELEMENT_NODE)
+	print(f'{name:>22} {elements:>9} {len(candidates):>12} {occluded:>9} {best * 1000:>10.2f}')
+	return best * 1000
+
+
+def main():
+	dom_service = DomService(BrowserSession())
+	print(f'{"payload":>22} {"elements":>9} {"interactive":>12} {"occluded":>9} {"time (ms)":>10}')
+	for size in SIZES:
+		root, _ = dom_service.construct_enhanced_tree(make_payload(size), TARGET_ID)
+		add_opaque_backgrounds(root)
+		elapsed = benchmark(f'{size} nodes', root)
+		if size == 5_000 and elapsed > BUDGET_MS_AT_5K:
+			print(f'  over the budget of {BUDGET_MS_AT_5K} ms for a 5k node page')
+	for path in sys.argv[1:]:
+		root, _ = dom_service.construct_enhanced_tree(load_payload(path), TARGET_ID)
+		benchmark(path[-22:], root)
+
+
+if __name__ == '__main__':
+	main()
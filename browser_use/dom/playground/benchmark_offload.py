@@ -0,0 +1,89 @@
+"""
+Benchmark the event loop lag caused by concurrent DOM builds, on the loop vs in a worker thread or process.
+
+Run with: python -m browser_use.dom.playground.benchmark_offload [agents] [nodes]
+
+Simulates `agents` agents in one process that each build and serialize a synthetic page of `nodes` nodes a few times,
+all on one event loop, like `DomService.get_serialized_dom_tree` does with `dom_offload` set to 'off', 'thread' or
+'process'. Meanwhile a probe task sleeps for 5 ms in a loop and records how late it wakes up: that lag is what CDP
+keepalives, LLM streams and the other agents' steps see.
+"""
+
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+from browser_use.dom.offload import DOMOffloadMode, discard_dom_offload_executor
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, make_payload
+from browser_use.dom.service import DomService
+from browser_use.dom.views import TargetAllTrees
+
+AGENTS = 20
+NODES = 5_000
+STEPS = 3
+PROBE_INTERVAL = 0.005
+
+
+async def probe_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+	while not stop.is_set():
+		start = time.perf_counter()
+		await asyncio.sleep(PROBE_INTERVAL)
+		lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+def make_dom_service(trees: TargetAllTrees, offload: DOMOffloadMode) -> DomService:
+	browser_session = SimpleNamespace(
+		logger=logging.getLogger('benchmark'), agent_focus=SimpleNamespace(session_id='session'), current_target_id=TARGET_ID
+	)
+	dom_service = DomService(browser_session=browser_session, offload=offload)  # type: ignore[arg-type]
+
+	async def get_all_trees(target_id):
+		await asyncio.sleep(0)  # the CDP round trips
+		return trees
+
+	dom_service._get_all_trees = get_all_trees  # type: ignore[method-assign]
+	return dom_service
+
+
+async def run_agent(dom_service: DomService) -> None:
+	state = None
+	for _ in range(STEPS):
+		state, _, _ = await dom_service.get_serialized_dom_tree(previous_cached_state=state)
+		state.llm_representation()
+
+
+async def benchmark(offload: DOMOffloadMode, agents: int, nodes: int) -> None:
+	dom_services = [make_dom_service(make_payload(nodes, seed=i), offload) for i in range(agents)]
+	if offload != 'off':
+		await run_agent(dom_services[0])  # start the workers outside of the measurement
+
+	lags: list[float] = []
+	stop = asyncio.Event()
+	probe = asyncio.create_task(probe_loop_lag(lags, stop))
+	start = time.perf_counter()
+	await asyncio.gather(*(run_agent(dom_service) for dom_service in dom_services))
+	total = time.perf_counter() - start
+	stop.set()
+	await probe
+	if offload != 'off':
+		discard_dom_offload_executor(offload)
+
+	lags.sort()
+	p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+	print(f'{offload:>8} {total:>9.2f} {statistics.median(lags) * 1000:>12.1f} {p99 * 1000:>12.1f} {lags[-1] * 1000:>12.1f}')
+
+
+async def main():
+	agents = int(sys.argv[1]) if len(sys.argv) > 1 else AGENTS
+	nodes = int(sys.argv[2]) if len(sys.argv) > 2 else NODES
+	print(f'{agents} agents x {STEPS} steps, {nodes} nodes per page')
+	print(f'{"offload":>8} {"total (s)":>9} {"lag p50 (ms)":>12} {"lag p99 (ms)":>12} {"lag max (ms)":>12}')
+	for offload in ('off', 'thread', 'process'):
+		await benchmark(offload, agents, nodes)
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+Benchmark serializing the enhanced DOM tree for the LLM, legacy passes vs. the fused single pass.
+
+Run with: python -m browser_use.dom.playground.benchmark_serializer [payload.json ...]
+Payloads can be recorded with `python -m browser_use.dom.playground.benchmark_tree_construction --record <url> <payload.json>`.
+
+Times `serialize_accessible_elements` plus `llm_representation` (one agent step) and counts the garbage collections it triggers.
+"""
+
+import gc
+import sys
+import time
+
+from browser_use.browser import BrowserSession
+from browser_use.dom.playground.benchmark_tree_construction import SIZES, TARGET_ID, load_payload, make_payload
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.service import DomService
+from browser_use.dom.views import EnhancedDOMTreeNode, TargetAllTrees
+
+
+def serialize(root: EnhancedDOMTreeNode, legacy: bool) -> str:
+	state, _ = DOMTreeSerializer(root, legacy=legacy).serialize_accessible_elements()
+	return state.llm_representation()
+
+
+def benchmark(name: str, trees: TargetAllTrees, dom_service: DomService, repeat: int = 5) -> None:
+	"""Print the best of `repeat` runs and the gc collections of the last run of both modes."""
+	root, _ = dom_service.construct_enhanced_tree(trees, TARGET_ID)
+	assert serialize(root, legacy=True) == serialize(root, legacy=False), f'{name}: fused output differs from legacy output'
+
+	columns: list[str] = []
+	for legacy in (True, False):
+		best = float('inf')
+		collections = 0
+		for _ in range(repeat):
+			gc.collect()
+			collections_before = sum(stats['collections'] for stats in gc.get_stats())
+			start = time.perf_counter()
+			serialize(root, legacy)
+			best = min(best, time.perf_counter() - start)
+			collections = sum(stats['collections'] for stats in gc.get_stats()) - collections_before
+		columns.append(f'{best * 1000:>12.1f} {collections:>4}')
+	print(f'{name:>22} {columns[0]} {columns[1]}')
+
+
+def main():
+	dom_service = DomService(BrowserSession())
+	print(f'{"payload":>22} {"legacy (ms)":>12} {"gcs":>4} {"fused (ms)":>12} {"gcs":>4}')
+	for size in SIZES:
+		benchmark(f'{size} nodes', make_payload(size), dom_service)
+	for path in sys.argv[1:]:
+		benchmark(path[-22:], load_payload(path), dom_service)
+
+
+if __name__ == '__main__':
+	main()
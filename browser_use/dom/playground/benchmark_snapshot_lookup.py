@@ -0,0 +1,78 @@
+"""
+Benchmark `build_snapshot_lookup` on synthetic DOMSnapshot payloads of increasing size.
+
+Run with: python -m browser_use.dom.playground.benchmark_snapshot_lookup
+
+The time per node should stay roughly constant from 1k to 100k nodes (linear scaling).
+If numpy is installed, the memory of the object lookup is also compared against the columnar snapshot store.
+"""
+
+import random
+import time
+import tracemalloc
+
+from browser_use.dom.enhanced_snapshot import REQUIRED_COMPUTED_STYLES, build_snapshot_lookup
+
+SIZES = [1_000, 5_000, 20_000, 50_000, 100_000]
+
+
+def make_snapshot(num_nodes: int, seed: int = 0) -> dict:
+	rng = random.Random(seed)
+	strings = ['auto', 'pointer', 'block', 'none', 'visible', 'hidden', '1', '0']
+	laid_out = [i for i in range(num_nodes) if rng.random() < 0.7]
+	rng.shuffle(laid_out)
+	# real pages reuse a few hundred distinct computed style combinations across all nodes
+	style_pool = [[rng.randrange(len(strings)) for _ in REQUIRED_COMPUTED_STYLES] for _ in range(300)]
+	return {
+		'strings': strings,
+		'documents': [
+			{
+				'nodes': {
+					'backendNodeId': list(range(1, num_nodes + 1)),
+					'isClickable': {'index': sorted(rng.sample(range(num_nodes), num_nodes // 10))},
+				},
+				'layout': {
+					'nodeIndex': laid_out,
+					'bounds': [[rng.randint(0, 2000), rng.randint(0, 5000), 100, 20] for _ in laid_out],
+					'styles': [list(rng.choice(style_pool)) for _ in laid_out],
+					'paintOrders': list(range(len(laid_out))),
+					'clientRects': [[0, 0, 300, 200] if rng.random() < 0.05 else [] for _ in laid_out],
+					'scrollRects': [[0, 0, 300, 900] if rng.random() < 0.05 else [] for _ in laid_out],
+				},
+			}
+		],
+	}
+
+
+def main():
+	print(f'{"nodes":>10} {"total (ms)":>12} {"per node (µs)":>15}')
+	for size in SIZES:
+		snapshot = make_snapshot(size)
+		start = time.perf_counter()
+		lookup = build_snapshot_lookup(snapshot)  # type: ignore[arg-type]
+		elapsed = time.perf_counter() - start
+		assert len(lookup) == size
+		print(f'{size:>10} {elapsed * 1000:>12.1f} {elapsed / size * 1_000_000:>15.2f}')
+
+	try:
+		from browser_use.dom.columnar_snapshot import build_columnar_snapshot
+	except ImportError:
+		return
+
+	build_columnar_snapshot(make_snapshot(10))  # warm up so numpy's own allocations are not measured
+	print(f'\n{"nodes":>10} {"lookup (MB)":>12} {"columnar (MB)":>14} {"ratio":>7}')
+	for size in SIZES:
+		snapshot = make_snapshot(size)
+		sizes_mb = []
+		for build in (build_snapshot_lookup, build_columnar_snapshot):
+			tracemalloc.start()
+			result = build(snapshot)  # type: ignore[arg-type]
+			current, _ = tracemalloc.get_traced_memory()
+			tracemalloc.stop()
+			sizes_mb.append(current / 1024 / 1024)
+			del result
+		print(f'{size:>10} {sizes_mb[0]:>12.1f} {sizes_mb[1]:>14.1f} {sizes_mb[0] / sizes_mb[1]:>6.1f}x')
+
+
+if __name__ == '__main__':
+	main()
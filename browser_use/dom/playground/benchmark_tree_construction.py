@@ -0,0 +1,277 @@
+"""
+Benchmark building the enhanced DOM tree from already fetched CDP payloads (`DOM.getDocument`, snapshot and AX tree).
+
+Run with: python -m browser_use.dom.playground.benchmark_tree_construction [payload.json ...]
+Record the payloads of a real page with: python -m browser_use.dom.playground.benchmark_tree_construction --record <url> <payload.json>
+
+Compares the previous recursive construction (one coroutine and `await` per node) with `DomService.construct_enhanced_tree`,
+and checks that a 10k levels deep document can be built, which the recursive version can't do.
+"""
+
+import asyncio
+import gc
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from cdp_use.cdp.accessibility.types import AXNode
+from cdp_use.cdp.dom.types import Node
+
+from browser_use.browser import BrowserSession
+from browser_use.dom.enhanced_snapshot import REQUIRED_COMPUTED_STYLES, build_snapshot_lookup
+from browser_use.dom.enhanced_tree import build_enhanced_ax_node
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMRect, EnhancedDOMTreeNode, NodeType, TargetAllTrees
+
+TARGET_ID = 'BENCHMARK-TARGET'
+SIZES = [1_000, 10_000, 50_000]
+DEEP_TREE_DEPTH = 10_000
+
+TAGS = ['DIV', 'SPAN', 'A', 'BUTTON', 'INPUT', 'P', 'LI', 'UL', 'IMG', 'LABEL']
+
+
+def make_payload(num_nodes: int, seed: int = 0, max_depth: int | None = None) -> TargetAllTrees:
+	"""Synthetic `getDocument` / `captureSnapshot` / `getFullAXTree` payloads for a page with `num_nodes` nodes.
+
+	With `max_depth=None` the tree is bushy like a real page, otherwise every node is nested in the previous one.
+	"""
+	rng = random.Random(seed)
+	backend_node_ids: list[int] = []
+
+	def make_node(node_id: int, name: str, node_type: int = 1, value: str = '', **extra) -> dict:
+		backend_node_ids.append(node_id + 1000)
+		attributes = ['class', f'c{rng.randrange(50)}'] if node_type == 1 else []
+		if name == 'INPUT':
+			attributes += ['type', 'text', 'name', f'field{node_id}']
+		return {
+			'nodeId': node_id,
+			'backendNodeId': node_id + 1000,
+			'nodeType': node_type,
+			'nodeName': name,
+			'localName': name.lower(),
+			'nodeValue': value,
+			'attributes': attributes,
+			**extra,
+		}
+
+	document = make_node(1, '#document', node_type=9)
+	document['attributes'] = []
+	html = make_node(2, 'HTML', frameId='MAIN', parentId=1)
+	body = make_node(3, 'BODY', parentId=2)
+	document['children'], html['children'] = [html], [body]
+	parents = [body]
+	for node_id in range(4, num_nodes + 1):
+		parent = parents[-1] if max_depth is not None else rng.choice(parents)
+		if rng.random() < 0.3 and max_depth is None:
+			node = make_node(node_id, '#text', node_type=3, value=f'text {node_id}', parentId=parent['nodeId'])
+		else:
+			node = make_node(node_id, rng.choice(TAGS), parentId=parent['nodeId'])
+			parents.append(node)
+		parent.setdefault('children', []).append(node)
+
+	strings = ['block', 'auto', 'pointer', 'visible', '1']
+	styles = [-1] * len(REQUIRED_COMPUTED_STYLES)
+	styles[REQUIRED_COMPUTED_STYLES.index('display')] = 0
+	laid_out = [i for i in range(len(backend_node_ids)) if i == 1 or rng.random() < 0.7]
+	snapshot = {
+		'strings': strings,
+		'documents': [
+			{
+				'nodes': {'backendNodeId': backend_node_ids, 'isClickable': {'index': []}},
+				'layout': {
+					'nodeIndex': laid_out,
+					'bounds': [[rng.randint(0, 1200), rng.randint(0, 5000), 100, 20] for _ in laid_out],
+					'styles': [styles for _ in laid_out],
+					'paintOrders': list(range(len(laid_out))),
+					'clientRects': [[0, 0, 1280, 800] if i == 1 else [] for i in laid_out],
+					'scrollRects': [[0, 0, 1280, 5000] if i == 1 else [] for i in laid_out],
+				},
+			}
+		],
+	}
+	ax_nodes = [
+		{
+			'nodeId': str(backend_node_id),
+			'ignored': False,
+			'role': {'type': 'role', 'value': 'generic'},
+			'backendDOMNodeId': backend_node_id,
+		}
+		for backend_node_id in backend_node_ids
+	]
+	return TargetAllTrees(
+		snapshot=snapshot,  # type: ignore[arg-type]
+		dom_tree={'root': document},  # type: ignore[typeddict-item]
+		ax_tree={'nodes': ax_nodes},  # type: ignore[typeddict-item]
+		device_pixel_ratio=1.0,
+		cdp_timing={},
+	)
+
+
+async def legacy_construct_enhanced_tree(trees: TargetAllTrees, target_id: str) -> EnhancedDOMTreeNode:
+	"""The previous recursive construction (one coroutine per node), kept as the baseline and parity oracle."""
+	ax_tree_lookup: dict[int, AXNode] = {
+		ax_node['backendDOMNodeId']: ax_node for ax_node in trees.ax_tree['nodes'] if 'backendDOMNodeId' in ax_node
+	}
+	enhanced_dom_tree_node_lookup: dict[int, EnhancedDOMTreeNode] = {}
+	snapshot_lookup = build_snapshot_lookup(trees.snapshot, trees.device_pixel_ratio)
+
+	async def _construct_enhanced_node(
+		node: Node, html_frames: list[EnhancedDOMTreeNode] | None, total_frame_offset: DOMRect | None
+	) -> EnhancedDOMTreeNode:
+		if html_frames is None:
+			html_frames = []
+		if total_frame_offset is None:
+			total_frame_offset = DOMRect(x=0.0, y=0.0, width=0.0, height=0.0)
+		else:
+			total_frame_offset = DOMRect(
+				total_frame_offset.x, total_frame_offset.y, total_frame_offset.width, total_frame_offset.height
+			)
+
+		if node['nodeId'] in enhanced_dom_tree_node_lookup:
+			return enhanced_dom_tree_node_lookup[node['nodeId']]
+
+		ax_node = ax_tree_lookup.get(node['backendNodeId'])
+		attributes: dict[str, str] | None = None
+		if 'attributes' in node and node['attributes']:
+			attributes = {}
+			for i in range(0, len(node['attributes']), 2):
+				attributes[node['attributes'][i]] = node['attributes'][i + 1]
+
+		snapshot_data = snapshot_lookup.get(node['backendNodeId'], None)
+		absolute_position = None
+		if snapshot_data and snapshot_data.bounds:
+			absolute_position = DOMRect(
+				x=snapshot_data.bounds.x + total_frame_offset.x,
+				y=snapshot_data.bounds.y + total_frame_offset.y,
+				width=snapshot_data.bounds.width,
+				height=snapshot_data.bounds.height,
+			)
+
+		dom_tree_node = EnhancedDOMTreeNode(
+			node_id=node['nodeId'],
+			backend_node_id=node['backendNodeId'],
+			node_type=NodeType(node['nodeType']),
+			node_name=node['nodeName'],
+			node_value=node['nodeValue'],
+			attributes=attributes or {},
+			is_scrollable=node.get('isScrollable', None),
+			frame_id=node.get('frameId', None),
+			session_id=None,
+			target_id=target_id,
+			content_document=None,
+			shadow_root_type=node.get('shadowRootType') or None,
+			shadow_roots=None,
+			parent_node=None,
+			children_nodes=None,
+			ax_node=build_enhanced_ax_node(ax_node) if ax_node else None,
+			snapshot_node=snapshot_data,
+			is_visible=None,
+			absolute_position=absolute_position,
+			element_index=None,
+		)
+		enhanced_dom_tree_node_lookup[node['nodeId']] = dom_tree_node
+
+		if 'parentId' in node and node['parentId']:
+			dom_tree_node.parent_node = enhanced_dom_tree_node_lookup[node['parentId']]
+
+		updated_html_frames = html_frames.copy()
+		if node['nodeType'] == NodeType.ELEMENT_NODE.value and node['nodeName'] == 'HTML' and node.get('frameId') is not None:
+			updated_html_frames.append(dom_tree_node)
+			if snapshot_data and snapshot_data.scrollRects:
+				total_frame_offset.x -= snapshot_data.scrollRects.x
+				total_frame_offset.y -= snapshot_data.scrollRects.y
+
+		if node['nodeName'].upper() == 'IFRAME' and snapshot_data and snapshot_data.bounds:
+			updated_html_frames.append(dom_tree_node)
+			total_frame_offset.x += snapshot_data.bounds.x
+			total_frame_offset.y += snapshot_data.bounds.y
+
+		if 'contentDocument' in node and node['contentDocument']:
+			dom_tree_node.content_document = await _construct_enhanced_node(
+				node['contentDocument'], updated_html_frames, total_frame_offset
+			)
+			dom_tree_node.content_document.parent_node = dom_tree_node
+
+		if 'shadowRoots' in node and node['shadowRoots']:
+			dom_tree_node.shadow_roots = []
+			for shadow_root in node['shadowRoots']:
+				shadow_root_node = await _construct_enhanced_node(shadow_root, updated_html_frames, total_frame_offset)
+				shadow_root_node.parent_node = dom_tree_node
+				dom_tree_node.shadow_roots.append(shadow_root_node)
+
+		if 'children' in node and node['children']:
+			dom_tree_node.children_nodes = []
+			for child in node['children']:
+				dom_tree_node.children_nodes.append(
+					await _construct_enhanced_node(child, updated_html_frames, total_frame_offset)
+				)
+
+		dom_tree_node.is_visible = DomService.is_element_visible_according_to_all_parents(dom_tree_node, updated_html_frames)
+		return dom_tree_node
+
+	return await _construct_enhanced_node(trees.dom_tree['root'], None, None)
+
+
+async def record(url: str, path: str) -> None:
+	"""Save the CDP payloads of a real page so they can be benchmarked offline."""
+	from browser_use.browser.events import NavigateToUrlEvent
+
+	browser_session = BrowserSession()
+	await browser_session.start()
+	try:
+		await browser_session.event_bus.dispatch(NavigateToUrlEvent(url=url))
+		await asyncio.sleep(2)
+		assert browser_session.current_target_id is not None
+		trees = await DomService(browser_session)._get_all_trees(browser_session.current_target_id)
+		payload = {
+			'dom_tree': trees.dom_tree,
+			'snapshot': trees.snapshot,
+			'ax_tree': trees.ax_tree,
+			'device_pixel_ratio': trees.device_pixel_ratio,
+		}
+		await asyncio.to_thread(Path(path).write_text, json.dumps(payload))
+	finally:
+		await browser_session.kill()
+
+
+def load_payload(path: str) -> TargetAllTrees:
+	return TargetAllTrees(cdp_timing={}, **json.loads(Path(path).read_text()))
+
+
+async def benchmark(name: str, trees: TargetAllTrees, dom_service: DomService, repeat: int = 3) -> None:
+	"""Print the best of `repeat` runs of both implementations."""
+	timings: list[str] = []
+	for build in (legacy_construct_enhanced_tree, dom_service.construct_enhanced_tree):
+		best = float('inf')
+		for _ in range(repeat):
+			gc.collect()
+			start = time.perf_counter()
+			try:
+				result = build(trees, TARGET_ID)
+				if asyncio.iscoroutine(result):
+					await result
+			except RecursionError:
+				break
+			best = min(best, time.perf_counter() - start)
+		timings.append(f'{best * 1000:>14.1f}' if best != float('inf') else f'{"RecursionError":>14}')
+	print(f'{name:>22} {timings[0]} {timings[1]}')
+
+
+async def main():
+	if sys.argv[1:2] == ['--record']:
+		await record(sys.argv[2], sys.argv[3])
+		return
+
+	dom_service = DomService(BrowserSession())
+	print(f'{"payload":>22} {"recursive (ms)":>14} {"iterative (ms)":>14}')
+	for size in SIZES:
+		await benchmark(f'{size} nodes', make_payload(size), dom_service)
+	await benchmark(f'{DEEP_TREE_DEPTH} levels deep', make_payload(DEEP_TREE_DEPTH, max_depth=DEEP_TREE_DEPTH), dom_service)
+	for path in sys.argv[1:]:
+		await benchmark(path[-22:], load_payload(path), dom_service)
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
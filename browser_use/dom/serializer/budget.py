@@ -0,0 +1,128 @@
+# @file purpose: Serializes the lines of a fused DOM serialization within a character budget, viewport first
+
+import math
+from collections.abc import Iterator
+
+from browser_use.dom.views import DOMRect, EnhancedDOMTreeNode, SerializedDOMLine
+
+
+class BudgetedDOMSerializer:
+	"""Renders as many `SerializedDOMLine`s as fit into `max_length` characters, closest to the viewport first.
+
+	Lines are picked in rings around the viewport: ring 0 intersects the viewport, ring k is at most k viewport
+	heights (or widths) away from it. Within a ring interactive elements come first, then everything else in document
+	order. Rendering stops at the first line that does not fit, so content that would be thrown away is never built.
+	The picked lines are output in document order, so the result reads like the (shorter) full representation.
+	"""
+
+	def __init__(
+		self,
+		lines: list[SerializedDOMLine],
+		include_attributes: list[str],
+		max_length: int,
+		viewport: DOMRect | None = None,
+	):
+		self.lines = lines
+		self.include_attributes = include_attributes
+		self.max_length = max_length
+		self.viewport = viewport or _find_viewport(lines)
+
+		self.rendered: dict[int, str] = {}
+		"""Position in `lines` -> rendered line, for the lines that fit into the budget"""
+		self.length = 0
+
+	def iter_lines(self) -> Iterator[tuple[int, str]]:
+		"""Yield (position in `lines`, rendered line) in priority order until the budget is used up."""
+		from browser_use.dom.serializer.serializer import DOMTreeSerializer
+
+		for position in sorted(range(len(self.lines)), key=self._priorities()):
+			text = DOMTreeSerializer.serialize_line(self.lines[position], self.include_attributes)
+
+			# every line but the first one is preceded by a newline
+			length = self.length + len(text) + (1 if self.rendered else 0)
+			if length > self.max_length:
+				return
+			self.length = length
+			self.rendered[position] = text
+			yield position, text
+
+	def serialize(self) -> str:
+		"""Render the lines that fit into the budget, in document order."""
+		for _ in self.iter_lines():
+			pass
+		return '\n'.join(self.rendered[position] for position in sorted(self.rendered))
+
+	@property
+	def omitted_lines(self) -> list[SerializedDOMLine]:
+		return [line for position, line in enumerate(self.lines) if position not in self.rendered]
+
+	def omitted_scroll_info_text(self) -> str:
+		"""Where the omitted lines are, in the format of `EnhancedDOMTreeNode.get_scroll_info_text`.
+
+		e.g. '0.0 pages above, 2.5 pages below', empty if nothing outside of the viewport was omitted.
+		"""
+		omitted = self.omitted_lines
+		if not omitted or self.viewport is None or self.viewport.height <= 0:
+			return ''
+
+		top, bottom = self.viewport.y, self.viewport.y + self.viewport.height
+		pixels_above = pixels_below = 0.0
+		for rect in _line_rects(omitted):
+			if rect is None:
+				continue
+			pixels_above = max(pixels_above, top - rect.y)
+			pixels_below = max(pixels_below, rect.y + rect.height - bottom)
+		pages_above, pages_below = pixels_above / self.viewport.height, pixels_below / self.viewport.height
+		if pages_above < 0.05 and pages_below < 0.05:
+			return ''  # everything left out is (practically) inside the viewport
+		return f'{pages_above:.1f} pages above, {pages_below:.1f} pages below'
+
+	def _priorities(self):
+		"""Sort key for positions in `lines`: ring around the viewport, interactive elements first, document order."""
+		rects = _line_rects(self.lines)
+		rings = [_ring(rect, self.viewport) for rect in rects]
+
+		def priority(position: int) -> tuple[int, bool, int]:
+			return rings[position], self.lines[position].interactive_index is None, position
+
+		return priority
+
+
+def _line_rects(lines: list[SerializedDOMLine]) -> list[DOMRect | None]:
+	"""Page position of every line, lines without layout (e.g. some text nodes) take the one of the line before."""
+	rects: list[DOMRect | None] = []
+	previous: DOMRect | None = None
+	for line in lines:
+		rect = line.node.absolute_position or previous
+		rects.append(rect)
+		previous = rect
+	return rects
+
+
+def _ring(rect: DOMRect | None, viewport: DOMRect | None) -> int:
+	"""0 if `rect` intersects the viewport, otherwise how many viewport sizes away it is (rounded up)."""
+	if rect is None or viewport is None:
+		return 0
+	rings = 0
+	for start, size, viewport_start, viewport_size in (
+		(rect.y, rect.height, viewport.y, viewport.height),
+		(rect.x, rect.width, viewport.x, viewport.width),
+	):
+		gap = max(viewport_start - (start + size), start - (viewport_start + viewport_size), 0)
+		if gap > 0 and viewport_size > 0:
+			rings = max(rings, math.ceil(gap / viewport_size))
+	return rings
+
+
+def _find_viewport(lines: list[SerializedDOMLine]) -> DOMRect | None:
+	"""Viewport of the top level document (client rect of its <html>), in the coordinates of `absolute_position`."""
+	if not lines:
+		return None
+	root: EnhancedDOMTreeNode = lines[0].node
+	while root.parent_node is not None:
+		root = root.parent_node
+	for node in [root, *root.children]:
+		if node.tag_name == 'html' and node.snapshot_node and node.snapshot_node.clientRects:
+			client_rects = node.snapshot_node.clientRects
+			return DOMRect(x=0.0, y=0.0, width=client_rects.width, height=client_rects.height)
+	return None
@@ -1,199 +1,152 @@
-from browser_use.dom.views import EnhancedDOMTreeNode, NodeType
+import re
+from functools import lru_cache
+
+from browser_use.dom.views import EnhancedAXProperty, EnhancedDOMTreeNode, NodeType
+
+# Substrings of class names, ids and data attributes that mark search elements (search-icon, searchbox etc. are covered
+# by 'search')
+SEARCH_INDICATORS = ('search', 'magnify', 'glass', 'lookup', 'find', 'query')
+_SEARCH_INDICATORS_RE = re.compile('|'.join(SEARCH_INDICATORS))
+
+NON_INTERACTIVE_TAGS = frozenset({'html', 'body'})
+INTERACTIVE_TAGS = frozenset({'button', 'input', 'select', 'textarea', 'a', 'label', 'details', 'summary', 'option', 'optgroup'})
+INTERACTIVE_ATTRIBUTES = frozenset({'onclick', 'onmousedown', 'onmouseup', 'onkeydown', 'onkeyup', 'tabindex'})
+INTERACTIVE_ROLES = frozenset(
+	{
+		'button',
+		'link',
+		'menuitem',
+		'option',
+		'radio',
+		'checkbox',
+		'tab',
+		'textbox',
+		'combobox',
+		'slider',
+		'spinbutton',
+		'search',
+		'searchbox',
+	}
+)
+INTERACTIVE_AX_ROLES = INTERACTIVE_ROLES | {'listbox'}
+# small elements with one of these attributes are likely interactive icons
+ICON_ATTRIBUTES = frozenset({'class', 'role', 'onclick', 'data-action', 'aria-label'})
+
+# AX property name -> (only if its value is truthy, verdict), the first listed property with a verdict decides
+AX_PROPERTY_VERDICTS: dict[str, tuple[bool, bool]] = {
+	# aria disabled / hidden
+	'disabled': (True, False),
+	'hidden': (True, False),
+	# direct interactiveness indicators
+	'focusable': (True, True),
+	'editable': (True, True),
+	'settable': (True, True),
+	# interactive state properties only exist on interactive widgets, whatever their value
+	'checked': (False, True),
+	'expanded': (False, True),
+	'pressed': (False, True),
+	'selected': (False, True),
+	# form related
+	'required': (True, True),
+	'autocomplete': (True, True),
+	# keyboard shortcuts
+	'keyshortcuts': (True, True),
+}
+
+
+@lru_cache(maxsize=16_384)
+def _has_search_indicator(value: str) -> bool:
+	return _SEARCH_INDICATORS_RE.search(value.lower()) is not None
+
+
+def _ax_properties_verdict(properties: list[EnhancedAXProperty]) -> bool | None:
+	for prop in properties:
+		rule = AX_PROPERTY_VERDICTS.get(prop.name)
+		if rule is not None and (prop.value or not rule[0]):
+			return rule[1]
+	return None
+
+
+def _classify(
+	tag_name: str,
+	is_large: bool,
+	is_icon_sized: bool,
+	has_pointer_cursor: bool,
+	has_attributes: bool,
+	has_search_indicator: bool,
+	ax_properties_verdict: bool | None,
+	has_interactive_attribute: bool,
+	role: str | None,
+	ax_role: str | None,
+	has_icon_attribute: bool,
+) -> bool:
+	if tag_name in NON_INTERACTIVE_TAGS:
+		return False
+
+	# IFRAME elements are interactive if they're large enough to potentially need scrolling (> 100x100px)
+	if tag_name == 'iframe' and is_large:
+		return True
+
+	# Search elements by their class names, id and data attributes
+	if has_search_indicator:
+		return True
+
+	if ax_properties_verdict is not None:
+		return ax_properties_verdict
+
+	if tag_name in INTERACTIVE_TAGS:
+		return True
+
+	# Event handlers, tabindex or an interactive ARIA role
+	if has_interactive_attribute or role in INTERACTIVE_ROLES:
+		return True
+
+	if ax_role in INTERACTIVE_AX_ROLES:
+		return True
+
+	# Icon sized elements with attributes that suggest they do something
+	if is_icon_sized and has_attributes and has_icon_attribute:
+		return True
+
+	# Final fallback: cursor style indicates interactivity (for cases Chrome missed)
+	return has_pointer_cursor
 
 
 class ClickableElementDetector:
 	@staticmethod
 	def is_interactive(node: EnhancedDOMTreeNode) -> bool:
-		"""Check if this node is clickable/interactive using enhanced scoring."""
+		"""Check if this node is clickable/interactive using enhanced scoring.
+
+		Only what the checks depend on is read from the node (tag, bounds buckets, cursor, search indicators, relevant
+		attributes and AX flags), then `_classify` decides.
+		"""
 
 		# Skip non-element nodes
 		if node.node_type != NodeType.ELEMENT_NODE:
 			return False
 
-		# # if ax ignored skip
-		# if node.ax_node and node.ax_node.ignored:
-		# 	return False
-
-		# remove html and body nodes
-		if node.tag_name in {'html', 'body'}:
-			return False
-
-		# IFRAME elements should be interactive if they're large enough to potentially need scrolling
-		# Small iframes (< 100px width or height) are unlikely to have scrollable content
-		if node.tag_name and node.tag_name.upper() == 'IFRAME':
-			if node.snapshot_node and node.snapshot_node.bounds:
-				width = node.snapshot_node.bounds.width
-				height = node.snapshot_node.bounds.height
-				# Only include iframes larger than 100x100px
-				if width > 100 and height > 100:
-					return True
-
 		# RELAXED SIZE CHECK: Allow all elements including size 0 (they might be interactive overlays, etc.)
-		# Note: Size 0 elements can still be interactive (e.g., invisible clickable overlays)
 		# Visibility is determined separately by CSS styles, not just bounding box size
-
-		# SEARCH ELEMENT DETECTION: Check for search-related classes and attributes
-		if node.attributes:
-			search_indicators = {
-				'search',
-				'magnify',
-				'glass',
-				'lookup',
-				'find',
-				'query',
-				'search-icon',
-				'search-btn',
-				'search-button',
-				'searchbox',
-			}
-
-			# Check class names for search indicators
-			class_list = node.attributes.get('class', '').lower().split()
-			if any(indicator in ' '.join(class_list) for indicator in search_indicators):
-				return True
-
-			# Check id for search indicators
-			element_id = node.attributes.get('id', '').lower()
-			if any(indicator in element_id for indicator in search_indicators):
-				return True
-
-			# Check data attributes for search functionality
-			for attr_name, attr_value in node.attributes.items():
-				if attr_name.startswith('data-') and any(indicator in attr_value.lower() for indicator in search_indicators):
-					return True
-
-		# Enhanced accessibility property checks - direct clear indicators only
-		if node.ax_node and node.ax_node.properties:
-			for prop in node.ax_node.properties:
-				try:
-					# aria disabled
-					if prop.name == 'disabled' and prop.value:
-						return False
-
-					# aria hidden
-					if prop.name == 'hidden' and prop.value:
-						return False
-
-					# Direct interactiveness indicators
-					if prop.name in ['focusable', 'editable', 'settable'] and prop.value:
-						return True
-
-					# Interactive state properties (presence indicates interactive widget)
-					if prop.name in ['checked', 'expanded', 'pressed', 'selected']:
-						# These properties only exist on interactive elements
-						return True
-
-					# Form-related interactiveness
-					if prop.name in ['required', 'autocomplete'] and prop.value:
-						return True
-
-					# Elements with keyboard shortcuts are interactive
-					if prop.name == 'keyshortcuts' and prop.value:
-						return True
-				except (AttributeError, ValueError):
-					# Skip properties we can't process
-					continue
-
-		# ENHANCED TAG CHECK: Include truly interactive elements
-		interactive_tags = {
-			'button',
-			'input',
-			'select',
-			'textarea',
-			'a',
-			'label',
-			'details',
-			'summary',
-			'option',
-			'optgroup',
-		}
-		if node.tag_name in interactive_tags:
-			return True
-
-		# SVG elements need special handling - only interactive if they have explicit handlers
-		# svg_tags = {'svg', 'path', 'circle', 'rect', 'polygon', 'ellipse', 'line', 'polyline', 'g'}
-		# if node.tag_name in svg_tags:
-		# 	# Only consider SVG elements interactive if they have:
-		# 	# 1. Explicit event handlers
-		# 	# 2. Interactive role attributes
-		# 	# 3. Cursor pointer style
-		# 	if node.attributes:
-		# 		# Check for event handlers
-		# 		if any(attr.startswith('on') for attr in node.attributes):
-		# 			return True
-		# 		# Check for interactive roles
-		# 		if node.attributes.get('role') in {'button', 'link', 'menuitem'}:
-		# 			return True
-		# 		# Check for cursor pointer (indicating clickability)
-		# 		if node.attributes.get('style') and 'cursor: pointer' in node.attributes.get('style', ''):
-		# 			return True
-		# 	# Otherwise, SVG elements are decorative
-		# 	return False
-
-		# Tertiary check: elements with interactive attributes
-		if node.attributes:
-			# Check for event handlers or interactive attributes
-			interactive_attributes = {'onclick', 'onmousedown', 'onmouseup', 'onkeydown', 'onkeyup', 'tabindex'}
-			if any(attr in node.attributes for attr in interactive_attributes):
-				return True
-
-			# Check for interactive ARIA roles
-			if 'role' in node.attributes:
-				interactive_roles = {
-					'button',
-					'link',
-					'menuitem',
-					'option',
-					'radio',
-					'checkbox',
-					'tab',
-					'textbox',
-					'combobox',
-					'slider',
-					'spinbutton',
-					'search',
-					'searchbox',
-				}
-				if node.attributes['role'] in interactive_roles:
-					return True
-
-		# Quaternary check: accessibility tree roles
-		if node.ax_node and node.ax_node.role:
-			interactive_ax_roles = {
-				'button',
-				'link',
-				'menuitem',
-				'option',
-				'radio',
-				'checkbox',
-				'tab',
-				'textbox',
-				'combobox',
-				'slider',
-				'spinbutton',
-				'listbox',
-				'search',
-				'searchbox',
-			}
-			if node.ax_node.role in interactive_ax_roles:
-				return True
-
-		# ICON AND SMALL ELEMENT CHECK: Elements that might be icons
-		if (
-			node.snapshot_node
-			and node.snapshot_node.bounds
-			and 10 <= node.snapshot_node.bounds.width <= 50  # Icon-sized elements
-			and 10 <= node.snapshot_node.bounds.height <= 50
-		):
-			# Check if this small element has interactive properties
-			if node.attributes:
-				# Small elements with these attributes are likely interactive icons
-				icon_attributes = {'class', 'role', 'onclick', 'data-action', 'aria-label'}
-				if any(attr in node.attributes for attr in icon_attributes):
-					return True
-
-		# Final fallback: cursor style indicates interactivity (for cases Chrome missed)
-		if node.snapshot_node and node.snapshot_node.cursor_style and node.snapshot_node.cursor_style == 'pointer':
-			return True
-
-		return False
+		snapshot_node = node.snapshot_node
+		bounds = snapshot_node.bounds if snapshot_node else None
+		attributes = node.attributes
+		ax_node = node.ax_node
+
+		return _classify(
+			node.tag_name,
+			bounds is not None and bounds.width > 100 and bounds.height > 100,
+			bounds is not None and 10 <= bounds.width <= 50 and 10 <= bounds.height <= 50,
+			snapshot_node is not None and snapshot_node.cursor_style == 'pointer',
+			bool(attributes),
+			bool(attributes)
+			and (
+				_has_search_indicator(attributes.get('class', ''))
+				or _has_search_indicator(attributes.get('id', ''))
+				or any(name.startswith('data-') and _has_search_indicator(value) for name, value in attributes.items())
+			),
+			_ax_properties_verdict(ax_node.properties) if ax_node and ax_node.properties else None,
+			bool(attributes) and not INTERACTIVE_ATTRIBUTES.isdisjoint(attributes),
+			attributes.get('role') if attributes else None,
+			ax_node.role if ax_node else None,
+			bool(attributes) and not ICON_ATTRIBUTES.isdisjoint(attributes),
+		)
@@ -0,0 +1,60 @@
+"""
+Line level diff between two serialized DOM states, keyed by backend node id.
+
+Used for DOM delta prompts: the agent sends the full serialized DOM once as a page snapshot and afterwards only the lines
+that were added, removed or changed since that snapshot. Element indices are part of the lines, so an element that got
+renumbered counts as changed and the LLM always sees the index that is valid now.
+"""
+
+from dataclasses import dataclass
+
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.views import DEFAULT_INCLUDE_ATTRIBUTES, SerializedDOMState
+
+
+def keyed_lines(state: SerializedDOMState, include_attributes: list[str] | None = None) -> dict[int, str] | None:
+	"""Rendered lines of `state` by backend node id, in document order, without indentation and `*` new element marker.
+
+	The marker is relative to the previous step, not to the baseline, so keeping it would turn every element that was new
+	in the baseline into a changed line on every later step.
+	None for states without lines (empty DOM state, legacy serializer), those can't be diffed.
+	"""
+	if state._lines is None:
+		return None
+	include_attributes = include_attributes or DEFAULT_INCLUDE_ATTRIBUTES
+	lines: dict[int, str] = {}
+	for line in state._lines:
+		text = DOMTreeSerializer.serialize_line(line, include_attributes).strip()
+		lines[line.node.backend_node_id] = text.removeprefix('*') if line.is_new else text
+	return lines
+
+
+@dataclass(slots=True)
+class DOMLinesDelta:
+	"""Lines added, removed and changed between a baseline and the current state."""
+
+	added: list[str]
+	"""New lines, in document order"""
+	removed: list[str]
+	"""Lines that are gone, as they were in the baseline"""
+	changed: list[str]
+	"""Current version of lines that differ from the baseline (other attributes, text or index)"""
+
+	@classmethod
+	def between(cls, baseline: dict[int, str], current: dict[int, str]) -> 'DOMLinesDelta':
+		return cls(
+			added=[text for key, text in current.items() if key not in baseline],
+			removed=[text for key, text in baseline.items() if key not in current],
+			changed=[text for key, text in current.items() if key in baseline and baseline[key] != text],
+		)
+
+	@property
+	def is_empty(self) -> bool:
+		return not (self.added or self.removed or self.changed)
+
+	def render(self) -> str:
+		if self.is_empty:
+			return 'No changes'
+		return '\n'.join(
+			[f'+ {text}' for text in self.added] + [f'- {text}' for text in self.removed] + [f'~ {text}' for text in self.changed]
+		)
@@ -0,0 +1,188 @@
+# @file purpose: Detects elements whose whole box is painted over by opaque elements (cookie banners, modals, ...)
+
+from browser_use.dom.spatial_index import SpatialGrid
+from browser_use.dom.views import DOMRect, EnhancedDOMTreeNode, NodeType
+
+# give up (and treat the element as visible) when the uncovered part of a box splits into more pieces than this
+MAX_UNCOVERED_PIECES = 32
+
+
+class PaintOrderOcclusionFilter:
+	"""Tells whether an element is fully covered by opaque elements that are painted after it.
+
+	Occluders are elements with an opaque background color at full opacity that take pointer events. Opacity is not
+	inherited but multiplies down the tree, so nothing inside a box with an opacity below 1 (hidden modals, closed
+	dropdowns, fading overlays) is an occluder. The box of an occluder is clipped to its `overflow` clipping ancestors
+	and iframes, so off-screen slides of a carousel only cover what is actually shown. Occluders are put into one
+	`SpatialGrid` per document, so an element is only compared with the occluders that overlap its box. An occluder
+	counts if it is painted later (higher `paint_order`, only comparable within a document) and is neither an ancestor
+	nor a descendant of the element (a button is not hidden by the opaque span inside of it). The part of the box that
+	is not covered in the element's own document is then checked against the document around its iframe, and so on up.
+
+	The occluder grids are built on the first query, in one pass over the tree.
+	"""
+
+	def __init__(self, root: EnhancedDOMTreeNode):
+		self.root = root
+		self._grids: dict[int, SpatialGrid[EnhancedDOMTreeNode]] | None = None
+		"""id() of the document node -> grid of the occluders of that document"""
+		self._occluder_rects: dict[int, DOMRect] = {}
+		"""id() of an occluder -> its box clipped to its clipping ancestors"""
+
+	def is_occluded(self, node: EnhancedDOMTreeNode) -> bool:
+		"""Whether the whole box of `node` is covered by opaque elements painted on top of it."""
+		if self._grids is None:
+			self._grids = self._build()
+
+		rect = node.absolute_position
+		if rect is None or rect.width <= 0 or rect.height <= 0:
+			return False
+		uncovered = [rect]
+		target: EnhancedDOMTreeNode | None = node
+		while target is not None:
+			paint_order = target.snapshot_node.paint_order if target.snapshot_node else None
+			if paint_order is None:
+				return False
+			ancestor_ids, document = _ancestors(target)
+			grid = self._grids.get(id(document))
+			if grid is not None:
+				occluders = {id(occluder): occluder for piece in uncovered for occluder in grid.query_rect(piece)}
+				for occluder_id, occluder in occluders.items():
+					if (
+						occluder.snapshot_node.paint_order <= paint_order  # type: ignore[union-attr,operator]
+						or occluder_id in ancestor_ids
+						or _is_descendant(occluder, target)
+					):
+						continue
+					uncovered = _subtract(uncovered, self._occluder_rects[occluder_id])
+					if not uncovered:
+						return True
+					if len(uncovered) > MAX_UNCOVERED_PIECES:
+						return False
+
+			# what is left of the box may still be covered by elements painted over the iframe of this document
+			target = document.parent_node
+		return False
+
+	def _build(self) -> dict[int, SpatialGrid[EnhancedDOMTreeNode]]:
+		grids: dict[int, SpatialGrid[EnhancedDOMTreeNode]] = {}
+		occluder_rects = self._occluder_rects
+		# (document, clip of its iframe), (node, clip of its ancestors); a clip of None means unclipped
+		documents: list[tuple[EnhancedDOMTreeNode, DOMRect | None]] = [(self.root, None)]
+		while documents:
+			document, document_clip = documents.pop()
+			grid: SpatialGrid[EnhancedDOMTreeNode] | None = None
+			stack: list[tuple[EnhancedDOMTreeNode, DOMRect | None]] = [(document, document_clip)]
+			while stack:
+				node, clip = stack.pop()
+				styles = node.snapshot_node.computed_styles if node.snapshot_node else None
+				if styles and styles.get('opacity', '1') != '1':
+					# the opacity multiplies into the whole subtree, nothing in it paints an opaque box
+					continue
+				rect = node.absolute_position
+				if styles and styles.get('position') == 'fixed':
+					clip = document_clip  # fixed boxes escape the overflow clipping of their ancestors
+				if rect is not None and clip is not None:
+					rect = _intersect(rect, clip)
+
+				child_clip = rect if rect is not None and _clips_overflow(node) else clip
+				if node.content_document is not None:
+					documents.append((node.content_document, rect if rect is not None else clip))
+				if node.children_nodes:
+					stack.extend((child, child_clip) for child in node.children_nodes)
+				if node.shadow_roots:
+					stack.extend((shadow_root, child_clip) for shadow_root in node.shadow_roots)
+
+				if rect is not None and _is_opaque_occluder(node, rect):
+					if grid is None:
+						grid = grids[id(document)] = SpatialGrid(lambda occluder: occluder_rects[id(occluder)])
+					occluder_rects[id(node)] = rect
+					grid.insert(node)
+		return grids
+
+
+def _is_opaque_occluder(node: EnhancedDOMTreeNode, rect: DOMRect) -> bool:
+	"""Whether the element paints an opaque box that takes the clicks over everything painted before it.
+
+	`rect` is its box clipped to its clipping ancestors, ancestors with an opacity below 1 are already skipped.
+	"""
+	snapshot = node.snapshot_node
+	if snapshot is None or not snapshot.computed_styles or node.node_type != NodeType.ELEMENT_NODE:
+		return False
+	if snapshot.paint_order is None or rect.width <= 0 or rect.height <= 0:
+		return False
+	styles = snapshot.computed_styles
+	if styles.get('visibility') in ('hidden', 'collapse') or styles.get('pointer-events') == 'none':
+		return False
+	return _is_opaque_color(styles.get('background-color', ''))
+
+
+def _clips_overflow(node: EnhancedDOMTreeNode) -> bool:
+	"""Whether the element clips the boxes of its descendants to its own box (`overflow` other than `visible`)."""
+	styles = node.snapshot_node.computed_styles if node.snapshot_node else None
+	if not styles or node.node_type != NodeType.ELEMENT_NODE:
+		return False
+	# a single non visible axis turns the other one into `auto`, so clipping both is exact
+	return any(styles.get(style, 'visible') != 'visible' for style in ('overflow-x', 'overflow-y'))
+
+
+def _intersect(rect: DOMRect, clip: DOMRect) -> DOMRect:
+	"""The part of `rect` inside `clip` (zero sized if they do not overlap)."""
+	left, top = max(rect.x, clip.x), max(rect.y, clip.y)
+	right, bottom = min(rect.x + rect.width, clip.x + clip.width), min(rect.y + rect.height, clip.y + clip.height)
+	return DOMRect(x=left, y=top, width=max(right - left, 0), height=max(bottom - top, 0))
+
+
+def _is_opaque_color(color: str) -> bool:
+	"""Whether a computed CSS color (`rgb(r, g, b)` or `rgba(r, g, b, a)`) is fully opaque."""
+	if color.startswith('rgb('):
+		return True
+	if color.startswith('rgba(') and color.endswith(')'):
+		alpha = color[5:-1].rsplit(',', 1)[-1].strip()
+		try:
+			return float(alpha) >= 1.0
+		except ValueError:
+			return False
+	return False
+
+
+def _subtract(pieces: list[DOMRect], occluder: DOMRect) -> list[DOMRect]:
+	"""The parts of `pieces` that are not covered by `occluder`, as non overlapping rects."""
+	left, top = occluder.x, occluder.y
+	right, bottom = occluder.x + occluder.width, occluder.y + occluder.height
+	remaining: list[DOMRect] = []
+	for piece in pieces:
+		piece_right, piece_bottom = piece.x + piece.width, piece.y + piece.height
+		if left >= piece_right or right <= piece.x or top >= piece_bottom or bottom <= piece.y:
+			remaining.append(piece)
+			continue
+		# the strips above and below the occluder span the whole width, the ones left and right of it only its height
+		if top > piece.y:
+			remaining.append(DOMRect(x=piece.x, y=piece.y, width=piece.width, height=top - piece.y))
+		if bottom < piece_bottom:
+			remaining.append(DOMRect(x=piece.x, y=bottom, width=piece.width, height=piece_bottom - bottom))
+		middle_top, middle_bottom = max(top, piece.y), min(bottom, piece_bottom)
+		if left > piece.x:
+			remaining.append(DOMRect(x=piece.x, y=middle_top, width=left - piece.x, height=middle_bottom - middle_top))
+		if right < piece_right:
+			remaining.append(DOMRect(x=right, y=middle_top, width=piece_right - right, height=middle_bottom - middle_top))
+	return remaining
+
+
+def _ancestors(node: EnhancedDOMTreeNode) -> tuple[set[int], EnhancedDOMTreeNode]:
+	"""id()s of the ancestors of `node` within its document, and the document node (shadow hosts count as ancestors)."""
+	ancestor_ids: set[int] = set()
+	current = node
+	while current.parent_node is not None and current.node_type != NodeType.DOCUMENT_NODE:
+		current = current.parent_node
+		ancestor_ids.add(id(current))
+	return ancestor_ids, current
+
+
+def _is_descendant(node: EnhancedDOMTreeNode, ancestor: EnhancedDOMTreeNode) -> bool:
+	current = node.parent_node
+	while current is not None and current.node_type != NodeType.DOCUMENT_NODE:
+		if current is ancestor:
+			return True
+		current = current.parent_node
+	return False
@@ -1,14 +1,18 @@
 # @file purpose: Serializes enhanced DOM trees to string format for LLM consumption
 
+from collections.abc import Iterator
 
 from browser_use.dom.serializer.clickable_elements import ClickableElementDetector
+from browser_use.dom.serializer.paint_order import PaintOrderOcclusionFilter
 from browser_use.dom.utils import cap_text_length
 from browser_use.dom.views import (
 	DOMRect,
 	DOMSelectorMap,
+	DOMStateDiff,
 	EnhancedDOMTreeNode,
 	NodeType,
 	PropagatingBounds,
+	SerializedDOMLine,
 	SerializedDOMState,
 	SimplifiedNode,
 )
@@ -16,6 +20,55 @@ from browser_use.dom.views import (
 DISABLED_ELEMENTS = {'style', 'script', 'head', 'meta', 'link', 'title'}
 
 
+class _FusedFrame:
+	"""A node of `DOMTreeSerializer._serialize_fused` whose children are still being visited."""
+
+	__slots__ = (
+		'children',
+		'is_document',
+		'included',
+		'kept',
+		'line_start',
+		'child_depth',
+		'child_tree_depth',
+		'child_bounds',
+		'done',
+	)
+
+	def __init__(
+		self,
+		children: Iterator[EnhancedDOMTreeNode],
+		is_document: bool,
+		included: bool,
+		kept: bool,
+		line_start: int,
+		child_depth: int,
+		child_tree_depth: int,
+		child_bounds: PropagatingBounds | None,
+	):
+		self.children = children
+		self.is_document = is_document
+		self.included = included
+		"""Whether the legacy simplify pass returns a node (becomes true when a child is included)."""
+		self.kept = kept
+		"""Whether the legacy optimize pass keeps the node (only if it is included as well)."""
+		self.line_start = line_start
+		self.child_depth = child_depth
+		self.child_tree_depth = child_tree_depth
+		self.child_bounds = child_bounds
+		self.done = False
+
+	def add_child(self, included: bool, kept: bool) -> None:
+		if not included:
+			return
+		if self.is_document:
+			# documents pass through the first child that is included, even if it is not kept afterwards
+			self.included, self.kept, self.done = True, kept, True
+			return
+		self.included = True
+		self.kept = self.kept or kept
+
+
 class DOMTreeSerializer:
 	"""Serializes enhanced DOM trees to string format."""
 
@@ -33,6 +86,8 @@ class DOMTreeSerializer:
 		# {'tag': 'span', 'role': 'link'},    # <span role="link">
 	]
 	DEFAULT_CONTAINMENT_THRESHOLD = 0.99  # 99% containment by default
+	# (tag, role) pairs of PROPAGATING_ELEMENTS for the fused serializer, a role of None matches any role
+	_PROPAGATING_TAG_ROLES = frozenset((pattern['tag'], pattern['role']) for pattern in PROPAGATING_ELEMENTS)
 
 	def __init__(
 		self,
@@ -40,11 +95,18 @@ class DOMTreeSerializer:
 		previous_cached_state: SerializedDOMState | None = None,
 		enable_bbox_filtering: bool = True,
 		containment_threshold: float | None = None,
+		legacy: bool = False,
+		enable_occlusion_filtering: bool = False,
+		previous_backend_node_ids: set[int] | None = None,
 	):
 		self.root_node = root_node
 		self._interactive_counter = 1
 		self._selector_map: DOMSelectorMap = {}
 		self._previous_cached_selector_map = previous_cached_state.selector_map if previous_cached_state else None
+		# backend node ids of the previous state's interactive elements, instead of `previous_cached_state` when the
+		# previous state lives elsewhere (see dom/offload.py)
+		self._given_previous_backend_node_ids = previous_backend_node_ids
+		self._previous_backend_node_ids: set[int] = set()
 		# Add timing tracking
 		self.timing_info: dict[str, float] = {}
 		# Cache for clickable element detection to avoid redundant calls
@@ -52,6 +114,12 @@ class DOMTreeSerializer:
 		# Bounding box filtering configuration
 		self.enable_bbox_filtering = enable_bbox_filtering
 		self.containment_threshold = containment_threshold or self.DEFAULT_CONTAINMENT_THRESHOLD
+		# Legacy mode builds a SimplifiedNode tree in four passes (kept for parity tests), otherwise one fused pass is used
+		self.legacy = legacy
+		# Interactive elements fully painted over by opaque elements (modals, cookie banners, ...) get no index.
+		# Off by default until real page regression runs show that no visible interactive element loses its index.
+		self.enable_occlusion_filtering = enable_occlusion_filtering
+		self._occlusion_filter: PaintOrderOcclusionFilter | None = None
 
 	def serialize_accessible_elements(self) -> tuple[SerializedDOMState, dict[str, float]]:
 		import time
@@ -63,6 +131,43 @@ class DOMTreeSerializer:
 		self._selector_map = {}
 		self._semantic_groups = []
 		self._clickable_cache = {}  # Clear cache for new serialization
+		self._occlusion_filter = None
+		# Computed once per serialization, used to mark new nodes and to diff against the previous state
+		if self._given_previous_backend_node_ids is not None:
+			self._previous_backend_node_ids = self._given_previous_backend_node_ids
+		else:
+			self._previous_backend_node_ids = (
+				{node.backend_node_id for node in self._previous_cached_selector_map.values()}
+				if self._previous_cached_selector_map
+				else set()
+			)
+
+		filtered_tree: SimplifiedNode | None = None
+		lines: list[SerializedDOMLine] | None = None
+		if self.legacy:
+			filtered_tree = self._serialize_in_passes()
+		else:
+			start_fused = time.time()
+			lines = self._serialize_fused()
+			self.timing_info['fused_serialization'] = time.time() - start_fused
+
+		end_total = time.time()
+		self.timing_info['serialize_accessible_elements_total'] = end_total - start_total
+
+		diff = None
+		if self._previous_cached_selector_map is not None or self._given_previous_backend_node_ids is not None:
+			diff = DOMStateDiff.from_backend_node_ids(
+				self._previous_backend_node_ids, {node.backend_node_id for node in self._selector_map.values()}
+			)
+
+		return (
+			SerializedDOMState(_root=filtered_tree, selector_map=self._selector_map, diff=diff, _lines=lines),
+			self.timing_info,
+		)
+
+	def _serialize_in_passes(self) -> SimplifiedNode | None:
+		"""Legacy pipeline: build a `SimplifiedNode` tree, then optimize, filter and index it in separate passes."""
+		import time
 
 		# Step 1: Create simplified tree (includes clickable element detection)
 		start_step1 = time.time()
@@ -95,10 +200,7 @@ class DOMTreeSerializer:
 		end_step4 = time.time()
 		self.timing_info['assign_interactive_indices'] = end_step4 - start_step4
 
-		end_total = time.time()
-		self.timing_info['serialize_accessible_elements_total'] = end_total - start_total
-
-		return SerializedDOMState(_root=filtered_tree, selector_map=self._selector_map), self.timing_info
+		return filtered_tree
 
 	def _is_interactive_cached(self, node: EnhancedDOMTreeNode) -> bool:
 		"""Cached version of clickable element detection to avoid redundant calls."""
@@ -106,7 +208,7 @@ class DOMTreeSerializer:
 			import time
 
 			start_time = time.time()
-			result = ClickableElementDetector.is_interactive(node)
+			result = ClickableElementDetector.is_interactive(node) and not self._is_occluded(node)
 			end_time = time.time()
 
 			if 'clickable_detection_time' not in self.timing_info:
@@ -117,6 +219,14 @@ class DOMTreeSerializer:
 
 		return self._clickable_cache[node.node_id]
 
+	def _is_occluded(self, node: EnhancedDOMTreeNode) -> bool:
+		"""Whether the element is hidden under opaque elements painted on top of it (built on first use)."""
+		if not self.enable_occlusion_filtering:
+			return False
+		if self._occlusion_filter is None:
+			self._occlusion_filter = PaintOrderOcclusionFilter(self.root_node)
+		return self._occlusion_filter.is_occluded(node)
+
 	def _create_simplified_tree(self, node: EnhancedDOMTreeNode) -> SimplifiedNode | None:
 		"""Step 1: Create a simplified tree with enhanced element detection."""
 
@@ -242,10 +352,8 @@ class DOMTreeSerializer:
 				self._interactive_counter += 1
 
 				# Check if node is new
-				if self._previous_cached_selector_map:
-					previous_backend_node_ids = {node.backend_node_id for node in self._previous_cached_selector_map.values()}
-					if node.original_node.backend_node_id not in previous_backend_node_ids:
-						node.is_new = True
+				if self._previous_backend_node_ids and node.original_node.backend_node_id not in self._previous_backend_node_ids:
+					node.is_new = True
 
 		# Process children
 		for child in node.children:
@@ -275,7 +383,7 @@ class DOMTreeSerializer:
 		"""
 
 		# Check if this node should be excluded by active bounds
-		if active_bounds and self._should_exclude_child(node, active_bounds):
+		if active_bounds and self._should_exclude_child(node.original_node, active_bounds):
 			node.excluded_by_parent = True
 			# Important: Still check if this node starts NEW propagation
 
@@ -305,20 +413,20 @@ class DOMTreeSerializer:
 		for child in node.children:
 			self._filter_tree_recursive(child, propagate_bounds, depth + 1)
 
-	def _should_exclude_child(self, node: SimplifiedNode, active_bounds: PropagatingBounds) -> bool:
+	def _should_exclude_child(self, node: EnhancedDOMTreeNode, active_bounds: PropagatingBounds) -> bool:
 		"""
 		Determine if child should be excluded based on propagating bounds.
 		"""
 
 		# Never exclude text nodes - we always want to preserve text content
-		if node.original_node.node_type == NodeType.TEXT_NODE:
+		if node.node_type == NodeType.TEXT_NODE:
 			return False
 
 		# Get child bounds
-		if not node.original_node.snapshot_node or not node.original_node.snapshot_node.bounds:
+		if not node.snapshot_node or not node.snapshot_node.bounds:
 			return False  # No bounds = can't determine containment
 
-		child_bounds = node.original_node.snapshot_node.bounds
+		child_bounds = node.snapshot_node.bounds
 
 		# Check containment with configured threshold
 		if not self._is_contained(child_bounds, active_bounds.bounds, self.containment_threshold):
@@ -326,8 +434,8 @@ class DOMTreeSerializer:
 
 		# EXCEPTION RULES - Keep these even if contained:
 
-		child_tag = node.original_node.tag_name.lower()
-		child_role = node.original_node.attributes.get('role') if node.original_node.attributes else None
+		child_tag = node.tag_name.lower()
+		child_role = node.attributes.get('role') if node.attributes else None
 		child_attributes = {
 			'tag': child_tag,
 			'role': child_role,
@@ -343,19 +451,19 @@ class DOMTreeSerializer:
 			return False
 
 		# 3. Keep if has explicit onclick handler
-		if node.original_node.attributes and 'onclick' in node.original_node.attributes:
+		if node.attributes and 'onclick' in node.attributes:
 			return False
 
 		# 4. Keep if has aria-label suggesting it's independently interactive
-		if node.original_node.attributes:
-			aria_label = node.original_node.attributes.get('aria-label')
+		if node.attributes:
+			aria_label = node.attributes.get('aria-label')
 			if aria_label and aria_label.strip():
 				# Has meaningful aria-label, likely interactive
 				return False
 
 		# 5. Keep if has role suggesting interactivity
-		if node.original_node.attributes:
-			role = node.original_node.attributes.get('role')
+		if node.attributes:
+			role = node.attributes.get('role')
 			if role in ['button', 'link', 'checkbox', 'radio', 'tab', 'menuitem']:
 				return False
 
@@ -404,6 +512,123 @@ class DOMTreeSerializer:
 
 		return False
 
+	def _serialize_fused(self) -> list[SerializedDOMLine] | None:
+		"""Simplify, optimize, filter, index and emit lines for the whole tree in one traversal.
+
+		Produces the same selector map and text as the legacy passes, without building `SimplifiedNode`s.
+		Lines of a node are emitted when it is entered and dropped again if the node turns out to be empty.
+		Returns None when nothing is left, like the legacy passes return no tree.
+		"""
+		lines: list[SerializedDOMLine] = []
+		visited = self._visit_fused(self.root_node, 0, 0, None, lines)
+		if not isinstance(visited, _FusedFrame):
+			return lines if visited[1] else None
+
+		stack = [visited]
+		while True:
+			frame = stack[-1]
+			child = None if frame.done else next(frame.children, None)
+			if child is not None:
+				visited = self._visit_fused(child, frame.child_depth, frame.child_tree_depth, frame.child_bounds, lines)
+				if isinstance(visited, _FusedFrame):
+					stack.append(visited)
+					continue
+				frame.add_child(*visited)
+				continue
+
+			stack.pop()
+			kept = frame.included and frame.kept
+			if not kept:
+				del lines[frame.line_start :]
+			if not stack:
+				return lines if kept else None
+			stack[-1].add_child(frame.included, kept)
+
+	def _visit_fused(
+		self,
+		node: EnhancedDOMTreeNode,
+		depth: int,
+		tree_depth: int,
+		active_bounds: PropagatingBounds | None,
+		lines: list[SerializedDOMLine],
+	) -> _FusedFrame | tuple[bool, bool]:
+		"""Enter a node: returns a frame for its children, or (included, kept) if there is nothing to descend into."""
+		node_type = node.node_type
+		line_start = len(lines)
+
+		if node_type == NodeType.DOCUMENT_NODE:
+			# documents are not part of the serialized tree, they stand in for their first included child
+			return _FusedFrame(
+				iter(node.children_and_shadow_roots), True, False, False, line_start, depth, tree_depth, active_bounds
+			)
+
+		is_element = node_type == NodeType.ELEMENT_NODE
+		if is_element:
+			if node.node_name.lower() in DISABLED_ELEMENTS:
+				return False, False
+			if node.node_name == 'IFRAME' and node.content_document:
+				children = node.content_document.children
+				always_included = True
+			else:
+				children = node.children_and_shadow_roots
+				always_included = False
+			is_interactive_and_visible = bool(
+				ClickableElementDetector.is_interactive(node)
+				and node.snapshot_node
+				and node.is_visible
+				and not self._is_occluded(node)
+			)
+			is_scrollable = node.is_actually_scrollable
+			included = always_included or is_interactive_and_visible or is_scrollable
+			kept = is_interactive_and_visible or is_scrollable
+		elif node_type == NodeType.DOCUMENT_FRAGMENT_NODE:
+			children = node.children_and_shadow_roots
+			included = True
+			kept = node.is_actually_scrollable
+		elif node_type == NodeType.TEXT_NODE:
+			if not (node.snapshot_node and node.is_visible and node.node_value and len(node.node_value.strip()) > 1):
+				return False, False
+			children = []
+			included = kept = True
+		else:
+			return False, False
+
+		# Bounding box filtering: propagating parents (links, buttons, ...) hide the elements they contain
+		excluded = False
+		child_bounds = active_bounds
+		if self.enable_bbox_filtering:
+			excluded = active_bounds is not None and self._should_exclude_child(node, active_bounds)
+			if is_element and node.snapshot_node and node.snapshot_node.bounds:
+				tag = node.tag_name
+				role = node.attributes.get('role') if node.attributes else None
+				if (tag, None) in self._PROPAGATING_TAG_ROLES or (tag, role) in self._PROPAGATING_TAG_ROLES:
+					child_bounds = PropagatingBounds(
+						tag=tag, bounds=node.snapshot_node.bounds, node_id=node.node_id, depth=tree_depth
+					)
+
+		child_depth = depth
+		if not excluded:
+			if is_element:
+				interactive_index = None
+				is_new = False
+				if is_interactive_and_visible:
+					interactive_index = self._interactive_counter
+					node.element_index = interactive_index
+					self._selector_map[interactive_index] = node
+					self._interactive_counter += 1
+					is_new = bool(self._previous_backend_node_ids) and node.backend_node_id not in self._previous_backend_node_ids
+				if interactive_index is not None or is_scrollable or node.is_scrollable or node.tag_name == 'iframe':
+					lines.append(SerializedDOMLine(depth, node, interactive_index, is_new))
+					child_depth = depth + 1
+			elif node_type == NodeType.TEXT_NODE:
+				lines.append(SerializedDOMLine(depth, node))
+
+		if not children:
+			if not kept:
+				del lines[line_start:]
+			return included, kept
+		return _FusedFrame(iter(children), False, included, kept, line_start, child_depth, tree_depth + 1, child_bounds)
+
 	@staticmethod
 	def serialize_tree(node: SimplifiedNode | None, include_attributes: list[str], depth: int = 0) -> str:
 		"""Serialize the optimized tree to string format."""
@@ -434,40 +659,13 @@ class DOMTreeSerializer:
 
 			# Add element with interactive_index if clickable, scrollable, or iframe
 			is_any_scrollable = node.original_node.is_actually_scrollable or node.original_node.is_scrollable
-			should_show_scroll = node.original_node.should_show_scroll_info
 			if node.interactive_index is not None or is_any_scrollable or node.original_node.tag_name.upper() == 'IFRAME':
 				next_depth += 1
-
-				# Build attributes string
-				attributes_html_str = DOMTreeSerializer._build_attributes_string(node.original_node, include_attributes, '')
-
-				# Build the line
-				if should_show_scroll and node.interactive_index is None:
-					# Scrollable container but not clickable
-					line = f'{depth_str}|SCROLL|<{node.original_node.tag_name}'
-				elif node.interactive_index is not None:
-					# Clickable (and possibly scrollable)
-					new_prefix = '*' if node.is_new else ''
-					scroll_prefix = '|SCROLL+' if should_show_scroll else '['
-					line = f'{depth_str}{new_prefix}{scroll_prefix}{node.interactive_index}]<{node.original_node.tag_name}'
-				elif node.original_node.tag_name.upper() == 'IFRAME':
-					# Iframe element (not interactive)
-					line = f'{depth_str}|IFRAME|<{node.original_node.tag_name}'
-				else:
-					line = f'{depth_str}<{node.original_node.tag_name}'
-
-				if attributes_html_str:
-					line += f' {attributes_html_str}'
-
-				line += ' />'
-
-				# Add scroll information only when we should show it
-				if should_show_scroll:
-					scroll_info_text = node.original_node.get_scroll_info_text()
-					if scroll_info_text:
-						line += f' ({scroll_info_text})'
-
-				formatted_text.append(line)
+				formatted_text.append(
+					DOMTreeSerializer._format_element_line(
+						node.original_node, node.interactive_index, node.is_new, depth_str, include_attributes
+					)
+				)
 
 		elif node.original_node.node_type == NodeType.TEXT_NODE:
 			# Include visible text
@@ -489,6 +687,62 @@ class DOMTreeSerializer:
 
 		return '\n'.join(formatted_text)
 
+	@staticmethod
+	def serialize_lines(lines: list[SerializedDOMLine], include_attributes: list[str]) -> str:
+		"""Render the lines of the fused serializer, same output as `serialize_tree` for the legacy tree."""
+		return '\n'.join(DOMTreeSerializer.serialize_line(line, include_attributes) for line in lines)
+
+	@staticmethod
+	def serialize_line(line: SerializedDOMLine, include_attributes: list[str]) -> str:
+		depth_str = line.depth * '\t'
+		if line.node.node_type == NodeType.TEXT_NODE:
+			return f'{depth_str}{line.node.node_value.strip()}'
+		return DOMTreeSerializer._format_element_line(
+			line.node, line.interactive_index, line.is_new, depth_str, include_attributes
+		)
+
+	@staticmethod
+	def _format_element_line(
+		node: EnhancedDOMTreeNode,
+		interactive_index: int | None,
+		is_new: bool,
+		depth_str: str,
+		include_attributes: list[str],
+	) -> str:
+		"""Format the line of a clickable, scrollable or iframe element."""
+		should_show_scroll = node.should_show_scroll_info
+
+		# Build attributes string
+		attributes_html_str = DOMTreeSerializer._build_attributes_string(node, include_attributes, '')
+
+		# Build the line
+		if should_show_scroll and interactive_index is None:
+			# Scrollable container but not clickable
+			line = f'{depth_str}|SCROLL|<{node.tag_name}'
+		elif interactive_index is not None:
+			# Clickable (and possibly scrollable)
+			new_prefix = '*' if is_new else ''
+			scroll_prefix = '|SCROLL+' if should_show_scroll else '['
+			line = f'{depth_str}{new_prefix}{scroll_prefix}{interactive_index}]<{node.tag_name}'
+		elif node.tag_name.upper() == 'IFRAME':
+			# Iframe element (not interactive)
+			line = f'{depth_str}|IFRAME|<{node.tag_name}'
+		else:
+			line = f'{depth_str}<{node.tag_name}'
+
+		if attributes_html_str:
+			line += f' {attributes_html_str}'
+
+		line += ' />'
+
+		# Add scroll information only when we should show it
+		if should_show_scroll:
+			scroll_info_text = node.get_scroll_info_text()
+			if scroll_info_text:
+				line += f' ({scroll_info_text})'
+
+		return line
+
 	@staticmethod
 	def _build_attributes_string(node: EnhancedDOMTreeNode, include_attributes: list[str], text: str) -> str:
 		"""Build the attributes string for an element."""
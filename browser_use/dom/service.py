@@ -1,36 +1,74 @@
 import asyncio
+import json
 import logging
 import time
-from typing import TYPE_CHECKING
+from concurrent.futures import BrokenExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
 
 from cdp_use.cdp.accessibility.commands import GetFullAXTreeReturns
 from cdp_use.cdp.accessibility.types import AXNode
-from cdp_use.cdp.dom.types import Node
-from cdp_use.cdp.target import TargetID
+from cdp_use.cdp.domsnapshot.commands import CaptureSnapshotReturns
+from cdp_use.cdp.target import SessionID, TargetID
 
+from browser_use.browser.cdp_client import SessionEventRouter
+from browser_use.dom.columnar_snapshot import build_columnar_snapshot
 from browser_use.dom.enhanced_snapshot import (
 	REQUIRED_COMPUTED_STYLES,
 	build_snapshot_lookup,
 )
+from browser_use.dom.enhanced_tree import build_enhanced_ax_node, build_enhanced_subtree
+from browser_use.dom.in_page_extraction import (
+	build_in_page_tree,
+	nodes_needing_backend_node_ids,
+	resolve_backend_node_ids,
+	run_in_page_extraction,
+)
+from browser_use.dom.mutation_tracker import TRACKED_DOM_EVENTS, DOMMutationTracker
+from browser_use.dom.offload import (
+	DOMOffloadMode,
+	OffloadedDOMState,
+	discard_dom_offload_executor,
+	get_dom_offload_executor,
+)
 from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.utils import gc_paused
 from browser_use.dom.views import (
 	CurrentPageTargets,
 	DOMRect,
-	EnhancedAXNode,
-	EnhancedAXProperty,
 	EnhancedDOMTreeNode,
+	EnhancedSnapshotNode,
 	NodeType,
 	SerializedDOMState,
 	TargetAllTrees,
 )
 
 if TYPE_CHECKING:
-	from browser_use.browser.session import BrowserSession
+	from browser_use.browser.session import BrowserSession, CDPSession
 
 
+logger = logging.getLogger(__name__)
+
 # TODO: enable cross origin iframes -> experimental for now
 ENABLE_CROSS_ORIGIN_IFRAMES = False
 
+# above this many changed elements the whole AX tree is refetched instead of one partial AX tree per element
+MAX_PARTIAL_AX_NODES = 100
+
+# cross origin iframes fetched at the same time during one DOM build, and the time each fetch may take
+MAX_CONCURRENT_IFRAME_FETCHES = 4
+IFRAME_FETCH_TIMEOUT = 5.0
+
+
+@dataclass
+class CrossOriginFrames:
+	"""The frame targets of a page, resolved once per DOM build and shared by all (nested) cross origin iframes."""
+
+	target_ids: dict[str, TargetID]
+	"""Frame id -> id of the target that owns the frame"""
+	semaphore: asyncio.Semaphore
+	"""Bounds the concurrent iframe fetches of the build"""
+
 
 class DomService:
 	"""
@@ -43,9 +81,35 @@ class DomService:
 
 	logger: logging.Logger
 
-	def __init__(self, browser_session: 'BrowserSession', logger: logging.Logger | None = None):
+	def __init__(
+		self,
+		browser_session: 'BrowserSession',
+		logger: logging.Logger | None = None,
+		incremental: bool = False,
+		extraction_backend: Literal['cdp', 'js'] = 'cdp',
+		offload: DOMOffloadMode = 'off',
+		occlusion_filtering: bool = False,
+	):
 		self.browser_session = browser_session
 		self.logger = logger or browser_session.logger
+		self.incremental = incremental
+		"""Keep the DOM tree patched from CDP mutation events and only refetch layout between steps."""
+		self.extraction_backend = extraction_backend
+		"""'cdp' builds the tree from the CDP snapshot payloads, 'js' from one in-page extraction script."""
+		self.offload: DOMOffloadMode = offload
+		"""Build and serialize full 'cdp' trees in a worker 'thread' or 'process' instead of on the event loop."""
+		self.occlusion_filtering = occlusion_filtering
+		"""Drop interactive elements that are fully painted over by other elements (see serializer/paint_order.py)."""
+
+		self._mutation_trackers: dict[str, DOMMutationTracker] = {}
+		"""CDP session id -> tracker of the document on that session"""
+		self._mutation_events = SessionEventRouter(
+			self._mutation_trackers,
+			{
+				f'DOM.{method}': lambda tracker, params, method=method: tracker.handle_event(method, params)
+				for method in TRACKED_DOM_EVENTS
+			},
+		)
 
 	async def __aenter__(self):
 		return self
@@ -96,33 +160,6 @@ class DomService:
 			iframe_sessions=iframe_targets,
 		)
 
-	def _build_enhanced_ax_node(self, ax_node: AXNode) -> EnhancedAXNode:
-		properties: list[EnhancedAXProperty] | None = None
-		if 'properties' in ax_node and ax_node['properties']:
-			properties = []
-			for property in ax_node['properties']:
-				try:
-					# test whether property name can go into the enum (sometimes Chrome returns some random properties)
-					properties.append(
-						EnhancedAXProperty(
-							name=property['name'],
-							value=property.get('value', {}).get('value', None),
-							# related_nodes=[],  # TODO: add related nodes
-						)
-					)
-				except ValueError:
-					pass
-
-		enhanced_ax_node = EnhancedAXNode(
-			ax_node_id=ax_node['nodeId'],
-			ignored=ax_node['ignored'],
-			role=ax_node.get('role', {}).get('value', None),
-			name=ax_node.get('name', {}).get('value', None),
-			description=ax_node.get('description', {}).get('value', None),
-			properties=properties,
-		)
-		return enhanced_ax_node
-
 	async def _get_viewport_ratio(self, target_id: TargetID) -> float:
 		"""Get viewport dimensions, device pixel ratio, and scroll position using CDP."""
 		cdp_session = await self.browser_session.get_or_create_cdp_session(target_id=target_id, focus=True)
@@ -194,7 +231,7 @@ class DomService:
 			):
 				iframe_bounds = frame.snapshot_node.bounds
 
-				# negate the values added in `_construct_enhanced_node`
+				# negate the values added in `_apply_layout`
 				current_bounds.x += iframe_bounds.x
 				current_bounds.y += iframe_bounds.y
 
@@ -294,6 +331,18 @@ class DomService:
 
 		return {'nodes': merged_nodes}
 
+	def _capture_snapshot(self, cdp_session: 'CDPSession'):
+		return cdp_session.cdp_client.send.DOMSnapshot.captureSnapshot(
+			params={
+				'computedStyles': REQUIRED_COMPUTED_STYLES,
+				'includePaintOrder': True,
+				'includeDOMRects': True,
+				'includeBlendedBackgroundColors': False,
+				'includeTextColorOpacities': False,
+			},
+			session_id=cdp_session.session_id,
+		)
+
 	async def _get_all_trees(self, target_id: TargetID) -> TargetAllTrees:
 		cdp_session = await self.browser_session.get_or_create_cdp_session(target_id=target_id, focus=False)
 
@@ -347,16 +396,7 @@ class DomService:
 
 		# Define CDP request factories to avoid duplication
 		def create_snapshot_request():
-			return cdp_session.cdp_client.send.DOMSnapshot.captureSnapshot(
-				params={
-					'computedStyles': REQUIRED_COMPUTED_STYLES,
-					'includePaintOrder': True,
-					'includeDOMRects': True,
-					'includeBlendedBackgroundColors': False,
-					'includeTextColorOpacities': False,
-				},
-				session_id=cdp_session.session_id,
-			)
+			return self._capture_snapshot(cdp_session)
 
 		def create_dom_tree_request():
 			return cdp_session.cdp_client.send.DOM.getDocument(
@@ -457,233 +497,386 @@ class DomService:
 			initial_total_frame_offset: Accumulated coordinate offset
 		"""
 
+		if self.extraction_backend == 'js' and initial_html_frames is None and initial_total_frame_offset is None:
+			return await self._get_in_page_dom_tree(target_id)
+
+		if (
+			self.incremental
+			and not ENABLE_CROSS_ORIGIN_IFRAMES
+			and initial_html_frames is None
+			and initial_total_frame_offset is None
+		):
+			return await self._get_tracked_dom_tree(target_id)
+
+		return await self._build_dom_tree(target_id, initial_html_frames, initial_total_frame_offset)
+
+	async def _build_dom_tree(
+		self,
+		target_id: TargetID,
+		initial_html_frames: list[EnhancedDOMTreeNode] | None = None,
+		initial_total_frame_offset: DOMRect | None = None,
+	) -> EnhancedDOMTreeNode:
+		"""Fetch the whole document, AX tree and layout snapshot of the target and build the enhanced tree from them."""
+
 		trees = await self._get_all_trees(target_id)
 
-		dom_tree = trees.dom_tree
-		ax_tree = trees.ax_tree
-		snapshot = trees.snapshot
-		device_pixel_ratio = trees.device_pixel_ratio
+		enhanced_dom_tree_node, iframes_without_content = self.construct_enhanced_tree(
+			trees, target_id, initial_html_frames, initial_total_frame_offset
+		)
 
-		ax_tree_lookup: dict[int, AXNode] = {
-			ax_node['backendDOMNodeId']: ax_node for ax_node in ax_tree['nodes'] if 'backendDOMNodeId' in ax_node
-		}
+		# second phase: cross origin iframes are fetched from their own targets, concurrently
+		# TODO: hacky way to disable cross origin iframes for now
+		if ENABLE_CROSS_ORIGIN_IFRAMES and iframes_without_content:
+			frames = await self._resolve_cross_origin_frames()
+			await self._attach_cross_origin_iframes(iframes_without_content, frames)
 
-		enhanced_dom_tree_node_lookup: dict[int, EnhancedDOMTreeNode] = {}
-		""" NodeId (NOT backend node id) -> enhanced dom tree node"""  # way to get the parent/content node
+		return enhanced_dom_tree_node
 
-		# Parse snapshot data with everything calculated upfront
-		snapshot_lookup = build_snapshot_lookup(snapshot, device_pixel_ratio)
-
-		async def _construct_enhanced_node(
-			node: Node, html_frames: list[EnhancedDOMTreeNode] | None, total_frame_offset: DOMRect | None
-		) -> EnhancedDOMTreeNode:
-			"""
-			Recursively construct enhanced DOM tree nodes.
-
-			Args:
-				node: The DOM node to construct
-				html_frames: List of HTML frame nodes encountered so far
-				accumulated_iframe_offset: Accumulated coordinate translation from parent iframes (includes scroll corrections)
-			"""
-
-			# Initialize lists if not provided
-			if html_frames is None:
-				html_frames = []
-
-			# to get rid of the pointer references
-			if total_frame_offset is None:
-				total_frame_offset = DOMRect(x=0.0, y=0.0, width=0.0, height=0.0)
-			else:
-				total_frame_offset = DOMRect(
-					total_frame_offset.x, total_frame_offset.y, total_frame_offset.width, total_frame_offset.height
-				)
+	async def _get_in_page_dom_tree(self, target_id: TargetID) -> EnhancedDOMTreeNode:
+		"""Build the DOM tree from one in-page extraction script instead of the CDP snapshot, document and AX trees.
 
-			# memoize the mf (I don't know if some nodes are duplicated)
-			if node['nodeId'] in enhanced_dom_tree_node_lookup:
-				return enhanced_dom_tree_node_lookup[node['nodeId']]
+		Only the elements that can get an index are resolved to real backend node ids afterwards (one batch of
+		`DOM.describeNode` calls), all other nodes keep the ids of the page.
+		"""
+		cdp_session = await self.browser_session.get_or_create_cdp_session(target_id=target_id, focus=False)
+		start = time.time()
+		payload = await asyncio.wait_for(run_in_page_extraction(cdp_session), timeout=10.0)
+		extracted = time.time()
 
-			ax_node = ax_tree_lookup.get(node['backendNodeId'])
-			if ax_node:
-				enhanced_ax_node = self._build_enhanced_ax_node(ax_node)
-			else:
-				enhanced_ax_node = None
+		root = build_in_page_tree(
+			json.loads(payload),
+			target_id,
+			session_id=self.browser_session.agent_focus.session_id if self.browser_session.agent_focus else None,
+		)
+		built = time.time()
 
-			# To make attributes more readable
-			attributes: dict[str, str] | None = None
-			if 'attributes' in node and node['attributes']:
-				attributes = {}
-				for i in range(0, len(node['attributes']), 2):
-					attributes[node['attributes'][i]] = node['attributes'][i + 1]
+		nodes = nodes_needing_backend_node_ids(root)
+		try:
+			resolved = await asyncio.wait_for(resolve_backend_node_ids(cdp_session, nodes), timeout=5.0)
+		except Exception as e:
+			self.logger.warning(f'Failed to resolve backend node ids of in-page extracted elements: {type(e).__name__}: {e}')
+			resolved = 0
 
-			shadow_root_type = None
-			if 'shadowRootType' in node and node['shadowRootType']:
-				try:
-					shadow_root_type = node['shadowRootType']
-				except ValueError:
-					pass
+		self.logger.debug(
+			f'🔍 In-page DOM extraction: {len(payload) / 1024:.0f} KiB in {extracted - start:.3f}s, '
+			f'tree built in {built - extracted:.3f}s, {resolved}/{len(nodes)} backend node ids resolved in {time.time() - built:.3f}s'
+		)
+		return root
 
-			# Get snapshot data and calculate absolute position
-			snapshot_data = snapshot_lookup.get(node['backendNodeId'], None)
-			absolute_position = None
-			if snapshot_data and snapshot_data.bounds:
-				absolute_position = DOMRect(
-					x=snapshot_data.bounds.x + total_frame_offset.x,
-					y=snapshot_data.bounds.y + total_frame_offset.y,
-					width=snapshot_data.bounds.width,
-					height=snapshot_data.bounds.height,
-				)
+	def construct_enhanced_tree(
+		self,
+		trees: TargetAllTrees,
+		target_id: TargetID,
+		initial_html_frames: list[EnhancedDOMTreeNode] | None = None,
+		initial_total_frame_offset: DOMRect | None = None,
+		session_id: SessionID | None = None,
+	) -> tuple[EnhancedDOMTreeNode, list[tuple[EnhancedDOMTreeNode, DOMRect]]]:
+		"""Build the enhanced DOM tree from already fetched CDP payloads.
 
-			dom_tree_node = EnhancedDOMTreeNode(
-				node_id=node['nodeId'],
-				backend_node_id=node['backendNodeId'],
-				node_type=NodeType(node['nodeType']),
-				node_name=node['nodeName'],
-				node_value=node['nodeValue'],
-				attributes=attributes or {},
-				is_scrollable=node.get('isScrollable', None),
-				frame_id=node.get('frameId', None),
-				session_id=self.browser_session.agent_focus.session_id if self.browser_session.agent_focus else None,
-				target_id=target_id,
-				content_document=None,
-				shadow_root_type=shadow_root_type,
-				shadow_roots=None,
-				parent_node=None,
-				children_nodes=None,
-				ax_node=enhanced_ax_node,
-				snapshot_node=snapshot_data,
-				is_visible=None,
-				absolute_position=absolute_position,
-				element_index=None,
+		Synchronous and iterative (no coroutine per node, no recursion limit on deep documents). `session_id` is stored
+		on the nodes, it defaults to the session of the agent focus.
+
+		Returns:
+			Tuple of (enhanced_dom_tree_root, iframes without a content document and the offset of their content)
+		"""
+		ax_tree_lookup: dict[int, AXNode] = {
+			ax_node['backendDOMNodeId']: ax_node for ax_node in trees.ax_tree['nodes'] if 'backendDOMNodeId' in ax_node
+		}
+
+		# Parse snapshot data with everything calculated upfront
+		snapshot_lookup = build_snapshot_lookup(trees.snapshot, trees.device_pixel_ratio)
+		style_visible_ids = style_visible_backend_node_ids(trees.snapshot)
+
+		if session_id is None and self.browser_session is not None and self.browser_session.agent_focus is not None:
+			session_id = self.browser_session.agent_focus.session_id
+
+		# every node references its parent and children, so the cyclic GC would repeatedly rescan the half built tree
+		with gc_paused():
+			enhanced_dom_tree_node = build_enhanced_subtree(
+				trees.dom_tree['root'],
+				None,
+				target_id,
+				session_id=session_id,
+				ax_tree_lookup=ax_tree_lookup,
+			)[0]
+			iframes_without_content = self._apply_layout(
+				enhanced_dom_tree_node, snapshot_lookup, initial_html_frames, initial_total_frame_offset, style_visible_ids
 			)
+		return enhanced_dom_tree_node, iframes_without_content
+
+	async def _resolve_cross_origin_frames(self) -> CrossOriginFrames:
+		"""Map the frames of all targets to their targets, once for the whole DOM build instead of once per iframe."""
+		all_frames, _ = await self.browser_session.get_all_frames()
+		return CrossOriginFrames(
+			target_ids={frame_id: info['frameTargetId'] for frame_id, info in all_frames.items() if info.get('frameTargetId')},
+			semaphore=asyncio.Semaphore(MAX_CONCURRENT_IFRAME_FETCHES),
+		)
+
+	async def _attach_cross_origin_iframes(
+		self, iframes: list[tuple[EnhancedDOMTreeNode, DOMRect]], frames: CrossOriginFrames
+	) -> None:
+		"""Build the content documents of cross origin iframes from their own targets, all iframes concurrently.
 
-			enhanced_dom_tree_node_lookup[node['nodeId']] = dom_tree_node
+		At most `MAX_CONCURRENT_IFRAME_FETCHES` fetches run at a time and each gets `IFRAME_FETCH_TIMEOUT` seconds. An
+		iframe whose fetch fails or runs out of time stays without content, the rest of the page is not held up by it.
+		"""
 
-			if 'parentId' in node and node['parentId']:
-				dom_tree_node.parent_node = enhanced_dom_tree_node_lookup[
-					node['parentId']
-				]  # parents should always be in the lookup
+		async def attach_content_document(iframe_node: EnhancedDOMTreeNode, total_frame_offset: DOMRect) -> None:
+			iframe_target_id = frames.target_ids.get(iframe_node.frame_id) if iframe_node.frame_id else None
+			# only if the frame has its own target (the frame of an iframe that didn't load yet belongs to the page itself)
+			if not iframe_target_id or iframe_target_id == iframe_node.target_id:
+				return
+
+			self.logger.debug(f'Getting content document for iframe {iframe_node.frame_id}')
+			try:
+				# the nested iframes are fetched after the slot is released, parents never wait for their children in it
+				async with frames.semaphore:
+					trees = await asyncio.wait_for(self._get_all_trees(iframe_target_id), timeout=IFRAME_FETCH_TIMEOUT)
+			except Exception as e:
+				self.logger.debug(f'Skipping content of iframe {iframe_node.frame_id}: {type(e).__name__}: {e}')
+				return
+
+			content_document, nested_iframes = self.construct_enhanced_tree(
+				trees,
+				iframe_target_id,
+				# TODO: experiment with this values -> not sure whether the whole cross origin iframe should be ALWAYS included as soon as some part of it is visible or not.
+				# Current config: if the cross origin iframe is AT ALL visible, then just include everything inside of it!
+				# initial_html_frames=updated_html_frames,
+				initial_total_frame_offset=total_frame_offset,
+			)
+			iframe_node.content_document = content_document
+			content_document.parent_node = iframe_node
+			if nested_iframes:
+				await self._attach_cross_origin_iframes(nested_iframes, frames)
 
-			# Check if this is an HTML frame node and add it to the list
-			updated_html_frames = html_frames.copy()
-			if node['nodeType'] == NodeType.ELEMENT_NODE.value and node['nodeName'] == 'HTML' and node.get('frameId') is not None:
-				updated_html_frames.append(dom_tree_node)
+		await asyncio.gather(*(attach_content_document(node, offset) for node, offset in iframes))
 
+	def _apply_layout(
+		self,
+		root: EnhancedDOMTreeNode,
+		snapshot_lookup: dict[int, EnhancedSnapshotNode],
+		html_frames: list[EnhancedDOMTreeNode] | None = None,
+		total_frame_offset: DOMRect | None = None,
+		style_visible_ids: set[int] | None = None,
+	) -> list[tuple[EnhancedDOMTreeNode, DOMRect]]:
+		"""Attach snapshot data, absolute positions and visibility to an already built tree.
+
+		Absolute positions are shifted by the offset (and scroll) of every enclosing frame. Visibility is
+		computed children first, because `is_element_visible_according_to_all_parents` moves the bounds
+		of the node it checks. Nodes missing from `style_visible_ids` (if given) have no bounds or are hidden by
+		CSS, `is_element_visible_according_to_all_parents` returns False for them before it looks at any frame.
+
+		Returns the iframes without a content document (cross origin) with the offset of their content.
+		"""
+		iframes_without_content: list[tuple[EnhancedDOMTreeNode, DOMRect]] = []
+		offset = (total_frame_offset.x, total_frame_offset.y) if total_frame_offset else (0.0, 0.0)
+		stack: list[tuple[EnhancedDOMTreeNode, list[EnhancedDOMTreeNode], tuple[float, float], bool]] = [
+			(root, html_frames or [], offset, False)
+		]
+		while stack:
+			node, frames, (offset_x, offset_y), children_done = stack.pop()
+			if children_done:
+				if style_visible_ids is not None and node.backend_node_id not in style_visible_ids:
+					node.is_visible = False
+				else:
+					node.is_visible = self.is_element_visible_according_to_all_parents(node, frames)
+				continue
+
+			snapshot_data = snapshot_lookup.get(node.backend_node_id)
+			node.snapshot_node = snapshot_data
+			node.element_index = None
+			node.absolute_position = None
+			if snapshot_data and snapshot_data.bounds:
+				bounds = snapshot_data.bounds
+				# without an offset (top level document, not scrolled) the coordinates are reused instead of copied
+				node.absolute_position = DOMRect(
+					x=bounds.x + offset_x if offset_x else bounds.x,
+					y=bounds.y + offset_y if offset_y else bounds.y,
+					width=bounds.width,
+					height=bounds.height,
+				)
+
+			updated_html_frames = frames
+			if node.node_type == NodeType.ELEMENT_NODE and node.node_name == 'HTML' and node.frame_id is not None:
+				updated_html_frames = [*updated_html_frames, node]
 				# and adjust the total frame offset by scroll
 				if snapshot_data and snapshot_data.scrollRects:
-					total_frame_offset.x -= snapshot_data.scrollRects.x
-					total_frame_offset.y -= snapshot_data.scrollRects.y
-					# DEBUG: Log iframe scroll information
-					self.logger.info(
-						f'🔍 DEBUG: HTML frame scroll - scrollY={snapshot_data.scrollRects.y}, scrollX={snapshot_data.scrollRects.x}, frameId={node.get("frameId")}, nodeId={node["nodeId"]}'
+					offset_x -= snapshot_data.scrollRects.x
+					offset_y -= snapshot_data.scrollRects.y
+					self.logger.debug(
+						f'🔍 HTML frame scroll - scrollY={snapshot_data.scrollRects.y}, scrollX={snapshot_data.scrollRects.x}, frameId={node.frame_id}, nodeId={node.node_id}'
 					)
 
 			# Calculate new iframe offset for content documents, accounting for iframe scroll
-			if node['nodeName'].upper() == 'IFRAME' and snapshot_data and snapshot_data.bounds:
-				if snapshot_data.bounds:
-					updated_html_frames.append(dom_tree_node)
+			is_iframe = node.node_name.upper() == 'IFRAME'
+			if is_iframe and snapshot_data and snapshot_data.bounds:
+				updated_html_frames = [*updated_html_frames, node]
+				offset_x += snapshot_data.bounds.x
+				offset_y += snapshot_data.bounds.y
+
+			if is_iframe and node.content_document is None:
+				iframes_without_content.append((node, DOMRect(x=offset_x, y=offset_y, width=0.0, height=0.0)))
+
+			child_offset = (offset_x, offset_y)
+			stack.append((node, updated_html_frames, child_offset, True))
+			# pushed in reverse so nodes are visited in the same order as the recursive build
+			for child in reversed(node.children_nodes or []):
+				stack.append((child, updated_html_frames, child_offset, False))
+			for shadow_root in reversed(node.shadow_roots or []):
+				stack.append((shadow_root, updated_html_frames, child_offset, False))
+			if node.content_document:
+				stack.append((node.content_document, updated_html_frames, child_offset, False))
+
+		return iframes_without_content
+
+	# region - incremental DOM tree
+
+	def _get_mutation_tracker(self, target_id: TargetID, cdp_session: 'CDPSession') -> DOMMutationTracker:
+		tracker = self._mutation_trackers.get(cdp_session.session_id)
+		if tracker is None:
+			# drop trackers of previous sessions to the same target, their node ids are meaningless now
+			for session_id, stale_tracker in list(self._mutation_trackers.items()):
+				if stale_tracker.target_id == target_id:
+					del self._mutation_trackers[session_id]
+			tracker = DOMMutationTracker(
+				target_id=target_id,
+				session_id=cdp_session.session_id,
+				node_session_id=self.browser_session.agent_focus.session_id if self.browser_session.agent_focus else None,
+			)
+			self._mutation_trackers[cdp_session.session_id] = tracker
 
-					total_frame_offset.x += snapshot_data.bounds.x
-					total_frame_offset.y += snapshot_data.bounds.y
+		self._mutation_events.attach(cdp_session.cdp_client)
+		return tracker
 
-			if 'contentDocument' in node and node['contentDocument']:
-				dom_tree_node.content_document = await _construct_enhanced_node(
-					node['contentDocument'], updated_html_frames, total_frame_offset
-				)
-				dom_tree_node.content_document.parent_node = dom_tree_node
-				# forcefully set the parent node to the content document node (helps traverse the tree)
-
-			if 'shadowRoots' in node and node['shadowRoots']:
-				dom_tree_node.shadow_roots = []
-				for shadow_root in node['shadowRoots']:
-					shadow_root_node = await _construct_enhanced_node(shadow_root, updated_html_frames, total_frame_offset)
-					# forcefully set the parent node to the shadow root node (helps traverse the tree)
-					shadow_root_node.parent_node = dom_tree_node
-					dom_tree_node.shadow_roots.append(shadow_root_node)
-
-			if 'children' in node and node['children']:
-				dom_tree_node.children_nodes = []
-				for child in node['children']:
-					dom_tree_node.children_nodes.append(
-						await _construct_enhanced_node(child, updated_html_frames, total_frame_offset)
-					)
+	async def _get_tracked_dom_tree(self, target_id: TargetID) -> EnhancedDOMTreeNode:
+		"""Return the DOM tree kept up to date by DOM mutation events, rebuilding it only when it can't be trusted."""
+		cdp_session = await self.browser_session.get_or_create_cdp_session(target_id=target_id, focus=False)
+		tracker = self._get_mutation_tracker(target_id, cdp_session)
 
-			# Set visibility using the collected HTML frames
-			dom_tree_node.is_visible = self.is_element_visible_according_to_all_parents(dom_tree_node, updated_html_frames)
-
-			# DEBUG: Log visibility info for form elements in iframes
-			if dom_tree_node.tag_name and dom_tree_node.tag_name.upper() in ['INPUT', 'SELECT', 'TEXTAREA', 'LABEL']:
-				attrs = dom_tree_node.attributes or {}
-				elem_id = attrs.get('id', '')
-				elem_name = attrs.get('name', '')
-				if (
-					'city' in elem_id.lower()
-					or 'city' in elem_name.lower()
-					or 'state' in elem_id.lower()
-					or 'state' in elem_name.lower()
-					or 'zip' in elem_id.lower()
-					or 'zip' in elem_name.lower()
-				):
-					self.logger.info(
-						f"🔍 DEBUG: Form element {dom_tree_node.tag_name} id='{elem_id}' name='{elem_name}' - visible={dom_tree_node.is_visible}, bounds={dom_tree_node.snapshot_node.bounds if dom_tree_node.snapshot_node else 'NO_SNAPSHOT'}"
-					)
+		if tracker.can_refresh:
+			try:
+				return await self._refresh_dom_tree(target_id, cdp_session, tracker)
+			except Exception as e:
+				tracker.invalidate(f'refresh failed: {type(e).__name__}: {e}')
 
-			# handle cross origin iframe (just recursively call the main function with the proper target if it exists in iframes)
-			# only do this if the iframe is visible (otherwise it's not worth it)
+		tracker.begin_rebuild()
+		try:
+			enhanced_dom_tree = await self._build_dom_tree(target_id)
+		except BaseException:
+			tracker.abort_rebuild()
+			raise
+		tracker.reset(enhanced_dom_tree)
+		return enhanced_dom_tree
+
+	async def _refresh_dom_tree(
+		self, target_id: TargetID, cdp_session: 'CDPSession', tracker: DOMMutationTracker
+	) -> EnhancedDOMTreeNode:
+		"""Update the tracked tree with fresh layout for the whole document and fresh AX data for changed nodes.
 
-			if (
-				# TODO: hacky way to disable cross origin iframes for now
-				ENABLE_CROSS_ORIGIN_IFRAMES and node['nodeName'].upper() == 'IFRAME' and node.get('contentDocument', None) is None
-			):  # None meaning there is no content
-				# Use get_all_frames to find the iframe's target
-				frame_id = node.get('frameId', None)
-				if frame_id:
-					all_frames, _ = await self.browser_session.get_all_frames()
-					frame_info = all_frames.get(frame_id)
-					iframe_document_target = None
-					if frame_info and frame_info.get('frameTargetId'):
-						# Get the target info for this iframe
-						targets = await self.browser_session.cdp_client.send.Target.getTargets()
-						iframe_document_target = next(
-							(t for t in targets['targetInfos'] if t['targetId'] == frame_info['frameTargetId']), None
-						)
-				else:
-					iframe_document_target = None
-				# if target actually exists in one of the frames, just recursively build the dom tree for it
-				if iframe_document_target:
-					self.logger.debug(f'Getting content document for iframe {node.get("frameId", None)}')
-					content_document = await self.get_dom_tree(
-						target_id=iframe_document_target.get('targetId'),
-						# TODO: experiment with this values -> not sure whether the whole cross origin iframe should be ALWAYS included as soon as some part of it is visible or not.
-						# Current config: if the cross origin iframe is AT ALL visible, then just include everything inside of it!
-						# initial_html_frames=updated_html_frames,
-						initial_total_frame_offset=total_frame_offset,
+		CDP snapshots can't be scoped to a subtree and any mutation (or scroll) can move every element,
+		so layout is always recaptured in a single `DOMSnapshot.captureSnapshot` call. What is skipped is
+		the full `DOM.getDocument` payload and the full AX trees.
+		"""
+		assert tracker.root is not None
+		start = time.time()
+		session_id = cdp_session.session_id
+
+		# inserted nodes are pushed without their children, requesting them makes Chrome send `DOM.setChildNodes`
+		if tracker.unexpanded_node_ids:
+			node_ids, tracker.unexpanded_node_ids = tracker.unexpanded_node_ids, set()
+			await asyncio.gather(
+				*(
+					cdp_session.cdp_client.send.DOM.requestChildNodes(
+						params={'nodeId': node_id, 'depth': -1, 'pierce': True}, session_id=session_id
 					)
+					for node_id in node_ids
+				),
+				return_exceptions=True,  # the node might have been removed in the meantime
+			)
+			if not tracker.can_refresh:
+				raise RuntimeError('DOM changed in an untrackable way while requesting child nodes')
+
+		ax_backend_node_ids = tracker.dirty_backend_node_ids | tracker.stateful_backend_node_ids()
+		tracker.dirty_backend_node_ids = set()
+		refetch_full_ax_tree = len(ax_backend_node_ids) > MAX_PARTIAL_AX_NODES
+
+		snapshot, device_pixel_ratio, ax_nodes = await asyncio.wait_for(
+			asyncio.gather(
+				self._capture_snapshot(cdp_session),
+				self._get_viewport_ratio(target_id),
+				self._get_ax_tree_for_all_frames(target_id)
+				if refetch_full_ax_tree
+				else self._get_partial_ax_nodes(cdp_session, ax_backend_node_ids),
+			),
+			timeout=10.0,
+		)
+		if isinstance(ax_nodes, dict):
+			ax_nodes = ax_nodes['nodes']
 
-					dom_tree_node.content_document = content_document
-					dom_tree_node.content_document.parent_node = dom_tree_node
-
-			return dom_tree_node
+		ax_tree_lookup: dict[int, AXNode] = {
+			ax_node['backendDOMNodeId']: ax_node for ax_node in ax_nodes if 'backendDOMNodeId' in ax_node
+		}
+		for node in tracker.node_lookup.values():
+			if refetch_full_ax_tree or node.backend_node_id in ax_backend_node_ids:
+				ax_node = ax_tree_lookup.get(node.backend_node_id)
+				node.ax_node = build_enhanced_ax_node(ax_node) if ax_node else None
+
+		self._apply_layout(
+			tracker.root,
+			build_snapshot_lookup(snapshot, device_pixel_ratio),
+			style_visible_ids=style_visible_backend_node_ids(snapshot),
+		)
 
-		enhanced_dom_tree_node = await _construct_enhanced_node(dom_tree['root'], initial_html_frames, initial_total_frame_offset)
+		self.logger.debug(
+			f'🔍 Refreshed tracked DOM tree in {time.time() - start:.3f}s: {tracker.mutation_count} mutations, '
+			f'{"full" if refetch_full_ax_tree else len(ax_backend_node_ids)} AX nodes refetched'
+		)
+		tracker.mutation_count = 0
+		return tracker.root
+
+	async def _get_partial_ax_nodes(self, cdp_session: 'CDPSession', backend_node_ids: set[int]) -> list[AXNode]:
+		results = await asyncio.gather(
+			*(
+				cdp_session.cdp_client.send.Accessibility.getPartialAXTree(
+					params={'backendNodeId': backend_node_id, 'fetchRelatives': False}, session_id=cdp_session.session_id
+				)
+				for backend_node_id in backend_node_ids
+			),
+			return_exceptions=True,
+		)
+		ax_nodes: list[AXNode] = []
+		for result in results:
+			if not isinstance(result, BaseException):
+				ax_nodes.extend(result['nodes'])
+		return ax_nodes
 
-		return enhanced_dom_tree_node
+	# endregion - incremental DOM tree
 
 	async def get_serialized_dom_tree(
 		self, previous_cached_state: SerializedDOMState | None = None
-	) -> tuple[SerializedDOMState, EnhancedDOMTreeNode, dict[str, float]]:
+	) -> tuple[SerializedDOMState, EnhancedDOMTreeNode | None, dict[str, float]]:
 		"""Get the serialized DOM tree representation for LLM consumption.
 
 		Returns:
-			Tuple of (serialized_dom_state, enhanced_dom_tree_root, timing_info)
+			Tuple of (serialized_dom_state, enhanced_dom_tree_root, timing_info). The root is None when the tree was built
+			in a worker (`offload`), only the serialized state comes back from there.
 		"""
 
 		# Use current target (None means use current)
 		assert self.browser_session.current_target_id is not None
+		if (
+			self.offload != 'off'
+			and self.extraction_backend == 'cdp'
+			and not self.incremental
+			and not ENABLE_CROSS_ORIGIN_IFRAMES
+		):
+			return await self._get_offloaded_serialized_dom_tree(self.browser_session.current_target_id, previous_cached_state)
+
 		enhanced_dom_tree = await self.get_dom_tree(target_id=self.browser_session.current_target_id)
 
 		start = time.time()
 		serialized_dom_state, serializer_timing = DOMTreeSerializer(
-			enhanced_dom_tree, previous_cached_state
+			enhanced_dom_tree, previous_cached_state, enable_occlusion_filtering=self.occlusion_filtering
 		).serialize_accessible_elements()
 
 		end = time.time()
@@ -693,3 +886,71 @@ class DomService:
 		all_timing = {**serializer_timing, **serialize_total_timing}
 
 		return serialized_dom_state, enhanced_dom_tree, all_timing
+
+	async def _get_offloaded_serialized_dom_tree(
+		self, target_id: TargetID, previous_cached_state: SerializedDOMState | None
+	) -> tuple[SerializedDOMState, None, dict[str, float]]:
+		"""Fetch the CDP payloads here, build and serialize the tree in the offload executor."""
+		mode = self.offload
+		assert mode != 'off'
+		trees = await self._get_all_trees(target_id)
+		previous_backend_node_ids = (
+			{node.backend_node_id for node in previous_cached_state.selector_map.values()} if previous_cached_state else None
+		)
+		session_id = self.browser_session.agent_focus.session_id if self.browser_session.agent_focus else None
+
+		start = time.time()
+		try:
+			offloaded = await asyncio.get_running_loop().run_in_executor(
+				get_dom_offload_executor(mode),
+				build_offloaded_dom_state,
+				trees,
+				target_id,
+				session_id,
+				previous_backend_node_ids,
+				self.occlusion_filtering,
+			)
+		except BrokenExecutor as e:
+			self.logger.warning(f'DOM offload {mode} executor is broken ({e}), building this DOM tree on the event loop')
+			discard_dom_offload_executor(mode)
+			offloaded = build_offloaded_dom_state(
+				trees, target_id, session_id, previous_backend_node_ids, self.occlusion_filtering
+			)
+
+		timing = {**trees.cdp_timing, **offloaded.timing, 'offloaded_dom_tree_total': time.time() - start}
+		return offloaded.to_serialized_state(), None, timing
+
+
+def style_visible_backend_node_ids(snapshot: CaptureSnapshotReturns) -> set[int] | None:
+	"""Backend node ids with bounds that CSS doesn't hide, computed vectorized; None if numpy is not installed."""
+	try:
+		return build_columnar_snapshot(snapshot).style_visible_backend_node_ids()
+	except ImportError:
+		return None
+
+
+def build_offloaded_dom_state(
+	trees: TargetAllTrees,
+	target_id: TargetID,
+	session_id: SessionID | None,
+	previous_backend_node_ids: set[int] | None,
+	occlusion_filtering: bool = False,
+) -> OffloadedDOMState:
+	"""Build the enhanced tree from CDP payloads and serialize it, runs in a DOM offload worker (no browser session)."""
+	start = time.time()
+	tree_builder = DomService(browser_session=None, logger=logger)  # type: ignore[arg-type]
+	root, _ = tree_builder.construct_enhanced_tree(trees, target_id, session_id=session_id)
+	built = time.time()
+	state, timing = DOMTreeSerializer(
+		root, previous_backend_node_ids=previous_backend_node_ids, enable_occlusion_filtering=occlusion_filtering
+	).serialize_accessible_elements()
+	serialized = time.time()
+	offloaded = OffloadedDOMState.from_serialized_state(state, timing)
+	offloaded.timing.update(
+		{
+			'construct_enhanced_tree': built - start,
+			'serialize_dom_tree_total': serialized - built,
+			'detach_serialized_state': time.time() - serialized,
+		}
+	)
+	return offloaded
@@ -0,0 +1,214 @@
+"""
+Spatial index over the laid out nodes of an enhanced DOM tree.
+
+Every document (the top level page and each iframe content document) gets its own uniform grid, because paint
+orders are only comparable within one document. Rects are the `absolute_position`s of the nodes, so all documents
+share the coordinate system of the top level viewport and can be queried with the same points and rects.
+"""
+
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from browser_use.dom.utils import gc_paused
+from browser_use.dom.views import DOMRect, EnhancedDOMTreeNode, NodeType
+
+T = TypeVar('T')
+
+DEFAULT_CELL_SIZE = 128.0
+MAX_CELLS_PER_ITEM = 64  # bigger items (page wrappers, backgrounds, ...) are kept in a flat list instead
+
+
+def containment_ratio(child: DOMRect, parent: DOMRect) -> float:
+	"""Fraction of the area of `child` that lies within `parent` (0.0 for zero-area children)."""
+	child_area = child.width * child.height
+	if child_area == 0:
+		return 0.0
+	x_overlap = max(0, min(child.x + child.width, parent.x + parent.width) - max(child.x, parent.x))
+	y_overlap = max(0, min(child.y + child.height, parent.y + parent.height) - max(child.y, parent.y))
+	return x_overlap * y_overlap / child_area
+
+
+def _intersects(a: DOMRect, b: DOMRect) -> bool:
+	return a.x < b.x + b.width and b.x < a.x + a.width and a.y < b.y + b.height and b.y < a.y + a.height
+
+
+def _covers(rect: DOMRect, x: float, y: float) -> bool:
+	return rect.x <= x < rect.x + rect.width and rect.y <= y < rect.y + rect.height
+
+
+class SpatialGrid(Generic[T]):
+	"""Uniform grid of items with a rect, queries only look at the cells that overlap the query area."""
+
+	def __init__(self, rect_of: Callable[[T], DOMRect], cell_size: float = DEFAULT_CELL_SIZE):
+		self.rect_of = rect_of
+		self.cell_size = cell_size
+		self._cells: dict[tuple[int, int], list[T]] = {}
+		self._large: list[T] = []
+		self._count = 0
+
+	def __len__(self) -> int:
+		return self._count
+
+	def _cell_range(self, rect: DOMRect) -> tuple[range, range]:
+		size = self.cell_size
+		return (
+			range(int(rect.x // size), int((rect.x + rect.width) // size) + 1),
+			range(int(rect.y // size), int((rect.y + rect.height) // size) + 1),
+		)
+
+	def insert(self, item: T) -> None:
+		self._count += 1
+		columns, rows = self._cell_range(self.rect_of(item))
+		if len(columns) * len(rows) > MAX_CELLS_PER_ITEM:
+			self._large.append(item)
+			return
+		cells = self._cells
+		for column in columns:
+			for row in rows:
+				cell = cells.get((column, row))
+				if cell is None:
+					cells[(column, row)] = [item]
+				else:
+					cell.append(item)
+
+	def _candidates(self, rect: DOMRect) -> list[T]:
+		"""Items that may intersect `rect`, each one once."""
+		columns, rows = self._cell_range(rect)
+		if len(columns) == 1 and len(rows) == 1:
+			return self._large + self._cells.get((columns[0], rows[0]), [])
+		candidates = {id(item): item for column in columns for row in rows for item in self._cells.get((column, row), ())}
+		return self._large + list(candidates.values())
+
+	def query_rect(self, rect: DOMRect) -> list[T]:
+		"""Items whose rect intersects `rect`."""
+		rect_of = self.rect_of
+		return [item for item in self._candidates(rect) if _intersects(rect_of(item), rect)]
+
+	def query_point(self, x: float, y: float) -> list[T]:
+		"""Items whose rect covers the point."""
+		rect_of = self.rect_of
+		return [item for item in self._candidates(DOMRect(x=x, y=y, width=0.0, height=0.0)) if _covers(rect_of(item), x, y)]
+
+	def query_contained(self, rect: DOMRect, threshold: float = 1.0) -> list[T]:
+		"""Items with at least `threshold` of their area inside `rect`."""
+		rect_of = self.rect_of
+		return [item for item in self._candidates(rect) if containment_ratio(rect_of(item), rect) >= threshold]
+
+
+class DOMSpatialIndex:
+	"""Per-document spatial index of the nodes of an enhanced DOM tree that have a position and a non-zero size."""
+
+	def __init__(self, root: EnhancedDOMTreeNode, cell_size: float = DEFAULT_CELL_SIZE):
+		self.root = root
+		self._grids: dict[int, SpatialGrid[EnhancedDOMTreeNode]] = {}
+		"""id() of the document node -> grid of the nodes of that document"""
+		self._order: dict[int, int] = {}
+		"""id() of an indexed node -> insertion order, breaks paint order ties (later nodes are painted on top)"""
+
+		# the grid cells are tens of thousands of small lists, the cyclic GC would rescan them while they are filled
+		with gc_paused():
+			self._index(root, cell_size)
+
+	def _index(self, root: EnhancedDOMTreeNode, cell_size: float) -> None:
+		documents = [(_document_of(root), root)]
+		while documents:
+			document, start = documents.pop()
+			grid = self._grids.setdefault(id(document), SpatialGrid(_absolute_position, cell_size))
+			stack = [start]
+			while stack:
+				node = stack.pop()
+				rect = node.absolute_position
+				if rect is not None and rect.width > 0 and rect.height > 0:
+					grid.insert(node)
+					self._order[id(node)] = len(self._order)
+				if node.content_document is not None:
+					# iframe content is painted in its own document with its own paint orders
+					documents.append((node.content_document, node.content_document))
+				if node.children_nodes:
+					stack.extend(reversed(node.children_nodes))
+				if node.shadow_roots:
+					stack.extend(reversed(node.shadow_roots))
+
+	def __len__(self) -> int:
+		return sum(len(grid) for grid in self._grids.values())
+
+	def _grid_of(self, node: EnhancedDOMTreeNode) -> SpatialGrid[EnhancedDOMTreeNode] | None:
+		return self._grids.get(id(_document_of(node)))
+
+	def in_viewport(self, viewport: DOMRect) -> list[EnhancedDOMTreeNode]:
+		"""Nodes of all documents that intersect the viewport."""
+		return [node for grid in self._grids.values() for node in grid.query_rect(viewport)]
+
+	def contained_in(self, node: EnhancedDOMTreeNode, threshold: float = 1.0) -> list[EnhancedDOMTreeNode]:
+		"""Nodes of the same document with at least `threshold` of their area inside the box of `node` (node included)."""
+		grid = self._grid_of(node)
+		if grid is None or node.absolute_position is None:
+			return []
+		return grid.query_contained(node.absolute_position, threshold)
+
+	def at_point(self, x: float, y: float, document_of: EnhancedDOMTreeNode | None = None) -> list[EnhancedDOMTreeNode]:
+		"""Nodes covering the point, topmost (highest paint order) first.
+
+		Only the document of `document_of` is searched, all documents if it is None.
+		"""
+		if document_of is not None:
+			grid = self._grid_of(document_of)
+			grids = [grid] if grid is not None else []
+		else:
+			grids = list(self._grids.values())
+		nodes = [node for grid in grids for node in grid.query_point(x, y)]
+		nodes.sort(key=lambda node: (_paint_order(node), self._order[id(node)]), reverse=True)
+		return nodes
+
+	def is_topmost_at_point(self, node: EnhancedDOMTreeNode, x: float, y: float) -> bool:
+		"""Whether a click at the point would hit `node` (or one of its descendants), checking the iframes it is in too."""
+		target = node
+		while True:
+			covering = self.at_point(x, y, document_of=target)
+			if covering and not _is_inclusive_ancestor(target, covering[0]):
+				return False
+			host = _document_of(target).parent_node
+			if host is None:
+				return True
+			target = host  # the iframe element has to be on top in its own document as well
+
+	def find_click_point(self, node: EnhancedDOMTreeNode) -> tuple[float, float] | None:
+		"""A point inside `node` where it is not covered by other elements, the center if possible.
+
+		Returns None if the node has no position or is covered at every sampled point.
+		"""
+		rect = node.absolute_position
+		if rect is None or rect.width <= 0 or rect.height <= 0:
+			return None
+		for fx, fy in ((0.5, 0.5), (0.25, 0.25), (0.75, 0.25), (0.25, 0.75), (0.75, 0.75), (0.5, 0.1), (0.5, 0.9)):
+			x, y = rect.x + rect.width * fx, rect.y + rect.height * fy
+			if self.is_topmost_at_point(node, x, y):
+				return x, y
+		return None
+
+
+def _absolute_position(node: EnhancedDOMTreeNode) -> DOMRect:
+	return node.absolute_position  # type: ignore[return-value]  # only nodes with a position are indexed
+
+
+def _paint_order(node: EnhancedDOMTreeNode) -> int:
+	if node.snapshot_node is None or node.snapshot_node.paint_order is None:
+		return -1
+	return node.snapshot_node.paint_order
+
+
+def _document_of(node: EnhancedDOMTreeNode) -> EnhancedDOMTreeNode:
+	"""The document node containing `node` (shadow roots belong to the document of their host)."""
+	current = node
+	while current.parent_node is not None and current.node_type != NodeType.DOCUMENT_NODE:
+		current = current.parent_node
+	return current
+
+
+def _is_inclusive_ancestor(ancestor: EnhancedDOMTreeNode, node: EnhancedDOMTreeNode) -> bool:
+	current: EnhancedDOMTreeNode | None = node
+	while current is not None:
+		if current is ancestor:
+			return True
+		current = current.parent_node
+	return False
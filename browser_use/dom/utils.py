@@ -1,3 +1,36 @@
+import gc
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+_gc_pause_lock = threading.Lock()
+_gc_pause_depth = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+	"""Pause the cyclic garbage collector while large, cyclic object graphs (DOM trees, grids) are built.
+
+	The collector would rescan the half built graph over and over. The GC switch is process wide, so pauses are counted:
+	nested and concurrent pauses (DOM builds in offload threads) share one, and the collector is only turned back on
+	(if it was on before) when the last one ends.
+	"""
+	global _gc_pause_depth, _gc_was_enabled
+	with _gc_pause_lock:
+		if _gc_pause_depth == 0:
+			_gc_was_enabled = gc.isenabled()
+			gc.disable()
+		_gc_pause_depth += 1
+	try:
+		yield
+	finally:
+		with _gc_pause_lock:
+			_gc_pause_depth -= 1
+			if _gc_pause_depth == 0 and _gc_was_enabled:
+				gc.enable()
+
+
 def cap_text_length(text: str, max_length: int) -> str:
 	"""Cap text length for display."""
 	if len(text) <= max_length:
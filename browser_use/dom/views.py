@@ -1,4 +1,5 @@
 import hashlib
+from collections.abc import Mapping
 from dataclasses import asdict, dataclass, field
 from enum import Enum
 from typing import Any
@@ -178,13 +179,18 @@ class EnhancedSnapshotNode:
 	Scrollable area of the element.
 	"""
 
-	computed_styles: dict[str, str] | None
-	"""Computed styles from the layout tree"""
+	computed_styles: Mapping[str, str] | None
+	"""Computed styles from the layout tree (read only, a `ComputedStyles` shared between nodes when built from a snapshot)"""
 	paint_order: int | None
 	"""Paint order from the layout tree"""
 	stacking_contexts: int | None
 	"""Stacking contexts from the layout tree"""
 
+	def __json__(self) -> dict:
+		json = asdict(self)
+		json['computed_styles'] = dict(self.computed_styles) if self.computed_styles else None
+		return json
+
 
 # @dataclass(slots=True)
 # class SuperSelector:
@@ -276,7 +282,23 @@ class EnhancedDOMTreeNode:
 	# Interactive element index
 	element_index: int | None = None
 
-	uuid: str = field(default_factory=uuid7str)
+	_uuid: str | None = field(default=None, repr=False, compare=False)
+
+	# memoized hashing state, see `_get_branch_hasher`
+	_branch_hasher: Any = field(default=None, repr=False, compare=False)
+	_branch_hash: int | None = field(default=None, repr=False, compare=False)
+	_element_hash: int | None = field(default=None, repr=False, compare=False)
+
+	# cached `xpath` and `get_all_children_text()`, see `precompute_xpaths_and_texts`
+	_xpath: str | None = field(default=None, repr=False, compare=False)
+	_children_text: str | None = field(default=None, repr=False, compare=False)
+
+	@property
+	def uuid(self) -> str:
+		"""Unique id of the node, generated on first use (most nodes never need one)."""
+		if self._uuid is None:
+			self._uuid = uuid7str()
+		return self._uuid
 
 	@property
 	def parent(self) -> 'EnhancedDOMTreeNode | None':
@@ -293,7 +315,8 @@ class EnhancedDOMTreeNode:
 		"""
 		children = self.children_nodes or []
 		if self.shadow_roots:
-			children.extend(self.shadow_roots)
+			# a new list, extending `children_nodes` in place would add the shadow roots again on every call
+			return children + self.shadow_roots
 		return children
 
 	@property
@@ -303,6 +326,8 @@ class EnhancedDOMTreeNode:
 	@property
 	def xpath(self) -> str:
 		"""Generate XPath for this DOM node, stopping at shadow boundaries or iframes."""
+		if self._xpath is not None:
+			return self._xpath
 		segments = []
 		current_element = self
 
@@ -365,13 +390,15 @@ class EnhancedDOMTreeNode:
 			'content_document': self.content_document.__json__() if self.content_document else None,
 			'shadow_root_type': self.shadow_root_type,
 			'ax_node': asdict(self.ax_node) if self.ax_node else None,
-			'snapshot_node': asdict(self.snapshot_node) if self.snapshot_node else None,
+			'snapshot_node': self.snapshot_node.__json__() if self.snapshot_node else None,
 			# these two in the end, so it's easier to read json
 			'shadow_roots': [r.__json__() for r in self.shadow_roots] if self.shadow_roots else [],
 			'children_nodes': [c.__json__() for c in self.children_nodes] if self.children_nodes else [],
 		}
 
 	def get_all_children_text(self, max_depth: int = -1) -> str:
+		if max_depth == -1 and self._children_text is not None:
+			return self._children_text
 		text_parts = []
 
 		def collect_text(node: EnhancedDOMTreeNode, current_depth: int) -> None:
@@ -626,32 +653,66 @@ class EnhancedDOMTreeNode:
 		"""
 		Hash the element based on its parent branch path and attributes.
 
+		Equal to the first 16 hex chars of sha256('{tag path joined by /}|{key=value...}'), cached on the node.
+
 		TODO: migrate this to use only backendNodeId + current SessionId
 		"""
+		if self._element_hash is None:
+			hasher = self._get_branch_hasher().copy()
+			attributes_string = ''.join(f'{key}={value}' for key, value in self.attributes.items())
+			hasher.update(f'|{attributes_string}'.encode())
+			# Convert to int for __hash__ return type - use first 16 chars and convert from hex to int
+			self._element_hash = int(hasher.hexdigest()[:16], 16)
+		return self._element_hash
 
-		# Get parent branch path
-		parent_branch_path = self._get_parent_branch_path()
-		parent_branch_path_string = '/'.join(parent_branch_path)
-
-		# Get attributes hash
-		attributes_string = ''.join(f'{key}={value}' for key, value in self.attributes.items())
+	def parent_branch_hash(self) -> int:
+		"""
+		Hash the element based on its parent branch path (sha256 of the tag path joined by /), cached on the node.
+		"""
+		if self._branch_hash is None:
+			self._branch_hash = int(self._get_branch_hasher().hexdigest()[:16], 16)
+		return self._branch_hash
 
-		# Combine both for final hash
-		combined_string = f'{parent_branch_path_string}|{attributes_string}'
-		element_hash = hashlib.sha256(combined_string.encode()).hexdigest()
+	def reset_element_hash(self) -> None:
+		"""Forget the cached element hash, call after changing `attributes` in place."""
+		self._element_hash = None
 
-		# Convert to int for __hash__ return type - use first 16 chars and convert from hex to int
-		return int(element_hash[:16], 16)
+	def reset_cached_children_details(self) -> None:
+		"""Forget the cached xpaths below this node and the cached texts of it and its ancestors.
 
-	def parent_branch_hash(self) -> int:
+		Call after changing `children_nodes` or the text of a child in place.
 		"""
-		Hash the element based on its parent branch path and attributes.
+		stack = list(self.children_and_shadow_roots)
+		while stack:
+			node = stack.pop()
+			node._xpath = None
+			stack.extend(node.children_and_shadow_roots)
+		current: EnhancedDOMTreeNode | None = self
+		while current is not None:
+			current._children_text = None
+			current = current.parent_node
+
+	def _get_branch_hasher(self) -> Any:
+		"""sha256 state of the parent branch path of this node, memoized top-down.
+
+		A node's state is its parent's state plus its own tag, so every node of the tree is hashed at most once.
+		The states must never be updated in place, only `.copy()`-ed.
 		"""
-		parent_branch_path = self._get_parent_branch_path()
-		parent_branch_path_string = '/'.join(parent_branch_path)
-		element_hash = hashlib.sha256(parent_branch_path_string.encode()).hexdigest()
-
-		return int(element_hash[:16], 16)
+		# walk up to the closest node whose state is already known, then fill in the states on the way back down
+		pending: list[EnhancedDOMTreeNode] = []
+		current: EnhancedDOMTreeNode | None = self
+		while current is not None and current._branch_hasher is None:
+			pending.append(current)
+			current = current.parent_node
+
+		hasher = current._branch_hasher if current is not None else _EMPTY_BRANCH_HASHER
+		for node in reversed(pending):
+			if node.node_type == NodeType.ELEMENT_NODE:
+				separator = '' if hasher is _EMPTY_BRANCH_HASHER else '/'
+				hasher = hasher.copy()
+				hasher.update(f'{separator}{node.tag_name}'.encode())
+			node._branch_hasher = hasher
+		return self._branch_hasher
 
 	def _get_parent_branch_path(self) -> list[str]:
 		"""Get the parent branch path as a list of tag names from root to current element."""
@@ -667,9 +728,50 @@ class EnhancedDOMTreeNode:
 		return [parent.tag_name for parent in parents]
 
 
+# shared state of the empty branch path (nodes above the first element), only ever copied
+_EMPTY_BRANCH_HASHER = hashlib.sha256()
+
 DOMSelectorMap = dict[int, EnhancedDOMTreeNode]
 
 
+@dataclass(slots=True)
+class SerializedDOMLine:
+	"""One line of the LLM representation, as emitted by the fused serializer (text nodes and shown elements)."""
+
+	depth: int
+	node: EnhancedDOMTreeNode
+	interactive_index: int | None = None
+	is_new: bool = False
+
+
+@dataclass(frozen=True)
+class DOMStateDiff:
+	"""Interactive elements added, removed and retained since the previous serialized state (by backend node id)."""
+
+	added: frozenset[int]
+	removed: frozenset[int]
+	retained: frozenset[int]
+
+	@classmethod
+	def from_backend_node_ids(cls, previous: set[int], current: set[int]) -> 'DOMStateDiff':
+		return cls(
+			added=frozenset(current - previous),
+			removed=frozenset(previous - current),
+			retained=frozenset(current & previous),
+		)
+
+	@classmethod
+	def from_selector_maps(cls, previous: DOMSelectorMap, current: DOMSelectorMap) -> 'DOMStateDiff':
+		return cls.from_backend_node_ids(
+			{node.backend_node_id for node in previous.values()},
+			{node.backend_node_id for node in current.values()},
+		)
+
+	@property
+	def has_changes(self) -> bool:
+		return bool(self.added or self.removed)
+
+
 @dataclass
 class SerializedDOMState:
 	_root: SimplifiedNode | None
@@ -677,6 +779,12 @@ class SerializedDOMState:
 
 	selector_map: DOMSelectorMap
 
+	diff: DOMStateDiff | None = None
+	"""Changes compared to the state passed as `previous_cached_state` to the serializer, None if there was none"""
+
+	_lines: list[SerializedDOMLine] | None = None
+	"""Set instead of `_root` by the fused serializer, not meant to be used directly either"""
+
 	def llm_representation(
 		self,
 		include_attributes: list[str] | None = None,
@@ -684,13 +792,43 @@ class SerializedDOMState:
 		"""Kinda ugly, but leaving this as an internal method because include_attributes are a parameter on the agent, so we need to leave it as a 2 step process"""
 		from browser_use.dom.serializer.serializer import DOMTreeSerializer
 
-		if not self._root:
+		if not self._root and self._lines is None:
 			return 'Empty DOM tree (you might have to wait for the page to load)'
 
 		include_attributes = include_attributes or DEFAULT_INCLUDE_ATTRIBUTES
 
+		if self._lines is not None:
+			return DOMTreeSerializer.serialize_lines(self._lines, include_attributes)
 		return DOMTreeSerializer.serialize_tree(self._root, include_attributes)
 
+	def budgeted_llm_representation(
+		self,
+		max_length: int,
+		include_attributes: list[str] | None = None,
+		viewport: DOMRect | None = None,
+	) -> tuple[str, str | None]:
+		"""`llm_representation` in at most `max_length` characters, keeping the content closest to the viewport.
+
+		Returns the text and a description of what was left out (None if nothing was), e.g.
+		'57 lines: 0.0 pages above, 2.5 pages below'. `viewport` defaults to the client rect of the top level document.
+		"""
+		from browser_use.dom.serializer.budget import BudgetedDOMSerializer
+
+		if self._lines is None:
+			# legacy tree: serialize everything and cut it off
+			text = self.llm_representation(include_attributes)
+			if len(text) <= max_length:
+				return text, None
+			return text[:max_length], f'{len(text) - max_length} characters'
+
+		serializer = BudgetedDOMSerializer(self._lines, include_attributes or DEFAULT_INCLUDE_ATTRIBUTES, max_length, viewport)
+		text = serializer.serialize()
+		omitted_lines = len(self._lines) - len(serializer.rendered)
+		if not omitted_lines:
+			return text, None
+		scroll_info_text = serializer.omitted_scroll_info_text()
+		return text, f'{omitted_lines} lines: {scroll_info_text}' if scroll_info_text else f'{omitted_lines} lines'
+
 
 @dataclass
 class DOMInteractedElement:
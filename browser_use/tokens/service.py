@@ -23,6 +23,7 @@ from browser_use.tokens.views import (
 	ModelPricing,
 	ModelUsageStats,
 	ModelUsageTokens,
+	PromptDeltaEntry,
 	TokenCostCalculated,
 	TokenUsageEntry,
 	UsageSummary,
@@ -35,6 +36,14 @@ from browser_use.config import CONFIG
 logger = logging.getLogger(__name__)
 cost_logger = logging.getLogger('cost')
 
+# rough average for English text and HTML-ish markup, only used for estimates
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+	"""Estimated token count of `text`, without a tokenizer"""
+	return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
 
 def xdg_cache_home() -> Path:
 	default = Path.home() / '.cache'
@@ -54,6 +63,7 @@ class TokenCost:
 		self.include_cost = include_cost or os.getenv('BROWSER_USE_CALCULATE_COST', 'false').lower() == 'true'
 
 		self.usage_history: list[TokenUsageEntry] = []
+		self.prompt_deltas: list[PromptDeltaEntry] = []
 		self.registered_llms: dict[str, BaseChatModel] = {}
 		self._pricing_data: dict[str, Any] | None = None
 		self._initialized = False
@@ -222,6 +232,23 @@ class TokenCost:
 
 		return entry
 
+	def add_prompt_delta(
+		self, source: str, prefix_tokens: int, delta_tokens: int, sent_prefix: bool, step_number: int | None = None
+	) -> PromptDeltaEntry:
+		"""Record the estimated size of a prompt part sent as a delta on top of a cached prefix (e.g. source='dom_delta')"""
+		entry = PromptDeltaEntry(
+			source=source,
+			timestamp=datetime.now(),
+			step_number=step_number,
+			prefix_tokens=prefix_tokens,
+			delta_tokens=delta_tokens,
+			sent_prefix=sent_prefix,
+		)
+		self.prompt_deltas.append(entry)
+		if not sent_prefix:
+			logger.debug(f'✂️ {source}: sent ~{delta_tokens} tokens on top of a ~{prefix_tokens} token prefix')
+		return entry
+
 	# async def _log_non_usage_llm(self, llm: BaseChatModel) -> None:
 	# 	"""Log non-usage to the logger"""
 	# 	C_CYAN = '\033[96m'
@@ -526,6 +553,17 @@ class TokenCost:
 				f'📞 {stats.invocations} calls | 📈 {avg_tokens_fmt}/call'
 			)
 
+		delta_entries = [entry for entry in self.prompt_deltas if not entry.sent_prefix]
+		if delta_entries:
+			# estimates only, the real effect is the cached prompt tokens reported by the provider
+			delta_tokens = sum(entry.delta_tokens for entry in delta_entries)
+			prefix_tokens = sum(entry.prefix_tokens for entry in delta_entries)
+			cost_logger.info(
+				f'✂️ {C_BOLD}Prompt deltas{C_RESET} (estimate): ~{C_YELLOW}{self._format_tokens(delta_tokens)}{C_RESET} delta tokens '
+				f'on top of ~{self._format_tokens(prefix_tokens)} cacheable prefix tokens in {len(delta_entries)} steps | '
+				f'cached prompt tokens reported: {self._format_tokens(summary.total_prompt_cached_tokens)}'
+			)
+
 	async def get_cost_by_model(self) -> dict[str, ModelUsageStats]:
 		"""Get cost breakdown by model"""
 		summary = await self.get_usage_summary()
@@ -534,6 +572,7 @@ class TokenCost:
 	def clear_history(self) -> None:
 		"""Clear usage history"""
 		self.usage_history = []
+		self.prompt_deltas = []
 
 	async def refresh_pricing_data(self) -> None:
 		"""Force refresh of pricing data from GitHub"""
@@ -16,6 +16,25 @@ class TokenUsageEntry(BaseModel):
 	usage: ChatInvokeUsage
 
 
+class PromptDeltaEntry(BaseModel):
+	"""Estimated size of a prompt part sent as a delta on top of a cached prompt prefix, e.g. DOM delta prompts
+
+	Estimated from the text length. These are not saved tokens: the prefix stays part of every call, so without prompt
+	caching the prompt grows by the delta. What caching actually saved is in the provider's usage counts
+	(`prompt_cached_tokens`).
+	"""
+
+	source: str
+	timestamp: datetime
+	step_number: int | None = None
+	prefix_tokens: int
+	"""Estimated tokens of the prefix the delta is diffed against (e.g. the page snapshot)"""
+	delta_tokens: int
+	"""Estimated tokens of the delta sent on top of the prefix, 0 if the prefix was (re)sent in this step"""
+	sent_prefix: bool
+	"""Whether the prefix was (re)sent in this step, i.e. it can't be a prompt cache hit yet"""
+
+
 class TokenCostCalculated(BaseModel):
 	"""Token cost"""
 
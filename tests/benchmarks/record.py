@@ -0,0 +1,94 @@
+"""
+Record the CDP traffic of a page for the replay benchmarks in test_replay_benchmarks.py (needs a local Chrome).
+
+Run with: python -m tests.benchmarks.record <url> <name>
+
+Writes two recordings to tests/benchmarks/recordings/:
+- <name>.dom.cdp.jsonl.gz: starting a session, navigating to the page and building its DOM state once
+- <name>.agent.cdp.jsonl.gz: the scripted agent run of `agent_actions(url)` (navigate, scroll, done)
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from browser_use import Agent
+from browser_use.browser import BrowserProfile, BrowserSession
+from browser_use.browser.cdp_recording import CDPRecording, record_cdp_traffic
+from browser_use.browser.events import NavigateToUrlEvent
+from tests.ci.conftest import create_mock_llm
+
+RECORDINGS_DIR = Path(__file__).parent / 'recordings'
+AGENT_TASK = 'Open the page and scroll down once'
+
+
+def benchmark_profile() -> BrowserProfile:
+	"""No fixed waits, they would only measure `asyncio.sleep` under replay. Kept alive, the scripts stop the session."""
+	return BrowserProfile(
+		headless=True,
+		keep_alive=True,
+		user_data_dir=None,
+		minimum_wait_page_load_time=0,
+		wait_for_network_idle_page_load_time=0,
+		wait_between_actions=0,
+	)
+
+
+def agent_actions(url: str) -> list[str]:
+	"""The LLM outputs of the scripted agent run, the done action follows once they are used up."""
+	return [
+		json.dumps(
+			{
+				'thinking': 'null',
+				'evaluation_previous_goal': 'Starting',
+				'memory': '',
+				'next_goal': goal,
+				'action': [action],
+			}
+		)
+		for goal, action in [
+			('Open the page', {'go_to_url': {'url': url, 'new_tab': False}}),
+			('Scroll down', {'scroll': {'down': True, 'num_pages': 1.0}}),
+		]
+	]
+
+
+async def record_dom(url: str, path: Path) -> None:
+	browser_session = BrowserSession(browser_profile=benchmark_profile())
+	recording = record_cdp_traffic(browser_session)
+	await browser_session.start()
+	try:
+		await browser_session.event_bus.dispatch(NavigateToUrlEvent(url=url))
+		await asyncio.sleep(2)
+		await browser_session.get_browser_state_summary(include_screenshot=False)
+	finally:
+		await browser_session.kill()
+	save(recording, path)
+
+
+async def record_agent(url: str, path: Path) -> None:
+	browser_session = BrowserSession(browser_profile=benchmark_profile())
+	recording = record_cdp_traffic(browser_session)
+	agent = Agent(task=AGENT_TASK, llm=create_mock_llm(agent_actions(url)), browser_session=browser_session)
+	try:
+		await agent.run(max_steps=len(agent_actions(url)) + 1)
+	finally:
+		await browser_session.kill()
+	save(recording, path)
+
+
+def save(recording: CDPRecording, path: Path) -> None:
+	path.parent.mkdir(parents=True, exist_ok=True)
+	recording.save(path)
+	print(f'{path}: {len(recording.calls)} calls, {len(recording.events)} events, {path.stat().st_size / 2**20:.1f} MiB')
+
+
+async def main():
+	url, name = sys.argv[1], sys.argv[2]
+	await record_dom(url, RECORDINGS_DIR / f'{name}.dom.cdp.jsonl.gz')
+	await record_agent(url, RECORDINGS_DIR / f'{name}.agent.cdp.jsonl.gz')
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Benchmarks of DOM builds, serialization and whole agent steps, replayed from CDP recordings (no browser, no network).
+
+Run with: uv run pytest tests/benchmarks -p no:xdist
+Record the pages first with: python -m tests.benchmarks.record <url> <name>
+
+Replays answer every CDP command instantly and deterministically, so what is measured is our own code: parsing the
+responses, building the trees, serializing them and the agent loop around them. Compare runs with
+`--benchmark-autosave` and `--benchmark-compare`.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from browser_use import Agent
+from browser_use.browser.cdp_recording import CDPRecording, replay_browser_session
+from browser_use.browser.events import NavigateToUrlEvent
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_clickable import legacy_is_interactive
+from browser_use.dom.serializer.clickable_elements import ClickableElementDetector
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.service import DomService
+from tests.benchmarks.record import AGENT_TASK, RECORDINGS_DIR, agent_actions, benchmark_profile
+from tests.ci.conftest import create_mock_llm
+
+DOM_RECORDINGS = sorted(RECORDINGS_DIR.glob('*.dom.cdp.jsonl.gz'))
+AGENT_RECORDINGS = sorted(RECORDINGS_DIR.glob('*.agent.cdp.jsonl.gz'))
+
+
+def recorded_url(recording: CDPRecording) -> str:
+	"""URL the recorded session navigated to (the first `Page.navigate` that was not to about:blank)."""
+	for call in recording.calls:
+		if call.method == 'Page.navigate':
+			url = json.loads(call.params_json)['url']
+			if url != 'about:blank':
+				return url
+	raise ValueError('The recording never navigates to a page')
+
+
+@pytest.fixture
+def loop():
+	loop = asyncio.new_event_loop()
+	yield loop
+	loop.close()
+
+
+@pytest.fixture(params=DOM_RECORDINGS or [None], ids=lambda path: path.name.split('.')[0] if path else 'none')
+def dom_session(request, loop):
+	"""A started replay session on the recorded page, and its DOM service."""
+	if request.param is None:
+		pytest.skip(f'No DOM recordings in {RECORDINGS_DIR}, record one with: python -m tests.benchmarks.record <url> <name>')
+	recording = CDPRecording.load(request.param)
+	browser_session = replay_browser_session(recording, browser_profile=benchmark_profile())
+	loop.run_until_complete(browser_session.start())
+	loop.run_until_complete(browser_session.event_bus.dispatch(NavigateToUrlEvent(url=recorded_url(recording))))
+	yield browser_session, DomService(browser_session)
+	loop.run_until_complete(browser_session.kill())
+
+
+def test_dom_build(benchmark, loop, dom_session):
+	"""`DomService.get_dom_tree`: CDP responses to the enhanced DOM tree."""
+	browser_session, dom_service = dom_session
+
+	root = benchmark(lambda: loop.run_until_complete(dom_service.get_dom_tree(browser_session.current_target_id)))
+
+	assert root.children_nodes
+
+
+def test_dom_serialization(benchmark, loop, dom_session):
+	"""`DOMTreeSerializer.serialize_accessible_elements` of the recorded page."""
+	browser_session, dom_service = dom_session
+	root = loop.run_until_complete(dom_service.get_dom_tree(browser_session.current_target_id))
+
+	state, _ = benchmark(lambda: DOMTreeSerializer(root).serialize_accessible_elements())
+
+	assert state.selector_map
+
+
+def test_interactivity_classification(benchmark, loop, dom_session):
+	"""`ClickableElementDetector.is_interactive` on every node of the recorded page, same results as the previous checks."""
+	browser_session, dom_service = dom_session
+	nodes = list(iter_subtree(loop.run_until_complete(dom_service.get_dom_tree(browser_session.current_target_id))))
+
+	results = benchmark(lambda: [ClickableElementDetector.is_interactive(node) for node in nodes])
+
+	assert results == [legacy_is_interactive(node) for node in nodes]
+
+
+@pytest.mark.parametrize('path', AGENT_RECORDINGS or [None], ids=lambda path: path.name.split('.')[0] if path else 'none')
+def test_agent_run(benchmark, loop, path):
+	"""A whole scripted agent run (navigate, scroll, done), a fresh replay session per round."""
+	if path is None:
+		pytest.skip(f'No agent recordings in {RECORDINGS_DIR}, record one with: python -m tests.benchmarks.record <url> <name>')
+	recording = CDPRecording.load(path)
+	url = recorded_url(recording)
+	sessions = []
+
+	def setup():
+		browser_session = replay_browser_session(recording, browser_profile=benchmark_profile())
+		sessions.append(browser_session)
+		agent = Agent(task=AGENT_TASK, llm=create_mock_llm(agent_actions(url)), browser_session=browser_session)
+		return (agent,), {}
+
+	def run(agent: Agent):
+		return loop.run_until_complete(agent.run(max_steps=len(agent_actions(url)) + 1))
+
+	try:
+		history = benchmark.pedantic(run, setup=setup, rounds=5)
+	finally:
+		for browser_session in sessions:
+			loop.run_until_complete(browser_session.kill())
+
+	assert history.is_done()
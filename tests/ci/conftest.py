@@ -4,9 +4,12 @@ Pytest configuration for browser-use CI tests.
 Sets up environment variables to ensure tests never connect to production services.
 """
 
+import asyncio
+import json
 import os
 import socketserver
 import tempfile
+from collections.abc import Awaitable, Callable
 from unittest.mock import AsyncMock
 
 import pytest
@@ -238,3 +241,103 @@ def event_collector():
 			self.event_order.clear()
 
 	return EventCollector()
+
+
+def cdp_target_info(target_id: str, url: str, title: str = '', type: str = 'page', opener_id: str | None = None) -> dict:
+	info = {'targetId': target_id, 'type': type, 'title': title, 'url': url, 'attached': True, 'canAccessOpener': False}
+	if opener_id:
+		info['openerId'] = opener_id
+	return info
+
+
+class FakeCDPSocket:
+	"""One WebSocket connection to a fake browser, see the `fake_cdp` fixture.
+
+	Acts like a browser for the `Target` domain: the pages in `targets` are reported when discovery is turned on and can be
+	attached to (flat sessions), inspected, closed and detached from. `Runtime.evaluate` returns 2, everything else an empty
+	result, unless `responses` has a responder for the method. Every command is recorded, events are pushed with `emit`.
+	"""
+
+	def __init__(self, targets: list[dict], responses: dict[str, 'CDPResponder']):
+		self.targets: dict[str, dict] = {info['targetId']: dict(info) for info in targets}
+		self.responses = responses
+		self.commands: list[tuple[str, dict]] = []
+		self.crashed = False
+		"""Answer every command with a 'Target crashed' error."""
+		self.closed = False
+		self.incoming: asyncio.Queue[str] = asyncio.Queue()
+
+	def open_page(self, target_id: str, url: str) -> dict:
+		info = self.targets[target_id] = cdp_target_info(target_id, url)
+		return info
+
+	def sent(self, method: str) -> list[dict]:
+		return [params for sent_method, params in self.commands if sent_method == method]
+
+	async def emit(self, method: str, params: dict, session_id: str | None = None) -> None:
+		event = {'method': method, 'params': params}
+		if session_id is not None:
+			event['sessionId'] = session_id
+		await self.incoming.put(json.dumps(event))
+
+	async def send(self, message: str) -> None:
+		command = json.loads(message)
+		method, params = command['method'], command.get('params', {})
+		self.commands.append((method, params))
+		if self.crashed:
+			response = {'error': {'code': -32000, 'message': 'Target crashed'}}
+		elif method in self.responses:
+			response = await self.responses[method](self, command)
+		else:
+			response = {'result': await self._browser_result(method, params)}
+		await self.incoming.put(json.dumps({'id': command['id'], **response}))
+
+	async def _browser_result(self, method: str, params: dict) -> dict:
+		if method == 'Target.setDiscoverTargets':
+			for info in self.targets.values():
+				await self.emit('Target.targetCreated', {'targetInfo': info})
+		elif method == 'Target.attachToTarget':
+			return {'sessionId': f'SESSION-{params["targetId"]}'}
+		elif method == 'Target.getTargetInfo':
+			return {'targetInfo': self.targets[params['targetId']]}
+		elif method == 'Target.closeTarget':
+			del self.targets[params['targetId']]
+			await self.emit('Target.targetDestroyed', {'targetId': params['targetId']})
+		elif method == 'Target.detachFromTarget':
+			await self.emit('Target.detachedFromTarget', {'sessionId': params['sessionId']})
+		elif method == 'Runtime.evaluate':
+			return {'result': {'type': 'number', 'value': 2}}
+		return {}
+
+	async def recv(self) -> str:
+		return await self.incoming.get()
+
+	async def close(self) -> None:
+		self.closed = True
+
+
+CDPResponder = Callable[[FakeCDPSocket, dict], Awaitable[dict]]
+"""Gets the socket and the command, returns the response (`{'result': ...}` or `{'error': ...}`)."""
+
+
+class FakeCDPBrowser:
+	"""Opens a new FakeCDPSocket for every CDP connection, each with its own copy of `targets` and the shared `responses`."""
+
+	target_info = staticmethod(cdp_target_info)
+
+	def __init__(self):
+		self.targets: list[dict] = []
+		self.responses: dict[str, CDPResponder] = {}
+		self.sockets: list[FakeCDPSocket] = []
+
+	async def connect(self, url: str, **kwargs) -> FakeCDPSocket:
+		self.sockets.append(FakeCDPSocket(self.targets, self.responses))
+		return self.sockets[-1]
+
+
+@pytest.fixture(scope='function')
+def fake_cdp(monkeypatch) -> FakeCDPBrowser:
+	"""CDP clients connect to fake browsers instead of real websockets (no browser needed)."""
+	browser = FakeCDPBrowser()
+	monkeypatch.setattr('cdp_use.client.websockets.connect', browser.connect)
+	return browser
@@ -0,0 +1,120 @@
+"""Tests for leasing pre-launched browsers from a BrowserPool: health checks, reset between leases and recycling (no browser needed)."""
+
+import asyncio
+
+import pytest
+
+from browser_use.browser.pool import BrowserPool
+from browser_use.browser.profile import BrowserProfile
+from browser_use.browser.session import BrowserSession
+from tests.ci.conftest import FakeCDPBrowser, FakeCDPSocket
+
+
+async def frame_tree(socket: FakeCDPSocket, command: dict) -> dict:
+	# every tab embeds a same-process ad frame, which is no target of its own
+	url = socket.targets[command['sessionId'].removeprefix('SESSION-')]['url']
+	ad_frame = {'frame': {'id': 'AD', 'url': 'https://ads.example.net/slot'}}
+	return {'result': {'frameTree': {'frame': {'id': 'MAIN', 'url': url}, 'childFrames': [ad_frame]}}}
+
+
+@pytest.fixture
+def fake_browsers(fake_cdp: FakeCDPBrowser, monkeypatch):
+	"""Starting a session connects to a new fake browser instead of launching one."""
+	fake_cdp.targets = [fake_cdp.target_info('TARGET-0', 'about:blank')]
+	fake_cdp.responses['Page.getFrameTree'] = frame_tree
+	browsers = fake_cdp.sockets
+	killed: list[FakeCDPSocket] = []
+	sockets: dict[str, FakeCDPSocket] = {}
+
+	async def start(self):
+		await self.connect(f'ws://fake-{len(browsers)}')
+		sockets[self.id] = self.cdp_client.ws
+		await self.event_bus.wait_until_idle()  # the initial focus event
+
+	async def kill(self):
+		killed.append(sockets[self.id])
+		await self.cdp_client.stop()
+		await self.event_bus.stop(clear=True, timeout=5)
+		await self.reset()
+
+	monkeypatch.setattr(BrowserSession, 'start', start)
+	monkeypatch.setattr(BrowserSession, 'kill', kill)
+	return browsers, killed, sockets
+
+
+async def test_leased_browsers_are_reset_and_recycled_after_max_uses(fake_browsers):
+	browsers, killed, sockets = fake_browsers
+	pool = BrowserPool(size=2, browser_profile=BrowserProfile(cdp_flat_sessions=True), max_uses=2)
+	async with pool:
+		assert len(browsers) == 2 and pool.idle == 2
+
+		async with pool.lease() as browser_session:
+			socket = sockets[browser_session.id]
+			assert browser_session.browser_profile.keep_alive
+			assert browser_session.browser_profile.user_data_dir != pool.browser_profile.user_data_dir
+			# the agent browses in two tabs
+			await socket.emit('Target.targetInfoChanged', {'targetInfo': socket.open_page('TARGET-0', 'https://example.com/a')})
+			await socket.emit('Target.targetCreated', {'targetInfo': socket.open_page('TARGET-1', 'https://example.org/b')})
+			await browser_session.cdp_client.send.Runtime.enable()  # answered after the events, so they have been handled
+		assert pool.idle == 2
+
+		# one blank tab left, cookies, cache and the storage of the visited origins cleared
+		assert list(socket.targets) == ['TARGET-0'] and socket.sent('Target.closeTarget') == [{'targetId': 'TARGET-1'}]
+		assert socket.sent('Page.navigate')[-1] == {'url': 'about:blank'}
+		assert len(socket.sent('Storage.clearCookies')) == len(socket.sent('Network.clearBrowserCache')) == 1
+		assert sorted(params['origin'] for params in socket.sent('Storage.clearDataForOrigin')) == [
+			'https://ads.example.net',
+			'https://example.com',
+			'https://example.org',
+		]
+
+		# the second lease of a browser is its last one, then it's replaced
+		leases = [await pool.acquire(), await pool.acquire()]
+		for browser_session in leases:
+			await pool.release(browser_session)
+		leased_again = await pool.acquire()
+		await pool.release(leased_again)
+		await asyncio.gather(*pool._tasks)
+		assert pool.stats.recycled == len(killed) == 2
+		assert len(browsers) == 4 and pool.idle == 2
+
+	assert len(killed) == len(browsers)
+
+
+async def test_unhealthy_browsers_are_replaced_before_they_are_leased(fake_browsers):
+	browsers, killed, sockets = fake_browsers
+	pool = BrowserPool(size=1, browser_profile=BrowserProfile(cdp_flat_sessions=True), health_check_timeout=1)
+	async with pool:
+		browsers[0].crashed = True
+		async with pool.lease(timeout=5) as browser_session:
+			assert sockets[browser_session.id] is browsers[1]
+		assert killed == [browsers[0]] and pool.stats.unhealthy == 1 and pool.stats.launched == 2
+
+
+async def test_browsers_are_not_lost_when_acquire_times_out_or_they_are_released_twice(fake_browsers, fake_cdp):
+	browsers, killed, _ = fake_browsers
+	pool = BrowserPool(size=1, browser_profile=BrowserProfile(cdp_flat_sessions=True), health_check_timeout=10)
+	async with pool:
+		page_answers = asyncio.Event()
+
+		async def hanging_evaluate(socket: FakeCDPSocket, command: dict) -> dict:
+			await page_answers.wait()
+			return {'result': {'result': {'type': 'number', 'value': 1}}}
+
+		fake_cdp.responses['Runtime.evaluate'] = hanging_evaluate
+		with pytest.raises(TimeoutError):
+			await pool.acquire(timeout=0.2)  # gives up during the health check
+		assert pool.idle == 1 and pool.stats.unhealthy == 0
+		page_answers.set()
+		del fake_cdp.responses['Runtime.evaluate']
+
+		browser_session = await pool.acquire(timeout=5)
+		await pool.release(browser_session)
+		await pool.release(browser_session)
+		assert pool.idle == 1 and not killed and len(browsers) == 1
+
+
+def test_browsers_of_a_pool_need_their_own_user_data_dir(tmp_path):
+	with pytest.raises(ValueError, match='user_data_dir'):
+		BrowserPool(size=2, browser_profile=BrowserProfile(user_data_dir=tmp_path))
+	assert BrowserPool(size=1, browser_profile=BrowserProfile(user_data_dir=tmp_path))
@@ -0,0 +1,92 @@
+"""Tests for the CDP client decoding messages with a pluggable decoder, recording per method stats and routing session events."""
+
+import json
+import threading
+
+import pytest
+from cdp_use import CDPClient
+
+from browser_use.browser.cdp_client import CDPMessageStats, DecodingCDPClient, SessionEventRouter
+from tests.ci.conftest import FakeCDPBrowser, FakeCDPSocket
+
+
+@pytest.fixture
+def fake_browser(fake_cdp: FakeCDPBrowser):
+	"""Answers `DOMSnapshot.captureSnapshot` with a large result, `DOM.getDocument` with an error and `Page.navigate` with an
+	event followed by an empty result."""
+
+	async def capture_snapshot(socket: FakeCDPSocket, command: dict) -> dict:
+		return {'result': {'documents': [], 'strings': ['x' * 100] * 1000}}
+
+	async def get_document(socket: FakeCDPSocket, command: dict) -> dict:
+		return {'error': {'code': -32000, 'message': 'No document'}}
+
+	async def navigate(socket: FakeCDPSocket, command: dict) -> dict:
+		await socket.emit('Page.frameStartedLoading', {'frameId': 'frame'})
+		return {'result': {}}
+
+	fake_cdp.responses.update(
+		{'DOMSnapshot.captureSnapshot': capture_snapshot, 'DOM.getDocument': get_document, 'Page.navigate': navigate}
+	)
+
+
+async def test_large_messages_are_decoded_in_a_thread_and_counted_per_method(fake_browser):
+	decode_threads: list[str] = []
+
+	def decoder(raw):
+		decode_threads.append(threading.current_thread().name)
+		return json.loads(raw)
+
+	stats = CDPMessageStats()
+	client = DecodingCDPClient('ws://fake', decoder=decoder, decode_in_thread_threshold=10_000, stats=stats)
+	events: list[str] = []
+	client.register.Page.frameStartedLoading(lambda params, session_id=None: events.append(params['frameId']))
+	await client.start()
+	try:
+		snapshot = await client.send.DOMSnapshot.captureSnapshot(params={'computedStyles': []})
+		await client.send.Page.navigate(params={'url': 'https://example.com'})
+		with pytest.raises(RuntimeError):
+			await client.send.DOM.getDocument()
+	finally:
+		await client.stop()
+
+	assert len(snapshot['strings']) == 1000
+	assert events == ['frame']
+	assert decode_threads[0] != threading.current_thread().name
+	assert set(decode_threads[1:]) == {threading.current_thread().name}
+
+	capture = stats.methods['DOMSnapshot.captureSnapshot']
+	assert capture.count == capture.decoded_in_thread == 1
+	assert capture.total_bytes == capture.max_bytes > 100_000
+	assert stats.methods['Page.navigate'].decoded_in_thread == 0
+	assert stats.methods['Page.frameStartedLoading'].count == 1
+	assert stats.methods['DOM.getDocument'].count == 1
+	assert stats.commands_sent == 3 and stats.methods['Page.navigate'].sent == 1
+	assert stats.methods['Page.frameStartedLoading'].sent == 0
+	assert 'DOMSnapshot.captureSnapshot: 1x' in stats.summary().splitlines()[1]
+
+
+async def test_commands_that_are_not_sent_are_not_attributed():
+	client = DecodingCDPClient('ws://fake')
+	with pytest.raises(RuntimeError, match='not started'):
+		await client.send.Page.navigate(params={'url': 'https://example.com'})
+	assert client._request_methods == {}
+
+
+async def test_session_events_are_routed_to_the_state_of_their_session(fake_cdp: FakeCDPBrowser):
+	sessions: dict[str, list[str]] = {'SESSION-A': []}
+	router = SessionEventRouter(sessions, {'Page.frameStartedLoading': lambda frames, params: frames.append(params['frameId'])})
+	client = CDPClient('ws://fake')
+	await client.start()
+	try:
+		router.attach(client)
+		router.attach(client)
+		sessions['SESSION-B'] = []
+		socket = fake_cdp.sockets[0]
+		for frame_id, session_id in (('a', 'SESSION-A'), ('b', 'SESSION-B'), ('c', 'SESSION-C'), ('d', None)):
+			await socket.emit('Page.frameStartedLoading', {'frameId': frame_id}, session_id)
+		await client.send.Runtime.enable()  # answered after the events, so they have been handled
+	finally:
+		await client.stop()
+
+	assert sessions == {'SESSION-A': ['a'], 'SESSION-B': ['b']}
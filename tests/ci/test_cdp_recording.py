@@ -0,0 +1,87 @@
+"""Tests for recording CDP traffic and replaying it without a browser (the browser is a fake websocket)."""
+
+import asyncio
+import json
+
+import pytest
+
+from browser_use.browser.cdp_recording import CDPRecording, CDPReplay, RecordingCDPClient, replay_browser_session
+from tests.ci.conftest import FakeCDPBrowser, FakeCDPSocket
+
+
+@pytest.fixture
+def fake_browser(fake_cdp: FakeCDPBrowser):
+	"""Answers `Runtime.evaluate` with its params, `Page.navigate` with an event before and one after the answer and
+	`DOM.getDocument` with an error."""
+
+	async def navigate(socket: FakeCDPSocket, command: dict) -> dict:
+		session_id = command.get('sessionId')
+		await socket.emit('Page.frameStartedLoading', {'frameId': 'frame'}, session_id)
+		event = {'method': 'Page.loadEventFired', 'params': {'timestamp': 1.0}, 'sessionId': session_id}
+		asyncio.get_running_loop().call_later(0.01, socket.incoming.put_nowait, json.dumps(event))
+		return {'result': {'frameId': 'frame', 'loaderId': 'loader'}}
+
+	async def get_document(socket: FakeCDPSocket, command: dict) -> dict:
+		return {'error': {'code': -32000, 'message': 'No document'}}
+
+	async def echo(socket: FakeCDPSocket, command: dict) -> dict:
+		return {'result': {'echo': command['params']}}
+
+	fake_cdp.responses.update({'Page.navigate': navigate, 'DOM.getDocument': get_document, 'Runtime.evaluate': echo})
+
+
+def listen(client, events: list[str]) -> None:
+	client.register.Page.frameStartedLoading(lambda params, session_id=None: events.append('frameStartedLoading'))
+	client.register.Page.loadEventFired(lambda params, session_id=None: events.append('loadEventFired'))
+
+
+async def test_recorded_traffic_is_replayed_in_order(fake_browser, tmp_path):
+	recording = CDPRecording()
+	client = RecordingCDPClient('ws://fake', recording)
+	recorded_events: list[str] = []
+	listen(client, recorded_events)
+	await client.start()
+	try:
+		navigation = await client.send.Page.navigate(params={'url': 'https://example.com'}, session_id='page')
+		await asyncio.sleep(0.05)  # the page loads while the client is idle
+		await client.send.Runtime.evaluate(params={'expression': '1 + 1'}, session_id='page')
+		with pytest.raises(RuntimeError):
+			await client.send.DOM.getDocument(session_id='page')
+		navigation['frameId'] = 'mutated by the caller'
+	finally:
+		await client.stop()
+	recording.save(tmp_path / 'session.cdp.jsonl.gz')
+
+	replay = CDPReplay.load(tmp_path / 'session.cdp.jsonl.gz')
+	client = replay.create_client()
+	replayed_events: list[str] = []
+	listen(client, replayed_events)
+	await client.start()
+
+	navigation = await client.send.Page.navigate(params={'url': 'https://example.com'}, session_id='page')
+	assert navigation == {'frameId': 'frame', 'loaderId': 'loader'}
+	assert replayed_events == ['frameStartedLoading']  # arrived before the answer
+	await asyncio.sleep(0)
+	assert replayed_events == recorded_events == ['frameStartedLoading', 'loadEventFired']
+
+	# different params fall back to the recorded call of the same method, repeated calls get the last answer again
+	assert await client.send.Runtime.evaluate(params={'expression': '2 + 2'}, session_id='page') == {
+		'echo': {'expression': '1 + 1'}
+	}
+	assert await client.send.Runtime.evaluate(params={'expression': '1 + 1'}, session_id='page') == {
+		'echo': {'expression': '1 + 1'}
+	}
+	with pytest.raises(RuntimeError) as error:
+		await client.send.DOM.getDocument(session_id='page')
+	assert error.value.args[0]['message'] == 'No document'
+	with pytest.raises(RuntimeError):
+		await client.send.Network.enable(session_id='page')  # never recorded
+	await client.stop()
+
+
+def test_replay_browser_session_creates_replay_clients():
+	browser_session = replay_browser_session(CDPRecording())
+
+	client = browser_session._cdp_client_factory(browser_session.cdp_url)  # type: ignore[arg-type]
+
+	assert isinstance(client.replay, CDPReplay) and not browser_session.is_local  # type: ignore[attr-defined]
@@ -0,0 +1,129 @@
+"""Tests for pooling CDP sessions: flat sessions over the root socket, LRU eviction, release of closed tabs and focus activation (no browser needed)."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from browser_use.browser.events import TabClosedEvent
+from browser_use.browser.popups_watchdog import PopupsWatchdog
+from browser_use.browser.profile import BrowserProfile
+from browser_use.browser.session import BrowserSession
+from tests.ci.conftest import FakeCDPBrowser
+
+TARGET_IDS = ['TARGET-A', 'TARGET-B', 'TARGET-C', 'TARGET-D']
+
+
+@pytest.fixture
+def fake_browser(fake_cdp: FakeCDPBrowser):
+	fake_cdp.targets = [
+		fake_cdp.target_info(target_id, f'https://example.com/{target_id}', target_id) for target_id in TARGET_IDS
+	]
+	return fake_cdp
+
+
+async def test_flat_sessions_share_the_root_socket_and_the_pool_evicts_least_recently_used(fake_browser):
+	session = BrowserSession(browser_profile=BrowserProfile(cdp_flat_sessions=True, cdp_session_pool_size=2))
+	await session.connect('ws://fake')
+	await session.event_bus.wait_until_idle()  # the initial focus event
+	try:
+		assert session.agent_focus is not None and session.agent_focus.target_id == 'TARGET-A'
+
+		await session.get_or_create_cdp_session('TARGET-B', focus=False)
+		await session.get_or_create_cdp_session('TARGET-C', focus=False, new_socket=True)
+		assert list(session._cdp_session_pool) == ['TARGET-A', 'TARGET-C']  # the agent focus is never evicted
+
+		await session.get_or_create_cdp_session('TARGET-A', focus=False)
+		await session.get_or_create_cdp_session('TARGET-D', focus=False)
+		assert list(session._cdp_session_pool) == ['TARGET-A', 'TARGET-D']
+		assert len(fake_browser.sockets) == 1 and session._cdp_session_pool.open_sockets == 0
+		assert len(fake_browser.sockets[0].sent('Target.detachFromTarget')) == 2
+
+		# the browser detaches a session (e.g. the target crashed)
+		await fake_browser.sockets[0].emit('Target.detachedFromTarget', {'sessionId': 'SESSION-TARGET-D'})
+		await session.cdp_client.send.Runtime.enable()  # answered after the event, so it has been handled
+		assert list(session._cdp_session_pool) == ['TARGET-A']
+
+		stats = session.cdp_session_pool_stats
+		assert (stats.created, stats.reused, stats.evicted, stats.detached) == (
+			4,
+			2,
+			2,
+			1,
+		)  # reused by the focus event and for TARGET-A
+		assert session._cdp_session_pool.summary().startswith('1 CDP sessions (0 with their own socket), 4 created, 2 reused')
+	finally:
+		await session.cdp_client.stop()
+		await session.event_bus.stop(clear=True, timeout=5)
+
+
+async def test_closing_a_tab_closes_the_socket_of_its_session(fake_browser):
+	session = BrowserSession(browser_profile=BrowserProfile(cdp_session_pool_size=8))
+	await session.connect('ws://fake')
+	await session.event_bus.wait_until_idle()  # the initial focus event
+	try:
+		await session.get_or_create_cdp_session('TARGET-B', focus=False)
+		await session.get_or_create_cdp_session('TARGET-C', focus=False)
+		assert len(fake_browser.sockets) == 3 and session._cdp_session_pool.open_sockets == 2
+
+		await session.on_TabClosedEvent(TabClosedEvent(target_id='TARGET-B'))
+		assert 'TARGET-B' not in session._cdp_session_pool and session.cdp_session_pool_stats.closed == 1
+		assert [socket.closed for socket in fake_browser.sockets] == [False, True, False]
+		assert session._cdp_session_pool.open_sockets == 1
+	finally:
+		for pooled_session in session._cdp_session_pool.values():
+			await pooled_session.disconnect()
+		await session.cdp_client.stop()
+		await session.event_bus.stop(clear=True, timeout=5)
+
+
+async def test_focus_is_activated_only_when_it_moves(fake_browser):
+	session = BrowserSession(browser_profile=BrowserProfile(cdp_flat_sessions=True))
+	await session.connect('ws://fake')
+	await session.event_bus.wait_until_idle()  # the initial focus event
+	try:
+		stats = session.cdp_message_stats
+		activations = stats.methods['Target.activateTarget'].sent
+
+		calls_before = stats.commands_sent
+		for _ in range(3):
+			await session.get_or_create_cdp_session(focus=True)
+		assert stats.commands_sent == calls_before  # the focus didn't move, no round-trips
+
+		await session.get_or_create_cdp_session('TARGET-B', focus=True)
+		await session.get_or_create_cdp_session('TARGET-B', focus=True)
+		await session.get_or_create_cdp_session('TARGET-A', focus=True)
+		assert stats.methods['Target.activateTarget'].sent == activations + 2
+		assert stats.methods['Runtime.runIfWaitingForDebugger'].sent == stats.methods['Target.activateTarget'].sent
+
+		# a new tab may have been brought to the front by the browser
+		new_tab = fake_browser.sockets[0].open_page('TARGET-E', 'https://example.com/TARGET-E')
+		await fake_browser.sockets[0].emit('Target.targetCreated', {'targetInfo': new_tab})
+		await session.cdp_client.send.Runtime.enable()  # answered after the event, so it has been handled
+		await session.get_or_create_cdp_session(focus=True)
+		assert stats.methods['Target.activateTarget'].sent == activations + 3
+	finally:
+		await session.cdp_client.stop()
+		await session.event_bus.stop(clear=True, timeout=5)
+
+
+async def test_released_sessions_are_forgotten_by_the_watchdogs(fake_browser):
+	session = BrowserSession(browser_profile=BrowserProfile(cdp_session_pool_size=2))
+	await session.connect('ws://fake')
+	await session.event_bus.wait_until_idle()  # the initial focus event
+	forgotten_sessions: list[str] = []
+	session._dom_watchdog = SimpleNamespace(forget_cdp_session=forgotten_sessions.append)
+	session._popups_watchdog = PopupsWatchdog(event_bus=session.event_bus, browser_session=session)
+	session._popups_watchdog._dialog_listeners_registered.update(TARGET_IDS)
+	try:
+		await session.get_or_create_cdp_session('TARGET-B', focus=False)
+		await session.get_or_create_cdp_session('TARGET-C', focus=False)  # evicts TARGET-B
+		await session.on_TabClosedEvent(TabClosedEvent(target_id='TARGET-C'))
+
+		assert forgotten_sessions == ['SESSION-TARGET-B', 'SESSION-TARGET-C']
+		assert session._popups_watchdog._dialog_listeners_registered == {'TARGET-A', 'TARGET-D'}
+	finally:
+		session._dom_watchdog = None
+		for pooled_session in session._cdp_session_pool.values():
+			await pooled_session.disconnect()
+		await session.cdp_client.stop()
+		await session.event_bus.stop(clear=True, timeout=5)
@@ -0,0 +1,19 @@
+"""Parity of the compiled interactivity classifier with the previous chain of checks (no browser needed)."""
+
+import pytest
+
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_clickable import decorate_for_classification, legacy_is_interactive
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, make_payload
+from browser_use.dom.serializer.clickable_elements import ClickableElementDetector
+from tests.ci.test_dom_enhanced_tree import make_dom_service
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_compiled_classifier_matches_the_previous_checks(seed):
+	root, _ = make_dom_service().construct_enhanced_tree(make_payload(3_000, seed=seed), TARGET_ID)
+	if seed:
+		decorate_for_classification(root, seed=seed)
+	nodes = list(iter_subtree(root))
+
+	assert [ClickableElementDetector.is_interactive(node) for node in nodes] == [legacy_is_interactive(node) for node in nodes]
@@ -0,0 +1,78 @@
+"""Tests for fetching cross origin iframes concurrently during one DOM build (no browser needed)."""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, make_payload
+from browser_use.dom.service import DomService
+from browser_use.dom.views import TargetAllTrees
+
+
+def with_iframes(trees: TargetAllTrees, frame_ids: list[str]) -> TargetAllTrees:
+	"""Append cross origin iframes (no content document) for `frame_ids` to the body of a `make_payload` document."""
+	body = trees.dom_tree['root']['children'][0]['children'][0]  # type: ignore[index]
+	for i, frame_id in enumerate(frame_ids):
+		body.setdefault('children', []).append(
+			{
+				'nodeId': 80000 + i,
+				'backendNodeId': 80000 + i,
+				'nodeType': 1,
+				'nodeName': 'IFRAME',
+				'localName': 'iframe',
+				'nodeValue': '',
+				'frameId': frame_id,
+			}
+		)
+	return trees
+
+
+async def test_iframes_are_resolved_once_and_fetched_concurrently_within_budget(monkeypatch):
+	monkeypatch.setattr('browser_use.dom.service.ENABLE_CROSS_ORIGIN_IFRAMES', True)
+	monkeypatch.setattr('browser_use.dom.service.MAX_CONCURRENT_IFRAME_FETCHES', 3)
+	monkeypatch.setattr('browser_use.dom.service.IFRAME_FETCH_TIMEOUT', 0.2)
+
+	ad_frames = [f'AD-{i}' for i in range(8)]
+	payloads = {
+		TARGET_ID: with_iframes(make_payload(200, seed=41), [*ad_frames, 'SLOW', 'NOT-LOADED']),
+		# an iframe nested in a cross origin iframe
+		'TARGET-AD-0': with_iframes(make_payload(30, seed=42), ['NESTED']),
+		'TARGET-NESTED': make_payload(30, seed=43),
+		**{f'TARGET-{frame_id}': make_payload(30, seed=44) for frame_id in ad_frames[1:]},
+	}
+	frame_targets = {frame_id: f'TARGET-{frame_id}' for frame_id in [*ad_frames, 'NESTED', 'SLOW']}
+	frame_targets['NOT-LOADED'] = TARGET_ID
+
+	get_all_frames_calls = 0
+	running = max_running = 0
+
+	async def get_all_frames():
+		nonlocal get_all_frames_calls
+		get_all_frames_calls += 1
+		return {frame_id: {'frameTargetId': target_id} for frame_id, target_id in frame_targets.items()}, {}
+
+	async def get_all_trees(target_id):
+		nonlocal running, max_running
+		if target_id == TARGET_ID:
+			return payloads[target_id]
+		running += 1
+		max_running = max(max_running, running)
+		try:
+			await asyncio.sleep(10 if target_id == 'TARGET-SLOW' else 0.01)
+			return payloads[target_id]
+		finally:
+			running -= 1
+
+	browser_session = SimpleNamespace(logger=logging.getLogger('test'), agent_focus=None, get_all_frames=get_all_frames)
+	dom_service = DomService(browser_session=browser_session)  # type: ignore[arg-type]
+	dom_service._get_all_trees = get_all_trees  # type: ignore[method-assign]
+
+	root = await asyncio.wait_for(dom_service.get_dom_tree(TARGET_ID), timeout=5)
+
+	iframes = {node.frame_id: node for node in iter_subtree(root) if node.node_name == 'IFRAME'}
+	assert get_all_frames_calls == 1
+	assert 1 < max_running <= 3
+	assert all(iframes[frame_id].content_document is not None for frame_id in [*ad_frames, 'NESTED'])
+	assert iframes['NESTED'].target_id == 'TARGET-AD-0'
+	assert iframes['SLOW'].content_document is None and iframes['NOT-LOADED'].content_document is None
@@ -0,0 +1,108 @@
+"""Tests for DOM delta prompts: a page snapshot message plus only the changed lines in the state message (no browser needed)."""
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.views import AgentStepInfo, MessageManagerState
+from browser_use.browser.views import BrowserStateSummary
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, make_payload
+from browser_use.dom.serializer.delta import DOMLinesDelta, keyed_lines
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.views import SerializedDOMState
+from browser_use.filesystem.file_system import FileSystem
+from browser_use.llm import SystemMessage
+from browser_use.tokens.service import TokenCost
+from tests.ci.test_dom_enhanced_tree import make_dom_service
+
+
+def serialized_state(nodes: int, seed: int, new_placeholder: str | None = None) -> SerializedDOMState:
+	root, _ = make_dom_service().construct_enhanced_tree(make_payload(nodes, seed=seed), TARGET_ID)
+	state, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+	if new_placeholder is not None:
+		# change one element of a fresh tree and serialize again
+		root, _ = make_dom_service().construct_enhanced_tree(make_payload(nodes, seed=seed), TARGET_ID)
+		element = next(iter(state.selector_map.values()))
+		node = next(n for n in iter_subtree(root) if n.backend_node_id == element.backend_node_id)
+		node.attributes = {**node.attributes, 'placeholder': new_placeholder}
+		state, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+	return state
+
+
+def test_delta_lists_changed_lines_by_backend_node_id():
+	baseline = keyed_lines(serialized_state(300, seed=31))
+	current = keyed_lines(serialized_state(300, seed=31, new_placeholder='Search here'))
+	assert baseline is not None and current is not None
+
+	assert DOMLinesDelta.between(baseline, baseline).render() == 'No changes'
+	delta = DOMLinesDelta.between(baseline, current)
+	assert not delta.added and not delta.removed
+	assert len(delta.changed) == 1 and 'Search here' in delta.changed[0]
+
+	gone = next(iter(baseline))
+	delta = DOMLinesDelta.between(baseline, {key: text for key, text in baseline.items() if key != gone})
+	assert delta.render() == f'- {baseline[gone]}'
+
+
+def test_new_element_marker_does_not_count_as_a_change():
+	root, _ = make_dom_service().construct_enhanced_tree(make_payload(300, seed=31), TARGET_ID)
+	state, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+	backend_node_ids = {node.backend_node_id for node in state.selector_map.values()}
+	new_element = next(iter(state.selector_map.values()))
+
+	# the baseline step marks one element as new, the next step doesn't
+	baseline_state, _ = DOMTreeSerializer(
+		root, previous_backend_node_ids=backend_node_ids - {new_element.backend_node_id}
+	).serialize_accessible_elements()
+	current_state, _ = DOMTreeSerializer(root, previous_backend_node_ids=backend_node_ids).serialize_accessible_elements()
+	assert '*[' in baseline_state.llm_representation() and '*[' not in current_state.llm_representation()
+
+	baseline, current = keyed_lines(baseline_state), keyed_lines(current_state)
+	assert baseline is not None and current is not None
+	assert DOMLinesDelta.between(baseline, current).is_empty
+
+
+def test_message_manager_sends_snapshot_once_and_then_only_changes(tmp_path):
+	token_cost = TokenCost()
+	message_manager = MessageManager(
+		task='Test task',
+		system_message=SystemMessage(content='System message'),
+		state=MessageManagerState(),
+		file_system=FileSystem(tmp_path),
+		dom_delta_prompts=True,
+		token_cost_service=token_cost,
+	)
+
+	def step(step_number: int, state: SerializedDOMState, url: str = 'https://example.com') -> tuple[str, str]:
+		summary = BrowserStateSummary(dom_state=state, url=url, title='Example', tabs=[])
+		message_manager.create_state_messages(summary, step_info=AgentStepInfo(step_number=step_number, max_steps=10))
+		history = message_manager.state.history
+		assert history.page_snapshot_message is not None and history.state_message is not None
+		assert history.get_messages()[1] is history.page_snapshot_message
+		browser_state = history.state_message.text.split('<browser_state>')[1].split('</browser_state>')[0]
+		return history.page_snapshot_message.text, browser_state
+
+	state = serialized_state(300, seed=31)
+	snapshot, state_text = step(0, state)
+	assert state.llm_representation() in snapshot and 'at step 1' in snapshot
+	assert 'No changes' in state_text
+
+	# unchanged page: same snapshot, nothing in the state message
+	assert step(1, serialized_state(300, seed=31)) == (snapshot, state_text)
+
+	# one changed element: same snapshot, one line in the state message
+	same_snapshot, state_text = step(2, serialized_state(300, seed=31, new_placeholder='Search here'))
+	assert same_snapshot == snapshot
+	assert '~ ' in state_text and 'Search here' in state_text
+
+	# navigation: new snapshot
+	new_snapshot, state_text = step(3, serialized_state(300, seed=31), url='https://example.com/next')
+	assert new_snapshot != snapshot and 'at step 4' in new_snapshot and 'No changes' in state_text
+
+	# a different page under the same url changes too much for a delta: new snapshot
+	other_state = serialized_state(300, seed=32)
+	other_snapshot, _ = step(4, other_state, url='https://example.com/next')
+	assert other_state.llm_representation() in other_snapshot and 'at step 5' in other_snapshot
+
+	deltas = token_cost.prompt_deltas
+	assert [entry.step_number for entry in deltas] == [1, 2, 3, 4, 5]
+	assert [entry.sent_prefix for entry in deltas] == [True, False, False, True, True]
+	assert all(entry.delta_tokens < entry.prefix_tokens for entry in deltas)
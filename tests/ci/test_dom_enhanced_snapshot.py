@@ -0,0 +1,229 @@
+"""Tests for building the snapshot lookup from CDP DOMSnapshot data (no browser needed)."""
+
+import random
+
+import pytest
+
+from browser_use.dom.enhanced_snapshot import REQUIRED_COMPUTED_STYLES, _parse_computed_styles, build_snapshot_lookup
+from browser_use.dom.views import DOMRect, EnhancedSnapshotNode
+
+
+def make_snapshot(num_nodes: int, seed: int = 0, num_documents: int = 1) -> dict:
+	"""Build a synthetic `DOMSnapshot.captureSnapshot` payload with a realistic shape."""
+	rng = random.Random(seed)
+	strings = ['auto', 'pointer', 'block', 'none', 'visible', 'hidden', '1', '0', 'static']
+	documents = []
+	backend_node_id = 1
+	for _ in range(num_documents):
+		backend_node_ids = list(range(backend_node_id, backend_node_id + num_nodes))
+		backend_node_id += num_nodes
+		# roughly 70% of the nodes have a layout node, in shuffled order like Chrome emits them
+		laid_out = [i for i in range(num_nodes) if rng.random() < 0.7]
+		rng.shuffle(laid_out)
+		documents.append(
+			{
+				'nodes': {
+					'backendNodeId': backend_node_ids,
+					'isClickable': {'index': sorted(rng.sample(range(num_nodes), num_nodes // 10))},
+				},
+				'layout': {
+					'nodeIndex': laid_out,
+					'bounds': [
+						[rng.randint(0, 2000), rng.randint(0, 5000), rng.randint(0, 400), rng.randint(0, 80)] for _ in laid_out
+					],
+					'styles': [[rng.randrange(len(strings)) for _ in range(len(REQUIRED_COMPUTED_STYLES))] for _ in laid_out],
+					'paintOrders': [rng.randint(0, num_nodes) for _ in laid_out],
+					'clientRects': [
+						[0, 0, rng.randint(0, 400), rng.randint(0, 400)] if rng.random() < 0.2 else [] for _ in laid_out
+					],
+					'scrollRects': [
+						[0, 0, rng.randint(0, 400), rng.randint(0, 900)] if rng.random() < 0.2 else [] for _ in laid_out
+					],
+					'stackingContexts': {'index': sorted(rng.sample(range(len(laid_out)), len(laid_out) // 20))},
+				},
+			}
+		)
+	return {'documents': documents, 'strings': strings}
+
+
+def reference_snapshot_lookup(snapshot: dict, device_pixel_ratio: float = 1.0) -> dict[int, EnhancedSnapshotNode]:
+	"""The original quadratic implementation, kept here as the parity oracle."""
+	snapshot_lookup: dict[int, EnhancedSnapshotNode] = {}
+	strings = snapshot['strings']
+	for document in snapshot['documents']:
+		nodes = document['nodes']
+		layout = document['layout']
+		for snapshot_index, backend_node_id in enumerate(nodes['backendNodeId']):
+			is_clickable = snapshot_index in nodes['isClickable']['index'] if 'isClickable' in nodes else None
+			cursor_style = bounding_box = paint_order = client_rects = scroll_rects = stacking_contexts = None
+			computed_styles = {}
+			for layout_idx, node_index in enumerate(layout.get('nodeIndex', [])):
+				if node_index == snapshot_index and layout_idx < len(layout.get('bounds', [])):
+					x, y, w, h = layout['bounds'][layout_idx][:4]
+					bounding_box = DOMRect(
+						x=x / device_pixel_ratio,
+						y=y / device_pixel_ratio,
+						width=w / device_pixel_ratio,
+						height=h / device_pixel_ratio,
+					)
+					computed_styles = _parse_computed_styles(strings, layout['styles'][layout_idx])
+					cursor_style = computed_styles.get('cursor')
+					paint_order = layout['paintOrders'][layout_idx]
+					client_rect = layout['clientRects'][layout_idx]
+					if client_rect:
+						client_rects = DOMRect(*client_rect[:4])
+					scroll_rect = layout['scrollRects'][layout_idx]
+					if scroll_rect:
+						scroll_rects = DOMRect(*scroll_rect[:4])
+					if layout_idx < len(layout.get('stackingContexts', [])):
+						stacking_contexts = layout['stackingContexts']['index'][layout_idx]
+					break
+			snapshot_lookup[backend_node_id] = EnhancedSnapshotNode(
+				is_clickable=is_clickable,
+				cursor_style=cursor_style,
+				bounds=bounding_box,
+				clientRects=client_rects,
+				scrollRects=scroll_rects,
+				computed_styles=computed_styles or None,
+				paint_order=paint_order,
+				stacking_contexts=stacking_contexts,
+			)
+	return snapshot_lookup
+
+
+def test_snapshot_lookup_matches_reference_implementation():
+	snapshot = make_snapshot(500, seed=1, num_documents=2)
+
+	assert build_snapshot_lookup(snapshot, device_pixel_ratio=2.0) == reference_snapshot_lookup(snapshot, device_pixel_ratio=2.0)  # type: ignore[arg-type]
+
+
+def test_snapshot_lookup_uses_first_layout_node_and_handles_missing_layout():
+	snapshot = {
+		'strings': ['pointer'],
+		'documents': [
+			{
+				'nodes': {'backendNodeId': [10, 11, 12], 'isClickable': {'index': [2]}},
+				'layout': {
+					'nodeIndex': [1, 1],
+					'bounds': [[1, 2, 3, 4], [5, 6, 7, 8]],
+					'styles': [[], []],
+					'paintOrders': [7, 8],
+					'clientRects': [[], []],
+					'scrollRects': [[], []],
+				},
+			}
+		],
+	}
+
+	lookup = build_snapshot_lookup(snapshot)  # type: ignore[arg-type]
+
+	assert lookup[10].bounds is None and lookup[10].is_clickable is False
+	assert lookup[11].bounds == DOMRect(x=1, y=2, width=3, height=4)
+	assert lookup[11].paint_order == 7
+	assert lookup[12].is_clickable is True
+
+
+def test_snapshot_lookup_empty_documents():
+	assert build_snapshot_lookup({'documents': [], 'strings': []}) == {}
+
+
+def test_columnar_snapshot_matches_snapshot_lookup():
+	pytest.importorskip('numpy')
+	from browser_use.dom.columnar_snapshot import build_columnar_snapshot
+
+	snapshot = make_snapshot(500, seed=2, num_documents=2)
+	lookup = build_snapshot_lookup(snapshot, device_pixel_ratio=2.0)  # type: ignore[arg-type]
+	columnar = build_columnar_snapshot(snapshot, device_pixel_ratio=2.0)  # type: ignore[arg-type]
+
+	for backend_node_id, snapshot_node in lookup.items():
+		snapshot_node.stacking_contexts = None  # not kept in the columnar store
+		assert columnar.get_snapshot_node(backend_node_id) == snapshot_node
+	assert columnar.get_snapshot_node(-1) is None
+
+
+def test_columnar_snapshot_resolves_duplicate_backend_node_ids_like_snapshot_lookup():
+	pytest.importorskip('numpy')
+	from browser_use.dom.columnar_snapshot import build_columnar_snapshot
+
+	snapshot = make_snapshot(200, seed=4, num_documents=2)
+	# the same backend node ids twice in one document and again in the second document
+	first, second = snapshot['documents']
+	first['nodes']['backendNodeId'][5] = first['nodes']['backendNodeId'][3]
+	second['nodes']['backendNodeId'][:10] = first['nodes']['backendNodeId'][:10]
+
+	lookup = build_snapshot_lookup(snapshot)  # type: ignore[arg-type]
+	columnar = build_columnar_snapshot(snapshot)  # type: ignore[arg-type]
+	for backend_node_id, snapshot_node in lookup.items():
+		snapshot_node.stacking_contexts = None
+		assert columnar.get_snapshot_node(backend_node_id) == snapshot_node
+	assert columnar.style_visible_backend_node_ids() == {
+		backend_node_id
+		for backend_node_id, snapshot_node in lookup.items()
+		if snapshot_node.bounds is not None
+		and (snapshot_node.computed_styles or {}).get('display') != 'none'
+		and (snapshot_node.computed_styles or {}).get('visibility') != 'hidden'
+		and (snapshot_node.computed_styles or {}).get('opacity') != '0'
+	}
+
+
+def test_columnar_snapshot_vectorized_checks():
+	np = pytest.importorskip('numpy')
+	from browser_use.dom.columnar_snapshot import STYLE_COLUMNS, build_columnar_snapshot
+
+	strings = ['DIV', 'SPAN', 'auto', 'visible', 'none', 'block', '0', '1', 'hidden']
+	styles = [-1] * len(REQUIRED_COMPUTED_STYLES)
+	scroll_styles, hidden_styles, transparent_styles = list(styles), list(styles), list(styles)
+	scroll_styles[STYLE_COLUMNS['overflow-y']] = 2
+	hidden_styles[STYLE_COLUMNS['display']] = 4
+	transparent_styles[STYLE_COLUMNS['opacity']] = 6
+	snapshot = {
+		'strings': strings,
+		'documents': [
+			{
+				'nodes': {'backendNodeId': [1, 2, 3, 4, 5], 'nodeName': [0, 0, 1, 0, 1]},
+				'layout': {
+					'nodeIndex': [0, 1, 2, 3],
+					'bounds': [[0, 0, 100, 100], [0, 0, 100, 100], [150, 0, 10, 10], [0, 0, 100, 100]],
+					'styles': [scroll_styles, hidden_styles, transparent_styles, []],
+					'clientRects': [[0, 0, 100, 100], [0, 0, 100, 100], [], [0, 0, 100, 100]],
+					'scrollRects': [[0, 0, 100, 500], [0, 0, 100, 100], [], [0, 0, 100, 500]],
+				},
+			}
+		],
+	}
+
+	columnar = build_columnar_snapshot(snapshot)  # type: ignore[arg-type]
+	document = columnar.documents[0]
+
+	# row 0 scrolls via overflow-y, row 3 has no styles but is a div, row 4 has no layout at all
+	assert columnar.scrollable_mask(document).tolist() == [True, False, False, True, False]
+	assert columnar.style_visible_mask(document).tolist() == [True, False, False, True, False]
+	assert columnar.intersects_mask(document, DOMRect(x=120, y=0, width=100, height=100)).tolist() == [
+		False,
+		False,
+		True,
+		False,
+		False,
+	]
+	assert np.allclose(columnar.containment_ratios(document, DOMRect(x=0, y=0, width=50, height=100)), [0.5, 0.5, 0, 0.5, 0])
+
+
+def test_computed_styles_are_shared_read_only_mappings():
+	snapshot = make_snapshot(300, seed=3)
+	strings = snapshot['strings']
+	lookup = build_snapshot_lookup(snapshot)  # type: ignore[arg-type]
+	layout = snapshot['documents'][0]['layout']
+
+	by_row: dict[tuple[int, ...], list[EnhancedSnapshotNode]] = {}
+	for layout_idx, node_index in enumerate(layout['nodeIndex']):
+		snapshot_node = lookup[snapshot['documents'][0]['nodes']['backendNodeId'][node_index]]
+		expected = _parse_computed_styles(strings, layout['styles'][layout_idx])
+		assert snapshot_node.computed_styles == expected
+		assert dict(snapshot_node.computed_styles or {}) == expected
+		assert snapshot_node.computed_styles.get('no-such-style', 'default') == 'default'  # type: ignore[union-attr]
+		by_row.setdefault(tuple(layout['styles'][layout_idx]), []).append(snapshot_node)
+
+	# nodes with the same style row share one styles object, nodes without layout share one snapshot node
+	assert all(len({id(node.computed_styles) for node in nodes}) == 1 for nodes in by_row.values())
+	without_layout = [node for node in lookup.values() if node.bounds is None and not node.is_clickable]
+	assert len({id(node) for node in without_layout}) == 1
@@ -0,0 +1,329 @@
+"""Tests for building the enhanced DOM tree from fetched CDP payloads (no browser needed)."""
+
+import gc
+import hashlib
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from browser_use.dom.enhanced_snapshot import REQUIRED_COMPUTED_STYLES
+from browser_use.dom.enhanced_tree import iter_subtree, precompute_xpaths_and_texts
+from browser_use.dom.mutation_tracker import DOMMutationTracker
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, legacy_construct_enhanced_tree, make_payload
+from browser_use.dom.service import DomService
+from browser_use.dom.utils import gc_paused
+from browser_use.dom.views import EnhancedDOMTreeNode, NodeType, TargetAllTrees
+
+
+def make_dom_service() -> DomService:
+	browser_session = SimpleNamespace(logger=logging.getLogger('test'), agent_focus=None)
+	return DomService(browser_session=browser_session)  # type: ignore[arg-type]
+
+
+def add_iframe_and_shadow_root(trees: TargetAllTrees) -> None:
+	"""Attach a same origin iframe and a shadow root to the body of a `make_payload` document."""
+	body: Any = trees.dom_tree['root']['children'][0]['children'][0]  # type: ignore[index]
+	shadow_host = {'nodeId': 90001, 'backendNodeId': 90001, 'nodeType': 1, 'nodeName': 'DIV', 'localName': 'div', 'nodeValue': ''}
+	shadow_host['shadowRoots'] = [
+		{
+			'nodeId': 90002,
+			'backendNodeId': 90002,
+			'nodeType': 11,
+			'nodeName': '#document-fragment',
+			'localName': '',
+			'nodeValue': '',
+			'shadowRootType': 'open',
+			'children': [
+				{
+					'nodeId': 90003,
+					'parentId': 90002,
+					'backendNodeId': 90003,
+					'nodeType': 1,
+					'nodeName': 'BUTTON',
+					'localName': 'button',
+					'nodeValue': '',
+				}
+			],
+		}
+	]
+	iframe_html = {
+		'nodeId': 90006,
+		'backendNodeId': 90006,
+		'nodeType': 1,
+		'nodeName': 'HTML',
+		'localName': 'html',
+		'nodeValue': '',
+	}
+	iframe_html.update(frameId='CHILD', parentId=90005)
+	iframe_html['children'] = [
+		{
+			'nodeId': 90007,
+			'parentId': 90006,
+			'backendNodeId': 90007,
+			'nodeType': 1,
+			'nodeName': 'INPUT',
+			'localName': 'input',
+			'nodeValue': '',
+		}
+	]
+	iframe = {
+		'nodeId': 90004,
+		'backendNodeId': 90004,
+		'nodeType': 1,
+		'nodeName': 'IFRAME',
+		'localName': 'iframe',
+		'nodeValue': '',
+	}
+	iframe['contentDocument'] = {
+		'nodeId': 90005,
+		'backendNodeId': 90005,
+		'nodeType': 9,
+		'nodeName': '#document',
+		'localName': '',
+		'nodeValue': '',
+		'children': [iframe_html],
+	}
+	for node in (shadow_host, iframe):
+		node['parentId'] = body['nodeId']
+		body['children'].append(node)
+
+	layout: Any = trees.snapshot['documents'][0]['layout']  # type: ignore[index]
+	child_document = {
+		'nodes': {'backendNodeId': [90005, 90006, 90007]},
+		'layout': {
+			'nodeIndex': [1, 2],
+			'bounds': [[0, 0, 300, 200], [10, 30, 100, 20]],
+			'styles': [layout['styles'][0], layout['styles'][0]],
+			'paintOrders': [0, 1],
+			'clientRects': [[0, 0, 300, 200], []],
+			'scrollRects': [[0, 15, 300, 600], []],
+		},
+	}
+	main_document: Any = trees.snapshot['documents'][0]
+	node_count = len(main_document['nodes']['backendNodeId'])
+	main_document['nodes']['backendNodeId'] += [90001, 90002, 90003, 90004]  # type: ignore[operator]
+	for node_index, bounds in (
+		(node_count, [5, 5, 50, 50]),
+		(node_count + 2, [5, 5, 40, 20]),
+		(node_count + 3, [100, 400, 300, 200]),
+	):
+		layout['nodeIndex'].append(node_index)
+		layout['bounds'].append(bounds)
+		layout['styles'].append(layout['styles'][0])
+		layout['paintOrders'].append(len(layout['paintOrders']))
+		layout['clientRects'].append([])
+		layout['scrollRects'].append([])
+	trees.snapshot['documents'].append(child_document)  # type: ignore[union-attr]
+
+
+def describe(root: EnhancedDOMTreeNode) -> list:
+	return [
+		(
+			node.node_id,
+			node.parent_node.node_id if node.parent_node else None,
+			node.node_type,
+			node.attributes,
+			node.ax_node,
+			node.snapshot_node,
+			node.absolute_position,
+			node.is_visible,
+		)
+		for node in iter_subtree(root)
+	]
+
+
+async def test_construct_enhanced_tree_matches_recursive_implementation():
+	trees, legacy_trees = make_payload(2_000, seed=3), make_payload(2_000, seed=3)
+	add_iframe_and_shadow_root(trees)
+	add_iframe_and_shadow_root(legacy_trees)
+
+	root, iframes_without_content = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+	legacy_root = await legacy_construct_enhanced_tree(legacy_trees, TARGET_ID)
+
+	assert describe(root) == describe(legacy_root)
+	assert iframes_without_content == []
+	visible_ids = {node.node_id for node in iter_subtree(root) if node.is_visible}
+	assert {90003, 90007} <= visible_ids
+
+
+def test_vectorized_css_visibility_matches_the_per_node_check(monkeypatch):
+	pytest.importorskip('numpy')
+
+	def hide_some_nodes(trees: TargetAllTrees) -> None:
+		snapshot = trees.snapshot
+		snapshot['strings'] += ['none', 'hidden', '0']  # type: ignore[operator]
+		layout = snapshot['documents'][0]['layout']
+		for i, (style, value) in enumerate([('display', 'none'), ('visibility', 'hidden'), ('opacity', '0')] * 20):
+			styles = list(layout['styles'][10 + i * 7])
+			styles[REQUIRED_COMPUTED_STYLES.index(style)] = snapshot['strings'].index(value)
+			layout['styles'][10 + i * 7] = styles
+
+	trees, reference_trees = make_payload(1_000, seed=5), make_payload(1_000, seed=5)
+	hide_some_nodes(trees)
+	hide_some_nodes(reference_trees)
+
+	root, _ = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+	monkeypatch.setattr('browser_use.dom.service.style_visible_backend_node_ids', lambda snapshot: None)
+	reference_root, _ = make_dom_service().construct_enhanced_tree(reference_trees, TARGET_ID)
+
+	assert describe(root) == describe(reference_root)
+	assert (
+		0 < sum(1 for node in iter_subtree(root) if node.is_visible) < sum(1 for node in iter_subtree(root) if node.snapshot_node)
+	)
+
+
+def test_construct_enhanced_tree_handles_deep_documents():
+	depth = 10_000
+	root, _ = make_dom_service().construct_enhanced_tree(make_payload(depth, max_depth=depth), TARGET_ID)
+
+	node, levels = root, 0
+	while node.children_nodes:
+		node = node.children_nodes[0]
+		levels += 1
+	assert levels == depth - 1
+	assert node.parent_node is not None and node.parent_node.parent_node is not None
+	assert sum(1 for _ in iter_subtree(root)) == depth
+
+
+def test_construct_enhanced_tree_reports_iframes_without_content_document():
+	trees = make_payload(50, seed=4)
+	body: Any = trees.dom_tree['root']['children'][0]['children'][0]  # type: ignore[index]
+	iframe = {'nodeId': 777, 'backendNodeId': 777, 'nodeType': 1, 'nodeName': 'IFRAME', 'localName': 'iframe', 'nodeValue': ''}
+	iframe.update(parentId=body['nodeId'], frameId='CROSS-ORIGIN')
+	body['children'].append(iframe)
+
+	_, iframes_without_content = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+
+	assert [(node.node_id, node.frame_id) for node, _ in iframes_without_content] == [(777, 'CROSS-ORIGIN')]
+
+
+def reference_element_hash(node: EnhancedDOMTreeNode, include_attributes: bool = True) -> int:
+	"""The original uncached hash: sha256 of the tag path (and attributes), recomputed from the root on every call."""
+	path = '/'.join(
+		parent.tag_name for parent in reversed(list(iter_ancestors(node))) if parent.node_type == NodeType.ELEMENT_NODE
+	)
+	if include_attributes:
+		path += '|' + ''.join(f'{key}={value}' for key, value in node.attributes.items())
+	return int(hashlib.sha256(path.encode()).hexdigest()[:16], 16)
+
+
+def as_builtin_hash(value: int) -> int:
+	"""Like before, `element_hash` goes through the builtin hash(), which folds values above sys.maxsize."""
+	return value if value <= sys.maxsize else hash(value)
+
+
+def iter_ancestors(node: EnhancedDOMTreeNode | None):
+	while node is not None:
+		yield node
+		node = node.parent_node
+
+
+def test_cached_element_hashes_match_original_hashes():
+	trees = make_payload(2_000, seed=5)
+	add_iframe_and_shadow_root(trees)
+	root, _ = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+
+	for node in iter_subtree(root):
+		assert hash(node) == node.element_hash == as_builtin_hash(reference_element_hash(node))
+		assert node.parent_branch_hash() == reference_element_hash(node, include_attributes=False)
+
+	# hashes are cached on the node, so a deep element hashes in O(1) the second time
+	deepest = max(iter_subtree(root), key=lambda node: len(list(iter_ancestors(node))))
+	assert deepest._element_hash is not None and deepest._branch_hash is not None
+
+
+def test_element_hash_follows_attribute_mutations():
+	trees = make_payload(20, seed=6)
+	root, _ = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+	tracker = DOMMutationTracker(target_id=TARGET_ID, session_id='SESSION')
+	tracker.reset(root)
+	element = next(node for node in iter_subtree(root) if node.node_type == NodeType.ELEMENT_NODE and node.attributes)
+	hash_before = hash(element)
+
+	tracker.handle_event('attributeModified', {'nodeId': element.node_id, 'name': 'aria-label', 'value': 'changed'})
+
+	assert hash(element) != hash_before
+	assert hash(element) == as_builtin_hash(reference_element_hash(element))
+
+
+def test_nodes_share_interned_names_and_create_uuids_lazily():
+	trees = make_payload(200, seed=7)
+	for ax_node in trees.ax_tree['nodes']:
+		ax_node['properties'] = [{'name': 'focusable', 'value': {'type': 'booleanOrUndefined', 'value': True}}]  # type: ignore[typeddict-item]
+	root, _ = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+	nodes = list(iter_subtree(root))
+
+	divs = [node for node in nodes if node.node_name == 'DIV']
+	assert len({id(node.node_name) for node in divs}) == 1
+	assert len({id(node.ax_node.properties[0]) for node in nodes if node.ax_node and node.ax_node.properties}) == 1
+
+	assert all(node._uuid is None for node in nodes)
+	assert nodes[1].uuid == nodes[1].uuid != nodes[2].uuid
+
+
+def test_precomputed_xpaths_and_texts_match_computed_ones():
+	trees = make_payload(3_000, seed=8)
+	add_iframe_and_shadow_root(trees)
+	root, _ = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+	nodes = list(iter_subtree(root))
+	expected = [(node.xpath, node.get_all_children_text()) for node in nodes]
+
+	# every other node, so that some nodes reuse the texts of nested ones and others walk past uncached ones
+	precompute_xpaths_and_texts(nodes[::2])
+
+	assert all(node._xpath is not None and node._children_text is not None for node in nodes[::2])
+	assert [(node.xpath, node.get_all_children_text()) for node in nodes] == expected
+
+
+def test_precomputed_xpaths_and_texts_follow_mutations():
+	trees = make_payload(50, seed=9, max_depth=50)
+	root, _ = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+	tracker = DOMMutationTracker(target_id=TARGET_ID, session_id='SESSION')
+	tracker.reset(root)
+	nodes = list(iter_subtree(root))
+	precompute_xpaths_and_texts(nodes)
+	body = nodes[2]
+	deepest = nodes[-1]
+	first_child = body.children_nodes[0]  # type: ignore[index]
+
+	sibling = {
+		'nodeId': 9001,
+		'backendNodeId': 9001,
+		'nodeType': 1,
+		'nodeName': first_child.node_name,
+		'localName': first_child.tag_name,
+		'nodeValue': '',
+		'children': [{'nodeId': 9002, 'backendNodeId': 9002, 'nodeType': 3, 'nodeName': '#text', 'nodeValue': 'inserted'}],
+	}
+	tracker.handle_event('childNodeInserted', {'parentNodeId': body.node_id, 'previousNodeId': 0, 'node': sibling})
+
+	assert deepest._xpath is None and body._children_text is None
+	assert deepest.xpath.split('/')[2] == f'{first_child.tag_name}[2]'
+	assert body.get_all_children_text().startswith('inserted')
+
+
+def test_gc_pauses_are_shared_by_nested_and_concurrent_builds():
+	assert gc.isenabled()
+	with gc_paused():
+		with gc_paused():
+			assert not gc.isenabled()
+		assert not gc.isenabled()
+	assert gc.isenabled()
+
+	# builds in offload threads start and end interleaved, the collector is only turned on again after the last one
+	started = threading.Barrier(4)
+
+	def build(seconds: float) -> bool:
+		with gc_paused():
+			started.wait()
+			threading.Event().wait(seconds)
+		return gc.isenabled()
+
+	with ThreadPoolExecutor(4) as executor:
+		enabled_after = list(executor.map(build, [0.0, 0.05, 0.1, 0.15]))
+	assert enabled_after.count(True) <= 1 and gc.isenabled()
@@ -0,0 +1,140 @@
+"""Tests for building the enhanced DOM tree from the payload of the in-page extraction script (no browser needed)."""
+
+from types import SimpleNamespace
+
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.in_page_extraction import build_in_page_tree, nodes_needing_backend_node_ids, resolve_backend_node_ids
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.views import DOMRect, NodeType
+
+TARGET_ID = 'IN-PAGE-TARGET'
+
+# what the script returns for a page scrolled by 0px with a link, a scrollable list, a button below the fold and a
+# same origin iframe at (100, 100) with a 2px border, scrolled by 5px, that contains another button
+PAYLOAD = {
+	'i': 1,
+	'o': [0, 0],
+	'c': [
+		{
+			'i': 2,
+			't': 'HTML',
+			'b': [0, 0, 800, 2000],
+			'v': 1,
+			'sr': [0, 0, 800, 2000],
+			'cr': [0, 0, 800, 600],
+			'c': [
+				{
+					'i': 3,
+					't': 'BODY',
+					'b': [0, 0, 800, 2000],
+					'v': 1,
+					'c': [
+						{'i': 4, 't': 'A', 'a': ['href', '/'], 'b': [0, 0, 40, 20], 'v': 1, 'cur': 'pointer', 'c': ['Home']},
+						{
+							'i': 5,
+							't': 'DIV',
+							'a': ['class', 'list'],
+							'b': [0, 30, 300, 100],
+							'v': 1,
+							'sr': [0, 0, 300, 500],
+							'cr': [0, 0, 300, 100],
+							'sc': 1,
+							'c': ['Items'],
+						},
+						{'i': 6, 't': 'BUTTON', 'b': [0, 1500, 40, 20], 'c': ['Below']},
+						{
+							'i': 7,
+							't': 'IFRAME',
+							'a': ['src', '/frame'],
+							'b': [100, 100, 200, 100],
+							'v': 1,
+							'd': {
+								'i': 8,
+								'o': [102, 97],
+								'c': [
+									{
+										'i': 9,
+										't': 'HTML',
+										'b': [0, 0, 200, 300],
+										'v': 1,
+										'c': [{'i': 11, 't': 'BUTTON', 'b': [10, 15, 50, 20], 'v': 1, 'c': ['Inner']}],
+									}
+								],
+							},
+						},
+						{
+							'i': 12,
+							't': 'DIV',
+							'b': [0, 140, 100, 20],
+							'v': 1,
+							'sh': {'i': 13, 'c': [{'i': 14, 't': 'INPUT', 'b': [0, 140, 100, 20], 'v': 1}]},
+						},
+					],
+				}
+			],
+		}
+	],
+}
+
+
+def by_page_id(root):
+	return {-node.node_id: node for node in iter_subtree(root) if node.node_type != NodeType.TEXT_NODE}
+
+
+def test_payload_is_built_into_a_tree_the_serializer_understands():
+	root = build_in_page_tree(PAYLOAD, TARGET_ID, session_id=None)
+	nodes = by_page_id(root)
+
+	inner_button = nodes[11]
+	assert inner_button.absolute_position == DOMRect(x=112, y=112, width=50, height=20)
+	assert inner_button.parent_node.parent_node is nodes[8] and nodes[8].parent_node is nodes[7]  # type: ignore[union-attr]
+	assert nodes[7].content_document is nodes[8]
+	assert nodes[14].parent_node is nodes[12].shadow_roots[0]  # type: ignore[index]
+	assert nodes[5].is_actually_scrollable and not nodes[6].is_visible
+	assert [node.node_value for node in nodes[4].children_nodes] == ['Home']  # type: ignore[union-attr]
+
+	serialized, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+
+	indexed = {-node.backend_node_id for node in serialized.selector_map.values()}
+	assert indexed == {4, 11, 14}
+	assert {-node.backend_node_id for node in nodes_needing_backend_node_ids(root)} == indexed
+	text = serialized.llm_representation()
+	assert 'Home' in text and 'Inner' in text and 'Below' not in text
+
+
+async def test_backend_node_ids_are_resolved_in_one_batch():
+	root = build_in_page_tree(PAYLOAD, TARGET_ID, session_id=None)
+	nodes = nodes_needing_backend_node_ids(root)
+	calls: list[str] = []
+
+	async def evaluate(params, session_id=None):
+		calls.append('Runtime.evaluate')
+		return {'result': {'type': 'object', 'objectId': 'array'}}
+
+	async def get_properties(params, session_id=None):
+		calls.append('Runtime.getProperties')
+		return {
+			'result': [
+				*({'name': str(index), 'value': {'objectId': f'element-{index}'}} for index in range(len(nodes) - 1)),
+				{'name': str(len(nodes) - 1), 'value': {'type': 'object', 'subtype': 'null'}},  # removed in the meantime
+				{'name': 'length', 'value': {'type': 'number', 'value': len(nodes)}},
+			]
+		}
+
+	async def describe_node(params, session_id=None):
+		calls.append('DOM.describeNode')
+		return {'node': {'backendNodeId': 1000 + int(params['objectId'].split('-')[1])}}
+
+	async def release_object_group(params, session_id=None):
+		calls.append('Runtime.releaseObjectGroup')
+
+	send = SimpleNamespace(
+		Runtime=SimpleNamespace(evaluate=evaluate, getProperties=get_properties, releaseObjectGroup=release_object_group),
+		DOM=SimpleNamespace(describeNode=describe_node),
+	)
+	cdp_session = SimpleNamespace(cdp_client=SimpleNamespace(send=send), session_id='session')
+
+	assert await resolve_backend_node_ids(cdp_session, nodes) == len(nodes) - 1  # type: ignore[arg-type]
+	assert [node.backend_node_id for node in nodes[:-1]] == list(range(1000, 1000 + len(nodes) - 1))
+	assert nodes[-1].backend_node_id < 0
+	assert calls.count('DOM.describeNode') == len(nodes) - 1 and calls[-1] == 'Runtime.releaseObjectGroup'
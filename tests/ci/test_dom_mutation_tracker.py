@@ -0,0 +1,222 @@
+"""Tests for keeping the enhanced DOM tree in sync from CDP DOM mutation events (no browser needed)."""
+
+import logging
+from types import SimpleNamespace
+
+from browser_use.dom.enhanced_snapshot import REQUIRED_COMPUTED_STYLES, build_snapshot_lookup
+from browser_use.dom.enhanced_tree import build_enhanced_subtree, iter_subtree
+from browser_use.dom.mutation_tracker import DOMMutationTracker
+from browser_use.dom.service import DomService
+from browser_use.dom.views import TargetAllTrees
+
+TARGET_ID = 'TARGET-0000'
+
+
+def element(node_id: int, name: str, children: list | None = None, attributes: list[str] | None = None, **extra) -> dict:
+	node = {
+		'nodeId': node_id,
+		'backendNodeId': node_id + 100,
+		'nodeType': 1,
+		'nodeName': name,
+		'localName': name.lower(),
+		'nodeValue': '',
+		'attributes': attributes or [],
+		'childNodeCount': len(children or []),
+		'children': children or [],
+		**extra,
+	}
+	for child in node['children']:
+		child['parentId'] = node_id
+	return node
+
+
+def text(node_id: int, value: str) -> dict:
+	return {
+		'nodeId': node_id,
+		'backendNodeId': node_id + 100,
+		'nodeType': 3,
+		'nodeName': '#text',
+		'localName': '',
+		'nodeValue': value,
+	}
+
+
+def document(node_id: int, html: dict) -> dict:
+	html['parentId'] = node_id
+	return {
+		'nodeId': node_id,
+		'backendNodeId': node_id + 100,
+		'nodeType': 9,
+		'nodeName': '#document',
+		'localName': '',
+		'nodeValue': '',
+		'children': [html],
+	}
+
+
+def make_dom_tree() -> dict:
+	iframe_document = document(
+		8, element(9, 'HTML', [element(10, 'BODY', [element(11, 'INPUT', attributes=['type', 'text'])])], frameId='CHILD')
+	)
+	body = element(
+		3,
+		'BODY',
+		[
+			element(4, 'DIV', [text(5, 'hello')], attributes=['id', 'a']),
+			element(6, 'BUTTON', attributes=['class', 'btn']),
+			element(7, 'IFRAME', frameId='CHILD', contentDocument=iframe_document),
+			element(12, 'DIV', attributes=['id', 'below-the-fold']),
+		],
+	)
+	return {'root': document(1, element(2, 'HTML', [body], frameId='MAIN'))}
+
+
+def make_snapshot() -> dict:
+	"""Layout for `make_dom_tree`: the main frame is scrolled down by 100px, the last div is off screen."""
+	strings = ['block']
+	styles = [-1] * len(REQUIRED_COMPUTED_STYLES)
+	styles[REQUIRED_COMPUTED_STYLES.index('display')] = 0
+	layout = {
+		2: ([0, 0, 800, 3000], [0, 0, 800, 600], [0, 100, 800, 3000]),
+		3: ([0, 0, 800, 3000], [], []),
+		4: ([10, 150, 200, 40], [], []),
+		6: ([10, 200, 80, 30], [], []),
+		7: ([50, 300, 400, 300], [], []),
+		9: ([0, 0, 400, 300], [0, 0, 400, 300], [0, 20, 400, 300]),
+		10: ([0, 0, 400, 300], [], []),
+		11: ([20, 40, 100, 20], [], []),
+		12: ([0, 2500, 800, 100], [], []),
+	}
+	main_ids, child_ids = [1, 2, 3, 4, 5, 6, 7, 12], [8, 9, 10, 11]
+	documents = []
+	for node_ids in (main_ids, child_ids):
+		laid_out = [i for i, node_id in enumerate(node_ids) if node_id in layout]
+		documents.append(
+			{
+				'nodes': {'backendNodeId': [node_id + 100 for node_id in node_ids], 'isClickable': {'index': []}},
+				'layout': {
+					'nodeIndex': laid_out,
+					'bounds': [layout[node_ids[i]][0] for i in laid_out],
+					'clientRects': [layout[node_ids[i]][1] for i in laid_out],
+					'scrollRects': [layout[node_ids[i]][2] for i in laid_out],
+					'styles': [styles for _ in laid_out],
+					'paintOrders': list(range(len(laid_out))),
+				},
+			}
+		)
+	return {'documents': documents, 'strings': strings}
+
+
+def make_dom_service() -> DomService:
+	browser_session = SimpleNamespace(logger=logging.getLogger('test'), agent_focus=None)
+	dom_service = DomService(browser_session=browser_session)  # type: ignore[arg-type]
+
+	async def get_all_trees(target_id):
+		return TargetAllTrees(
+			snapshot=make_snapshot(),  # type: ignore[arg-type]
+			dom_tree=make_dom_tree(),  # type: ignore[arg-type]
+			ax_tree={'nodes': []},
+			device_pixel_ratio=1.0,
+			cdp_timing={},
+		)
+
+	dom_service._get_all_trees = get_all_trees  # type: ignore[method-assign]
+	return dom_service
+
+
+def make_tracker() -> DOMMutationTracker:
+	root = build_enhanced_subtree(make_dom_tree()['root'], None, TARGET_ID, None)[0]  # type: ignore[arg-type]
+	tracker = DOMMutationTracker(target_id=TARGET_ID, session_id='SESSION')
+	tracker.reset(root)
+	return tracker
+
+
+def layout_of(root) -> list:
+	return [
+		(node.backend_node_id, node.absolute_position, node.is_visible, node.snapshot_node and node.snapshot_node.bounds)
+		for node in iter_subtree(root)
+	]
+
+
+async def test_apply_layout_matches_full_build():
+	dom_service = make_dom_service()
+	built = await dom_service._build_dom_tree(TARGET_ID)
+
+	tracked = build_enhanced_subtree(make_dom_tree()['root'], None, TARGET_ID, None)[0]  # type: ignore[arg-type]
+	dom_service._apply_layout(tracked, build_snapshot_lookup(make_snapshot()))  # type: ignore[arg-type]
+
+	assert layout_of(tracked) == layout_of(built)
+	visible = {node.attributes.get('id') or node.node_name for node in iter_subtree(built) if node.is_visible}
+	assert {'a', 'BUTTON', 'IFRAME', 'INPUT'} <= visible
+	assert 'below-the-fold' not in visible
+
+
+def test_enhanced_subtree_keeps_structure():
+	root = build_enhanced_subtree(make_dom_tree()['root'], None, TARGET_ID, None)[0]  # type: ignore[arg-type]
+
+	body = root.children_nodes[0].children_nodes[0]  # type: ignore[index]
+	assert [child.node_id for child in body.children_nodes] == [4, 6, 7, 12]  # type: ignore[union-attr]
+	iframe = body.children_nodes[2]  # type: ignore[index]
+	assert iframe.content_document is not None and iframe.content_document.parent_node is iframe
+	assert [node.node_id for node in iter_subtree(root)] == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
+
+
+def test_tracker_applies_mutations_in_place():
+	tracker = make_tracker()
+	body = tracker.node_lookup[3]
+
+	tracker.handle_event(
+		'childNodeInserted', {'parentNodeId': 3, 'previousNodeId': 4, 'node': element(20, 'A', [text(21, 'link')])}
+	)
+	tracker.handle_event('attributeModified', {'nodeId': 6, 'name': 'aria-expanded', 'value': 'true'})
+	tracker.handle_event('attributeRemoved', {'nodeId': 6, 'name': 'class'})
+	tracker.handle_event('characterDataModified', {'nodeId': 5, 'characterData': 'bye'})
+	tracker.handle_event('childNodeRemoved', {'parentNodeId': 3, 'nodeId': 7})
+
+	assert [child.node_id for child in body.children_nodes] == [4, 20, 6, 12]  # type: ignore[union-attr]
+	assert tracker.node_lookup[20].parent_node is body and tracker.node_lookup[21].node_value == 'link'
+	assert tracker.node_lookup[6].attributes == {'aria-expanded': 'true'}
+	assert tracker.node_lookup[5].node_value == 'bye'
+	# the removed iframe takes its whole content document with it
+	assert not {7, 8, 9, 10, 11} & tracker.node_lookup.keys()
+	assert tracker.dirty_backend_node_ids == {120, 106, 104, 103}
+	assert tracker.can_refresh
+
+
+def test_tracker_requests_children_of_shallow_inserted_nodes():
+	tracker = make_tracker()
+	shallow = element(30, 'UL')
+	shallow['childNodeCount'] = 2
+	del shallow['children']
+
+	tracker.handle_event('childNodeInserted', {'parentNodeId': 3, 'previousNodeId': 0, 'node': shallow})
+	assert tracker.unexpanded_node_ids == {30}
+
+	tracker.handle_event('setChildNodes', {'parentId': 30, 'nodes': [element(31, 'LI'), element(32, 'LI')]})
+	assert tracker.unexpanded_node_ids == set()
+	assert [child.node_id for child in tracker.node_lookup[30].children_nodes] == [31, 32]  # type: ignore[union-attr]
+	assert tracker.node_lookup[3].children_nodes[0].node_id == 30  # type: ignore[index]
+
+
+def test_tracker_falls_back_to_full_rebuild():
+	tracker = make_tracker()
+	tracker.handle_event('attributeModified', {'nodeId': 999, 'name': 'id', 'value': 'x'})
+	assert tracker.needs_full_rebuild and not tracker.can_refresh
+
+	tracker = make_tracker()
+	tracker.handle_event('documentUpdated', {})
+	assert tracker.needs_full_rebuild
+
+
+def test_tracker_replays_events_received_during_rebuild():
+	tracker = DOMMutationTracker(target_id=TARGET_ID, session_id='SESSION')
+	tracker.begin_rebuild()
+	tracker.handle_event('attributeModified', {'nodeId': 999, 'name': 'id', 'value': 'stale'})  # id of the old document
+	tracker.handle_event('attributeModified', {'nodeId': 4, 'name': 'id', 'value': 'b'})
+	assert not tracker.can_refresh
+
+	tracker.reset(build_enhanced_subtree(make_dom_tree()['root'], None, TARGET_ID, None)[0])  # type: ignore[arg-type]
+
+	assert tracker.can_refresh
+	assert tracker.node_lookup[4].attributes['id'] == 'b'
+	assert tracker.dirty_backend_node_ids == {104}
@@ -0,0 +1,97 @@
+"""Tests for building and serializing DOM trees in a worker and shipping back the detached result (no browser needed)."""
+
+import logging
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+from browser_use.dom.offload import DetachedDOMTreeNode, OffloadedDOMState, discard_dom_offload_executor
+from browser_use.dom.playground.benchmark_tree_construction import make_payload
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.service import DomService, build_offloaded_dom_state
+from tests.ci.test_dom_enhanced_tree import make_dom_service
+from tests.ci.test_dom_mutation_tracker import TARGET_ID
+
+
+def test_offloaded_state_survives_pickling_and_matches_the_in_process_state():
+	trees = make_payload(3_000, seed=21)
+	root, _ = make_dom_service().construct_enhanced_tree(trees, TARGET_ID)
+	expected, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+
+	offloaded = pickle.loads(pickle.dumps(build_offloaded_dom_state(make_payload(3_000, seed=21), TARGET_ID, None, None)))
+	state = offloaded.to_serialized_state()
+
+	assert state.llm_representation() == expected.llm_representation()
+	assert state.selector_map.keys() == expected.selector_map.keys()
+	for index, node in state.selector_map.items():
+		original = expected.selector_map[index]
+		assert isinstance(node, DetachedDOMTreeNode) and node.parent_node is None
+		assert node.backend_node_id == original.backend_node_id
+		assert node.xpath == original.xpath
+		assert hash(node) == hash(original) and node.parent_branch_hash() == original.parent_branch_hash()
+		assert node.get_all_children_text(max_depth=2) == original.get_all_children_text(max_depth=2)
+		assert node.get_all_children_text() == original.get_all_children_text()
+	# lines and the selector map share the detached nodes
+	interactive_lines = [line for line in state._lines or [] if line.interactive_index is not None]
+	assert all(line.node is state.selector_map[line.interactive_index] for line in interactive_lines)  # type: ignore[index]
+
+	again = build_offloaded_dom_state(make_payload(3_000, seed=21), TARGET_ID, None, set(offloaded.elements))
+	assert again.diff is not None and not again.diff.has_changes
+	assert '*[' not in again.to_serialized_state().llm_representation()
+
+
+@pytest.mark.parametrize('offload', ['thread', 'process'])
+async def test_dom_service_builds_in_the_offload_executor(offload):
+	trees = make_payload(500, seed=22)
+	browser_session = SimpleNamespace(
+		logger=logging.getLogger('test'), agent_focus=SimpleNamespace(session_id='session'), current_target_id=TARGET_ID
+	)
+	dom_service = DomService(browser_session=browser_session, offload=offload)  # type: ignore[arg-type]
+
+	async def get_all_trees(target_id):
+		return trees
+
+	dom_service._get_all_trees = get_all_trees  # type: ignore[method-assign]
+	try:
+		state, root, timing = await dom_service.get_serialized_dom_tree()
+	finally:
+		discard_dom_offload_executor(offload)
+
+	assert root is None
+	assert state.selector_map and all(node.session_id == 'session' for node in state.selector_map.values())
+	assert timing['offloaded_dom_tree_total'] >= timing['construct_enhanced_tree']
+	assert isinstance(pickle.loads(pickle.dumps(OffloadedDOMState.from_serialized_state(state, {}))), OffloadedDOMState)
+
+
+@pytest.mark.parametrize('offload', ['off', 'thread'])
+async def test_dom_service_passes_occlusion_filtering_to_the_serializer(offload, monkeypatch):
+	trees = make_payload(200, seed=23)
+	browser_session = SimpleNamespace(
+		logger=logging.getLogger('test'), agent_focus=SimpleNamespace(session_id='session'), current_target_id=TARGET_ID
+	)
+	dom_service = DomService(browser_session=browser_session, offload=offload, occlusion_filtering=True)  # type: ignore[arg-type]
+
+	async def get_all_trees(target_id):
+		return trees
+
+	async def get_dom_tree(target_id):
+		return dom_service.construct_enhanced_tree(trees, target_id)[0]
+
+	dom_service._get_all_trees = get_all_trees  # type: ignore[method-assign]
+	dom_service.get_dom_tree = get_dom_tree  # type: ignore[method-assign]
+	serializers: list[DOMTreeSerializer] = []
+
+	class RecordingSerializer(DOMTreeSerializer):
+		def __init__(self, *args, **kwargs):
+			super().__init__(*args, **kwargs)
+			serializers.append(self)
+
+	monkeypatch.setattr('browser_use.dom.service.DOMTreeSerializer', RecordingSerializer)
+	try:
+		await dom_service.get_serialized_dom_tree()
+	finally:
+		if offload != 'off':
+			discard_dom_offload_executor(offload)
+
+	assert [serializer.enable_occlusion_filtering for serializer in serializers] == [True]
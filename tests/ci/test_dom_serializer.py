@@ -0,0 +1,210 @@
+"""Tests for serializing the enhanced DOM tree for the LLM (no browser needed)."""
+
+import pytest
+
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_tree_construction import make_payload
+from browser_use.dom.serializer.budget import BudgetedDOMSerializer, _ring
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.views import (
+	DEFAULT_INCLUDE_ATTRIBUTES,
+	DOMRect,
+	DOMStateDiff,
+	EnhancedDOMTreeNode,
+	SerializedDOMState,
+	TargetAllTrees,
+)
+from tests.ci.test_dom_enhanced_tree import add_iframe_and_shadow_root
+from tests.ci.test_dom_enhanced_tree import make_dom_service as make_tree_builder
+from tests.ci.test_dom_mutation_tracker import TARGET_ID, make_dom_service
+from tests.ci.test_dom_spatial_index import document, element
+
+
+async def build_tree() -> EnhancedDOMTreeNode:
+	return await make_dom_service()._build_dom_tree(TARGET_ID)
+
+
+def find(root: EnhancedDOMTreeNode, node_id: int) -> EnhancedDOMTreeNode:
+	return next(node for node in iter_subtree(root) if node.node_id == node_id)
+
+
+async def test_serialized_state_reports_diff_against_previous_state():
+	first_state, _ = DOMTreeSerializer(await build_tree()).serialize_accessible_elements()
+	assert first_state.diff is None
+	assert {node.backend_node_id for node in first_state.selector_map.values()} == {106, 107, 111}
+
+	root = await build_tree()
+	body = find(root, 3)
+	body.children_nodes = [child for child in body.children_nodes or [] if child.node_id != 6]  # the button goes away
+	find(root, 4).attributes['role'] = 'button'  # and the div becomes interactive
+
+	serializer = DOMTreeSerializer(root, previous_cached_state=first_state)
+	second_state, _ = serializer.serialize_accessible_elements()
+
+	assert second_state.diff == DOMStateDiff(added=frozenset({104}), removed=frozenset({106}), retained=frozenset({107, 111}))
+	assert second_state.diff == DOMStateDiff.from_selector_maps(first_state.selector_map, second_state.selector_map)
+	assert second_state.diff is not None and second_state.diff.has_changes
+	assert '*[1]<div' in second_state.llm_representation()
+
+	unchanged_state, _ = DOMTreeSerializer(await build_tree(), previous_cached_state=first_state).serialize_accessible_elements()
+	assert unchanged_state.diff is not None and not unchanged_state.diff.has_changes
+	assert '*[' not in unchanged_state.llm_representation()
+
+
+def nest_bounds(trees: TargetAllTrees) -> None:
+	"""Make most elements overlap, so links and buttons contain (and hide) lots of their descendants."""
+	layout = trees.snapshot['documents'][0]['layout']  # type: ignore[index]
+	layout['bounds'] = [[10, 10, 100, 20] if i % 3 else [5, 5, 200, 40] for i in range(len(layout['bounds']))]
+
+
+def describe(state: SerializedDOMState) -> tuple:
+	return (
+		state.llm_representation(),
+		{index: node.backend_node_id for index, node in state.selector_map.items()},
+		state.diff,
+	)
+
+
+@pytest.mark.parametrize('nested', [False, True])
+def test_fused_serializer_matches_legacy_passes(nested: bool):
+	previous_trees = make_payload(2_000, seed=10)
+	trees = make_payload(2_000, seed=11)
+	add_iframe_and_shadow_root(trees)
+	if nested:
+		nest_bounds(trees)
+	tree_builder = make_tree_builder()
+	previous_state, _ = DOMTreeSerializer(
+		tree_builder.construct_enhanced_tree(previous_trees, TARGET_ID)[0]
+	).serialize_accessible_elements()
+	root, _ = tree_builder.construct_enhanced_tree(trees, TARGET_ID)
+
+	legacy_state, _ = DOMTreeSerializer(root, previous_state, legacy=True).serialize_accessible_elements()
+	fused_state, timing = DOMTreeSerializer(root, previous_state).serialize_accessible_elements()
+
+	assert fused_state._root is None and fused_state._lines
+	assert describe(fused_state) == describe(legacy_state)
+	assert '*[' in fused_state.llm_representation()
+	assert 'fused_serialization' in timing
+	# the shadow root and the iframe content are serialized once, no matter how often we serialize
+	assert fused_state.llm_representation().count('<button') == legacy_state.llm_representation().count('<button')
+	assert sum(1 for node in fused_state.selector_map.values() if node.backend_node_id in (90003, 90007)) == 2
+
+
+def test_fused_serializer_handles_empty_documents():
+	trees = make_payload(3, seed=12)
+	root, _ = make_tree_builder().construct_enhanced_tree(trees, TARGET_ID)
+
+	fused_state, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+	legacy_state, _ = DOMTreeSerializer(root, legacy=True).serialize_accessible_elements()
+
+	assert describe(fused_state) == describe(legacy_state)
+	assert fused_state.llm_representation() == 'Empty DOM tree (you might have to wait for the page to load)'
+
+
+def test_budgeted_representation_keeps_viewport_content_first():
+	root, _ = make_tree_builder().construct_enhanced_tree(make_payload(5_000, seed=13), TARGET_ID)
+	state, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+	assert state._lines
+	full_text = state.llm_representation()
+
+	assert state.budgeted_llm_representation(len(full_text)) == (full_text, None)
+
+	serializer = BudgetedDOMSerializer(state._lines, DEFAULT_INCLUDE_ATTRIBUTES, max_length=2_000)
+	assert serializer.viewport == DOMRect(x=0.0, y=0.0, width=1280, height=800)  # client rect of <html>
+	picked = [state._lines[position] for position, _ in serializer.iter_lines()]
+	rings = [_ring(line.node.absolute_position, serializer.viewport) for line in picked]
+	assert rings == sorted(rings) and rings[0] == 0
+	assert picked[0].interactive_index is not None
+
+	text, omitted = state.budgeted_llm_representation(2_000)
+	assert len(text) <= 2_000
+	assert text == '\n'.join(serializer.rendered[position] for position in sorted(serializer.rendered))
+	# all visible content of the synthetic page is inside the viewport
+	assert omitted == f'{len(state._lines) - len(serializer.rendered)} lines'
+
+
+def test_budgeted_representation_reports_omitted_content_below_the_viewport():
+	root, _ = make_tree_builder().construct_enhanced_tree(make_payload(2_000, seed=14), TARGET_ID)
+	state, _ = DOMTreeSerializer(root).serialize_accessible_elements()
+	assert state._lines
+	far_lines = [line for line in state._lines if line.interactive_index is not None][:10]
+	for line in far_lines:
+		line.node.absolute_position = DOMRect(x=10.0, y=4_000.0, width=100.0, height=20.0)
+	viewport = DOMRect(x=0.0, y=0.0, width=1280.0, height=800.0)
+	full_text = state.llm_representation()
+	far_text_length = sum(len(DOMTreeSerializer.serialize_line(line, DEFAULT_INCLUDE_ATTRIBUTES)) + 1 for line in far_lines)
+
+	far_line_ids = {id(line) for line in far_lines}
+
+	text, omitted = state.budgeted_llm_representation(len(full_text) - far_text_length, viewport=viewport)
+
+	assert omitted == '10 lines: 0.0 pages above, 4.0 pages below'
+	assert text == '\n'.join(
+		DOMTreeSerializer.serialize_line(line, DEFAULT_INCLUDE_ATTRIBUTES)
+		for line in state._lines
+		if id(line) not in far_line_ids
+	)
+
+
+def opaque(node: EnhancedDOMTreeNode) -> EnhancedDOMTreeNode:
+	node.snapshot_node.computed_styles = {'background-color': 'rgb(255, 255, 255)', 'opacity': '1'}  # type: ignore[union-attr]
+	return node
+
+
+@pytest.mark.parametrize('legacy', [False, True])
+def test_elements_painted_over_by_opaque_elements_get_no_index(legacy: bool):
+	covered = element('button', (100, 100, 80, 30), 2)
+	half_covered = element('button', (300, 100, 80, 30), 3)
+	with_opaque_child = element('button', (500, 100, 80, 30), 4, opaque(element('span', (500, 100, 80, 30), 5)))
+	banner_parts = [opaque(element('div', (90, 90, 60, 50), 6)), opaque(element('div', (150, 90, 40, 50), 7))]
+	translucent = element('div', (290, 90, 60, 50), 8)
+	translucent.snapshot_node.computed_styles = {'background-color': 'rgba(0, 0, 0, 0.5)', 'opacity': '1'}  # type: ignore[union-attr]
+	body = element('body', (0, 0, 1000, 800), 1, covered, half_covered, with_opaque_child, *banner_parts, translucent)
+	root = document(element('html', (0, 0, 1000, 800), 0, opaque(body)))
+
+	state, _ = DOMTreeSerializer(root, legacy=legacy, enable_occlusion_filtering=True).serialize_accessible_elements()
+	assert [id(node) for node in state.selector_map.values()] == [id(half_covered), id(with_opaque_child)]
+
+	state, _ = DOMTreeSerializer(root, legacy=legacy).serialize_accessible_elements()
+	assert [id(node) for node in state.selector_map.values()] == [id(covered), id(half_covered), id(with_opaque_child)]
+
+
+def test_hidden_see_through_and_clipped_boxes_do_not_occlude():
+	def styled(node: EnhancedDOMTreeNode, **styles: str) -> EnhancedDOMTreeNode:
+		node.snapshot_node.computed_styles = {**(node.snapshot_node.computed_styles or {}), **styles}  # type: ignore[union-attr]
+		return node
+
+	under_hidden_modal = element('button', (100, 100, 80, 30), 2)
+	under_click_through = element('button', (300, 100, 80, 30), 3)
+	beside_carousel = element('button', (500, 100, 80, 30), 4)
+	covered = element('button', (700, 100, 80, 30), 5)
+	# an opaque dialog inside a wrapper faded out to opacity 0
+	hidden_modal = styled(element('div', (0, 0, 1000, 800), 6, opaque(element('div', (90, 90, 100, 50), 7))), opacity='0')
+	click_through = styled(opaque(element('div', (290, 90, 100, 50), 8)), **{'pointer-events': 'none'})
+	# the second slide of a carousel lies outside of its overflow hidden viewport
+	carousel = styled(
+		element('div', (0, 300, 400, 100), 9, opaque(element('div', (400, 0, 400, 400), 10))),
+		**{'overflow-x': 'hidden', 'overflow-y': 'hidden'},
+	)
+	banner = opaque(element('div', (690, 90, 100, 50), 11))
+	body = element(
+		'body',
+		(0, 0, 1000, 800),
+		1,
+		under_hidden_modal,
+		under_click_through,
+		beside_carousel,
+		covered,
+		hidden_modal,
+		click_through,
+		carousel,
+		banner,
+	)
+	root = document(element('html', (0, 0, 1000, 800), 0, opaque(body)))
+
+	state, _ = DOMTreeSerializer(root, enable_occlusion_filtering=True).serialize_accessible_elements()
+	assert [id(node) for node in state.selector_map.values()] == [
+		id(under_hidden_modal),
+		id(under_click_through),
+		id(beside_carousel),
+	]
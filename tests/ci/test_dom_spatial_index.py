@@ -0,0 +1,156 @@
+"""Tests for the spatial index over the enhanced DOM tree (no browser needed)."""
+
+import itertools
+
+from browser_use.dom.enhanced_tree import iter_subtree
+from browser_use.dom.playground.benchmark_tree_construction import TARGET_ID, make_payload
+from browser_use.dom.spatial_index import DOMSpatialIndex, SpatialGrid
+from browser_use.dom.views import DOMRect, EnhancedDOMTreeNode, EnhancedSnapshotNode, NodeType
+from tests.ci.test_dom_enhanced_tree import make_dom_service
+
+_node_ids = itertools.count(1)
+
+
+def make_node(
+	node_type: NodeType,
+	tag: str = '',
+	rect: tuple[float, float, float, float] | None = None,
+	paint_order: int | None = None,
+	children: list[EnhancedDOMTreeNode] | None = None,
+	content_document: EnhancedDOMTreeNode | None = None,
+) -> EnhancedDOMTreeNode:
+	node_id = next(_node_ids)
+	position = DOMRect(*rect) if rect else None
+	node = EnhancedDOMTreeNode(
+		node_id=node_id,
+		backend_node_id=node_id,
+		node_type=node_type,
+		node_name=tag.upper() or '#document',
+		node_value='',
+		attributes={},
+		is_scrollable=None,
+		is_visible=True,
+		absolute_position=position,
+		target_id=TARGET_ID,
+		frame_id=None,
+		session_id=None,
+		content_document=content_document,
+		shadow_root_type=None,
+		shadow_roots=None,
+		parent_node=None,
+		children_nodes=children,
+		ax_node=None,
+		snapshot_node=EnhancedSnapshotNode(
+			is_clickable=None,
+			cursor_style=None,
+			bounds=position,
+			clientRects=None,
+			scrollRects=None,
+			computed_styles=None,
+			paint_order=paint_order,
+			stacking_contexts=None,
+		)
+		if position
+		else None,
+	)
+	for child in [*(children or []), *([content_document] if content_document else [])]:
+		child.parent_node = node
+	return node
+
+
+def element(tag, rect, paint_order, *children, content_document=None) -> EnhancedDOMTreeNode:
+	return make_node(NodeType.ELEMENT_NODE, tag, rect, paint_order, list(children) or None, content_document)
+
+
+def document(*children) -> EnhancedDOMTreeNode:
+	return make_node(NodeType.DOCUMENT_NODE, children=list(children))
+
+
+def make_page():
+	"""A button half covered by a sticky header, and an iframe whose link is covered by a popup of the outer page."""
+	button = element('button', (100, 80, 200, 80), 3)
+	header = element('div', (0, 0, 1000, 100), 5)
+	link = element('a', (310, 410, 50, 20), 1)
+	iframe = element('iframe', (300, 400, 400, 300), 4, content_document=document(element('html', (300, 400, 400, 300), 0, link)))
+	popup = element('div', (290, 390, 40, 40), 6)
+	root = document(element('html', (0, 0, 1000, 2000), 0, element('body', (0, 0, 1000, 2000), 1, button, iframe, header, popup)))
+	return root, button, header, iframe, link
+
+
+def test_spatial_grid_queries_match_brute_force():
+	rects = [DOMRect(x=(i * 37) % 900, y=(i * 53) % 3000, width=10 + i % 90, height=5 + (i * 7) % 60) for i in range(500)]
+	rects.append(DOMRect(x=0, y=0, width=5000, height=5000))  # spans more cells than MAX_CELLS_PER_ITEM
+	grid: SpatialGrid[DOMRect] = SpatialGrid(lambda rect: rect, cell_size=64)
+	for rect in rects:
+		grid.insert(rect)
+
+	query = DOMRect(x=200, y=500, width=300, height=250)
+	assert len(grid) == len(rects)
+	assert {id(rect) for rect in grid.query_rect(query)} == {
+		id(rect)
+		for rect in rects
+		if rect.x < query.x + query.width
+		and query.x < rect.x + rect.width
+		and rect.y < query.y + query.height
+		and query.y < rect.y + rect.height
+	}
+	assert {id(rect) for rect in grid.query_point(250, 600)} == {
+		id(rect) for rect in rects if rect.x <= 250 < rect.x + rect.width and rect.y <= 600 < rect.y + rect.height
+	}
+	assert {id(rect) for rect in grid.query_contained(query)} == {
+		id(rect)
+		for rect in rects
+		if query.x <= rect.x
+		and rect.x + rect.width <= query.x + query.width
+		and query.y <= rect.y
+		and rect.y + rect.height <= query.y + query.height
+	}
+
+
+def test_point_queries_use_paint_order_per_document():
+	root, button, header, iframe, link = make_page()
+	index = DOMSpatialIndex(root)
+
+	assert index.at_point(150, 90)[0] is header
+	assert not index.is_topmost_at_point(button, 150, 90)
+	assert index.is_topmost_at_point(button, 150, 150)
+
+	# the link wins in its own document, but its iframe is covered by the popup in the outer document
+	assert index.at_point(315, 415, document_of=link)[0] is link
+	assert not index.is_topmost_at_point(link, 315, 415)
+	assert index.is_topmost_at_point(link, 350, 425)
+
+	assert {id(node) for node in index.in_viewport(DOMRect(x=0, y=0, width=1000, height=300))} >= {id(button), id(header)}
+	assert [id(node) for node in index.contained_in(iframe)] == [id(iframe)]
+
+
+def test_find_click_point_avoids_covering_elements():
+	root, button, header, _, link = make_page()
+	index = DOMSpatialIndex(root)
+
+	x, y = index.find_click_point(button)  # type: ignore[misc]
+	assert index.is_topmost_at_point(button, x, y) and y >= 100
+	x, y = index.find_click_point(link)  # type: ignore[misc]
+	assert x >= 330 or y >= 430
+	assert index.find_click_point(element('span', (10, 10, 20, 20), 0)) is not None  # not indexed, nothing covers it
+
+	covered = element('button', (10, 10, 50, 50), 2)
+	covering = element('div', (0, 0, 100, 100), 3)
+	assert DOMSpatialIndex(document(covered, covering)).find_click_point(covered) is None
+
+
+def test_index_covers_all_laid_out_nodes_of_a_built_tree():
+	root, _ = make_dom_service().construct_enhanced_tree(make_payload(2_000, seed=9), TARGET_ID)
+	laid_out = [
+		node
+		for node in iter_subtree(root)
+		if node.absolute_position and node.absolute_position.width > 0 and node.absolute_position.height > 0
+	]
+
+	index = DOMSpatialIndex(root)
+
+	assert len(index) == len(laid_out)
+	for node in laid_out[::50]:
+		position = node.absolute_position
+		assert position is not None
+		assert any(hit is node for hit in index.at_point(position.x + position.width / 2, position.y + position.height / 2))
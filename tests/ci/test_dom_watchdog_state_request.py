@@ -0,0 +1,98 @@
+"""Tests for assembling the browser state concurrently under one deadline (no browser needed)."""
+
+import asyncio
+import time
+
+from bubus import EventBus
+
+from browser_use.browser.dom_watchdog import DOMWatchdog
+from browser_use.browser.events import BrowserStateRequestEvent, ScreenshotEvent
+from browser_use.browser.session import BrowserSession, CDPSession
+from browser_use.browser.views import PageInfo
+from browser_use.dom.views import SerializedDOMState
+from tests.ci.test_dom_spatial_index import document
+
+
+async def test_state_parts_run_concurrently_and_slow_parts_fall_back_at_the_deadline(monkeypatch):
+	monkeypatch.setattr('browser_use.browser.dom_watchdog.BROWSER_STATE_DEADLINE', 1.0)
+	finished: list[str] = []
+
+	async def part(name: str, seconds: float, result):
+		await asyncio.sleep(seconds)
+		finished.append(name)
+		return result
+
+	page_info = PageInfo(
+		viewport_width=800,
+		viewport_height=600,
+		page_width=800,
+		page_height=2000,
+		scroll_x=0,
+		scroll_y=0,
+		pixels_above=0,
+		pixels_below=1400,
+		pixels_left=0,
+		pixels_right=0,
+	)
+	dom_state = SerializedDOMState(_root=None, selector_map={})
+
+	async def get_current_page_url(self):
+		return 'https://example.com'
+
+	async def get_or_create_cdp_session(self, target_id=None, focus=True, new_socket=None):
+		return self.agent_focus
+
+	async def wait_for_stable_network(self):
+		pass
+
+	monkeypatch.setattr(BrowserSession, 'get_current_page_url', get_current_page_url)
+	monkeypatch.setattr(BrowserSession, 'get_or_create_cdp_session', get_or_create_cdp_session)
+	monkeypatch.setattr(BrowserSession, 'get_tabs', lambda self: part('tabs', 0.3, []))
+	monkeypatch.setattr(BrowserSession, 'get_current_page_title', lambda self: part('title', 10, 'Never'))
+	monkeypatch.setattr(DOMWatchdog, '_wait_for_stable_network', wait_for_stable_network)
+	monkeypatch.setattr(DOMWatchdog, '_get_page_info', lambda self: part('page_info', 0.3, page_info))
+	monkeypatch.setattr(DOMWatchdog, '_build_dom_tree', lambda self, previous_state=None: part('dom', 0.3, dom_state))
+
+	event_bus = EventBus()
+	browser_session = BrowserSession(event_bus=event_bus)
+	browser_session.agent_focus = CDPSession.model_construct(target_id='TARGET', session_id='SESSION')
+	watchdog = DOMWatchdog(browser_session=browser_session, event_bus=event_bus)
+
+	async def on_screenshot(event: ScreenshotEvent) -> str:
+		# the screenshot shows the highlights injected by the DOM build
+		assert 'dom' in finished
+		return await part('screenshot', 0.3, 'c2NyZWVuc2hvdA==')
+
+	event_bus.on(ScreenshotEvent, on_screenshot)
+
+	start = time.time()
+	state = await watchdog.on_BrowserStateRequestEvent(BrowserStateRequestEvent())
+	elapsed = time.time() - start
+	await event_bus.stop()
+
+	# tabs, page info and the DOM build overlap, the screenshot follows the DOM build, the title misses the deadline
+	assert elapsed < 1.5
+	assert (state.title, state.screenshot, state.page_info, state.dom_state) == ('Page', 'c2NyZWVuc2hvdA==', page_info, dom_state)
+	assert set(state.timing) == {'wait_for_stable_network', 'tabs', 'page_info', 'title', 'dom', 'screenshot', 'total'}
+	assert 0.3 <= state.timing['screenshot'] < 0.6 and state.timing['title'] >= 0.9
+	assert browser_session._cached_browser_state_summary is state
+
+
+async def test_spatial_index_is_rebuilt_for_every_dom_build():
+	root = document()
+	event_bus = EventBus()
+	browser_session = BrowserSession(event_bus=event_bus)
+	watchdog = DOMWatchdog(browser_session=browser_session, event_bus=event_bus)
+
+	class IncrementalDomService:
+		async def get_serialized_dom_tree(self, previous_cached_state=None):
+			# the incremental DOM hands out the same (mutated) root object on every build
+			return SerializedDOMState(_root=None, selector_map={}), root, {}
+
+	watchdog._dom_service = IncrementalDomService()  # type: ignore[assignment]
+	await watchdog._build_dom_tree()
+	first_index = watchdog.get_spatial_index()
+	await watchdog._build_dom_tree()
+	await event_bus.stop()
+
+	assert first_index is not None and watchdog.get_spatial_index() is not first_index
@@ -0,0 +1,96 @@
+"""Tests for waiting on quiet pages from network events and DOM mutation counts (no browser needed)."""
+
+import asyncio
+
+import pytest
+from cdp_use import CDPClient
+
+from browser_use.browser.quiescence import PageQuiescenceDetector
+from browser_use.browser.session import CDPSession
+from tests.ci.conftest import FakeCDPBrowser, FakeCDPSocket
+
+SESSION_ID = 'SESSION'
+
+
+@pytest.fixture
+async def page(fake_cdp: FakeCDPBrowser):
+	"""A CDP session whose `Runtime.evaluate` answers with the page activity in `page_state`."""
+	page_state = {
+		'installed': False,
+		'readyState': 'complete',
+		'mutations': 0,
+		'msSinceMutation': None,
+		'msSinceResource': 60_000,
+	}
+
+	async def evaluate(socket: FakeCDPSocket, command: dict) -> dict:
+		return {'result': {'result': {'type': 'object', 'value': page_state}}}
+
+	fake_cdp.responses['Runtime.evaluate'] = evaluate
+	client = CDPClient('ws://fake')
+	await client.start()
+	yield (
+		fake_cdp.sockets[0],
+		page_state,
+		CDPSession.model_construct(cdp_client=client, target_id='TARGET', session_id=SESSION_ID),
+	)
+	await client.stop()
+
+
+async def test_static_page_returns_after_the_minimum_wait(page):
+	_, _, cdp_session = page
+	report = await PageQuiescenceDetector().wait_until_quiet(cdp_session, min_wait=0.1, idle_time=0.5, max_wait=5)
+	assert report.reason == 'quiet' and report.waited < 0.3
+
+
+async def test_waits_for_requests_and_mutations_and_reports_them(page, monkeypatch):
+	socket, page_state, cdp_session = page
+	detector = PageQuiescenceDetector()
+	await detector.wait_until_quiet(cdp_session, min_wait=0, idle_time=0.2, max_wait=5)  # starts tracking
+
+	async def request(request_id: str, url: str, **params) -> None:
+		params = {'requestId': request_id, 'request': {'url': url}, **params}
+		await socket.emit('Network.requestWillBeSent', params, session_id=SESSION_ID)
+
+	async def page_activity():
+		await request('1', 'https://example.com/api', type='Fetch')
+		await request('2', 'https://www.google-analytics.com/g/collect?v=2', type='Ping')
+		await request('3', 'https://example.com/poll')
+		await asyncio.sleep(0.3)
+		finished = {'requestId': '1', 'timestamp': 1, 'encodedDataLength': 10}
+		await socket.emit('Network.loadingFinished', finished, session_id=SESSION_ID)
+		page_state.update(mutations=40, msSinceMutation=0)
+		await asyncio.sleep(0.3)
+		page_state.update(msSinceMutation=300)
+
+	activity = asyncio.create_task(page_activity())
+	await asyncio.sleep(0.05)
+	report = await detector.wait_until_quiet(cdp_session, min_wait=0, idle_time=0.2, max_wait=0.4)
+	# the long-poll is still in flight at the cap
+	assert report.reason == 'timeout' and report.pending_requests == ['https://example.com/poll']
+	assert report.requests == 2 and report.mutations == 40  # the analytics ping is not waited on
+
+	# requests in flight for longer than LONG_REQUEST_SECONDS don't block
+	monkeypatch.setattr('browser_use.browser.quiescence.LONG_REQUEST_SECONDS', 0.5)
+	report = await detector.wait_until_quiet(cdp_session, min_wait=0, idle_time=0.2, max_wait=5)
+	await activity
+	# until the mutations settle
+	assert report.reason == 'quiet' and 0.1 < report.waited < 1.5
+	assert report.long_requests == ['https://example.com/poll']
+	assert 'ignored long requests: https://example.com/poll' in str(report)
+
+
+async def test_closed_and_detached_sessions_are_forgotten(page):
+	_, _, cdp_session = page
+	detector = PageQuiescenceDetector()
+	await detector.wait_until_quiet(cdp_session, min_wait=0, idle_time=0, max_wait=1)
+	assert set(detector._activity) == {SESSION_ID}
+
+	detector.forget_target('OTHER_TARGET')
+	assert set(detector._activity) == {SESSION_ID}
+	detector.forget_target('TARGET')
+	assert not detector._activity
+
+	await detector.wait_until_quiet(cdp_session, min_wait=0, idle_time=0, max_wait=1)
+	detector.forget(SESSION_ID)
+	assert not detector._activity
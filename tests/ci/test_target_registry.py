@@ -0,0 +1,61 @@
+"""Tests for tracking the browser's targets from CDP discovery events (no browser needed)."""
+
+import pytest
+from cdp_use import CDPClient
+
+from browser_use.browser.session import BrowserSession
+from tests.ci.conftest import FakeCDPBrowser, cdp_target_info
+
+
+@pytest.fixture
+def fake_browser(fake_cdp: FakeCDPBrowser):
+	fake_cdp.targets = [
+		cdp_target_info('TARGET-A', 'https://example.com/', 'Example'),
+		cdp_target_info('TARGET-W', 'https://example.com/sw.js', type='service_worker'),
+		cdp_target_info('TARGET-B', 'chrome://newtab/'),
+	]
+	return fake_cdp
+
+
+async def test_tabs_and_lookups_are_served_from_discovery_events(fake_browser):
+	client = CDPClient('ws://fake')
+	await client.start()
+	session = BrowserSession()
+	session._cdp_client_root = client
+	try:
+		await session._target_registry.start(client)
+		socket = fake_browser.sockets[0]
+		assert session._target_registry.is_tracking and len(session._target_registry) == 3
+
+		tabs = await session.get_tabs()
+		assert [(tab.target_id, tab.title) for tab in tabs] == [
+			('TARGET-A', 'Example'),
+			('TARGET-B', 'ignore this tab and do not use it'),
+		]
+
+		# a popup opens, the new tab navigates and gets a title, then the first tab is closed
+		await socket.emit(
+			'Target.targetCreated', {'targetInfo': cdp_target_info('TARGET-C', 'about:blank', opener_id='TARGET-A')}
+		)
+		await socket.emit(
+			'Target.targetInfoChanged',
+			{'targetInfo': cdp_target_info('TARGET-C', 'https://example.com/report.pdf', opener_id='TARGET-A')},
+		)
+		await socket.emit('Target.targetDestroyed', {'targetId': 'TARGET-A'})
+		await client.send.Runtime.enable()  # answered after the events, so they have all been handled
+
+		tabs = await session.get_tabs()
+		assert [(tab.target_id, tab.title) for tab in tabs] == [
+			('TARGET-B', 'ignore this tab and do not use it'),
+			('TARGET-C', 'report.pdf'),
+		]
+		assert session._target_registry.get('TARGET-C')['openerId'] == 'TARGET-A'  # type: ignore[index]
+		assert await session.get_most_recently_opened_target_id() == 'TARGET-C'
+		assert await session.get_target_id_from_url('https://example.com/report.pdf') == 'TARGET-C'
+		with pytest.raises(ValueError):
+			await session.get_target_id_from_url('https://example.org/')
+
+		# nothing but the discovery switch and the barrier went to the browser
+		assert [method for method, _ in socket.commands] == ['Target.setDiscoverTargets', 'Runtime.enable']
+	finally:
+		await client.stop()